@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: ChatML conversion throughput per core.
+
+Measures single-process records/sec for
+- extract:   extract_function_parts() alone (one parse per record)
+- convert:   the production worker path, _process_chunk_worker over newline-aligned
+             byte chunks (JSON decode, quality check, extraction, JSON encode)
+- parse x2:  two bare ast.parse() calls per record, i.e. the parsing floor of
+             the old separate signature/body extractors
+
+With ``--workers`` it also times ChatMLConverter.convert_file end to end
+(streamed chunks through a process pool) for each worker count.
+
+Usage:
+    python benchmarks/bench_convert.py
+    python benchmarks/bench_convert.py --records 20000 --repeat 5
+    python benchmarks/bench_convert.py --input data/generated/func_ratings/fim/ratings.jsonl
+    python benchmarks/bench_convert.py --records 50000 --workers 1,2,4,8
+"""
+
+import argparse
+import ast
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from evoselfcode.core import ConfigManager
+from evoselfcode.datagen.postprocess.converter import (
+    ChatMLConverter,
+    _init_worker,
+    _process_chunk_worker,
+)
+from evoselfcode.datagen.utils.ast_tools import extract_function_parts
+
+_TEMPLATE = '''from typing import List
+
+
+def {name}(nums: List[int],
+        target: int) -> int:
+    """
+    Find the number of subarrays of nums summing to target.
+
+    Args:
+        nums: Input numbers
+        target: Target sum
+    """
+    counts = {{0: 1}}
+    total = 0
+    result = 0
+    for x in nums:
+        total += x
+        result += counts.get(total - target, 0)
+        counts[total] = counts.get(total, 0) + 1
+{extra}
+    return result
+'''
+
+
+def make_records(n: int, seed: int = 0) -> List[str]:
+    """Synthetic rating records with functions of varying length."""
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        extra = "\n".join(f"    tmp_{j} = result + {j}" for j in range(rng.randint(0, 30)))
+        records.append(json.dumps({
+            "uid": f"{i:016x}",
+            "problem_text": "Count subarrays with a given sum.\n\nExample: nums = [1, 1, 1], target = 2 -> Output: 2\nHint: prefix sums",
+            "code": _TEMPLATE.format(name=f"func_{i}", extra=extra),
+            "ratings": {"problem_design": 5, "function_definition": 5, "correctness": 5, "efficiency": 4, "readability": 5},
+        }))
+    return records
+
+
+def make_chunks(lines: List[str], chunk_bytes: int) -> List[bytes]:
+    """Newline-aligned byte chunks of JSONL lines, as convert_file feeds its workers."""
+    chunks, current, size = [], [], 0
+    for line in lines:
+        data = line.encode("utf-8") + b"\n"
+        if current and size + len(data) > chunk_bytes:
+            chunks.append(b"".join(current))
+            current, size = [], 0
+        current.append(data)
+        size += len(data)
+    if current:
+        chunks.append(b"".join(current))
+    return chunks
+
+
+def chunk_worker_fn(lines: List[str], config_dict: Dict, chunk_bytes: int) -> Callable[[], None]:
+    """One core running _process_chunk_worker over ``lines`` (initialized like a pool worker)."""
+    _init_worker(config_dict)
+    chunks = make_chunks(lines, chunk_bytes)
+
+    def _convert():
+        for chunk in chunks:
+            _process_chunk_worker(chunk)
+
+    return _convert
+
+
+def bench(fn: Callable[[], None], n: int, repeat: int) -> float:
+    """Best-of-``repeat`` throughput in items/sec."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return n / best
+
+
+def bench_convert_file(lines: List[str], workers: List[int], chunk_bytes: int) -> List[Dict[str, float]]:
+    """Time convert_file on a temporary copy of the records for each worker count."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = Path(tmp) / "ratings.jsonl"
+        input_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        for num_workers in workers:
+            config = ConfigManager({
+                "filter": {"min_ratings": {"correctness": 4}},
+                "processing": {"num_workers": num_workers, "chunk_bytes": chunk_bytes},
+                # Full conversion on every run (no incremental skip)
+                "incremental": {"enabled": False},
+            })
+            converter = ChatMLConverter(config, logger=logging.getLogger("bench_convert"))
+            start = time.perf_counter()
+            stats = converter.convert_file(input_path, Path(tmp) / "chatml.jsonl")
+            elapsed = time.perf_counter() - start
+            print(f"  convert_file workers={num_workers:<3} {stats['total'] / elapsed:>10,.0f} records/s "
+                  f"({stats['total'] / elapsed / num_workers:,.0f} per worker)")
+            results.append({"workers": num_workers, "records_per_s": stats["total"] / elapsed})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChatML conversion micro-benchmark")
+    parser.add_argument("--records", type=int, default=10000, help="Synthetic records to generate")
+    parser.add_argument("--input", type=Path, default=None, help="Use records from a ratings JSONL file instead")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions (best is reported)")
+    parser.add_argument("--workers", type=str, default=None, help="Comma-separated worker counts for convert_file")
+    parser.add_argument("--chunk-bytes", type=int, default=4 * 1024 * 1024, help="convert_file chunk size")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()][:args.records]
+    else:
+        lines = make_records(args.records)
+    codes = [json.loads(line).get("code", "") for line in lines]
+    config_dict = {"min_ratings": {"correctness": 4}, "require_all": True, "output_fields": ["uid", "messages"]}
+
+    def _extract():
+        for code in codes:
+            extract_function_parts(code)
+
+    _convert = chunk_worker_fn(lines, config_dict, args.chunk_bytes)
+
+    def _parse_twice():
+        for code in codes:
+            ast.parse(code)
+            ast.parse(code)
+
+    n = len(lines)
+    print(f"Records: {n} ({sum(map(len, codes)) / max(1, n):.0f} chars of code on average)")
+    print(f"  extract   {bench(_extract, n, args.repeat):>10,.0f} records/s/core")
+    print(f"  convert   {bench(_convert, n, args.repeat):>10,.0f} records/s/core")
+    print(f"  parse x2  {bench(_parse_twice, n, args.repeat):>10,.0f} records/s/core (old extractor floor)")
+
+    if args.workers:
+        bench_convert_file(lines, [int(w) for w in args.workers.split(",")], args.chunk_bytes)
+
+
+if __name__ == "__main__":
+    main()
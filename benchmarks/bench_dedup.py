@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: hash-table deduplication at scale.
+
+The generators deduplicate outputs by a 16-hex-digit SHA-256 prefix kept in
+a ``hash_table.txt`` per output directory and loaded into a set at start.
+This measures, for a table of ``--hashes`` entries:
+
+- load:    _load_existing_hashes() of the table file (hashes/s)
+- lookup:  membership tests, half hits and half misses (ns per lookup)
+- hash:    compute_hash() of a typical generated text (ns per text)
+- memory:  resident memory added by the loaded set (bytes per hash)
+
+Usage:
+    python benchmarks/bench_dedup.py
+    python benchmarks/bench_dedup.py --hashes 1000000 --lookups 200000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from evoselfcode.datagen.preprocess.problemgen import ProblemGenerator
+from evoselfcode.datagen.utils.hashing import compute_hash
+
+_SAMPLE_TEXT = (
+    "Title: Subarray Sum Count\n"
+    "Description: Count the contiguous subarrays of nums whose sum equals target.\n"
+    "Example:\nInput: nums = [1, 1, 1], target = 2\nOutput: 2\nHint: prefix sums.\n"
+)
+
+
+def _current_rss_bytes() -> int:
+    """Current resident set size (Linux; 0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def bench_dedup(num_hashes: int, num_lookups: int, seed: int = 0) -> Dict[str, float]:
+    """Measure loading and querying a hash table of ``num_hashes`` entries."""
+    rng = random.Random(seed)
+    generator = ProblemGenerator(client_manager=None, prompt_builder=None, config={})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        hash_file = Path(tmp) / "hash_table.txt"
+        with open(hash_file, "w", encoding="utf-8") as f:
+            for start in range(0, num_hashes, 100_000):
+                count = min(100_000, num_hashes - start)
+                f.write("".join(f"{rng.getrandbits(64):016x}\n" for _ in range(count)))
+
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+        hashes = generator._load_existing_hashes(hash_file)
+        load_s = time.perf_counter() - start
+        rss_after = _current_rss_bytes()
+
+    present = rng.sample(list(hashes), min(num_lookups // 2, len(hashes))) if hashes else []
+    absent = [f"{rng.getrandbits(64):016x}" for _ in range(num_lookups - len(present))]
+    queries = present + absent
+    rng.shuffle(queries)
+    start = time.perf_counter()
+    hits = sum(1 for q in queries if q in hashes)
+    lookup_s = time.perf_counter() - start
+
+    texts = [_SAMPLE_TEXT + str(i) for i in range(min(num_lookups, 100_000))]
+    start = time.perf_counter()
+    for text in texts:
+        compute_hash(text)
+    hash_s = time.perf_counter() - start
+
+    return {
+        "hashes": len(hashes),
+        "load_hashes_per_s": len(hashes) / load_s if load_s else 0.0,
+        "lookup_ns": lookup_s / len(queries) * 1e9 if queries else 0.0,
+        "hit_rate": hits / len(queries) if queries else 0.0,
+        "hash_ns": hash_s / len(texts) * 1e9 if texts else 0.0,
+        "bytes_per_hash": (rss_after - rss_before) / len(hashes) if hashes and rss_after else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash-table deduplication micro-benchmark")
+    parser.add_argument("--hashes", type=int, default=10_000_000, help="Entries in the hash table")
+    parser.add_argument("--lookups", type=int, default=1_000_000, help="Membership tests (half hits)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    r = bench_dedup(args.hashes, args.lookups, args.seed)
+    print(f"Hash table: {r['hashes']:,} entries")
+    print(f"  load    {r['load_hashes_per_s']:>12,.0f} hashes/s")
+    print(f"  lookup  {r['lookup_ns']:>12,.0f} ns ({r['hit_rate']:.0%} hits)")
+    print(f"  hash    {r['hash_ns']:>12,.0f} ns per text")
+    print(f"  memory  {r['bytes_per_hash']:>12,.0f} bytes per hash")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Benchmark: generator throughput against the local mock OpenAI server.
+
+Runs the datagen chain problem -> skeleton -> codegen -> rating with the
+real stage configs (configs/datagen/*.yaml) and prompts, each stage reading
+the previous stage's output, against a mock server in a child process.
+With zero latency this measures the client and orchestration overhead
+alone; with ``--latency-s`` / ``--tokens-per-s`` it approximates a serving
+endpoint. Reported per stage: requests/sec, samples/sec and CPU time per
+sample, for the whole benchmark process and for the event loop thread alone
+(client, parsing and orchestration, without the file writes offloaded to
+worker threads), and event loop lag: how late a ticker coroutine wakes up
+(p99 and max), i.e. how long the loop was blocked between two awaits.
+
+Usage:
+    python benchmarks/bench_generators.py
+    python benchmarks/bench_generators.py --samples 2000 --concurrency 128
+    python benchmarks/bench_generators.py --latency lognormal --latency-s 0.5 --tokens-per-s 40
+    python benchmarks/bench_generators.py --stages problem,skeleton --error-rate 0.05
+    python benchmarks/bench_generators.py --rating-mode logprobs --json results.json
+    python benchmarks/bench_generators.py --stages codegen --inline-postprocess   # validation on the loop
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from evoselfcode.core import ClientManager, ConfigManager, PromptBuilder
+from evoselfcode.datagen.preprocess import (
+    CodeGenerator,
+    ProblemGenerator,
+    RatingGenerator,
+    SkeletonGenerator,
+)
+from evoselfcode.datagen.utils.postprocess import PostProcessPool
+from evoselfcode.testing import MockServerProcess
+
+CONFIGS_DIR = PROJECT_ROOT / "configs"
+STAGES = ("problem", "skeleton", "codegen", "rating")
+
+
+def load_config(stage_file: str, base_url: str, concurrency: int) -> ConfigManager:
+    """Stage config merged over the model config, pointed at the mock server."""
+    config = ConfigManager.from_files(CONFIGS_DIR / "model.yaml", CONFIGS_DIR / "datagen" / stage_file)
+    config.set("api.base_url", base_url)
+    config.set("api.api_key", "EMPTY")
+    config.set("api.concurrency.max_concurrent_requests", concurrency)
+    config.set("api.max_retries", 5)
+    return config
+
+
+class LoopLagProbe:
+    """Measures event loop lag: how much later than requested a sleeping coroutine wakes up."""
+
+    def __init__(self, interval_s: float = 0.005):
+        self.interval_s = interval_s
+        self.lags: List[float] = []
+        self._task = None
+
+    async def _tick(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval_s)
+            self.lags.append(max(0.0, loop.time() - start - self.interval_s))
+
+    def start(self):
+        self._task = asyncio.create_task(self._tick())
+
+    async def stop(self) -> Dict[str, float]:
+        """Stop ticking; returns p99 and max lag in ms."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if not self.lags:
+            return {"p99": 0.0, "max": 0.0}
+        lags = sorted(self.lags)
+        return {"p99": lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1e3, "max": lags[-1] * 1e3}
+
+
+def request_count(client) -> int:
+    """Requests issued by a client so far (over all priority classes)."""
+    return int(sum(s["requests"] for s in client.queue_stats().values()))
+
+
+async def run_stage(stage: str, args: argparse.Namespace, base_url: str, work_dir: Path, logger: logging.Logger) -> Dict[str, Any]:
+    """Run one generator stage and measure it."""
+    config = load_config({"problem": "fim.yaml"}.get(stage, f"{stage}.yaml"), base_url, args.concurrency)
+    client_manager = ClientManager(config)
+    client = client_manager.completion_client
+    out_dir = work_dir / stage
+    if args.inline_postprocess:
+        config.set("postprocess.enabled", False)
+    postprocess_pool = PostProcessPool.from_config(config.get_section("postprocess"))
+    probe = LoopLagProbe()
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    # The event loop runs in this thread; file writes go to worker threads
+    loop_cpu_start = time.thread_time()
+    probe.start()
+    if stage == "problem":
+        generator = ProblemGenerator(client_manager, PromptBuilder(config), config.to_dict(), logger)
+        results = await generator.generate(
+            mode="FIM",
+            num_samples=args.samples,
+            output_dir=out_dir,
+            temperature=float(config.get("namegen.temperature", 1.0)),
+            top_p=float(config.get("namegen.top_p", 0.95)),
+            max_tokens=int(config.get("namegen.max_tokens", 2048)),
+            stop=config.get("namegen.stop", ["---"]),
+            batch_write_size=int(config.get("namegen.batch_write_size", 50)),
+        )
+    elif stage == "skeleton":
+        generator = SkeletonGenerator(client_manager, config.to_dict(), logger, postprocess_pool)
+        results = await generator.generate(
+            input_file=work_dir / "problem" / "fim_results.jsonl",
+            output_dir=out_dir,
+            prompt_template=config.get("prompts.skeleton.template", ""),
+            num_samples=args.samples,
+            temperature=float(config.get("skeleton.temperature", 0.7)),
+            top_p=float(config.get("skeleton.top_p", 0.95)),
+            max_tokens=int(config.get("skeleton.max_tokens", 512)),
+            stop=config.get("skeleton.stop", []),
+            batch_write_size=int(config.get("skeleton.batch_write_size", 50)),
+        )
+    elif stage == "codegen":
+        codegen_cfg = config.get_section("codegen")
+        generator = CodeGenerator(client_manager, codegen_cfg, logger, postprocess_pool)
+        results = await generator.generate(
+            input_file=work_dir / "skeleton" / "skeletons.jsonl",
+            output_dir=out_dir,
+            prompt_template=config.get("prompts.codegen.template", ""),
+            num_samples=args.samples,
+            temperature=codegen_cfg.get("temperature", 0.7),
+            top_p=codegen_cfg.get("top_p", 0.95),
+            max_tokens=codegen_cfg.get("max_tokens", 1024),
+            stop=codegen_cfg.get("stop", ["\n\ndef ", "\n\nclass "]),
+            batch_write_size=codegen_cfg.get("batch_write_size", 50),
+        )
+    else:
+        rating_cfg = config.get_section("rating")
+        if args.pack:
+            rating_cfg.setdefault("pack", {})["enabled"] = True
+        generator = RatingGenerator(client_manager, rating_cfg, logger)
+        results = await generator.generate(
+            input_file=work_dir / "codegen" / "implementations.jsonl",
+            output_dir=out_dir,
+            prompt_template=config.get("prompts.rating.template", ""),
+            num_samples=args.samples,
+            temperature=rating_cfg.get("temperature", 0.3),
+            top_p=rating_cfg.get("top_p", 0.9),
+            max_tokens=rating_cfg.get("max_tokens", 1024),
+            stop=rating_cfg.get("stop", []),
+            batch_write_size=rating_cfg.get("batch_write_size", 50),
+            mode=args.rating_mode,
+        )
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    loop_cpu = time.thread_time() - loop_cpu_start
+    lag = await probe.stop()
+    requests = request_count(client)
+    await client.client.close()
+
+    samples = len(results)
+    return {
+        "stage": stage,
+        "samples": samples,
+        "requests": requests,
+        "seconds": elapsed,
+        "requests_per_s": requests / elapsed if elapsed else 0.0,
+        "samples_per_s": samples / elapsed if elapsed else 0.0,
+        "cpu_ms_per_sample": cpu / samples * 1e3 if samples else 0.0,
+        "loop_cpu_ms_per_sample": loop_cpu / samples * 1e3 if samples else 0.0,
+        "loop_lag_p99_ms": lag["p99"],
+        "loop_lag_max_ms": lag["max"],
+    }
+
+
+async def run_chain(args: argparse.Namespace, base_url: str, logger: logging.Logger) -> List[Dict[str, Any]]:
+    """Run the selected stages in order in a temporary work directory."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for stage in STAGES:
+            if stage in args.stages:
+                results.append(await run_stage(stage, args, base_url, Path(tmp), logger))
+            elif stage != STAGES[-1] and any(s in args.stages for s in STAGES[STAGES.index(stage) + 1:]):
+                # Later stages need this stage's output; produce it unmeasured
+                await run_stage(stage, args, base_url, Path(tmp), logger)
+    return results
+
+
+def server_args(args: argparse.Namespace) -> List[str]:
+    return [
+        "--seed", str(args.seed),
+        "--latency", args.latency,
+        "--latency-s", str(args.latency_s),
+        "--jitter", str(args.jitter),
+        "--tokens-per-s", str(args.tokens_per_s),
+        "--error-rate", str(args.error_rate),
+        "--error-status", str(args.error_status),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator throughput against the local mock server")
+    parser.add_argument("--samples", type=int, default=512, help="Samples per stage")
+    parser.add_argument("--concurrency", type=int, default=64, help="Client max_concurrent_requests")
+    parser.add_argument("--stages", type=str, default=",".join(STAGES), help="Comma-separated stages to measure")
+    parser.add_argument("--rating-mode", choices=("text", "logprobs"), default="text", help="RatingGenerator mode")
+    parser.add_argument("--pack", action="store_true", help="Rate packed candidates")
+    parser.add_argument("--inline-postprocess", action="store_true", help="Validate and hash on the event loop (no worker pool)")
+    parser.add_argument("--server-url", type=str, default=None, help="Use a running server instead of starting one")
+    parser.add_argument("--seed", type=int, default=0, help="Mock server seed")
+    parser.add_argument("--latency", type=str, default="fixed", help="Mock latency distribution")
+    parser.add_argument("--latency-s", type=float, default=0.0, help="Mock time to first token")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Mock latency spread")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="Mock decode rate (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock error rate")
+    parser.add_argument("--error-status", type=int, default=500, help="Mock error status (0 = drop connection)")
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show generator logs")
+    args = parser.parse_args()
+    args.stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {sorted(unknown)}")
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    logger = logging.getLogger("bench_generators")
+
+    def _run(base_url: str) -> List[Dict[str, Any]]:
+        return asyncio.run(run_chain(args, base_url, logger))
+
+    if args.server_url:
+        results = _run(args.server_url)
+    else:
+        with MockServerProcess(server_args(args)) as server:
+            results = _run(server.base_url)
+
+    print(f"Samples/stage: {args.samples}, concurrency: {args.concurrency}, "
+          f"latency: {args.latency} {args.latency_s}s, tokens/s: {args.tokens_per_s or 'inf'}, error rate: {args.error_rate}")
+    for r in results:
+        print(f"  {r['stage']:<9} {r['samples']:>6} samples {r['requests']:>6} requests "
+              f"{r['requests_per_s']:>8,.0f} req/s {r['samples_per_s']:>8,.0f} samples/s "
+              f"{r['cpu_ms_per_sample']:>7.2f} ms CPU/sample ({r['loop_cpu_ms_per_sample']:.2f} in loop) "
+              f"loop lag p99 {r['loop_lag_p99_ms']:.1f} ms, max {r['loop_lag_max_ms']:.1f} ms")
+
+    if args.json:
+        payload = {"args": {k: v for k, v in vars(args).items() if k != "json"}, "results": results}
+        args.json.write_text(json.dumps(payload, indent=2, default=str), encoding="utf-8")
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark: import time and CLI startup against a budget.
+
+Each target is measured in a fresh interpreter (best of ``--repeat`` runs):
+
+- imports:  ``python -X importtime -c "<import statement>"`` import time of
+            the entry points (CLI, DataGenService, generators, clients),
+            excluding interpreter startup, and which heavy dependencies
+            (matplotlib, numpy, openai, ...) the import pulled in
+- commands: wall-clock time of short CLI invocations (``--help``)
+
+A target over its budget, or an entry point importing a dependency it
+should only load on use, is reported and makes the script exit non-zero.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 10 --json startup.json
+    python benchmarks/bench_startup.py --show-top 15   # slowest modules per import
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# Import statement -> (import-time budget in ms, heavy dependencies it may load)
+IMPORT_BUDGETS_MS = {
+    "import evoselfcode.cli": (300, ()),
+    "from evoselfcode.services import DataGenService": (300, ()),
+    "from evoselfcode.datagen.preprocess import CodeGenerator, RatingGenerator": (300, ()),
+    "from evoselfcode.clients import AsyncOpenAICompletionClient": (200, ()),
+    "from evoselfcode.datagen.postprocess import ChatMLConverter": (500, ("numpy",)),
+}
+# Command (arguments after the interpreter) -> wall-clock budget in ms
+COMMAND_BUDGETS_MS = {
+    "-m evoselfcode.cli --help": 800,
+    "-m evoselfcode.cli datagen --help": 800,
+    "-m evoselfcode.cli bench --help": 800,
+}
+# Dependencies loaded only when the code using them runs
+HEAVY_DEPENDENCIES = ("matplotlib", "numpy", "openai", "pandas", "torch", "transformers")
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, nesting depth, self us, cumulative us) per line of ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def _importtime(code: str) -> List[Tuple[str, int, int, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=_env(), cwd=PROJECT_ROOT, check=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def measure_import(statement: str, repeat: int) -> Dict[str, Any]:
+    """Best-of-``repeat`` import time of ``statement`` in a fresh interpreter."""
+    # Modules the interpreter imports at startup anyway
+    startup = {name for name, _, _, _ in _importtime("pass")}
+    best = None
+    for _ in range(repeat):
+        rows = [r for r in _importtime(statement) if r[0] not in startup]
+        total = sum(cum for _, depth, _, cum in rows if depth == 0)
+        if best is None or total < best["total_us"]:
+            best = {"total_us": total, "rows": rows}
+    loaded = {name.split(".")[0] for name, _, _, _ in best["rows"]}
+    return {
+        "statement": statement,
+        "import_ms": best["total_us"] / 1e3,
+        "heavy": sorted(dep for dep in HEAVY_DEPENDENCIES if dep in loaded),
+        "top": sorted(((name, self_us) for name, _, self_us, _ in best["rows"]), key=lambda r: r[1], reverse=True),
+    }
+
+
+def measure_command(command: str, repeat: int) -> Dict[str, Any]:
+    """Best-of-``repeat`` wall-clock time of ``python <command>``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *command.split()], capture_output=True, env=_env(), cwd=PROJECT_ROOT, check=True)
+        best = min(best, time.perf_counter() - start)
+    return {"command": command, "wall_ms": best * 1e3}
+
+
+def bench_startup(repeat: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+    """Measure all import and command targets."""
+    return {
+        "imports": [measure_import(statement, repeat) for statement in IMPORT_BUDGETS_MS],
+        "commands": [measure_command(command, repeat) for command in COMMAND_BUDGETS_MS],
+    }
+
+
+def check_budgets(results: Dict[str, List[Dict[str, Any]]]) -> List[str]:
+    """Budget violations of bench_startup() results."""
+    problems = []
+    for r in results["imports"]:
+        budget, allowed = IMPORT_BUDGETS_MS[r["statement"]]
+        if r["import_ms"] > budget:
+            problems.append(f"{r['statement']}: {r['import_ms']:.0f} ms > {budget} ms")
+        unexpected = [dep for dep in r["heavy"] if dep not in allowed]
+        if unexpected:
+            problems.append(f"{r['statement']} loads {', '.join(unexpected)}")
+    for r in results["commands"]:
+        budget = COMMAND_BUDGETS_MS[r["command"]]
+        if r["wall_ms"] > budget:
+            problems.append(f"python {r['command']}: {r['wall_ms']:.0f} ms > {budget} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and CLI startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per target (best is kept)")
+    parser.add_argument("--show-top", type=int, default=0, help="Show the N slowest modules (self time) per import")
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = bench_startup(args.repeat)
+    for r in results["imports"]:
+        heavy = f"  loads {', '.join(r['heavy'])}" if r["heavy"] else ""
+        print(f"  {r['statement']:<72} {r['import_ms']:>8.1f} ms (budget {IMPORT_BUDGETS_MS[r['statement']][0]}){heavy}")
+        for name, self_us in r["top"][:args.show_top]:
+            print(f"      {self_us / 1e3:>8.1f} ms  {name}")
+    for r in results["commands"]:
+        print(f"  python {r['command']:<65} {r['wall_ms']:>8.1f} ms (budget {COMMAND_BUDGETS_MS[r['command']]})")
+
+    if args.json:
+        payload = {k: [{kk: vv for kk, vv in r.items() if kk != "top"} for r in v] for k, v in results.items()}
+        args.json.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"Results written to {args.json}")
+
+    problems = check_budgets(results)
+    for problem in problems:
+        print(f"OVER BUDGET: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
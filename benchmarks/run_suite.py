@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Datagen benchmark suite with JSON results for regression tracking.
+
+Sections (each runs in its own child process, so its peak memory is its own):
+
+- generators: problem -> skeleton -> codegen -> rating against the local
+              mock server (bench_generators.py): requests/s, samples/s, CPU
+              time per sample (process and event loop thread)
+- dedup:      hash-table deduplication at ``--dedup-hashes`` entries
+              (bench_dedup.py): load rate, lookup and hashing cost, memory
+- convert:    ChatMLConverter records/s per core and per worker count
+              (bench_convert.py)
+- startup:    import time of the package entry points and wall-clock time
+              of ``--help`` CLI invocations (bench_startup.py)
+
+Results are written as one JSON file per run (default directory
+benchmarks/results/). Compare two runs with:
+
+    evoselfcode bench diff benchmarks/results/<base>.json benchmarks/results/<new>.json
+
+Usage:
+    python benchmarks/run_suite.py
+    python benchmarks/run_suite.py --quick
+    python benchmarks/run_suite.py --sections generators --latency-s 0.2 --tokens-per-s 50
+    python benchmarks/run_suite.py --quick --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from evoselfcode.utils.bench_results import metric, peak_rss_mb, save_results
+
+SECTIONS = ("generators", "dedup", "convert", "startup")
+QUICK = {"samples": 128, "dedup_hashes": 1_000_000, "dedup_lookups": 200_000, "convert_records": 5000, "workers": "1,2",
+         "startup_repeat": 2}
+
+
+def run_generators(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    import bench_generators
+
+    from evoselfcode.testing import MockServerProcess
+
+    gen_args = argparse.Namespace(
+        samples=args.samples, concurrency=args.concurrency, stages=list(bench_generators.STAGES),
+        rating_mode="text", pack=False, inline_postprocess=False, seed=0, latency=args.latency, latency_s=args.latency_s,
+        jitter=0.5, tokens_per_s=args.tokens_per_s, error_rate=args.error_rate, error_status=500,
+    )
+    logger = logging.getLogger("run_suite")
+    with MockServerProcess(bench_generators.server_args(gen_args)) as server:
+        results = asyncio.run(bench_generators.run_chain(gen_args, server.base_url, logger))
+
+    metrics = {}
+    for r in results:
+        prefix = f"generators.{r['stage']}"
+        metrics[f"{prefix}.requests_per_s"] = metric(r["requests_per_s"], "req/s")
+        metrics[f"{prefix}.samples_per_s"] = metric(r["samples_per_s"], "samples/s")
+        metrics[f"{prefix}.cpu_ms_per_sample"] = metric(r["cpu_ms_per_sample"], "ms", higher_is_better=False)
+        metrics[f"{prefix}.loop_cpu_ms_per_sample"] = metric(r["loop_cpu_ms_per_sample"], "ms", higher_is_better=False)
+        metrics[f"{prefix}.loop_lag_p99_ms"] = metric(r["loop_lag_p99_ms"], "ms", higher_is_better=False)
+    return metrics
+
+
+def run_dedup(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from bench_dedup import bench_dedup
+
+    r = bench_dedup(args.dedup_hashes, args.dedup_lookups)
+    return {
+        "dedup.load_hashes_per_s": metric(r["load_hashes_per_s"], "hashes/s"),
+        "dedup.lookup_ns": metric(r["lookup_ns"], "ns", higher_is_better=False),
+        "dedup.hash_ns": metric(r["hash_ns"], "ns", higher_is_better=False),
+        "dedup.bytes_per_hash": metric(r["bytes_per_hash"], "bytes", higher_is_better=False),
+    }
+
+
+def run_convert(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from bench_convert import bench, bench_convert_file, chunk_worker_fn, make_records
+
+    lines = make_records(args.convert_records)
+    config_dict = {"min_ratings": {"correctness": 4}, "require_all": True, "output_fields": ["uid", "messages"]}
+    convert = chunk_worker_fn(lines, config_dict, 4 * 1024 * 1024)
+
+    metrics = {"convert.per_core.records_per_s": metric(bench(convert, len(lines), 3), "records/s")}
+    workers = [int(w) for w in args.workers.split(",") if w.strip()]
+    for r in bench_convert_file(lines, workers, 4 * 1024 * 1024):
+        metrics[f"convert.workers_{r['workers']}.records_per_s"] = metric(r["records_per_s"], "records/s")
+    return metrics
+
+
+def run_startup(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from bench_startup import bench_startup
+
+    results = bench_startup(args.startup_repeat)
+    metrics = {}
+    for r in results["imports"]:
+        # "from evoselfcode.services import X" -> "evoselfcode_services"
+        module = r["statement"].split()[1].replace(".", "_")
+        metrics[f"startup.import.{module}_ms"] = metric(r["import_ms"], "ms", higher_is_better=False)
+    for r in results["commands"]:
+        # "-m evoselfcode.cli datagen --help" -> "cli_datagen_help"
+        name = "_".join(w.strip("-") for w in r["command"].split()[1:]).replace("evoselfcode.", "")
+        metrics[f"startup.command.{name}_ms"] = metric(r["wall_ms"], "ms", higher_is_better=False)
+    return metrics
+
+
+def run_section(section: str, args: argparse.Namespace, out: Path):
+    """Child process entry: run one section and write its metrics."""
+    metrics = {"generators": run_generators, "dedup": run_dedup, "convert": run_convert,
+               "startup": run_startup}[section](args)
+    metrics[f"{section}.peak_rss_mb"] = metric(peak_rss_mb(), "MiB", higher_is_better=False)
+    out.write_text(json.dumps(metrics), encoding="utf-8")
+
+
+def section_argv(args: argparse.Namespace) -> List[str]:
+    return [
+        "--samples", str(args.samples), "--concurrency", str(args.concurrency),
+        "--latency", args.latency, "--latency-s", str(args.latency_s),
+        "--tokens-per-s", str(args.tokens_per_s), "--error-rate", str(args.error_rate),
+        "--dedup-hashes", str(args.dedup_hashes), "--dedup-lookups", str(args.dedup_lookups),
+        "--convert-records", str(args.convert_records), "--workers", args.workers,
+        "--startup-repeat", str(args.startup_repeat),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Datagen benchmark suite")
+    parser.add_argument("--sections", type=str, default=",".join(SECTIONS), help="Comma-separated sections to run")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes for a fast check")
+    parser.add_argument("--samples", type=int, default=512, help="Generator samples per stage")
+    parser.add_argument("--concurrency", type=int, default=64, help="Client max_concurrent_requests")
+    parser.add_argument("--latency", type=str, default="fixed", help="Mock latency distribution")
+    parser.add_argument("--latency-s", type=float, default=0.0, help="Mock time to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="Mock decode rate (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock error rate")
+    parser.add_argument("--dedup-hashes", type=int, default=10_000_000, help="Entries in the dedup hash table")
+    parser.add_argument("--dedup-lookups", type=int, default=1_000_000, help="Dedup membership tests")
+    parser.add_argument("--convert-records", type=int, default=20000, help="Synthetic records for the converter")
+    parser.add_argument("--workers", type=str, default="1,2,4", help="Converter worker counts")
+    parser.add_argument("--startup-repeat", type=int, default=5, help="Runs per startup target (best is kept)")
+    parser.add_argument("--output", type=Path, default=PROJECT_ROOT / "benchmarks" / "results",
+                        help="Result file, or directory for <timestamp>-<commit>.json")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline result file to diff against")
+    parser.add_argument("--section-out", type=Path, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.quick:
+        for key, value in QUICK.items():
+            if getattr(args, key) == parser.get_default(key):
+                setattr(args, key, value)
+    sections = [s.strip() for s in args.sections.split(",") if s.strip()]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"Unknown sections: {sorted(unknown)}")
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.section_out:
+        run_section(sections[0], args, args.section_out)
+        return
+
+    metrics: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for section in sections:
+            out = Path(tmp) / f"{section}.json"
+            print(f"=== {section} ===", flush=True)
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--sections", section,
+                 "--section-out", str(out), *section_argv(args)],
+                check=True,
+            )
+            metrics.update(json.loads(out.read_text(encoding="utf-8")))
+            print(f"=== {section} done in {time.perf_counter() - start:.1f}s ===", flush=True)
+
+    run_args = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "section_out", "sections")}
+    run_args["sections"] = sections
+    path = save_results(args.output, "datagen", metrics, args=run_args, root=PROJECT_ROOT)
+    print(f"Results written to {path}")
+
+    if args.compare:
+        from evoselfcode.utils.bench_results import diff_results, load_results, print_diff
+        base, new = load_results(args.compare), load_results(path)
+        print_diff(base, new, diff_results(base, new))
+    else:
+        from evoselfcode.utils.bench_results import load_results
+        for name, entry in load_results(path)["metrics"].items():
+            print(f"  {name:<45} {entry['value']:>14,.4g} {entry['unit']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import typer
+
+app = typer.Typer(add_completion=False, help="Benchmark result commands")
+
+
+@app.command("diff")
+def diff(
+    base: Path = typer.Argument(..., help="Baseline result JSON (benchmarks/run_suite.py output)"),
+    new: Path = typer.Argument(..., help="New result JSON"),
+    threshold: float = typer.Option(0.05, "--threshold", help="Relative change counted as a difference"),
+    only: str = typer.Option(None, "--only", help="Only metrics whose name starts with this prefix"),
+    fail_on_regression: bool = typer.Option(False, "--fail-on-regression", help="Exit with status 1 on regressions"),
+):
+    """Compare two benchmark runs metric by metric"""
+    from ..utils.bench_results import diff_results, load_results, print_diff
+
+    try:
+        base_run, new_run = load_results(base), load_results(new)
+    except (OSError, ValueError) as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1) from None
+
+    diffs = diff_results(base_run, new_run, threshold=threshold)
+    if only:
+        diffs = [d for d in diffs if d.name.startswith(only)]
+    print_diff(base_run, new_run, diffs)
+
+    if fail_on_regression and any(d.status == "regressed" for d in diffs):
+        raise typer.Exit(1)
+
+
+@app.command("show")
+def show(
+    result: Path = typer.Argument(..., help="Result JSON"),
+):
+    """Print the metrics of one benchmark run"""
+    from rich.console import Console
+    from rich.table import Table
+
+    from ..utils.bench_results import load_results
+
+    try:
+        run = load_results(result)
+    except (OSError, ValueError) as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1) from None
+
+    git = run.get("git") or {}
+    table = Table(title=f"{run.get('suite', '?')} @ {git.get('commit') or '?'} ({run.get('created', '?')})")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    table.add_column("Unit")
+    for name, entry in run["metrics"].items():
+        table.add_row(name, f"{entry['value']:,.4g}", entry.get("unit", ""))
+    Console().print(table)
@@ -2,99 +2,265 @@ from __future__ import annotations
 
 import asyncio
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 import typer
 
 app = typer.Typer(add_completion=False, help="Data generation commands")
+run_app = typer.Typer(
+    add_completion=False,
+    help="Run data generation stages (one stage, or several with --pipeline)",
+)
+app.add_typer(run_app, name="run")
 
+# Stages in pipeline order (see DataGenService.STAGE_CONFIGS)
+STAGES = ("problems", "skeletons", "code", "exec", "ratings")
 
-@app.command("generate-names")
-def generate_names(
-    mode: str = typer.Option(..., "--mode", help="Generation mode: 'fim' or 'l2r'"),
-    config: Path = typer.Option(None, "--config", help="Custom config path (default: configs/datagen/{mode}.yaml)"),
-    num_samples: int = typer.Option(None, "--num-samples", help="Number of samples to generate (overrides config)"),
+# Options shared by `datagen run` and its stage subcommands
+SOURCE = typer.Option(None, "--source", help="Source mode: 'fim' or 'l2r'")
+NUM_SAMPLES = typer.Option(None, "--num-samples", help="Samples to generate/process per stage, in total over shards (default: config/all)")
+CONCURRENCY = typer.Option(None, "--concurrency", help="Max concurrent requests (overrides model config)")
+SHARD = typer.Option(None, "--shard", help="Process one uid-hash shard of the input, as INDEX/COUNT (e.g. 0/4)")
+RESUME = typer.Option(None, "--resume/--no-resume", help="Skip inputs that already have an output record; they count towards --num-samples")
+STREAM = typer.Option(None, "--stream/--no-stream", help="Write every record as soon as it is accepted")
+
+
+def _parse_shard(shard: Optional[str]) -> Optional[Tuple[int, int]]:
+    if not shard:
+        return None
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise typer.BadParameter(f"expected INDEX/COUNT, got '{shard}'", param_hint="--shard") from None
+    if count < 1 or not 0 <= index < count:
+        raise typer.BadParameter(f"need 0 <= INDEX < COUNT, got '{shard}'", param_hint="--shard")
+    return index, count
+
+
+def _run_stages(
+    stages: List[str],
+    source: str,
+    num_samples: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    shard: Optional[str] = None,
+    resume: bool = False,
+    stream: bool = False,
+    config: Optional[Path] = None,
 ):
-    """Generate function names using FIM or L2R mode"""
-    import json
-    from ..services.datagen_service import DataGenService
-    from ..utils.logger import setup_task_logger, LoggerManager
-    from ..constants import PROJECT_ROOT
-    
-    # Determine config path
-    if config is None:
-        config = PROJECT_ROOT / f"configs/datagen/{mode}.yaml"
-    
-    if not config.exists():
-        typer.echo(f"Error: Config file not found: {config}", err=True)
-        raise typer.Exit(1)
-    
-    # Setup logging
-    log_dir = PROJECT_ROOT / "logs"
-    LoggerManager.setup_base_dir(log_dir)
-    logger = setup_task_logger("datagen", mode)
-    
-    mode_upper = "FIM" if mode == "fim" else "L2R"
-    logger.info(f"Starting {mode_upper} function name generation")
-    logger.info(f"Config: {config}")
-    
-    # Run generation
+    """Run ``stages`` in order in one event loop, sharing one client."""
+    import logging
+
+    from ..constants import CONFIGS_DIR
+    from ..core import ConfigManager
+    from ..services.datagen_service import STAGE_CONFIGS, DataGenService
+    from ..utils.logger import LoggerManager
+
+    if source not in ("fim", "l2r"):
+        raise typer.BadParameter(f"expected 'fim' or 'l2r', got '{source}'", param_hint="--source")
+    shard_range = _parse_shard(shard)
+
+    config_paths = {
+        stage: config or CONFIGS_DIR / "datagen" / STAGE_CONFIGS[stage].format(source=source)
+        for stage in stages
+    }
+    for path in config_paths.values():
+        if not path.exists():
+            typer.echo(f"Error: Config file not found: {path}", err=True)
+            raise typer.Exit(1)
+
+    name = f"{stages[0] if len(stages) == 1 else 'pipeline'}_{source}"
+    if shard_range is not None:
+        name += f"_shard{shard_range[0]}of{shard_range[1]}"
+    log_level = ConfigManager.from_file(config_paths[stages[0]]).get("logging.level", "INFO")
+    logger = LoggerManager.get_logger(
+        name="datagen_run",
+        module="datagen",
+        task=name,
+        level=getattr(logging, log_level, logging.INFO),
+    )
+    logger.info(f"Stages: {' -> '.join(stages)} (source={source}, shard={shard or 'all'}, "
+                f"resume={resume}, stream={stream})")
+
     async def run():
-        service = DataGenService.from_config_path(config, task=mode, logger=logger)
-        results = await service.generate_function_names(mode=mode_upper, num_samples=num_samples)
-        
-        # Save results
-        out_dir = PROJECT_ROOT / f"data/generated/names/{mode}"
-        out_dir.mkdir(parents=True, exist_ok=True)
-        output_file = out_dir / f"{mode}_results.jsonl"
-        
-        with open(output_file, "w", encoding="utf-8") as f:
-            for result in results:
-                f.write(json.dumps(result, ensure_ascii=False) + "\n")
-        
-        logger.info(f"Saved {len(results)} results to: {output_file}")
-        return len(results)
-    
+        counts = {}
+        client_manager = None
+        services = {}
+        for stage in stages:
+            services[stage] = DataGenService.from_stage(
+                stage, source,
+                config_path=config_paths[stage],
+                logger=logger,
+                client_manager=client_manager,
+                concurrency=concurrency,
+                shard=shard_range,
+                resume=resume,
+                stream=stream,
+            )
+            # Later stages reuse the first stage's client and connection pool
+            client_manager = services[stage].client_manager
+
+        first = services[stages[0]]
+        with first.metrics_exporters(name), first.tracing(name):
+            for stage in stages:
+                results = await services[stage].run_stage(stage, source, num_samples=num_samples)
+                counts[stage] = len(results)
+                logger.info(f"✓ {stage}: {counts[stage]} records")
+        return counts
+
     try:
-        total = asyncio.run(run())
-        logger.info(f"✓ Generation completed: {total} function names")
+        counts = asyncio.run(run())
+        logger.info("Done: " + ", ".join(f"{stage}={n}" for stage, n in counts.items()))
     except Exception as e:
         logger.exception(f"Generation failed: {e}")
-        raise typer.Exit(1)
+        raise typer.Exit(1) from None
     finally:
         LoggerManager.close_all()
 
 
-@app.command("generate-code")
-def generate_code(
-    config: Path = typer.Option("configs/datagen.yaml", "--config", help="Datagen config path"),
-    names_file: Path = typer.Option(..., "--names", help="Input function names JSONL file"),
+@run_app.callback(invoke_without_command=True)
+def run(
+    ctx: typer.Context,
+    pipeline: str = typer.Option(None, "--pipeline", help="Comma-separated stages to run in order, or 'all'"),
+    source: str = SOURCE,
+    num_samples: int = NUM_SAMPLES,
+    concurrency: int = CONCURRENCY,
+    shard: str = SHARD,
+    resume: bool = RESUME,
+    stream: bool = STREAM,
 ):
-    """Generate code completions for given function names"""
-    typer.echo(f"Generating code for names from: {names_file}")
-    typer.echo("(Not yet implemented)")
-    # TODO: Implement code generation
+    """Run stages in one process, reusing a single client across them.
 
+    Options given here also apply to a stage subcommand, e.g.
+    `datagen run --concurrency 64 code --source fim`.
+    """
+    options = {"source": source, "num_samples": num_samples, "concurrency": concurrency,
+               "shard": shard, "resume": resume, "stream": stream}
+    if ctx.invoked_subcommand is not None:
+        if pipeline:
+            raise typer.BadParameter("cannot be combined with a stage subcommand", param_hint="--pipeline")
+        ctx.obj = options
+        return
+    if not pipeline:
+        typer.echo(ctx.get_help())
+        raise typer.Exit(0)
+
+    stages = list(STAGES) if pipeline == "all" else [s.strip() for s in pipeline.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown or not stages:
+        raise typer.BadParameter(f"unknown stages {unknown}, expected any of {list(STAGES)}", param_hint="--pipeline")
+    _run_options(stages, options, None)
+
+
+def _run_options(stages: List[str], options: dict, parent: Optional[dict]):
+    """Merge subcommand options over those given to `datagen run`, then run."""
+    merged = {key: value if value is not None else (parent or {}).get(key) for key, value in options.items()}
+    if merged["source"] is None:
+        raise typer.BadParameter("required", param_hint="--source")
+    _run_stages(
+        stages,
+        source=merged["source"],
+        num_samples=merged["num_samples"],
+        concurrency=merged["concurrency"],
+        shard=merged["shard"],
+        resume=bool(merged["resume"]),
+        stream=bool(merged["stream"]),
+    )
 
-@app.command("score")
-def score_candidates(
-    config: Path = typer.Option("configs/datagen.yaml", "--config", help="Datagen config path"),
-    input_file: Path = typer.Option(..., "--input", help="Input JSONL file to score"),
-    output_file: Path = typer.Option(None, "--output", help="Output scored JSONL file"),
-):
-    """Score generated candidates using perplexity"""
-    typer.echo(f"Scoring candidates from: {input_file}")
-    typer.echo("(Not yet implemented)")
-    # TODO: Implement scoring
 
+def _stage_command(stage: str, help_text: str):
+    """Register a `datagen run <stage>` subcommand."""
 
-@app.command("filter")
-def filter_candidates(
-    config: Path = typer.Option("configs/datagen.yaml", "--config", help="Datagen config path"),
-    input_file: Path = typer.Option(..., "--input", help="Input JSONL file to filter"),
-    output_file: Path = typer.Option(..., "--output", help="Output filtered JSONL file"),
+    @run_app.command(stage, help=help_text)
+    def command(
+        ctx: typer.Context,
+        source: str = SOURCE,
+        num_samples: int = NUM_SAMPLES,
+        concurrency: int = CONCURRENCY,
+        shard: str = SHARD,
+        resume: bool = RESUME,
+        stream: bool = STREAM,
+    ):
+        options = {"source": source, "num_samples": num_samples, "concurrency": concurrency,
+                   "shard": shard, "resume": resume, "stream": stream}
+        _run_options([stage], options, ctx.obj)
+
+    return command
+
+
+_stage_command("problems", "Generate algorithm problem descriptions")
+_stage_command("skeletons", "Generate function skeletons from problems")
+_stage_command("code", "Generate function implementations from skeletons")
+_stage_command("exec", "Check implementations against problem examples in the sandbox")
+_stage_command("ratings", "Rate implementation quality")
+
+
+@app.command("run-sharded")
+def run_sharded(
+    pipeline: str = typer.Option(..., "--pipeline", help="Comma-separated stages each worker runs, or 'all'"),
+    source: str = typer.Option(..., "--source", help="Source mode: 'fim' or 'l2r'"),
+    workers: int = typer.Option(..., "--workers", help="Number of shards / worker processes"),
+    num_samples: int = NUM_SAMPLES,
+    concurrency: int = typer.Option(None, "--concurrency", help="Max concurrent requests per worker"),
+    stream: bool = typer.Option(False, "--stream", help="Workers write every record as soon as it is accepted"),
+    hosts: str = typer.Option(None, "--hosts", help="Comma-separated hosts for workers (round-robin; needs --launcher)"),
+    launcher: str = typer.Option(None, "--launcher",
+                                 help="Shell template starting a worker, with {host}, {command} and {shard}, "
+                                      "e.g. \"ssh {host} 'cd /shared/evoselfcode && {command}'\""),
+    base_urls: str = typer.Option(None, "--base-urls", help="Comma-separated inference endpoints for workers (round-robin)"),
+    max_restarts: int = typer.Option(3, "--max-restarts", help="Restarts per failing worker"),
+    poll_interval: float = typer.Option(10.0, "--poll-interval", help="Seconds between progress reports"),
+    merge: bool = typer.Option(True, "--merge/--no-merge", help="Merge shard outputs when all workers finish"),
+    merge_only: bool = typer.Option(False, "--merge-only", help="Only merge existing shard outputs"),
+    clean: bool = typer.Option(False, "--clean", help="Delete shard directories after merging"),
 ):
-    """Filter candidates by quality metrics"""
-    typer.echo(f"Filtering candidates from: {input_file}")
-    typer.echo("(Not yet implemented)")
-    # TODO: Implement filtering
+    """Run stages as uid-hash shards in parallel worker processes, then merge their outputs"""
+    import logging
+
+    from ..services.shard_coordinator import ShardCoordinator
+    from ..utils.logger import LoggerManager
+
+    stages = list(STAGES) if pipeline == "all" else [s.strip() for s in pipeline.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown or not stages:
+        raise typer.BadParameter(f"unknown stages {unknown}, expected any of {list(STAGES)}", param_hint="--pipeline")
+    if source not in ("fim", "l2r"):
+        raise typer.BadParameter(f"expected 'fim' or 'l2r', got '{source}'", param_hint="--source")
+
+    def _split(value: Optional[str]) -> List[str]:
+        return [v.strip() for v in value.split(",") if v.strip()] if value else []
+
+    logger = LoggerManager.get_logger(
+        name="datagen_sharded", module="datagen", task=f"sharded_{source}", level=logging.INFO,
+    )
+    try:
+        coordinator = ShardCoordinator(
+            stages, source, workers,
+            num_samples=num_samples,
+            concurrency=concurrency,
+            stream=stream,
+            hosts=_split(hosts),
+            launcher=launcher,
+            base_urls=_split(base_urls),
+            max_restarts=max_restarts,
+            poll_interval_s=poll_interval,
+            logger=logger,
+        )
+        if not merge_only:
+            coordinator.run()
+        if merge or merge_only:
+            coordinator.merge(remove_shards=clean)
+    except Exception as e:
+        logger.exception(f"Sharded run failed: {e}")
+        raise typer.Exit(1) from None
+    finally:
+        LoggerManager.close_all()
 
+
+@app.command("generate-names")
+def generate_names(
+    mode: str = typer.Option(..., "--mode", help="Generation mode: 'fim' or 'l2r'"),
+    config: Path = typer.Option(None, "--config", help="Custom config path (default: configs/datagen/{mode}.yaml)"),
+    num_samples: int = typer.Option(None, "--num-samples", help="Number of samples to generate (overrides config)"),
+):
+    """Generate problem descriptions using FIM or L2R mode (same as `datagen run problems`)"""
+    _run_stages(["problems"], source=mode, num_samples=num_samples, config=config)
@@ -52,24 +52,16 @@ def all_benchmarks(
     ckpt: Path = typer.Option(..., "--ckpt", help="Checkpoint path"),
     config: Path = typer.Option(None, "--config", help="Eval config"),
 ):
-    """Evaluate on all benchmarks"""
-    typer.echo("Running all benchmarks...")
+    """Evaluate on all benchmarks (run concurrently, combined report)"""
+    from ..evaluation.suite import cmd_eval_all
+    combined = cmd_eval_all(ckpt, config)
     
-    typer.echo("\n[1/4] HumanEval")
-    from ..evaluation.humaneval import cmd_eval as humaneval_eval
-    humaneval_eval(ckpt, config)
+    typer.echo("\nBenchmark      Tasks  pass@k")
+    for name, report in combined["benchmarks"].items():
+        scores = "  ".join(
+            f"@{k}={v:.4f}" if v is not None else f"@{k}=n/a"
+            for k, v in report["pass_at_k"].items()
+        )
+        typer.echo(f"{name:<14} {report['num_tasks']:>5}  {scores}")
     
-    typer.echo("\n[2/4] MBPP")
-    from ..evaluation.mbpp import cmd_eval as mbpp_eval
-    mbpp_eval(ckpt, config)
-    
-    typer.echo("\n[3/4] LiveCodeBench")
-    from ..evaluation.lcb import cmd_eval as lcb_eval
-    lcb_eval(ckpt, config)
-    
-    typer.echo("\n[4/4] BigCodeBench")
-    from ..evaluation.bigcodebench import cmd_eval as bigcodebench_eval
-    bigcodebench_eval(ckpt, config)
-    
-    typer.echo("\n✓ All benchmarks completed")
-
+    typer.echo(f"\n✓ All benchmarks completed in {combined['elapsed_s']:.1f}s")
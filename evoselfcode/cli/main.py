@@ -19,12 +19,13 @@ def main(
 
 
 # Import subcommands
-from . import datagen_commands, eval_commands, pipeline_commands
+from . import bench_commands, datagen_commands, eval_commands, pipeline_commands
 
 # Register subcommands
 app.add_typer(datagen_commands.app, name="datagen", help="Data generation commands")
 app.add_typer(pipeline_commands.app, name="pipeline", help="Training pipeline commands")
 app.add_typer(eval_commands.app, name="eval", help="Evaluation commands")
+app.add_typer(bench_commands.app, name="bench", help="Benchmark result commands")
 
 
 if __name__ == "__main__":
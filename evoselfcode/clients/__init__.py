@@ -1,11 +1,33 @@
-from .base import CompletionClient, ScoringClient
-from .async_openai import AsyncOpenAICompletionClient
-from .scoring import OpenAIScoringClient
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .async_openai import AsyncOpenAICompletionClient
+    from .base import CompletionClient, ScoringClient
+    from .guided import GuidedDecoding
+    from .limiter import DeadlineExceeded, Priority, PriorityLimiter
+    from .scoring import OpenAIScoringClient
 
 __all__ = [
     "CompletionClient",
     "ScoringClient",
     "AsyncOpenAICompletionClient",
+    "GuidedDecoding",
+    "DeadlineExceeded",
+    "Priority",
+    "PriorityLimiter",
     "OpenAIScoringClient",
 ]
 
+# Submodules are imported on first attribute access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "CompletionClient": ".base",
+    "ScoringClient": ".base",
+    "AsyncOpenAICompletionClient": ".async_openai",
+    "GuidedDecoding": ".guided",
+    "DeadlineExceeded": ".limiter",
+    "Priority": ".limiter",
+    "PriorityLimiter": ".limiter",
+    "OpenAIScoringClient": ".scoring",
+})
@@ -1,16 +1,16 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
 import time
 from typing import Any, Dict, List, Optional
 
-try:
-    from openai import AsyncOpenAI
-except ImportError:
-    AsyncOpenAI = None
-
+from ..utils.metrics import ClientMetrics
+from ..utils.tracing import TRACER, traced
 from .base import CompletionClient
+from .guided import GuidedDecoding
+from .limiter import Priority, PriorityLimiter, total_active, total_waiting
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +22,10 @@ class AsyncOpenAICompletionClient(CompletionClient):
     - Normal completion (completions.create)
     - FIM via completions.create(prompt=..., suffix=...)
     - FIM via chat.completions.create(extra_body={"prefix": ..., "suffix": ...})
-    - Rate limiting and semaphore control
+    - Guided decoding (JSON schema / regex / choice) on vLLM-compatible servers
+    - Concurrency limit with priority classes and deadlines (PriorityLimiter)
+    - Request metrics in the process-wide registry (utils.metrics)
+    - Optional per-request tracing spans (utils.tracing)
     """
 
     def __init__(
@@ -37,8 +40,11 @@ class AsyncOpenAICompletionClient(CompletionClient):
         suffix_key: str = "suffix",
         max_concurrent: int = 10,
     ):
-        if AsyncOpenAI is None:
-            raise ImportError("Please install openai: pip install openai")
+        # Imported here: the openai package takes most of a second to import
+        try:
+            from openai import AsyncOpenAI
+        except ImportError:
+            raise ImportError("Please install openai: pip install openai") from None
 
         # Normalize base_url to include /v1 if missing
         normalized_base_url = base_url.rstrip("/")
@@ -55,24 +61,65 @@ class AsyncOpenAICompletionClient(CompletionClient):
         self.prefix_key = prefix_key
         self.suffix_key = suffix_key
         
-        # Concurrency control
-        self.semaphore = asyncio.Semaphore(max_concurrent)
-        logger.info(f"[AsyncOpenAIClient] Semaphore initialized with max_concurrent={max_concurrent}")
+        # Concurrency control: requests beyond max_concurrent queue by priority
+        self.max_concurrent = max_concurrent
+        self.limiter = PriorityLimiter(max_concurrent)
+        logger.info(f"[AsyncOpenAIClient] Limiter initialized with max_concurrent={max_concurrent}")
+
+        # In-flight and queued requests are read at export time, summed over
+        # the limiters of all live clients (the gauges are process-wide)
+        self.metrics = ClientMetrics()
+        self.metrics.in_flight.set_function(total_active)
+        self.metrics.queue_depth.set_function(total_waiting)
+
+    def queue_stats(self) -> Dict[str, Dict[str, float]]:
+        """Queue-wait statistics per priority class (see PriorityLimiter.stats)."""
+        return self.limiter.stats()
 
     async def _retry_call(self, fn, *args, **kwargs):
         """Exponential backoff retry"""
         for attempt in range(self.max_retries):
             try:
-                return await fn(*args, **kwargs)
+                with TRACER.span("attempt", attempt=attempt + 1):
+                    return await fn(*args, **kwargs)
             except Exception as e:
                 logger.warning(f"Attempt {attempt+1} failed: {e}")
                 if attempt < self.max_retries - 1:
+                    self.metrics.retries.inc()
                     # Exponential backoff with jitter
                     delay = (2 ** attempt) + (0.1 * (attempt + 1))
-                    await asyncio.sleep(delay)
+                    with TRACER.span("backoff"):
+                        await asyncio.sleep(delay)
                 else:
                     raise
 
+    @contextlib.asynccontextmanager
+    async def _slot(self, priority: int, deadline: Optional[float]):
+        """Limiter slot (as PriorityLimiter.slot), recording the time spent waiting for it."""
+        start = time.perf_counter()
+        with TRACER.span("queue_wait", priority=int(priority)):
+            await self.limiter.acquire(priority, deadline)
+        self.metrics.queue_wait.observe(time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self.limiter.release()
+
+    async def _measured_call(self, kind: str, fn):
+        """_retry_call(fn), recording latency (incl. retries) and outcome."""
+        start = time.perf_counter()
+        try:
+            results = await self._retry_call(fn)
+        except BaseException:
+            self.metrics.failed.inc()
+            raise
+        finally:
+            self.metrics.latency[kind].observe(time.perf_counter() - start)
+        self.metrics.ok.inc()
+        self.metrics.choices.inc(len(results))
+        return results
+
+    @traced("request")
     async def _complete_async(
         self,
         prompt: str,
@@ -85,11 +132,20 @@ class AsyncOpenAICompletionClient(CompletionClient):
         logprobs: Optional[int] = None,
         stream: bool = False,
         extra: Optional[Dict[str, Any]] = None,
+        guided: Optional[GuidedDecoding] = None,
+        priority: int = Priority.DEFAULT,
+        deadline: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
-        """Async normal completion request"""
-        logger.debug(f"[_complete_async] prompt={prompt[:60]}..., max_tokens={max_tokens}, n={n}")
-        async with self.semaphore:
-            logger.debug(f"[_complete_async] Acquired semaphore, calling completions.create(model={self.model}, base_url={self.base_url})")
+        """Async normal completion request.
+
+        ``guided`` constrains the output server-side; ``priority`` and
+        ``deadline`` (time.monotonic()) order the request while all slots
+        are busy.
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[_complete_async] prompt=%s..., max_tokens=%s, n=%s", prompt[:60], max_tokens, n)
+        async with self._slot(priority, deadline):
+            logger.debug("[_complete_async] Acquired slot, calling completions.create(model=%s, base_url=%s)", self.model, self.base_url)
             async def _call():
                 kwargs: Dict[str, Any] = {
                     "model": self.model,
@@ -106,8 +162,10 @@ class AsyncOpenAICompletionClient(CompletionClient):
                     kwargs["logprobs"] = logprobs
                 if extra:
                     kwargs.update(extra)
+                if guided is not None:
+                    kwargs["extra_body"] = {**kwargs.get("extra_body", {}), **guided.to_extra_body()}
 
-                logger.debug(f"[_call] Sending POST to /v1/completions with kwargs: model={kwargs['model']}, prompt_len={len(kwargs['prompt'])}, max_tokens={kwargs['max_tokens']}")
+                logger.debug("[_call] Sending POST to /v1/completions with kwargs: model=%s, prompt_len=%s, max_tokens=%s", kwargs["model"], len(kwargs["prompt"]), kwargs["max_tokens"])
                 
                 if stream:
                     texts = [""] * n
@@ -116,7 +174,7 @@ class AsyncOpenAICompletionClient(CompletionClient):
                         for choice in chunk.choices:
                             idx = choice.index
                             texts[idx] += choice.text or ""
-                    logger.debug(f"[_call] Streaming complete, got {len(texts)} results")
+                    logger.debug("[_call] Streaming complete, got %s results", len(texts))
                     return [{"text": t} for t in texts]
                 else:
                     response = await self.client.completions.create(**kwargs)
@@ -126,11 +184,12 @@ class AsyncOpenAICompletionClient(CompletionClient):
                         if hasattr(choice, "logprobs") and choice.logprobs:
                             item["logprobs"] = choice.logprobs
                         results.append(item)
-                    logger.debug(f"[_call] Got {len(results)} results from completions.create")
+                    logger.debug("[_call] Got %s results from completions.create", len(results))
                     return results
 
-            return await self._retry_call(_call)
+            return await self._measured_call("completion", _call)
 
+    @traced("request")
     async def _complete_fim_async(
         self,
         prefix: str,
@@ -143,9 +202,12 @@ class AsyncOpenAICompletionClient(CompletionClient):
         stop: Optional[List[str]] = None,
         stream: bool = False,
         extra: Optional[Dict[str, Any]] = None,
+        guided: Optional[GuidedDecoding] = None,
+        priority: int = Priority.DEFAULT,
+        deadline: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
-        """Async FIM request"""
-        async with self.semaphore:
+        """Async FIM request (``guided``, ``priority`` and ``deadline`` as in _complete_async)"""
+        async with self._slot(priority, deadline):
             async def _call():
                 if self.use_chat_for_fim:
                     # chat.completions with extra_body
@@ -165,6 +227,8 @@ class AsyncOpenAICompletionClient(CompletionClient):
                         kwargs["stop"] = stop
                     if extra:
                         kwargs["extra_body"].update(extra)
+                    if guided is not None:
+                        kwargs["extra_body"].update(guided.to_extra_body())
 
                     if stream:
                         texts = [""] * n
@@ -194,6 +258,8 @@ class AsyncOpenAICompletionClient(CompletionClient):
                         kwargs["stop"] = stop
                     if extra:
                         kwargs.update(extra)
+                    if guided is not None:
+                        kwargs["extra_body"] = {**kwargs.get("extra_body", {}), **guided.to_extra_body()}
 
                     if stream:
                         texts = [""] * n
@@ -207,7 +273,7 @@ class AsyncOpenAICompletionClient(CompletionClient):
                         response = await self.client.completions.create(**kwargs)
                         return [{"text": choice.text} for choice in response.choices]
 
-            return await self._retry_call(_call)
+            return await self._measured_call("fim", _call)
 
     # Sync wrappers for compatibility with base class
     def complete(self, *args, **kwargs) -> List[Dict[str, Any]]:
@@ -218,6 +284,10 @@ class AsyncOpenAICompletionClient(CompletionClient):
         """Sync wrapper for complete_fim"""
         return asyncio.run(self._complete_fim_async(*args, **kwargs))
 
+    async def complete_async(self, prompt: str, **kwargs) -> List[Dict[str, Any]]:
+        """Single completion (one item of complete_batch_async, same arguments)"""
+        return await self._complete_async(prompt, **kwargs)
+
     # Batch async methods for high concurrency
     async def complete_batch_async(
         self,
@@ -0,0 +1,76 @@
+"""
+Guided (structured) decoding for vLLM-compatible servers.
+
+A GuidedDecoding constrains the sampled text server-side to a JSON schema,
+a regular expression or a fixed set of choices, so outputs are well-formed
+on the first attempt. It is sent in the request body as vLLM's
+``guided_json`` / ``guided_regex`` / ``guided_choice`` (plus
+``guided_decoding_backend``). Servers without guided decoding reject or
+ignore these fields, so generators only send it when enabled in config.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# Request body fields of each constraint kind
+GUIDED_FIELDS = ("guided_json", "guided_regex", "guided_choice")
+
+
+@dataclass(frozen=True)
+class GuidedDecoding:
+    """Output constraint of a completion request (exactly one of json_schema, regex, choice)."""
+
+    json_schema: Optional[Dict[str, Any]] = None
+    regex: Optional[str] = None
+    choice: Optional[Tuple[str, ...]] = None
+    backend: Optional[str] = None
+
+    def __post_init__(self):
+        given = [value is not None for value in (self.json_schema, self.regex, self.choice)]
+        if sum(given) != 1:
+            raise ValueError("GuidedDecoding needs exactly one of json_schema, regex or choice")
+        if self.choice is not None:
+            object.__setattr__(self, "choice", tuple(self.choice))
+
+    def to_extra_body(self) -> Dict[str, Any]:
+        """Request body fields understood by vLLM-compatible servers."""
+        if self.json_schema is not None:
+            body: Dict[str, Any] = {"guided_json": self.json_schema}
+        elif self.regex is not None:
+            body = {"guided_regex": self.regex}
+        else:
+            body = {"guided_choice": list(self.choice)}
+        if self.backend:
+            body["guided_decoding_backend"] = self.backend
+        return body
+
+    @classmethod
+    def from_config(
+        cls,
+        cfg: Optional[Mapping[str, Any]],
+        default: Optional["GuidedDecoding"] = None,
+    ) -> Optional["GuidedDecoding"]:
+        """Build the constraint of a generator from its ``guided_decoding`` config.
+
+        Args:
+            cfg: Config section ({"enabled", "backend", and optionally one of
+                "regex", "json_schema", "choice" overriding the default})
+            default: Output constraint the generator declares for its format
+
+        Returns:
+            GuidedDecoding, or None if disabled or nothing to constrain
+        """
+        if not cfg or not cfg.get("enabled", False):
+            return None
+        backend = cfg.get("backend")
+        json_schema = cfg.get("json_schema")
+        if isinstance(json_schema, str):
+            json_schema = json.loads(json_schema)
+        if json_schema is not None or cfg.get("regex") is not None or cfg.get("choice") is not None:
+            return cls(json_schema=json_schema, regex=cfg.get("regex"), choice=cfg.get("choice"), backend=backend)
+        if default is None:
+            return None
+        return cls(json_schema=default.json_schema, regex=default.regex, choice=default.choice, backend=backend)
@@ -0,0 +1,232 @@
+"""
+Priority-aware concurrency limiter for completion requests.
+
+Replaces a plain asyncio.Semaphore: when all slots are busy, waiting
+requests are served by priority class (lower value first), then by
+deadline (earliest first), then in arrival order. A request still queued
+when its deadline passes fails with DeadlineExceeded instead of taking a
+slot. Queue-wait times are recorded per priority class.
+
+Retries and downstream stages (ratings before code, code before problems)
+get the better classes, so items that are nearly done finish first and
+fewer partially processed items are held in memory. Stages submit more
+requests than there are slots (``requests_per_batch``) and re-request
+malformed outputs as soon as they arrive, so there is a queue to order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+import weakref
+from collections import deque
+from enum import IntEnum
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+# Queue waits kept per priority class for percentiles
+_WAIT_SAMPLES = 2048
+
+# Limiters of all live clients in this process (for the process-wide gauges)
+_LIVE_LIMITERS: "weakref.WeakSet[PriorityLimiter]" = weakref.WeakSet()
+
+
+class Priority(IntEnum):
+    """Request priority classes; lower values are served first."""
+
+    RETRY = 0
+    RATING = 1
+    CODEGEN = 2
+    SKELETON = 3
+    PROBLEM = 4
+    DEFAULT = 5
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """A request's deadline passed while it was waiting for a slot."""
+
+
+class _WaitStats:
+    """Queue-wait statistics of one priority class."""
+
+    def __init__(self):
+        self.requests = 0
+        self.queued = 0
+        self.expired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.samples: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+
+    def record(self, wait: float):
+        self.requests += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.samples.append(wait)
+
+    def snapshot(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+
+        def percentile(q: float) -> float:
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+        return {
+            "requests": self.requests,
+            "queued": self.queued,
+            "expired": self.expired,
+            "wait_mean_s": self.total_wait / self.requests if self.requests else 0.0,
+            "wait_p50_s": percentile(0.5),
+            "wait_p95_s": percentile(0.95),
+            "wait_max_s": self.max_wait,
+        }
+
+
+class PriorityLimiter:
+    """At most ``max_concurrent`` holders; waiters served by (priority, deadline, arrival)."""
+
+    def __init__(self, max_concurrent: int):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self._waiters: List[tuple] = []
+        self._waiting = 0
+        self._counter = itertools.count()
+        self._stats: Dict[int, _WaitStats] = {}
+        _LIVE_LIMITERS.add(self)
+
+    @property
+    def waiting(self) -> int:
+        """Requests currently queued for a slot."""
+        return self._waiting
+
+    def _stats_for(self, priority: int) -> _WaitStats:
+        if priority not in self._stats:
+            self._stats[priority] = _WaitStats()
+        return self._stats[priority]
+
+    async def acquire(self, priority: int = Priority.DEFAULT, deadline: Optional[float] = None):
+        """Wait for a slot.
+
+        Args:
+            priority: Priority class (lower is served first)
+            deadline: time.monotonic() by which the slot must be granted
+
+        Raises:
+            DeadlineExceeded: If the deadline passed while waiting
+        """
+        stats = self._stats_for(priority)
+        if self.active < self.max_concurrent and not self._waiting:
+            self.active += 1
+            stats.record(0.0)
+            return
+
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (
+            int(priority),
+            deadline if deadline is not None else float("inf"),
+            next(self._counter),
+            future,
+        ))
+        self._waiting += 1
+        stats.queued += 1
+        try:
+            if deadline is None:
+                await future
+            else:
+                await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self._waiting -= 1
+                stats.expired += 1
+                raise DeadlineExceeded(f"Deadline passed after {time.monotonic() - start:.2f}s in queue") from None
+            # Granted just as the deadline passed: keep the slot
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over; pass it on
+                self.release()
+            else:
+                future.cancel()
+                self._waiting -= 1
+            raise
+        stats.record(time.monotonic() - start)
+
+    def release(self):
+        """Return a slot, handing it to the best waiter if any."""
+        while self._waiters:
+            future = heapq.heappop(self._waiters)[-1]
+            if not future.done():
+                # The slot moves to the waiter; ``active`` is unchanged
+                self._waiting -= 1
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: int = Priority.DEFAULT, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block (see acquire)."""
+        await self.acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Queue-wait statistics per priority class (keyed by class name)."""
+        return {_priority_name(priority): stats.snapshot() for priority, stats in sorted(self._stats.items())}
+
+
+def total_active() -> int:
+    """Slots held over all live limiters of the process."""
+    return sum(limiter.active for limiter in list(_LIVE_LIMITERS))
+
+
+def total_waiting() -> int:
+    """Requests queued over all live limiters of the process."""
+    return sum(limiter.waiting for limiter in list(_LIVE_LIMITERS))
+
+
+def parse_priority(value, default: int = Priority.DEFAULT) -> int:
+    """Priority from config: a class name (e.g. "rating"), an integer or None for ``default``."""
+    if value is None:
+        return int(default)
+    if isinstance(value, str) and not value.lstrip("-").isdigit():
+        try:
+            return int(Priority[value.upper()])
+        except KeyError:
+            raise ValueError(f"Unknown priority class: {value}") from None
+    return int(value)
+
+
+def queue_deadline(seconds: Optional[float]) -> Optional[float]:
+    """Deadline (time.monotonic()) ``seconds`` from now; None or 0 = no deadline."""
+    return time.monotonic() + float(seconds) if seconds else None
+
+
+def requests_per_batch(max_concurrent: int, queue_factor: Optional[float]) -> int:
+    """Requests a stage submits at once: ``queue_factor`` x the client's slots.
+
+    With more requests than slots the limiter always has waiters, so a freed
+    slot is refilled immediately and retries (queued at RETRY) overtake the
+    rest of the batch instead of waiting for the next one.
+    """
+    return max(1, int(max_concurrent * max(1.0, float(queue_factor or 1))))
+
+
+def format_queue_stats(stats: Dict[str, Dict[str, float]]) -> List[str]:
+    """One summary line per priority class of PriorityLimiter.stats()."""
+    return [
+        f"Queue wait [{name}]: {s['requests']} requests ({s['queued']} queued, {s['expired']} expired), "
+        f"mean {s['wait_mean_s']:.3f}s, p95 {s['wait_p95_s']:.3f}s, max {s['wait_max_s']:.3f}s"
+        for name, s in stats.items()
+    ]
+
+
+def _priority_name(priority: int) -> str:
+    try:
+        return Priority(priority).name
+    except ValueError:
+        return str(priority)
@@ -4,11 +4,6 @@ import logging
 import math
 from typing import List, Optional
 
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None
-
 from .base import ScoringClient
 
 logger = logging.getLogger(__name__)
@@ -27,8 +22,10 @@ class OpenAIScoringClient(ScoringClient):
         model: str = "Qwen2.5-Coder-32B",
         timeout_s: int = 60,
     ):
-        if OpenAI is None:
-            raise ImportError("Please install openai: pip install openai")
+        try:
+            from openai import OpenAI
+        except ImportError:
+            raise ImportError("Please install openai: pip install openai") from None
         self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout_s)
         self.model = model
 
@@ -15,4 +15,4 @@ CONFIGS_DIR = PROJECT_ROOT / "configs"
 DEFAULT_MODEL_CONFIG = CONFIGS_DIR / "model.yaml"
 DEFAULT_DATAGEN_FIM_CONFIG = CONFIGS_DIR / "datagen" / "fim.yaml"
 DEFAULT_DATAGEN_L2R_CONFIG = CONFIGS_DIR / "datagen" / "l2r.yaml"
-
+DEFAULT_EVAL_CONFIG = CONFIGS_DIR / "eval.yaml"
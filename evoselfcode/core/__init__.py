@@ -1,12 +1,27 @@
-from .config_manager import ConfigManager
-from .client_manager import ClientManager
-from .prompt_builder import PromptBuilder
-from .filter_chain import FilterChain
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .client_manager import ClientManager
+    from .code_analyzer import CodeAnalyzer
+    from .config_manager import ConfigManager
+    from .filter_chain import FilterChain
+    from .prompt_builder import PromptBuilder
 
 __all__ = [
     "ConfigManager",
     "ClientManager",
     "PromptBuilder",
     "FilterChain",
+    "CodeAnalyzer",
 ]
 
+# Submodules are imported on first attribute access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "ConfigManager": ".config_manager",
+    "ClientManager": ".client_manager",
+    "PromptBuilder": ".prompt_builder",
+    "FilterChain": ".filter_chain",
+    "CodeAnalyzer": ".code_analyzer",
+})
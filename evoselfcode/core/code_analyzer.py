@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from ..datagen.utils.ast_tools import analyze_code
+from ..datagen.utils.hashing import compute_hash
+from ..datagen.utils.ruff import count_lint_errors_batch, ruff_available
+
+logger = logging.getLogger(__name__)
+
+
+def _analyze_chunk(codes: List[str], lint_select: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Worker: run AST checks (and optionally one ruff call) over a chunk."""
+    reports = [analyze_code(code) for code in codes]
+    if lint_select is not None:
+        lint_counts = count_lint_errors_batch(codes, lint_select)
+    else:
+        lint_counts = [None] * len(codes)
+    for report, lint_count in zip(reports, lint_counts):
+        report["lint_errors"] = lint_count
+    return reports
+
+
+class CodeAnalyzer:
+    """
+    Static analysis runner backing the code filters.
+    Runs AST checks and ruff in a process pool with chunked submission,
+    and caches reports by code hash so re-filtering the same code is free.
+    """
+
+    def __init__(
+        self,
+        enable_ruff: bool = False,
+        lint_select: Optional[Sequence[str]] = None,
+        num_workers: int = 0,
+        chunk_size: int = 64,
+    ):
+        if enable_ruff and not ruff_available():
+            logger.warning("[CodeAnalyzer] ruff not found on PATH, lint checks disabled")
+            enable_ruff = False
+
+        self.lint_select: Optional[List[str]] = (
+            list(lint_select or ["E9", "F"]) if enable_ruff else None
+        )
+        self.num_workers = num_workers if num_workers > 0 else max(1, mp.cpu_count() - 1)
+        self.chunk_size = max(1, chunk_size)
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_config(cls, config) -> "CodeAnalyzer":
+        """Create analyzer from ``filters.*`` configuration"""
+        return cls(
+            enable_ruff=bool(config.get("filters.enable_ruff", False)),
+            lint_select=config.get("filters.lint_select"),
+            num_workers=int(config.get("filters.analysis_workers", 0)),
+            chunk_size=int(config.get("filters.analysis_chunk_size", 64)),
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.num_workers)
+        return self._pool
+
+    def _pending(self, codes: Iterable[str]) -> Dict[str, str]:
+        """Map hash -> code for codes not in the cache (deduplicated)"""
+        pending: Dict[str, str] = {}
+        for code in codes:
+            key = compute_hash(code)
+            if key not in self._cache and key not in pending:
+                pending[key] = code
+        return pending
+
+    def _chunks(self, pending: Dict[str, str]) -> List[tuple[List[str], List[str]]]:
+        keys = list(pending.keys())
+        return [
+            (keys[i:i + self.chunk_size], [pending[k] for k in keys[i:i + self.chunk_size]])
+            for i in range(0, len(keys), self.chunk_size)
+        ]
+
+    def analyze_many(self, codes: Iterable[str]) -> None:
+        """
+        Analyze codes and populate the cache.
+        Small batches run inline; larger ones are spread over the process pool.
+        """
+        pending = self._pending(codes)
+        if not pending:
+            return
+
+        chunks = self._chunks(pending)
+        if len(chunks) == 1:
+            keys, chunk_codes = chunks[0]
+            reports = _analyze_chunk(chunk_codes, self.lint_select)
+            self._cache.update(zip(keys, reports))
+            return
+
+        pool = self._get_pool()
+        futures = [
+            (keys, pool.submit(_analyze_chunk, chunk_codes, self.lint_select))
+            for keys, chunk_codes in chunks
+        ]
+        for keys, future in futures:
+            self._cache.update(zip(keys, future.result()))
+
+    async def analyze_many_async(self, codes: Iterable[str]) -> None:
+        """Analyze codes in the process pool without blocking the event loop"""
+        pending = self._pending(codes)
+        if not pending:
+            return
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        chunks = self._chunks(pending)
+        results = await asyncio.gather(*[
+            loop.run_in_executor(pool, _analyze_chunk, chunk_codes, self.lint_select)
+            for _, chunk_codes in chunks
+        ])
+        for (keys, _), reports in zip(chunks, results):
+            self._cache.update(zip(keys, reports))
+
+    def analyze(self, code: str) -> Dict[str, Any]:
+        """Get the report for a single code string (cached)"""
+        key = compute_hash(code)
+        report = self._cache.get(key)
+        if report is None:
+            report = _analyze_chunk([code], self.lint_select)[0]
+            self._cache[key] = report
+        return report
+
+    def cache_size(self) -> int:
+        """Number of cached reports"""
+        return len(self._cache)
+
+    def close(self):
+        """Shut down the worker pool (the cache is kept)"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
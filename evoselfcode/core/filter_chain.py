@@ -3,8 +3,13 @@ from __future__ import annotations
 import re
 from typing import Any, Callable, Dict, List, Optional
 
+from .code_analyzer import CodeAnalyzer
 from .config_manager import ConfigManager
 
+DEFAULT_FORBIDDEN_IMPORTS = [
+    "os", "subprocess", "shutil", "socket", "requests", "urllib", "http",
+    "ctypes", "multiprocessing", "signal",
+]
 
 FilterFunc = Callable[[Any], bool]
 
@@ -15,8 +20,9 @@ class FilterChain:
     Supports composable filtering with statistics.
     """
     
-    def __init__(self, config: ConfigManager):
+    def __init__(self, config: ConfigManager, analyzer: Optional[CodeAnalyzer] = None):
         self.config = config
+        self.analyzer = analyzer
         self.filters: List[tuple[str, FilterFunc]] = []
         self.stats: Dict[str, int] = {}
     
@@ -54,17 +60,38 @@ class FilterChain:
         min_len = self.config.get("filters.min_code_len", 16)
         return len(code.strip()) >= min_len
     
-    def apply(self, items: List[Any], extract_key: Optional[Callable] = None) -> List[Any]:
-        """
-        Apply all filters in the chain.
-        
-        Args:
-            items: List of items to filter
-            extract_key: Function to extract value from item for filtering
-        
-        Returns:
-            Filtered list of items
-        """
+    def filter_code_parses(self, code: str) -> bool:
+        """Filter code that fails to parse"""
+        return self.analyzer.analyze(code)["parse_ok"]
+    
+    def filter_code_imports(self, code: str) -> bool:
+        """Filter code importing forbidden modules"""
+        forbidden = self.config.get("filters.forbidden_imports", DEFAULT_FORBIDDEN_IMPORTS) or []
+        imports = self.analyzer.analyze(code)["imports"]
+        return not any(module in forbidden for module in imports)
+    
+    def filter_code_recursion(self, code: str) -> bool:
+        """Filter code with recursive functions that never branch"""
+        return not self.analyzer.analyze(code)["unbounded_recursion"]
+    
+    def filter_code_infinite_loops(self, code: str) -> bool:
+        """Filter code with `while True` loops that can never exit"""
+        return self.analyzer.analyze(code)["infinite_loops"] == 0
+    
+    def filter_code_undefined_names(self, code: str) -> bool:
+        """Filter code loading names that are never bound"""
+        return not self.analyzer.analyze(code)["undefined_names"]
+    
+    def filter_code_lint(self, code: str) -> bool:
+        """Filter code by ruff diagnostic count (passes if ruff is unavailable)"""
+        max_errors = self.config.get("filters.max_lint_errors", 0)
+        lint_errors = self.analyzer.analyze(code)["lint_errors"]
+        if max_errors is None or lint_errors is None:
+            return True
+        return lint_errors <= max_errors
+    
+    def _run_filters(self, items: List[Any], extract_key: Optional[Callable] = None) -> List[Any]:
+        """Run every filter in order, recording how many items each removed"""
         self.stats = {name: 0 for name, _ in self.filters}
         filtered = items
         
@@ -81,6 +108,35 @@ class FilterChain:
         
         return filtered
     
+    def apply(self, items: List[Any], extract_key: Optional[Callable] = None) -> List[Any]:
+        """
+        Apply all filters in the chain.
+        
+        Static analysis (if configured) is computed for all items up front,
+        in parallel, so the individual filters only hit the analyzer cache.
+        
+        Args:
+            items: List of items to filter
+            extract_key: Function to extract value from item for filtering
+        
+        Returns:
+            Filtered list of items
+        """
+        if self.analyzer is not None:
+            self.analyzer.analyze_many(extract_key(item) if extract_key else item for item in items)
+        return self._run_filters(items, extract_key)
+    
+    async def apply_async(self, items: List[Any], extract_key: Optional[Callable] = None) -> List[Any]:
+        """
+        Async version of apply() for use inside the generators.
+        Static analysis runs in the worker pool instead of on the event loop.
+        """
+        if self.analyzer is not None:
+            await self.analyzer.analyze_many_async(
+                [extract_key(item) if extract_key else item for item in items]
+            )
+        return self._run_filters(items, extract_key)
+    
     def get_stats(self) -> Dict[str, int]:
         """Get filtering statistics"""
         return dict(self.stats)
@@ -94,10 +150,27 @@ class FilterChain:
         return chain
     
     @classmethod
-    def for_code(cls, config: ConfigManager) -> "FilterChain":
-        """Create filter chain for code"""
-        chain = cls(config)
+    def for_code(cls, config: ConfigManager, analyzer: Optional[CodeAnalyzer] = None) -> "FilterChain":
+        """
+        Create filter chain for code.
+        AST checks are enabled by `filters.enable_ast`, ruff by `filters.enable_ruff`
+        (both off by default: only the length check runs).
+        """
+        enable_ast = config.get("filters.enable_ast", False)
+        enable_ruff = config.get("filters.enable_ruff", False)
+        if analyzer is None and (enable_ast or enable_ruff):
+            analyzer = CodeAnalyzer.from_config(config)
+        
+        chain = cls(config, analyzer)
         chain.add_filter("min_length", chain.filter_code_length)
-        # Can add more: AST check, ruff, etc.
+        if enable_ast or enable_ruff:
+            chain.add_filter("parse", chain.filter_code_parses)
+        if enable_ast:
+            chain.add_filter("forbidden_imports", chain.filter_code_imports)
+            chain.add_filter("unbounded_recursion", chain.filter_code_recursion)
+            chain.add_filter("infinite_loop", chain.filter_code_infinite_loops)
+            chain.add_filter("undefined_names", chain.filter_code_undefined_names)
+        if enable_ruff:
+            chain.add_filter("lint", chain.filter_code_lint)
         return chain
 
@@ -1,6 +1,18 @@
 """Post-processing modules for data generation pipeline."""
 
-from .converter import ChatMLConverter
+from typing import TYPE_CHECKING
 
-__all__ = ["ChatMLConverter"]
+from ...utils.lazy import lazy_exports
 
+if TYPE_CHECKING:
+    from .converter import ChatMLConverter
+    from .shards import ShardedDataset, ShardWriter
+
+__all__ = ["ChatMLConverter", "ShardedDataset", "ShardWriter"]
+
+# Submodules are imported on first attribute access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "ChatMLConverter": ".converter",
+    "ShardedDataset": ".shards",
+    "ShardWriter": ".shards",
+})
@@ -2,66 +2,246 @@
 ChatML format converter for training data.
 
 Converts rated function implementations to ChatML format suitable for fine-tuning.
-Uses multiprocessing for efficient batch conversion.
+Uses multiprocessing over streamed, newline-aligned byte chunks.
 """
 
-import ast
+import contextlib
 import json
 import multiprocessing as mp
 import os
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from evoselfcode.core import ConfigManager
+from evoselfcode.datagen.postprocess.incremental import ConversionCache, input_fingerprint
+from evoselfcode.datagen.postprocess.shards import ShardWriter
+from evoselfcode.datagen.utils.ast_tools import (
+    extract_function_parts,
+    function_parts,
+    locate_function,
+)
+from evoselfcode.datagen.utils.hashing import compute_hash
+from evoselfcode.datagen.utils.validation_cache import (
+    ValidationCache,
+    ValidationEntry,
+    ValidationIndex,
+    encode_entry,
+)
 from evoselfcode.utils.logger import LoggerManager
 
+# Conversion settings of the current worker process (set by _init_worker)
+_WORKER_CONFIG: Optional[Dict[str, Any]] = None
+_WORKER_TOKENIZER = None
+# Validation cache file, its memory-mapped index (None while the file has no
+# entries) and the cache lines (by key) of code parsed by this worker since
+# the last chunk
+_WORKER_VALIDATION_PATH: Optional[str] = None
+_WORKER_VALIDATION: Optional[ValidationIndex] = None
+_WORKER_VALIDATION_LINES: Dict[str, str] = {}
+
+
+def _init_worker(
+    config_dict: Dict[str, Any],
+    validation_path: Optional[str] = None,
+    validation_index: Optional[str] = None,
+) -> None:
+    """Pool initializer: receive the conversion settings once per worker and
+    memory-map the validation cache index (if any), so workers share its
+    pages instead of each holding every entry."""
+    global _WORKER_CONFIG, _WORKER_TOKENIZER, _WORKER_VALIDATION_PATH, _WORKER_VALIDATION
+    _WORKER_CONFIG = config_dict
+    _WORKER_TOKENIZER = None
+    _WORKER_VALIDATION_PATH = validation_path
+    _WORKER_VALIDATION = (
+        ValidationIndex(Path(validation_path), Path(validation_index)) if validation_index else None
+    )
+    if config_dict.get("tokenizer"):
+        from transformers import AutoTokenizer
+        _WORKER_TOKENIZER = AutoTokenizer.from_pretrained(config_dict["tokenizer"])
+
 
-def _process_record_worker(args):
-    """Worker function for multiprocessing.
+def _convert_line(record_json, config_dict: Dict[str, Any]) -> Tuple[str, Any]:
+    """Convert one JSON line.
     
     Args:
-        args: Tuple of (record_json, config_dict)
+        record_json: JSON record (str or bytes)
+        config_dict: Conversion settings
         
     Returns:
-        Tuple of (success, result_or_error)
+        Tuple of (status, converted_record_or_error)
     """
-    record_json, config_dict = args
-    
     try:
         record = json.loads(record_json)
     except json.JSONDecodeError:
-        return (False, "json_error", None)
-    
-    # Recreate converter settings
-    min_ratings = config_dict["min_ratings"]
-    require_all = config_dict["require_all"]
-    output_fields = config_dict["output_fields"]
+        return ("json_error", None)
     
     # Check quality
-    ratings = record.get("ratings", {})
-    if min_ratings:
-        if require_all:
-            for dimension, min_score in min_ratings.items():
-                if ratings.get(dimension, 0) < min_score:
-                    return (False, "quality", None)
-        else:
-            passed = False
-            for dimension, min_score in min_ratings.items():
-                if ratings.get(dimension, 0) >= min_score:
-                    passed = True
-                    break
-            if not passed:
-                return (False, "quality", None)
+    scores = record.get(config_dict.get("score_field", "ratings")) or {}
+    if not _passes_quality(scores, config_dict["min_ratings"], config_dict["require_all"]):
+        return ("quality", None)
     
     # Process record
     try:
-        result = _convert_single_record(record, output_fields)
-        if result:
-            return (True, "success", json.dumps(result, ensure_ascii=False))
-        else:
-            return (False, "parse", None)
+        result = _convert_single_record(record, config_dict["output_fields"])
+        return ("success", result) if result else ("parse", None)
     except Exception as e:
-        return (False, "error", str(e))
+        return ("error", str(e))
+
+
+def _encode_outputs(out: List[str], token_ids: List[List[int]]):
+    """Join output lines into bytes and flatten token ids (if tokenizing)."""
+    payload = ('\n'.join(out) + '\n').encode('utf-8') if out else b''
+    if _WORKER_TOKENIZER is None:
+        return payload, None, None
+    lengths = np.array([len(ids) for ids in token_ids], dtype=np.int64)
+    tokens = np.fromiter((t for ids in token_ids for t in ids), dtype=np.int32, count=int(lengths.sum()))
+    return payload, tokens, lengths
+
+
+def _emit(result: Dict[str, Any], out: List[str], token_ids: List[List[int]]) -> None:
+    out.append(json.dumps(result, ensure_ascii=False))
+    if _WORKER_TOKENIZER is not None:
+        token_ids.append(_WORKER_TOKENIZER.apply_chat_template(result["messages"], tokenize=True))
+
+
+def _process_chunk_worker(chunk: bytes):
+    """Worker function for streaming conversion.
+    
+    With ``keep_parts`` set, every parseable record is converted (before
+    the quality filter) and returned as a parts-cache line too, so later
+    threshold changes need no re-parsing.
+    
+    Args:
+        chunk: Newline-aligned block of JSONL bytes
+        
+    Returns:
+        Tuple of (converted JSONL bytes, status counts, token ids,
+        token lengths, parts-cache JSONL bytes, validation cache lines); the
+        token arrays are None unless a tokenizer is configured, the parts
+        bytes are empty unless ``keep_parts`` is set
+    """
+    config = _WORKER_CONFIG
+    keep_parts = config.get("keep_parts", False)
+    skip_uids = config.get("skip_uids") or ()
+    out: List[str] = []
+    parts: List[str] = []
+    token_ids: List[List[int]] = []
+    counts = {"total": 0, "converted": 0, "filtered_quality": 0, "failed_parse": 0, "skipped": 0}
+    
+    for line in chunk.split(b'\n'):
+        if not line.strip():
+            continue
+        if not keep_parts:
+            counts["total"] += 1
+            status, result = _convert_line(line, config)
+            if status == "success":
+                _emit(result, out, token_ids)
+                counts["converted"] += 1
+            elif status == "quality":
+                counts["filtered_quality"] += 1
+            else:
+                counts["failed_parse"] += 1
+            continue
+        
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            counts["total"] += 1
+            counts["failed_parse"] += 1
+            continue
+        uid = record.get("uid")
+        if uid in skip_uids:
+            counts["skipped"] += 1
+            continue
+        counts["total"] += 1
+        
+        ratings = record.get(config.get("score_field", "ratings")) or {}
+        try:
+            result = _convert_single_record(record, config["output_fields"])
+        except Exception:
+            result = None
+        parts.append(json.dumps({"uid": uid, "ratings": ratings, "record": result}, ensure_ascii=False))
+        
+        if not _passes_quality(ratings, config["min_ratings"], config["require_all"]):
+            counts["filtered_quality"] += 1
+        elif result is None:
+            counts["failed_parse"] += 1
+        else:
+            _emit(result, out, token_ids)
+            counts["converted"] += 1
+    
+    payload, tokens, lengths = _encode_outputs(out, token_ids)
+    parts_payload = ('\n'.join(parts) + '\n').encode('utf-8') if parts else b''
+    validation_lines = list(_WORKER_VALIDATION_LINES.values())
+    _WORKER_VALIDATION_LINES.clear()
+    return payload, counts, tokens, lengths, parts_payload, validation_lines
+
+
+def _refilter_chunk_worker(chunk: bytes):
+    """Worker function re-applying the quality filter to cached parts.
+    
+    Args:
+        chunk: Newline-aligned block of parts-cache JSONL bytes
+        
+    Returns:
+        Same tuple as _process_chunk_worker (with empty parts bytes and
+        validation lines)
+    """
+    config = _WORKER_CONFIG
+    out: List[str] = []
+    token_ids: List[List[int]] = []
+    counts = {"total": 0, "converted": 0, "filtered_quality": 0, "failed_parse": 0, "skipped": 0}
+    
+    for line in chunk.split(b'\n'):
+        if not line.strip():
+            continue
+        counts["total"] += 1
+        part = json.loads(line)
+        if not _passes_quality(part.get("ratings") or {}, config["min_ratings"], config["require_all"]):
+            counts["filtered_quality"] += 1
+        elif part.get("record") is None:
+            counts["failed_parse"] += 1
+        else:
+            _emit(part["record"], out, token_ids)
+            counts["converted"] += 1
+    
+    payload, tokens, lengths = _encode_outputs(out, token_ids)
+    return payload, counts, tokens, lengths, b'', []
+
+
+def _iter_line_chunks(path: Path, chunk_bytes: int, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Yield newline-aligned blocks of a file (or of its byte range [start, end))."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start if end is not None else None
+        pending = b''
+        while remaining is None or remaining > 0:
+            block = f.read(chunk_bytes if remaining is None else min(chunk_bytes, remaining))
+            if remaining is not None:
+                remaining -= len(block)
+            if not block:
+                break
+            block = pending + block
+            cut = block.rfind(b'\n')
+            if cut < 0:
+                pending = block
+                continue
+            pending = block[cut + 1:]
+            yield block[:cut + 1]
+        if pending:
+            yield pending
+
+
+def _passes_quality(ratings: Dict[str, float], min_ratings: Dict[str, float], require_all: bool) -> bool:
+    """Check ratings against thresholds (all or any dimension must pass; missing scores fail)."""
+    if not min_ratings:
+        return True
+    if require_all:
+        return all((ratings.get(dimension) or 0) >= min_score for dimension, min_score in min_ratings.items())
+    return any((ratings.get(dimension) or 0) >= min_score for dimension, min_score in min_ratings.items())
 
 
 def _convert_single_record(record: Dict[str, Any], output_fields: List[str]) -> Optional[Dict[str, Any]]:
@@ -82,19 +262,14 @@ def _convert_single_record(record: Dict[str, Any], output_fields: List[str]) ->
     # Remove hint
     problem_no_hint = _remove_hint_static(problem_text)
     
-    # Extract signature
-    signature = _extract_signature_static(code)
-    if not signature:
-        return None
-    
-    # Extract body
-    body = _extract_body_static(code)
-    if not body:
+    # Extract signature and body (single parse, none if the code is in the validation cache)
+    parts = _function_parts_cached(code)
+    if parts is None or not parts.signature or not parts.body:
         return None
     
     # Construct result
-    user_content = f"{problem_no_hint}\n\n{signature}"
-    assistant_content = body
+    user_content = f"{problem_no_hint}\n\n{parts.signature}"
+    assistant_content = parts.body
     
     result = {
         "uid": uid,
@@ -112,6 +287,22 @@ def _convert_single_record(record: Dict[str, Any], output_fields: List[str]) ->
     return filtered
 
 
+def _function_parts_cached(code: str):
+    """extract_function_parts() through the validation cache index.
+
+    Code missing from the index is parsed and queued as a new cache line
+    (the parent appends them after each chunk).
+    """
+    if _WORKER_VALIDATION_PATH is None:
+        return extract_function_parts(code)
+    key = compute_hash(code)
+    entry = _WORKER_VALIDATION.get(key) if _WORKER_VALIDATION is not None else None
+    if entry is None:
+        entry = ValidationEntry(*locate_function(code))
+        _WORKER_VALIDATION_LINES.setdefault(key, encode_entry(key, entry))
+    return function_parts(code, entry.location) if entry.location is not None else None
+
+
 def _remove_hint_static(problem_text: str) -> str:
     """Static version of hint removal."""
     lines = problem_text.split('\n')
@@ -128,76 +319,6 @@ def _remove_hint_static(problem_text: str) -> str:
     return '\n'.join(filtered_lines).strip()
 
 
-def _extract_signature_static(code: str) -> Optional[str]:
-    """Static version of signature extraction."""
-    try:
-        tree = ast.parse(code)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                lines = code.split('\n')
-                for i, line in enumerate(lines):
-                    if line.strip().startswith('def ') and node.name in line:
-                        signature_lines = [line]
-                        j = i + 1
-                        while j < len(lines) and not signature_lines[-1].rstrip().endswith(':'):
-                            signature_lines.append(lines[j])
-                            j += 1
-                        return '\n'.join(signature_lines).strip()
-        return None
-    except:
-        return None
-
-
-def _extract_body_static(code: str) -> Optional[str]:
-    """Static version of body extraction."""
-    try:
-        tree = ast.parse(code)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                lines = code.split('\n')
-                func_start_line = node.lineno - 1
-                body_start = func_start_line + 1
-                
-                while body_start < len(lines) and not lines[body_start].strip():
-                    body_start += 1
-                
-                if (node.body and 
-                    isinstance(node.body[0], ast.Expr) and 
-                    isinstance(node.body[0].value, ast.Constant) and
-                    isinstance(node.body[0].value.value, str)):
-                    docstring_end_line = node.body[0].end_lineno
-                    body_start = docstring_end_line
-                
-                body_lines = []
-                for i in range(body_start, len(lines)):
-                    line = lines[i]
-                    if line and not line[0].isspace() and line.strip():
-                        break
-                    body_lines.append(line)
-                
-                while body_lines and not body_lines[0].strip():
-                    body_lines.pop(0)
-                
-                if not body_lines:
-                    return None
-                
-                base_indent = len(body_lines[0]) - len(body_lines[0].lstrip())
-                normalized_lines = []
-                for line in body_lines:
-                    if line.strip():
-                        if len(line) >= base_indent:
-                            normalized_lines.append(line[base_indent:])
-                        else:
-                            normalized_lines.append(line)
-                    else:
-                        normalized_lines.append('')
-                
-                return '\n'.join(normalized_lines).rstrip()
-        return None
-    except:
-        return None
-
-
 class ChatMLConverter:
     """Convert rated implementations to ChatML format.
     
@@ -234,146 +355,44 @@ class ChatMLConverter:
         # Quality thresholds
         self.min_ratings = self.filter_cfg.get("min_ratings", {})
         self.require_all = self.filter_cfg.get("require_all_above_threshold", True)
+        # Record field holding the scores: "ratings" (integers) or
+        # "expected_ratings" (continuous scores of logprob rating)
+        self.score_field = self.filter_cfg.get("score_field", "ratings")
         
         # Output fields
         self.output_fields = self.output_cfg.get("fields", ["uid", "messages"])
         
+        # Sharded memory-mapped output
+        shards_cfg = self.output_cfg.get("shards", {}) or {}
+        self.shards_enabled = bool(shards_cfg.get("enabled", False))
+        self.shard_dir = shards_cfg.get("dir")
+        self.shard_bytes = int(float(shards_cfg.get("shard_mb", 256)) * 1024 * 1024)
+        self.shard_tokenizer = shards_cfg.get("tokenizer")
+        
+        # Incremental conversion (manifest + per-uid parts cache)
+        incremental_cfg = config.get_section("incremental")
+        self.incremental = bool(incremental_cfg.get("enabled", True))
+        self.cache_dir = incremental_cfg.get("cache_dir")
+        
         # Processing settings
         self.num_workers = self.processing_cfg.get("num_workers", 0)
         if self.num_workers == 0:
             self.num_workers = max(1, mp.cpu_count() - 1)
-        self.chunk_size = self.processing_cfg.get("chunk_size", 500)
+        self.chunk_bytes = int(self.processing_cfg.get("chunk_bytes", 4 * 1024 * 1024))
+        self.max_in_flight = int(self.processing_cfg.get("max_in_flight", 0)) or 2 * self.num_workers
+        # Parse results of the generators by content hash (code parsed there is not parsed again)
+        self.validation_cache = (
+            ValidationCache.from_config(self.processing_cfg)
+            if self.processing_cfg.get("validation_cache") else None
+        )
+        self.progress_interval = int(config.get("logging.progress_interval", 1000))
         
         self.logger.info(f"Initialized ChatML converter")
-        self.logger.info(f"Quality filters: {self.min_ratings}")
+        self.logger.info(f"Quality filters: {self.min_ratings} (on {self.score_field})")
         self.logger.info(f"Output fields: {self.output_fields}")
-        self.logger.info(f"Workers: {self.num_workers}, Chunk size: {self.chunk_size}")
-    
-    def _remove_hint(self, problem_text: str) -> str:
-        """Remove hint section from problem text.
-        
-        Args:
-            problem_text: Original problem description
-            
-        Returns:
-            Problem text without hint
-        """
-        # Remove lines starting with "Hint:"
-        lines = problem_text.split('\n')
-        filtered_lines = []
-        skip_rest = False
-        
-        for line in lines:
-            if line.strip().startswith("Hint:"):
-                skip_rest = True
-                continue
-            if not skip_rest:
-                filtered_lines.append(line)
-        
-        return '\n'.join(filtered_lines).strip()
-    
-    def _extract_function_signature(self, code: str) -> Optional[str]:
-        """Extract function signature (def line) from code.
-        
-        Args:
-            code: Full function implementation
-            
-        Returns:
-            Function signature or None if not found
-        """
-        try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    # Get the line with the function definition
-                    lines = code.split('\n')
-                    # Find the def line
-                    for i, line in enumerate(lines):
-                        if line.strip().startswith('def ') and node.name in line:
-                            # Handle multi-line signatures
-                            signature_lines = [line]
-                            j = i + 1
-                            # Continue if line doesn't end with ):
-                            while j < len(lines) and not signature_lines[-1].rstrip().endswith(':'):
-                                signature_lines.append(lines[j])
-                                j += 1
-                            return '\n'.join(signature_lines).strip()
-            return None
-        except Exception as e:
-            self.logger.debug(f"Failed to extract signature: {e}")
-            return None
-    
-    def _remove_docstring_and_extract_body(self, code: str) -> Optional[str]:
-        """Remove docstring and extract function body.
-        
-        Args:
-            code: Full function implementation
-            
-        Returns:
-            Function body without docstring, or None if parsing fails
-        """
-        try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    # Get function body
-                    lines = code.split('\n')
-                    
-                    # Find where the function body starts (after def line and docstring)
-                    func_start_line = node.lineno - 1  # 0-indexed
-                    
-                    # Skip the def line(s)
-                    body_start = func_start_line + 1
-                    while body_start < len(lines) and not lines[body_start].strip():
-                        body_start += 1
-                    
-                    # Check if first statement is a docstring
-                    if (node.body and 
-                        isinstance(node.body[0], ast.Expr) and 
-                        isinstance(node.body[0].value, ast.Constant) and
-                        isinstance(node.body[0].value.value, str)):
-                        # Skip docstring
-                        docstring_end_line = node.body[0].end_lineno  # 1-indexed
-                        body_start = docstring_end_line  # Now 0-indexed due to array indexing
-                    
-                    # Extract body lines
-                    body_lines = []
-                    for i in range(body_start, len(lines)):
-                        line = lines[i]
-                        # Stop at next function or class definition at same level
-                        if line and not line[0].isspace() and line.strip():
-                            break
-                        body_lines.append(line)
-                    
-                    # Remove leading empty lines and normalize indentation
-                    while body_lines and not body_lines[0].strip():
-                        body_lines.pop(0)
-                    
-                    if not body_lines:
-                        return None
-                    
-                    # Get base indentation (from first non-empty line)
-                    base_indent = len(body_lines[0]) - len(body_lines[0].lstrip())
-                    
-                    # Remove base indentation from all lines
-                    normalized_lines = []
-                    for line in body_lines:
-                        if line.strip():  # Non-empty line
-                            if len(line) >= base_indent:
-                                normalized_lines.append(line[base_indent:])
-                            else:
-                                normalized_lines.append(line)
-                        else:  # Empty line
-                            normalized_lines.append('')
-                    
-                    return '\n'.join(normalized_lines).rstrip()
-            
-            return None
-        except Exception as e:
-            self.logger.debug(f"Failed to extract body: {e}")
-            return None
+        self.logger.info(f"Workers: {self.num_workers}, Chunk bytes: {self.chunk_bytes}")
     
-    def _check_quality(self, ratings: Dict[str, int]) -> bool:
+    def _check_quality(self, ratings: Dict[str, float]) -> bool:
         """Check if ratings meet quality thresholds.
         
         Args:
@@ -382,21 +401,7 @@ class ChatMLConverter:
         Returns:
             True if quality requirements are met
         """
-        if not self.min_ratings:
-            return True
-        
-        if self.require_all:
-            # All specified dimensions must meet threshold
-            for dimension, min_score in self.min_ratings.items():
-                if ratings.get(dimension, 0) < min_score:
-                    return False
-            return True
-        else:
-            # At least one dimension must meet threshold
-            for dimension, min_score in self.min_ratings.items():
-                if ratings.get(dimension, 0) >= min_score:
-                    return True
-            return False
+        return _passes_quality(ratings, self.min_ratings, self.require_all)
     
     def convert_record(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Convert a single record to ChatML format.
@@ -408,72 +413,91 @@ class ChatMLConverter:
             ChatML formatted record or None if conversion fails
         """
         # Check quality first
-        ratings = record.get("ratings", {})
+        ratings = record.get(self.score_field) or {}
         if not self._check_quality(ratings):
             self.logger.debug(f"Record {record.get('uid')} filtered by quality: {ratings}")
             return None
         
-        # Extract fields
-        uid = record.get("uid")
-        problem_text = record.get("problem_text", "")
-        code = record.get("code", "")
-        
-        # Remove hint from problem
-        problem_no_hint = self._remove_hint(problem_text)
-        
-        # Extract function signature
-        signature = self._extract_function_signature(code)
-        if not signature:
-            self.logger.debug(f"Failed to extract signature for {uid}")
-            return None
-        
-        # Extract function body without docstring
-        body = self._remove_docstring_and_extract_body(code)
-        if not body:
-            self.logger.debug(f"Failed to extract body for {uid}")
-            return None
-        
-        # Construct ChatML format
-        user_content = f"{problem_no_hint}\n\n{signature}"
-        assistant_content = body
-        
-        chatml_record = {
-            "uid": uid,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": user_content
-                },
-                {
-                    "role": "assistant",
-                    "content": assistant_content
-                }
-            ]
-        }
-        
-        # Add optional fields based on configuration
-        if "ratings" in self.output_fields:
-            chatml_record["ratings"] = ratings
-        
-        # Filter to only include specified fields
-        filtered_record = {
-            field: chatml_record[field]
-            for field in self.output_fields
-            if field in chatml_record
-        }
-        
-        return filtered_record
+        result = _convert_single_record(record, self.output_fields)
+        if result is None:
+            self.logger.debug(f"Failed to extract signature/body for {record.get('uid')}")
+        return result
+    
+    def _last_line_end(self, path: Path) -> int:
+        """Offset just past the last newline (a partially appended line is left for the next run)"""
+        size = path.stat().st_size
+        with open(path, 'rb') as f:
+            pos = size
+            while pos > 0:
+                step = min(pos, 1 << 16)
+                f.seek(pos - step)
+                block = f.read(step)
+                cut = block.rfind(b'\n')
+                if cut >= 0:
+                    return pos - step + cut + 1
+                pos -= step
+        return 0
+    
+    def _run_chunks(self, pool, worker, chunks, total_bytes, outfile, shard_writer, parts_file, stats):
+        """Feed chunks through the pool with a bounded in-flight window and
+        write results in input order (and new validation cache lines)."""
+        in_flight = deque()
+        done_bytes = 0
+        next_report = stats["total"] + self.progress_interval
+        
+        def _drain_one():
+            nonlocal done_bytes, next_report
+            size, async_result = in_flight.popleft()
+            payload, counts, tokens, token_lengths, parts_payload, validation_lines = async_result.get()
+            outfile.write(payload)
+            if self.validation_cache is not None:
+                self.validation_cache.append_lines(validation_lines)
+            if shard_writer is not None:
+                shard_writer.write(payload, tokens, token_lengths)
+            if parts_file is not None and parts_payload:
+                parts_file.write(parts_payload)
+            for key, value in counts.items():
+                stats[key] += value
+            done_bytes += size
+            
+            # Progress logging
+            if stats["total"] >= next_report:
+                next_report = stats["total"] + self.progress_interval
+                self.logger.info(
+                    f"Processed {stats['total']} records ({done_bytes / max(1, total_bytes) * 100:.1f}%): "
+                    f"{stats['converted']} converted, "
+                    f"{stats['filtered_quality']} filtered, "
+                    f"{stats['failed_parse']} failed"
+                )
+        
+        for chunk in chunks:
+            if len(in_flight) >= self.max_in_flight:
+                _drain_one()
+            in_flight.append((len(chunk), pool.apply_async(worker, (chunk,))))
+        
+        while in_flight:
+            _drain_one()
     
     def convert_file(
         self,
         input_path: Path,
-        output_path: Path
+        output_path: Path,
+        rebuild: bool = False
     ) -> Dict[str, int]:
         """Convert entire JSONL file to ChatML format using multiprocessing.
         
+        The input is streamed in newline-aligned byte chunks; each worker
+        converts a whole chunk and returns the output as one bytes block, so
+        memory stays flat regardless of file size.
+        
+        In incremental mode (default) only records appended since the last
+        run are converted; if only the rating thresholds changed, the output
+        is rebuilt from cached per-uid parts without parsing code again.
+        
         Args:
             input_path: Input JSONL file path
             output_path: Output JSONL file path
+            rebuild: Ignore the incremental cache and convert everything
             
         Returns:
             Statistics dictionary
@@ -485,66 +509,175 @@ class ChatMLConverter:
         # Ensure output directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Read all input lines
-        self.logger.info("Reading input file...")
-        with open(input_path, 'r', encoding='utf-8') as f:
-            input_lines = [line.strip() for line in f if line.strip()]
-        
-        total_records = len(input_lines)
-        self.logger.info(f"Loaded {total_records} records")
-        
-        # Prepare config dict for workers
+        shard_dir = Path(self.shard_dir) if self.shard_dir else output_path.parent / "shards"
+        shard_state = {"enabled": self.shards_enabled, "tokenizer": self.shard_tokenizer}
+        filter_state = {"min_ratings": self.min_ratings, "require_all": self.require_all}
+        
+        # Decide what the incremental cache lets us skip
+        cache = None
+        manifest = None
+        start_offset = 0
+        skip_uids = None
+        refilter = False
+        end_offset = None
+        if self.incremental:
+            cache = ConversionCache(
+                Path(self.cache_dir) if self.cache_dir else output_path.parent / ".convert_cache"
+            )
+            manifest = None if rebuild else cache.load_manifest()
+            if manifest is not None and (
+                manifest.get("input_path") != str(input_path.resolve())
+                or manifest.get("output_fields") != self.output_fields
+                or manifest.get("score_field", "ratings") != self.score_field
+            ):
+                self.logger.info("Input, output fields or score field changed, rebuilding conversion cache")
+                manifest = None
+            
+            end_offset = self._last_line_end(input_path)
+            if manifest is not None and end_offset >= manifest.get("input_offset", 0) and (
+                manifest.get("input_fingerprint")
+                != input_fingerprint(input_path, manifest.get("input_offset", 0))
+            ):
+                self.logger.info("Input was rewritten since the last run, rebuilding conversion cache")
+                manifest = None
+            if manifest is None:
+                cache.reset()
+            else:
+                # Drop anything an interrupted run wrote after the last manifest
+                cache.truncate_parts(manifest.get("parts_bytes", 0))
+                start_offset = manifest.get("input_offset", 0)
+                if end_offset < start_offset:
+                    self.logger.info("Input file shrank, rescanning it and skipping cached uids")
+                    start_offset = 0
+                    skip_uids = frozenset(cache.load_uids())
+                refilter = (
+                    manifest.get("filter") != filter_state
+                    or manifest.get("shards") != shard_state
+                    or not output_path.exists()
+                    or output_path.stat().st_size < manifest.get("output_bytes", 0)
+                    or (self.shards_enabled and not (shard_dir / "index.json").exists())
+                )
+                if not refilter and output_path.stat().st_size > manifest.get("output_bytes", 0):
+                    with open(output_path, 'r+b') as f:
+                        f.truncate(manifest.get("output_bytes", 0))
+                self.logger.info(
+                    f"Incremental: {manifest.get('num_parts', 0)} cached records, "
+                    f"{(end_offset - start_offset) / 1e6:.1f} MB new input"
+                    + (", re-filtering cached records" if refilter else "")
+                )
+        
+        # Settings are sent once per worker through the pool initializer
         config_dict = {
             "min_ratings": self.min_ratings,
             "require_all": self.require_all,
-            "output_fields": self.output_fields
+            "score_field": self.score_field,
+            "output_fields": self.output_fields,
+            "tokenizer": self.shard_tokenizer if self.shards_enabled else None,
+            "keep_parts": cache is not None,
+            "skip_uids": skip_uids,
         }
         
-        # Prepare args for multiprocessing
-        worker_args = [(line, config_dict) for line in input_lines]
+        # Workers look entries up in a memory-mapped index of the validation
+        # cache file (built once here, removed after the run)
+        validation_path = validation_index = None
+        if self.validation_cache is not None:
+            validation_path = str(self.validation_cache.path)
+            index_path = output_path.parent / f".{output_path.name}.validation_index.npy"
+            if ValidationIndex.build(self.validation_cache.path, index_path):
+                validation_index = str(index_path)
+            self.logger.info(f"Validation cache: {validation_path}")
+        
+        # Append to the existing output unless it has to be rewritten
+        append = manifest is not None and not refilter
+        
+        # Optional memory-mapped shards written next to the JSONL
+        shard_writer = None
+        if self.shards_enabled:
+            shard_writer = ShardWriter(
+                shard_dir, shard_bytes=self.shard_bytes, tokenizer=self.shard_tokenizer, append=append
+            )
+            self.logger.info(f"Shards: {shard_dir} (tokenizer: {self.shard_tokenizer or 'none'})")
         
-        # Process in parallel
         stats = {
-            "total": total_records,
+            "total": 0,
             "converted": 0,
             "filtered_quality": 0,
-            "failed_parse": 0
+            "failed_parse": 0,
+            "skipped": 0
         }
         
-        self.logger.info("Starting parallel conversion...")
-        
-        with open(output_path, 'w', encoding='utf-8') as outfile:
-            with mp.Pool(processes=self.num_workers) as pool:
-                # Process in chunks with progress updates
-                chunk_results = []
-                for i, result in enumerate(pool.imap(_process_record_worker, worker_args, chunksize=self.chunk_size)):
-                    success, status, data = result
-                    
-                    if success:
-                        outfile.write(data + '\n')
-                        stats["converted"] += 1
-                    elif status == "quality":
-                        stats["filtered_quality"] += 1
-                    else:
-                        stats["failed_parse"] += 1
-                    
-                    # Progress logging
-                    if (i + 1) % 1000 == 0:
-                        self.logger.info(
-                            f"Processed {i + 1}/{total_records} records: "
-                            f"{stats['converted']} converted, "
-                            f"{stats['filtered_quality']} filtered, "
-                            f"{stats['failed_parse']} failed"
-                        )
+        total_bytes = (end_offset if end_offset is not None else input_path.stat().st_size) - start_offset
+        self.logger.info(
+            f"Streaming {total_bytes / 1e6:.1f} MB in {self.chunk_bytes / 1e6:.1f} MB chunks "
+            f"({self.max_in_flight} in flight)"
+        )
+        
+        # Bounded window of in-flight chunks keeps memory flat; results are
+        # written in input order
+        with contextlib.ExitStack() as stack:
+            outfile = stack.enter_context(open(output_path, 'ab' if append else 'wb'))
+            if validation_index is not None:
+                stack.callback(Path(validation_index).unlink, missing_ok=True)
+            parts_file = None
+            pool = stack.enter_context(
+                mp.Pool(processes=self.num_workers, initializer=_init_worker, initargs=(config_dict, validation_path, validation_index))
+            )
+            
+            if refilter:
+                cached_stats = {key: 0 for key in stats}
+                self._run_chunks(
+                    pool, _refilter_chunk_worker,
+                    _iter_line_chunks(cache.parts_path, self.chunk_bytes),
+                    cache.parts_path.stat().st_size, outfile, shard_writer, None, cached_stats,
+                )
+                stats["reused"] = cached_stats["total"]
+                stats["converted"] += cached_stats["converted"]
+                stats["filtered_quality"] += cached_stats["filtered_quality"]
+                stats["failed_parse"] += cached_stats["failed_parse"]
+            
+            if cache is not None:
+                parts_file = stack.enter_context(open(cache.parts_path, 'ab'))
+            self._run_chunks(
+                pool, _process_chunk_worker,
+                _iter_line_chunks(input_path, self.chunk_bytes, start_offset, end_offset),
+                total_bytes, outfile, shard_writer, parts_file, stats,
+            )
+        
+        if shard_writer is not None:
+            shard_manifest = shard_writer.close()
+            stats["shards"] = len(shard_manifest["shards"])
+            self.logger.info(
+                f"Wrote {shard_manifest['num_records']} records to {len(shard_manifest['shards'])} shards "
+                f"({shard_manifest['num_tokens']} tokens)"
+            )
+        
+        if cache is not None:
+            cache.save_manifest({
+                "input_path": str(input_path.resolve()),
+                "input_offset": end_offset,
+                "input_fingerprint": input_fingerprint(input_path, end_offset),
+                "output_fields": self.output_fields,
+                "score_field": self.score_field,
+                "filter": filter_state,
+                "shards": shard_state,
+                "num_parts": (manifest or {}).get("num_parts", 0) + stats["total"],
+                "parts_bytes": cache.parts_path.stat().st_size,
+                "output_bytes": output_path.stat().st_size,
+            })
         
         # Final statistics
         self.logger.info(f"\n=== Conversion Complete ===")
-        self.logger.info(f"Total records: {stats['total']}")
+        self.logger.info(f"New records: {stats['total']}")
+        if stats.get("reused"):
+            self.logger.info(f"Re-filtered cached records: {stats['reused']}")
+        if stats["skipped"]:
+            self.logger.info(f"Skipped (already converted): {stats['skipped']}")
         self.logger.info(f"Converted: {stats['converted']}")
         self.logger.info(f"Filtered by quality: {stats['filtered_quality']}")
         self.logger.info(f"Parse failures: {stats['failed_parse']}")
-        if stats['total'] > 0:
-            self.logger.info(f"Success rate: {stats['converted']/stats['total']*100:.1f}%")
+        processed = stats['total'] + stats.get('reused', 0)
+        if processed > 0:
+            self.logger.info(f"Success rate: {stats['converted']/processed*100:.1f}%")
         
         return stats
     
@@ -0,0 +1,95 @@
+"""
+Incremental conversion state for ChatMLConverter.
+
+The cache directory holds:
+
+    manifest.json   # settings of the last run and how far the input was read
+    parts.jsonl     # per uid: {"uid", "ratings", "record"} where "record" is the
+                    # converted record before quality filtering (null if the
+                    # code could not be parsed)
+
+New ratings are appended to the input file between runs, so a rerun only
+converts bytes past ``input_offset``. The manifest also keeps a fingerprint
+of the bytes before that offset; an input regenerated in place (different
+content, same or larger size) no longer matches it and is converted from
+scratch. If only the rating thresholds changed, the output is rebuilt from
+parts.jsonl without parsing any code.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+CACHE_VERSION = 2
+
+# Bytes hashed at each end of the converted input range
+_FINGERPRINT_BYTES = 64 * 1024
+
+
+def input_fingerprint(path: Path, offset: int) -> str:
+    """Hash of the first and last bytes of ``path`` before ``offset`` (capped at _FINGERPRINT_BYTES each)."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read(min(offset, _FINGERPRINT_BYTES)))
+        if offset > _FINGERPRINT_BYTES:
+            tail = min(offset - _FINGERPRINT_BYTES, _FINGERPRINT_BYTES)
+            f.seek(offset - tail)
+            digest.update(f.read(tail))
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """Manifest and per-uid parts cache of one conversion output."""
+
+    def __init__(self, cache_dir: Path):
+        """Initialize cache paths.
+
+        Args:
+            cache_dir: Cache directory (created on demand)
+        """
+        self.cache_dir = cache_dir
+        self.manifest_path = cache_dir / "manifest.json"
+        self.parts_path = cache_dir / "parts.jsonl"
+
+    def load_manifest(self) -> Optional[Dict[str, Any]]:
+        """Load the manifest, or None if missing, unreadable or outdated"""
+        if not self.manifest_path.exists() or not self.parts_path.exists():
+            return None
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return manifest if manifest.get("version") == CACHE_VERSION else None
+
+    def save_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Write the manifest atomically"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({**manifest, "version": CACHE_VERSION}, f, indent=2)
+        tmp_path.replace(self.manifest_path)
+
+    def reset(self) -> None:
+        """Drop all cached state"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path.unlink(missing_ok=True)
+        self.parts_path.write_bytes(b'')
+
+    def truncate_parts(self, size: int) -> None:
+        """Cut the parts file back to ``size`` bytes (undo an interrupted run)"""
+        if self.parts_path.exists() and self.parts_path.stat().st_size > size:
+            with open(self.parts_path, 'r+b') as f:
+                f.truncate(size)
+
+    def load_uids(self) -> Set[str]:
+        """UIDs already in the parts cache"""
+        uids = set()
+        if not self.parts_path.exists():
+            return uids
+        with open(self.parts_path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    uids.add(json.loads(line).get("uid"))
+        return uids
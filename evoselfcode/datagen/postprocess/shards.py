@@ -0,0 +1,233 @@
+"""
+Sharded, memory-mapped training data.
+
+Layout of a shard directory::
+
+    index.json                 # manifest: shards, record/token counts, tokenizer
+    shard_00000.bin            # JSONL record bytes (same lines as the JSONL output)
+    shard_00000.idx.npy        # uint64 byte offsets, N + 1 entries
+    shard_00000.tok.bin        # optional int32 token ids, concatenated
+    shard_00000.tok.idx.npy    # optional uint64 token offsets, N + 1 entries
+
+Shards roll over once they reach ``shard_bytes``, so all but the last have
+about the same size. ``ShardedDataset`` maps the files read-only and gives
+O(1) random access to any record or token sequence without parsing the rest.
+"""
+
+import bisect
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 1
+_NEWLINE = 10
+
+
+class ShardWriter:
+    """Append JSONL payloads (and optional token arrays) into size-balanced shards."""
+
+    def __init__(
+        self,
+        out_dir: Path,
+        shard_bytes: int = 256 * 1024 * 1024,
+        tokenizer: Optional[str] = None,
+        append: bool = False,
+    ):
+        """Initialize writer.
+
+        Args:
+            out_dir: Shard directory
+            shard_bytes: Target size of each shard's record file
+            tokenizer: Name of the tokenizer used for token arrays (None = no tokens)
+            append: Continue the existing shards instead of replacing them
+        """
+        self.out_dir = out_dir
+        self.shard_bytes = shard_bytes
+        self.tokenizer = tokenizer
+        self.shards: List[Dict[str, Any]] = []
+
+        self._bin = None
+        self._tok = None
+        self._offsets: List[np.ndarray] = []
+        self._tok_offsets: List[np.ndarray] = []
+        self._size = 0
+        self._num_tokens = 0
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if append and self._reopen():
+            return
+        for old in out_dir.glob("shard_*"):
+            old.unlink()
+        (out_dir / "index.json").unlink(missing_ok=True)
+
+    def _reopen(self) -> bool:
+        """Reopen the last shard of an existing directory for appending"""
+        index_path = self.out_dir / "index.json"
+        if not index_path.exists():
+            return False
+        with open(index_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != FORMAT_VERSION or manifest.get("tokenizer") != self.tokenizer:
+            return False
+        self.shards = manifest["shards"]
+        if not self.shards:
+            return True
+
+        # Bytes past the recorded offsets come from an interrupted run
+        name = self.shards[-1]["name"]
+        offsets = np.load(self.out_dir / f"{name}.idx.npy")
+        self._offsets = [offsets]
+        self._size = int(offsets[-1])
+        self._bin = open(self.out_dir / f"{name}.bin", 'r+b')
+        self._bin.truncate(self._size)
+        self._bin.seek(self._size)
+        if self.tokenizer:
+            tok_offsets = np.load(self.out_dir / f"{name}.tok.idx.npy")
+            self._tok_offsets = [tok_offsets]
+            self._num_tokens = int(tok_offsets[-1])
+            self._tok = open(self.out_dir / f"{name}.tok.bin", 'r+b')
+            self._tok.truncate(self._num_tokens * 4)
+            self._tok.seek(self._num_tokens * 4)
+        return True
+
+    def _open_shard(self):
+        name = f"shard_{len(self.shards):05d}"
+        self.shards.append({"name": name, "num_records": 0, "num_bytes": 0, "num_tokens": 0})
+        self._bin = open(self.out_dir / f"{name}.bin", 'wb')
+        if self.tokenizer:
+            self._tok = open(self.out_dir / f"{name}.tok.bin", 'wb')
+        self._offsets = [np.zeros(1, dtype=np.uint64)]
+        self._tok_offsets = [np.zeros(1, dtype=np.uint64)]
+        self._size = 0
+        self._num_tokens = 0
+
+    def _close_shard(self):
+        if self._bin is None:
+            return
+        shard = self.shards[-1]
+        offsets = np.concatenate(self._offsets)
+        np.save(self.out_dir / f"{shard['name']}.idx.npy", offsets)
+        shard["num_records"] = len(offsets) - 1
+        shard["num_bytes"] = self._size
+        self._bin.close()
+        self._bin = None
+        if self._tok is not None:
+            np.save(self.out_dir / f"{shard['name']}.tok.idx.npy", np.concatenate(self._tok_offsets))
+            shard["num_tokens"] = self._num_tokens
+            self._tok.close()
+            self._tok = None
+
+    def write(self, payload: bytes, tokens: Optional[np.ndarray] = None, token_lengths: Optional[np.ndarray] = None):
+        """Append newline-terminated JSONL records.
+
+        Args:
+            payload: One or more complete JSONL lines
+            tokens: Concatenated int32 token ids of these records (if tokenizing)
+            token_lengths: Token count per record
+        """
+        if not payload:
+            return
+        if self._bin is None or self._size >= self.shard_bytes:
+            self._close_shard()
+            self._open_shard()
+
+        ends = np.flatnonzero(np.frombuffer(payload, dtype=np.uint8) == _NEWLINE).astype(np.uint64) + 1
+        self._offsets.append(ends + np.uint64(self._size))
+        self._bin.write(payload)
+        self._size += len(payload)
+
+        if self._tok is not None:
+            if tokens is None or token_lengths is None or len(token_lengths) != len(ends):
+                raise ValueError("Token arrays must be given for every record when tokenizing")
+            self._tok_offsets.append(np.cumsum(token_lengths, dtype=np.uint64) + np.uint64(self._num_tokens))
+            self._tok.write(np.ascontiguousarray(tokens, dtype=np.int32).tobytes())
+            self._num_tokens += int(token_lengths.sum())
+
+    def close(self) -> Dict[str, Any]:
+        """Finish the last shard and write index.json.
+
+        Returns:
+            Manifest dictionary
+        """
+        self._close_shard()
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "tokenizer": self.tokenizer,
+            "num_records": sum(s["num_records"] for s in self.shards),
+            "num_tokens": sum(s["num_tokens"] for s in self.shards),
+            "shards": self.shards,
+        }
+        with open(self.out_dir / "index.json", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+class ShardedDataset:
+    """Read-only, memory-mapped view over a shard directory."""
+
+    def __init__(self, shard_dir: Path):
+        """Open a shard directory written by ShardWriter.
+
+        Args:
+            shard_dir: Directory containing index.json
+        """
+        self.shard_dir = Path(shard_dir)
+        with open(self.shard_dir / "index.json", 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported shard format: {self.manifest.get('format_version')}")
+
+        self.has_tokens = bool(self.manifest.get("tokenizer"))
+        self._data, self._offsets, self._tokens, self._tok_offsets = [], [], [], []
+        for shard in self.manifest["shards"]:
+            name = shard["name"]
+            bin_path = self.shard_dir / f"{name}.bin"
+            self._data.append(
+                np.memmap(bin_path, dtype=np.uint8, mode='r') if shard["num_bytes"] else np.zeros(0, np.uint8)
+            )
+            self._offsets.append(np.load(self.shard_dir / f"{name}.idx.npy", mmap_mode='r'))
+            if self.has_tokens:
+                tok_path = self.shard_dir / f"{name}.tok.bin"
+                self._tokens.append(
+                    np.memmap(tok_path, dtype=np.int32, mode='r') if shard["num_tokens"] else np.zeros(0, np.int32)
+                )
+                self._tok_offsets.append(np.load(self.shard_dir / f"{name}.tok.idx.npy", mmap_mode='r'))
+
+        # starts[i] = global index of the first record in shard i
+        self._starts = np.cumsum([0] + [s["num_records"] for s in self.manifest["shards"]]).tolist()
+
+    def __len__(self) -> int:
+        return self._starts[-1]
+
+    def _locate(self, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        shard = bisect.bisect_right(self._starts, index) - 1
+        return shard, index - self._starts[shard]
+
+    def raw(self, index: int) -> memoryview:
+        """Record bytes (without the newline) as a zero-copy view"""
+        shard, local = self._locate(index)
+        offsets = self._offsets[shard]
+        return memoryview(self._data[shard][int(offsets[local]):int(offsets[local + 1]) - 1])
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return json.loads(self.raw(index).tobytes())
+
+    def tokens(self, index: int) -> np.ndarray:
+        """Token ids of a record as a zero-copy int32 view"""
+        if not self.has_tokens:
+            raise ValueError("Shards were written without token arrays")
+        shard, local = self._locate(index)
+        offsets = self._tok_offsets[shard]
+        return self._tokens[shard][int(offsets[local]):int(offsets[local + 1])]
+
+    def token_lengths(self) -> np.ndarray:
+        """Token count of every record (e.g. for length-grouped batching)"""
+        if not self.has_tokens:
+            raise ValueError("Shards were written without token arrays")
+        return np.concatenate([np.diff(offsets) for offsets in self._tok_offsets]) if self._tok_offsets else np.zeros(0)
@@ -5,21 +5,38 @@ Core generators for data preprocessing pipeline:
 - ProblemGenerator: Generates algorithm problem descriptions
 - SkeletonGenerator: Generates function skeletons from problems
 - CodeGenerator: Generates function implementations from skeletons
+- ExecutionChecker: Executes implementations against problem examples
 - RatingGenerator: Generates quality ratings for implementations
 - RatingAnalyzer: Analyzes and visualizes quality ratings
 """
 
-from .problemgen import ProblemGenerator
-from .skeletongen import SkeletonGenerator
-from .codegen import CodeGenerator
-from .ratinggen import RatingGenerator
-from .rating_analyzer import RatingAnalyzer
+from typing import TYPE_CHECKING
+
+from ...utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .codegen import CodeGenerator
+    from .execcheck import ExecutionChecker
+    from .problemgen import ProblemGenerator
+    from .rating_analyzer import RatingAnalyzer
+    from .ratinggen import RatingGenerator
+    from .skeletongen import SkeletonGenerator
 
 __all__ = [
     "ProblemGenerator",
     "SkeletonGenerator",
     "CodeGenerator",
+    "ExecutionChecker",
     "RatingGenerator",
     "RatingAnalyzer",
 ]
 
+# Submodules are imported on first attribute access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "ProblemGenerator": ".problemgen",
+    "SkeletonGenerator": ".skeletongen",
+    "CodeGenerator": ".codegen",
+    "ExecutionChecker": ".execcheck",
+    "RatingGenerator": ".ratinggen",
+    "RatingAnalyzer": ".rating_analyzer",
+})
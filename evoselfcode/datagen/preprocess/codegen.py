@@ -6,18 +6,41 @@ Reads problem descriptions and function skeletons, then generates complete imple
 """
 
 import asyncio
-import ast
-import hashlib
 import json
 import logging
 import math
 import re
 from pathlib import Path
-from typing import List, Dict, Optional, Set
-
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
-
+from typing import Dict, List, Optional, Set, Tuple
+
+from ...clients.guided import GuidedDecoding
+from ...clients.limiter import (
+    Priority,
+    format_queue_stats,
+    parse_priority,
+    queue_deadline,
+    requests_per_batch,
+)
 from ...core.client_manager import ClientManager
+from ...core.filter_chain import FilterChain
+from ...utils.logger import RateLimitedLogger
+from ...utils.metrics import StageMetrics, metrics_column
+from ...utils.tracing import TRACER, set_stage, traced
+from ..utils.hashing import compute_hash
+from ..utils.postprocess import PostProcessPool, combine_skeleton_and_body
+from ..utils.validation_cache import ValidationCache
+
+# A function body: indented lines, where the first line after any leading
+# comments is code other than a "def " (a full function definition, see
+# _check_body_format)
+BODY_REGEX = (
+    r'(?:[ \t]+#[^\n]*\n)*'
+    r'[ \t]+(?:[^d#\s]|d(?:[^e\n]|e(?:[^f\n]|f[^ \n])))[^\n]*'
+    r'(?:\n(?:[ \t][^\n]*)?)*'
+)
+
+# Re-requests of a skeleton whose output is not a usable function body
+FORMAT_RETRIES = 1
 
 
 class CodeGenerator:
@@ -36,7 +59,10 @@ class CodeGenerator:
         self,
         client_manager: ClientManager,
         config: dict,
-        logger: Optional[logging.Logger] = None
+        logger: Optional[logging.Logger] = None,
+        postprocess_pool: Optional[PostProcessPool] = None,
+        validation_cache: Optional[ValidationCache] = None,
+        code_filter: Optional[FilterChain] = None
     ):
         """Initialize the code generator.
 
@@ -44,21 +70,24 @@ class CodeGenerator:
             client_manager: Manager for API clients
             config: Configuration dictionary
             logger: Logger instance
+            postprocess_pool: Worker pool for syntax validation
+                (default: a pool of its own, shut down after each run)
+            validation_cache: Parse results by content hash, shared with
+                the other stages (default: in memory for this generator)
+            code_filter: Static-analysis filters applied to implementations
+                that parse (``FilterChain.for_code``; None = no filtering)
         """
         self.client_manager = client_manager
         self.config = config
         self.logger = logger or logging.getLogger(__name__)
-
-    def _compute_hash(self, text: str) -> str:
-        """Compute SHA256 hash as UID.
-
-        Args:
-            text: Text to hash
-
-        Returns:
-            16-character hash string
-        """
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+        self.postprocess_pool = postprocess_pool or PostProcessPool()
+        self.validation_cache = validation_cache or ValidationCache()
+        self.code_filter = code_filter
+        # Implementations removed per filter over the current run
+        self.filter_stats: Dict[str, int] = {}
+        self.metrics = StageMetrics("codegen")
+        # Per-batch progress lines at most every 10s
+        self.progress_log = RateLimitedLogger(self.logger)
 
     def _load_existing_hashes(self, hash_file: Path) -> set:
         """Load existing hashes from file.
@@ -106,21 +135,6 @@ class CodeGenerator:
                 imports.append(stripped)
         return imports
 
-    def _validate_syntax(self, code: str) -> bool:
-        """Validate Python syntax using AST parsing.
-
-        Args:
-            code: Python code string
-
-        Returns:
-            True if valid Python code, False otherwise
-        """
-        try:
-            ast.parse(code)
-            return True
-        except SyntaxError:
-            return False
-
     def _check_body_format(self, body: str) -> bool:
         """Check if body is actually function body (not full function definition).
 
@@ -135,6 +149,14 @@ class CodeGenerator:
             return False
         return True
     
+    def output_constraint(self) -> GuidedDecoding:
+        """Guided decoding constraint matching the expected function body output.
+
+        Returns:
+            Regex constraint for the completion (see BODY_REGEX)
+        """
+        return GuidedDecoding(regex=BODY_REGEX)
+
     def _check_body_has_code(self, body: str) -> bool:
         """Check if body contains actual code (not just empty lines or comments).
         
@@ -156,35 +178,85 @@ class CodeGenerator:
         
         return False
 
-    def _combine_skeleton_and_body(self, skeleton: str, body: str) -> str:
-        """Combine function skeleton with generated body.
+    async def _accept_implementations(
+        self,
+        candidates: List[Dict],
+        validate_syntax: bool,
+        existing_hashes: Set[str],
+        pending_hashes: List[str],
+        pending_write: List[Dict],
+    ) -> Tuple[int, int, int, int]:
+        """Build, dedup and validate implementations, adding accepted ones to the pending lists.
+
+        Duplicates are dropped before validation, and code already in the
+        validation cache is not parsed again; the rest is parsed in the
+        post-processing pool. Implementations that parse then go through
+        the static-analysis filters (their analysis runs in the analyzer's
+        process pool).
 
         Args:
-            skeleton: Function definition with docstring
-            body: Generated function body
+            candidates: Dicts with skeleton_data, problem_text, skeleton_code,
+                function_name and the generated body
+            validate_syntax: Whether to reject code that does not parse
+            existing_hashes: UIDs already written
+            pending_hashes: UIDs accepted but not yet written (extended)
+            pending_write: Records accepted but not yet written (extended)
 
         Returns:
-            Complete function implementation
+            (accepted, duplicates, invalid, filtered) counts
         """
-        # Remove trailing whitespace from skeleton
-        skeleton = skeleton.rstrip()
-        
-        # Ensure body has proper indentation
-        body_lines = body.split('\n')
-        indented_body = []
-        for line in body_lines:
-            if line.strip():  # Non-empty line
-                # Ensure at least 4 spaces indentation
-                if not line.startswith('    '):
-                    indented_body.append('    ' + line.lstrip())
-                else:
-                    indented_body.append(line)
-            else:
-                indented_body.append(line)
-        
-        # Combine
-        return skeleton + '\n' + '\n'.join(indented_body)
-
+        implementations = [combine_skeleton_and_body(c['skeleton_code'], c['body']) for c in candidates]
+        with TRACER.span("hash"):
+            uids = [compute_hash(code) for code in implementations]
+        entries = {}
+        if validate_syntax:
+            unseen = {
+                uid: code for uid, code in zip(uids, implementations)
+                if uid not in existing_hashes and uid not in pending_hashes
+            }
+            with TRACER.span("validate"):
+                entries = await self.validation_cache.validate(unseen, self.postprocess_pool)
+
+        duplicates = invalid = 0
+        records = []
+        batch_uids = set()
+        for candidate, full_implementation, uid in zip(candidates, implementations, uids):
+            # Check duplicates
+            if uid in existing_hashes or uid in pending_hashes or uid in batch_uids:
+                duplicates += 1
+                self.metrics.duplicates.inc()
+                continue
+
+            if validate_syntax and not entries[uid].parse_ok:
+                invalid += 1
+                self.metrics.invalid.inc()
+                self.logger.debug("Invalid syntax (skipping): %s", uid)
+                continue
+
+            batch_uids.add(uid)
+            records.append({
+                "uid": uid,
+                "skeleton_uid": candidate['skeleton_data'].get("uid"),
+                "source": candidate['skeleton_data'].get("source", "UNKNOWN"),
+                "problem_text": candidate['problem_text'],
+                "code": full_implementation,
+                "function_name": candidate['function_name']
+            })
+
+        filtered = 0
+        if self.code_filter is not None and records:
+            kept = await self.code_filter.apply_async(records, extract_key=lambda r: r["code"])
+            filtered = len(records) - len(kept)
+            for name, removed in self.code_filter.get_stats().items():
+                self.filter_stats[name] = self.filter_stats.get(name, 0) + removed
+            self.metrics.filtered.inc(filtered)
+            records = kept
+
+        pending_hashes.extend(r["uid"] for r in records)
+        pending_write.extend(records)
+        return len(records), duplicates, invalid, filtered
+
+    @traced("write_jsonl", always=True)
     async def _write_jsonl(self, file_path: Path, data: List[Dict]):
         """Write JSONL data asynchronously.
 
@@ -197,7 +269,8 @@ class CodeGenerator:
                 for item in data:
                     f.write(json.dumps(item, ensure_ascii=False) + '\n')
 
-        await asyncio.to_thread(_write)
+        with self.metrics.writing(len(data)):
+            await asyncio.to_thread(_write)
 
     async def _write_hashes(self, file_path: Path, hashes: List[str]):
         """Write hashes asynchronously.
@@ -299,6 +372,9 @@ class CodeGenerator:
         Returns:
             List of generated implementation dictionaries
         """
+        set_stage(self.metrics.stage)
+        # Previews are only built when DEBUG is enabled
+        debug = self.logger.isEnabledFor(logging.DEBUG)
         self.logger.info(f"=== Code Generator ===")
         self.logger.info(f"Input: {input_file}")
         self.logger.info(f"Output: {output_dir}")
@@ -334,13 +410,63 @@ class CodeGenerator:
         client = self.client_manager.completion_client
         self.logger.info(f"Client: {client.base_url}, Model: {client.model}")
 
-        # Calculate batching
-        max_concurrent = getattr(client.semaphore, '_value', 5)
-        num_batches = math.ceil(len(skeletons) / max_concurrent)
+        # Calculate batching: more requests than slots, so the limiter has a queue to order
+        max_concurrent = getattr(client, 'max_concurrent', 5)
+        batch_size = requests_per_batch(max_concurrent, self.config.get('queue_factor', 4))
+        num_batches = math.ceil(len(skeletons) / batch_size)
 
-        self.logger.info(f"Batching: {num_batches} batches, max_concurrent={max_concurrent}")
+        self.logger.info(f"Batching: {num_batches} batches of {batch_size} requests, max_concurrent={max_concurrent}")
         self.logger.info(f"Parameters: temp={temperature}, top_p={top_p}, max_tokens={max_tokens}")
 
+        request_kwargs = {
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p,
+            "n": 1,
+            "stop": stop,
+            "priority": parse_priority(self.config.get('priority'), Priority.CODEGEN),
+        }
+        deadline_s = self.config.get('queue_deadline_s')
+
+        # Server-side guided decoding keeps outputs in body format (fewer retries)
+        guided = GuidedDecoding.from_config(self.config.get('guided_decoding'), default=self.output_constraint())
+        if guided is not None:
+            request_kwargs["guided"] = guided
+            self.logger.info(f"Guided decoding: {guided.to_extra_body()}")
+
+        async def request_bodies(skeleton_data: Dict) -> Tuple[List[str], int]:
+            """Well-formed bodies for one skeleton and the number of retries it took.
+
+            A malformed output (a full function, or no code) is re-requested
+            at retry priority as soon as it arrives, while the rest of the
+            batch is still queued, so the retry is served first.
+            """
+            function_name = skeleton_data.get(function_name_key, "")
+            prompt = self._build_prompt(skeleton_data.get(problem_key, ""), skeleton_data.get(skeleton_key, ""), prompt_template)
+            kwargs = dict(request_kwargs)
+            for attempt in range(FORMAT_RETRIES + 1):
+                results = await client.complete_async(prompt, **kwargs, deadline=queue_deadline(deadline_s))
+                bodies = []
+                malformed = 0
+                for result in results:
+                    body_code = result.get("text", "").strip()
+                    if debug:
+                        self.logger.debug("[%s] Output (attempt %s, first 200 chars): %s", function_name, attempt + 1, body_code[:200])
+                    if not body_code:
+                        self.logger.debug("[%s] Empty response", function_name)
+                    elif not self._check_body_format(body_code):
+                        self.logger.debug("[%s] Wrong format", function_name)
+                        malformed += 1
+                    elif not self._check_body_has_code(body_code):
+                        self.logger.debug("[%s] Empty body (no actual code)", function_name)
+                        malformed += 1
+                    else:
+                        bodies.append(body_code)
+                if bodies or not malformed or attempt == FORMAT_RETRIES:
+                    return bodies, attempt
+                kwargs["priority"] = Priority.RETRY
+            return [], FORMAT_RETRIES
+
         # Generation loop
         all_results = []
         pending_write = []
@@ -348,6 +474,19 @@ class CodeGenerator:
         total_processed = 0
         total_duplicates = 0
         total_invalid_syntax = 0
+        total_filtered = 0
+        total_retries = 0
+        total_failed = 0
+        self.filter_stats = {}
+        cache_hits, cache_misses = self.validation_cache.hits, self.validation_cache.misses
+
+        from rich.progress import (
+            BarColumn,
+            Progress,
+            SpinnerColumn,
+            TextColumn,
+            TimeRemainingColumn,
+        )
 
         with Progress(
             SpinnerColumn(),
@@ -355,6 +494,7 @@ class CodeGenerator:
             BarColumn(),
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TimeRemainingColumn(),
+            metrics_column("codegen"),
         ) as progress:
             task_id = progress.add_task(
                 "[cyan]Generating function implementations...",
@@ -363,175 +503,48 @@ class CodeGenerator:
 
             # Process in batches
             for batch_idx in range(num_batches):
-                batch_start = batch_idx * max_concurrent
-                batch_end = min(batch_start + max_concurrent, len(skeletons))
+                batch_start = batch_idx * batch_size
+                batch_end = min(batch_start + batch_size, len(skeletons))
                 batch_skeletons = skeletons[batch_start:batch_end]
 
-                # Build prompts for batch
-                batch_prompts = [
-                    self._build_prompt(
-                        s.get(problem_key, ""),
-                        s.get(skeleton_key, ""),
-                        prompt_template
-                    )
-                    for s in batch_skeletons
-                ]
-
-                self.logger.info(f"[Batch {batch_idx+1}/{num_batches}] Processing {len(batch_prompts)} skeletons...")
+                self.progress_log.info("[Batch %s/%s] Processing %s skeletons...", batch_idx + 1, num_batches, len(batch_skeletons))
 
                 try:
-                    # Call API with batch
-                    batch_results = await client.complete_batch_async(
-                        prompts=batch_prompts,
-                        max_tokens=max_tokens,
-                        temperature=temperature,
-                        top_p=top_p,
-                        n=1,
-                        stop=stop
+                    # One request (plus its retries) per skeleton; a failed item does not fail the batch
+                    batch_results = await asyncio.gather(
+                        *(request_bodies(s) for s in batch_skeletons), return_exceptions=True
                     )
 
-                    # Collect tasks that need retry
-                    retry_tasks = []
-                    
-                    # Process results
-                    self.logger.debug(f"[Batch {batch_idx+1}/{num_batches}] Processing {len(batch_results)} results")
-                    for idx, result_list in enumerate(batch_results):
-                        skeleton_data = batch_skeletons[idx]
-                        problem_text = skeleton_data.get(problem_key, "")
-                        skeleton_code = skeleton_data.get(skeleton_key, "")
+                    # Well-formed bodies to post-process
+                    candidates = []
+                    for skeleton_data, outcome in zip(batch_skeletons, batch_results):
                         function_name = skeleton_data.get(function_name_key, "")
+                        if isinstance(outcome, BaseException):
+                            self.logger.warning(f"[{function_name}] Request failed: {outcome!r}")
+                            total_failed += 1
+                            continue
+                        bodies, retries = outcome
+                        total_retries += retries
+                        candidates.extend({
+                            'skeleton_data': skeleton_data,
+                            'problem_text': skeleton_data.get(problem_key, ""),
+                            'skeleton_code': skeleton_data.get(skeleton_key, ""),
+                            'function_name': function_name,
+                            'body': body_code
+                        } for body_code in bodies)
+
+                    # Combine, hash, dedup and validate (only valid code is accepted)
+                    _, duplicates, invalid, filtered = await self._accept_implementations(
+                        candidates, validate_syntax, existing_hashes, pending_hashes, pending_write
+                    )
+                    total_duplicates += duplicates
+                    total_invalid_syntax += invalid
+                    total_filtered += filtered
 
-                        for result in result_list:
-                            body_code = result.get("text", "").strip()
-                            
-                            # Log raw model output
-                            self.logger.debug(f"[{function_name}] Raw output (first 200 chars): {body_code[:200]}")
-
-                            if not body_code:
-                                self.logger.debug(f"[{function_name}] Empty response")
-                                continue
-
-                            # Check if format is correct (should be function body, not full function)
-                            if not self._check_body_format(body_code):
-                                self.logger.debug(f"[{function_name}] Wrong format, adding to retry queue")
-                                self.logger.debug(f"[{function_name}] Wrong format output: {body_code[:300]}")
-                                # Add to retry queue (up to 3 attempts)
-                                retry_tasks.append({
-                                    'skeleton_data': skeleton_data,
-                                    'problem_text': problem_text,
-                                    'skeleton_code': skeleton_code,
-                                    'function_name': function_name,
-                                    'attempts': 0,
-                                    'max_attempts': 3
-                                })
-                                continue
-                            
-                            # Check if body contains actual code
-                            if not self._check_body_has_code(body_code):
-                                self.logger.debug(f"[{function_name}] Empty body (no actual code), adding to retry queue")
-                                retry_tasks.append({
-                                    'skeleton_data': skeleton_data,
-                                    'problem_text': problem_text,
-                                    'skeleton_code': skeleton_code,
-                                    'function_name': function_name,
-                                    'attempts': 0,
-                                    'max_attempts': 3
-                                })
-                                continue
-
-                            # Combine skeleton and body
-                            full_implementation = self._combine_skeleton_and_body(
-                                skeleton_code,
-                                body_code
-                            )
-
-                            # Compute hash
-                            uid = self._compute_hash(full_implementation)
-
-                            # Check duplicates
-                            if uid in existing_hashes or uid in pending_hashes:
-                                total_duplicates += 1
-                                continue
-
-                            # Validate syntax
-                            if validate_syntax:
-                                is_valid = self._validate_syntax(full_implementation)
-                                if not is_valid:
-                                    total_invalid_syntax += 1
-                                    self.logger.debug(f"Invalid syntax (skipping): {uid}")
-                                    continue  # Skip invalid implementations
-
-                            # Add to pending (only valid code reaches here)
-                            pending_hashes.append(uid)
-                            pending_write.append({
-                                "uid": uid,
-                                "source": skeleton_data.get("source", "UNKNOWN"),
-                                "problem_text": problem_text,
-                                "code": full_implementation,
-                                "function_name": function_name
-                            })
-                    
-                    # Process retry queue asynchronously
-                    if retry_tasks:
-                        self.logger.debug(f"Processing {len(retry_tasks)} retry tasks...")
-                        retry_prompts = [
-                            self._build_prompt(task['problem_text'], task['skeleton_code'], prompt_template)
-                            for task in retry_tasks
-                        ]
-                        
-                        try:
-                            retry_results = await client.complete_batch_async(
-                                prompts=retry_prompts,
-                                max_tokens=max_tokens,
-                                temperature=temperature,
-                                top_p=top_p,
-                                n=1,
-                                stop=stop
-                            )
-                            
-                            retry_success_count = 0
-                            for task_idx, result_list in enumerate(retry_results):
-                                task = retry_tasks[task_idx]
-                                task['attempts'] += 1
-                                
-                                for result in result_list:
-                                    retry_body = result.get("text", "").strip()
-                                    self.logger.debug(f"[{task['function_name']}] Retry {task['attempts']} output: {retry_body[:200]}")
-                                    
-                                    if retry_body and self._check_body_format(retry_body) and self._check_body_has_code(retry_body):
-                                        # Success! Process this result
-                                        full_implementation = self._combine_skeleton_and_body(
-                                            task['skeleton_code'],
-                                            retry_body
-                                        )
-                                        uid = self._compute_hash(full_implementation)
-                                        
-                                        if uid not in existing_hashes and uid not in pending_hashes:
-                                            if validate_syntax and not self._validate_syntax(full_implementation):
-                                                total_invalid_syntax += 1
-                                                continue
-                                            
-                                            pending_hashes.append(uid)
-                                            pending_write.append({
-                                                "uid": uid,
-                                                "source": task['skeleton_data'].get("source", "UNKNOWN"),
-                                                "problem_text": task['problem_text'],
-                                                "code": full_implementation,
-                                                "function_name": task['function_name']
-                                            })
-                                            retry_success_count += 1
-                                            self.logger.debug(f"✓ Retry succeeded for {task['function_name']}")
-                                        break
-                            
-                            self.logger.debug(f"Retry batch: {retry_success_count}/{len(retry_tasks)} succeeded")
-                            
-                        except Exception as e:
-                            self.logger.error(f"Retry batch failed: {e}")
-
-                    total_processed += len(batch_prompts)
-                    progress.update(task_id, advance=len(batch_prompts))
-                    
-                    self.logger.debug(f"[Batch {batch_idx+1}/{num_batches}] Pending write: {len(pending_write)}, batch_write_size: {batch_write_size}")
+                    total_processed += len(batch_skeletons)
+                    progress.update(task_id, advance=len(batch_skeletons))
+
+                    self.logger.debug("[Batch %s/%s] Pending write: %s, batch_write_size: %s", batch_idx + 1, num_batches, len(pending_write), batch_write_size)
 
                     # Incremental write
                     if len(pending_write) >= batch_write_size:
@@ -546,7 +559,7 @@ class CodeGenerator:
                         pending_write = []
                         pending_hashes = []
 
-                        self.logger.info(f"✅ Progress: {len(all_results)} implementations generated")
+                        self.progress_log.info("✅ Progress: %s implementations generated", len(all_results))
 
                 except Exception as e:
                     self.logger.error(f"Error in batch {batch_idx+1}: {e}", exc_info=True)
@@ -560,13 +573,26 @@ class CodeGenerator:
             # Wait for writes to complete
             await asyncio.sleep(0.5)
 
+        self.postprocess_pool.close()
+        if self.code_filter is not None and self.code_filter.analyzer is not None:
+            self.code_filter.analyzer.close()
+
         # Summary
         self.logger.info(f"✅ Code generation complete!")
         self.logger.info(f"  Total unique implementations: {len(all_results)}")
         self.logger.info(f"  Duplicates skipped: {total_duplicates}")
         self.logger.info(f"  Invalid syntax: {total_invalid_syntax}")
+        self.logger.info(f"  Format retries: {total_retries}, failed requests: {total_failed}")
+        if self.code_filter is not None:
+            per_filter = ", ".join(f"{name}={count}" for name, count in self.filter_stats.items() if count)
+            self.logger.info(f"  Filtered by static checks: {total_filtered}" + (f" ({per_filter})" if per_filter else ""))
+        self.logger.info(f"  Validation cache: {self.validation_cache.hits - cache_hits} hits, "
+                         f"{self.validation_cache.misses - cache_misses} parsed")
         self.logger.info(f"  Output: {output_file}")
         self.logger.info(f"  Hash table: {hash_file}")
+        if hasattr(client, "queue_stats"):
+            for line in format_queue_stats(client.queue_stats()):
+                self.logger.info(f"  {line}")
 
         return all_results
 
@@ -0,0 +1,254 @@
+"""
+Execution Checker (ExecCheck)
+
+Runs generated function implementations against the examples embedded in
+their problem descriptions inside the sandbox pool, and records
+passed / failed / error / timeout per implementation. Cheap execution
+results let the rating stage skip obviously broken code.
+"""
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ...sandbox import SandboxPool, build_example_program, extract_examples
+from ...utils.logger import RateLimitedLogger
+from ...utils.metrics import StageMetrics, metrics_column
+from ...utils.tracing import TRACER, set_stage, traced
+
+STATUS_NO_EXAMPLES = "no_examples"
+
+
+class ExecutionChecker:
+    """
+    Checks function implementations by executing them on problem examples.
+
+    Features:
+    - Example extraction from problem descriptions
+    - Sandboxed parallel execution (fork-server worker pool)
+    - UID-based resume
+    - Incremental writing to disk
+    """
+
+    def __init__(
+        self,
+        sandbox: SandboxPool,
+        config: dict,
+        logger: Optional[logging.Logger] = None
+    ):
+        """Initialize the execution checker.
+
+        Args:
+            sandbox: Sandbox worker pool
+            config: Configuration dictionary
+            logger: Logger instance
+        """
+        self.sandbox = sandbox
+        self.config = config
+        self.logger = logger or logging.getLogger(__name__)
+        self.metrics = StageMetrics("execcheck")
+        # Per-batch progress lines at most every 10s
+        self.progress_log = RateLimitedLogger(self.logger)
+
+    def _load_existing_hashes(self, hash_file: Path) -> set:
+        """Load UIDs of already-checked implementations.
+
+        Args:
+            hash_file: Path to hash table file
+
+        Returns:
+            Set of existing UIDs
+        """
+        if not hash_file.exists():
+            return set()
+
+        with open(hash_file, 'r', encoding='utf-8') as f:
+            return set(line.strip() for line in f if line.strip())
+
+    def _load_implementations(self, input_file: Path, skip_uids: set) -> List[Dict]:
+        """Load implementations from JSONL file.
+
+        Args:
+            input_file: Input JSONL file path
+            skip_uids: UIDs to skip (already checked)
+
+        Returns:
+            List of implementation dictionaries
+        """
+        implementations = []
+
+        if not input_file.exists():
+            self.logger.error(f"Input file not found: {input_file}")
+            return implementations
+
+        with open(input_file, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    self.logger.warning(f"Failed to parse JSON line {line_num}: {e}")
+                    continue
+                if item.get("uid") not in skip_uids:
+                    implementations.append(item)
+
+        return implementations
+
+    @traced("write_jsonl", always=True)
+    async def _write_jsonl(self, file_path: Path, data: List[Dict]):
+        """Write JSONL data asynchronously.
+
+        Args:
+            file_path: Output file path
+            data: List of dictionaries to write
+        """
+        def _write():
+            with open(file_path, 'a', encoding='utf-8') as f:
+                for item in data:
+                    f.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+        with self.metrics.writing(len(data)):
+            await asyncio.to_thread(_write)
+
+    async def _write_hashes(self, file_path: Path, hashes: List[str]):
+        """Write hashes asynchronously.
+
+        Args:
+            file_path: Hash table file path
+            hashes: List of hash strings
+        """
+        def _write():
+            with open(file_path, 'a', encoding='utf-8') as f:
+                for h in hashes:
+                    f.write(h + '\n')
+
+        await asyncio.to_thread(_write)
+
+    async def check(
+        self,
+        input_file: Path,
+        output_dir: Path,
+        num_samples: Optional[int] = None,
+        batch_size: int = 4096,
+        max_examples: int = 8,
+        timeout_s: Optional[float] = None,
+        out_file_name: str = "executions.jsonl",
+        hash_table_name: str = "hash_table.txt",
+    ) -> List[Dict]:
+        """Execute implementations against their problem examples.
+
+        Args:
+            input_file: Input JSONL file with implementations
+            output_dir: Output directory for execution results
+            num_samples: Number of implementations to check (None = all)
+            batch_size: Implementations per sandbox batch (and per disk write)
+            max_examples: Maximum examples used per problem
+            timeout_s: Wall-clock limit per implementation (default: sandbox setting)
+            out_file_name: Name of the results file in ``output_dir``
+            hash_table_name: Name of the hash table file in ``output_dir``
+
+        Returns:
+            List of execution result dictionaries
+        """
+        set_stage(self.metrics.stage)
+        self.logger.info("=== Execution Checker ===")
+        self.logger.info(f"Input: {input_file}")
+        self.logger.info(f"Output: {output_dir}")
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / out_file_name
+        hash_file = output_dir / hash_table_name
+
+        existing_hashes = self._load_existing_hashes(hash_file)
+        self.logger.info(f"Loaded {len(existing_hashes)} existing results")
+
+        implementations = self._load_implementations(input_file, existing_hashes)
+        self.logger.info(f"Loaded {len(implementations)} unchecked implementations")
+
+        if num_samples is not None:
+            implementations = implementations[:num_samples]
+
+        if not implementations:
+            self.logger.warning("No implementations to check")
+            return []
+
+        self.logger.info(
+            f"Sandbox: workers={self.sandbox.num_workers}, chunk_size={self.sandbox.chunk_size}, "
+            f"timeout={timeout_s or self.sandbox.timeout_s}s"
+        )
+
+        all_results = []
+        status_counts: Dict[str, int] = {}
+
+        from rich.progress import (
+            BarColumn,
+            Progress,
+            SpinnerColumn,
+            TextColumn,
+            TimeRemainingColumn,
+        )
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+            TimeRemainingColumn(),
+            metrics_column("execcheck"),
+        ) as progress:
+            task_id = progress.add_task(
+                "[cyan]Executing implementations...",
+                total=len(implementations)
+            )
+
+            for batch_start in range(0, len(implementations), batch_size):
+                batch = implementations[batch_start:batch_start + batch_size]
+
+                batch_results: List[Optional[Dict]] = []
+                programs = []
+                program_slots = []
+                for impl in batch:
+                    record = {
+                        "uid": impl.get("uid", ""),
+                        "source": impl.get("source", "UNKNOWN"),
+                        "function_name": impl.get("function_name", ""),
+                    }
+                    examples = extract_examples(impl.get("problem_text", ""), max_examples)
+                    if not examples or not record["function_name"]:
+                        record.update(status=STATUS_NO_EXAMPLES, num_examples=0, num_passed=0, error=None)
+                    else:
+                        record["num_examples"] = len(examples)
+                        programs.append(build_example_program(impl.get("code", ""), record["function_name"], examples))
+                        program_slots.append(len(batch_results))
+                    batch_results.append(record)
+
+                with TRACER.span("sandbox", always=True, programs=len(programs)):
+                    exec_results = await asyncio.to_thread(self.sandbox.run, programs, timeout_s)
+                for slot, exec_result in zip(program_slots, exec_results):
+                    record = batch_results[slot]
+                    record["status"] = exec_result.status
+                    record["num_passed"] = exec_result.passed or 0
+                    record["error"] = exec_result.error
+
+                for record in batch_results:
+                    status_counts[record["status"]] = status_counts.get(record["status"], 0) + 1
+
+                await self._write_jsonl(output_file, batch_results)
+                await self._write_hashes(hash_file, [r["uid"] for r in batch_results])
+                all_results.extend(batch_results)
+
+                progress.update(task_id, advance=len(batch))
+                self.progress_log.info("✅ Progress: %s implementations checked", len(all_results))
+
+        # Summary
+        self.logger.info("✅ Execution check complete!")
+        self.logger.info(f"  Total checked: {len(all_results)}")
+        for status, count in sorted(status_counts.items()):
+            self.logger.info(f"  {status}: {count}")
+        self.logger.info(f"  Output: {output_file}")
+        self.logger.info(f"  Hash table: {hash_file}")
+
+        return all_results
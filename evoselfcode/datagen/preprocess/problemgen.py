@@ -6,17 +6,19 @@ Supports both FIM (Fill-in-the-Middle) and L2R (Left-to-Right) generation modes.
 """
 
 import asyncio
-import hashlib
 import json
 import logging
 import math
 from pathlib import Path
-from typing import List, Dict, Literal, Optional
-
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
+from typing import Dict, List, Literal, Optional
 
+from ...clients.limiter import Priority, format_queue_stats, parse_priority
 from ...core.client_manager import ClientManager
 from ...core.prompt_builder import PromptBuilder
+from ...utils.logger import RateLimitedLogger
+from ...utils.metrics import StageMetrics, metrics_column
+from ...utils.tracing import TRACER, set_stage, traced
+from ..utils.hashing import compute_hash
 
 
 class ProblemGenerator:
@@ -49,17 +51,9 @@ class ProblemGenerator:
         self.prompt_builder = prompt_builder
         self.config = config
         self.logger = logger or logging.getLogger(__name__)
-    
-    def _compute_hash(self, text: str) -> str:
-        """Compute SHA256 hash as UID.
-        
-        Args:
-            text: Text to hash
-            
-        Returns:
-            16-character hash string
-        """
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+        self.metrics = StageMetrics("problem")
+        # Per-batch progress lines at most every 10s
+        self.progress_log = RateLimitedLogger(self.logger)
     
     def _load_existing_hashes(self, hash_file: Path) -> set:
         """Load existing hashes from file.
@@ -76,6 +70,7 @@ class ProblemGenerator:
         with open(hash_file, 'r', encoding='utf-8') as f:
             return set(line.strip() for line in f if line.strip())
     
+    @traced("write_jsonl", always=True)
     async def _write_jsonl(self, file_path: Path, data: List[Dict]):
         """Write JSONL data asynchronously.
         
@@ -88,7 +83,8 @@ class ProblemGenerator:
                 for item in data:
                     f.write(json.dumps(item, ensure_ascii=False) + '\n')
         
-        await asyncio.to_thread(_write)
+        with self.metrics.writing(len(data)):
+            await asyncio.to_thread(_write)
     
     async def _write_hashes(self, file_path: Path, hashes: List[str]):
         """Write hashes asynchronously.
@@ -130,6 +126,7 @@ class ProblemGenerator:
         Returns:
             List of generated problem dictionaries
         """
+        set_stage(self.metrics.stage)
         self.logger.info(f"=== Problem Generator: {mode} Mode ===")
         self.logger.info(f"Target samples: {num_samples}")
         self.logger.info(f"Output directory: {output_dir}")
@@ -155,8 +152,8 @@ class ProblemGenerator:
         
         self.logger.debug(f"Base prompt preview: {base_prompt[:100]}...")
         
-        # Calculate batch size from client's semaphore
-        max_concurrent = getattr(client.semaphore, '_value', 5)
+        # Calculate batch size from client's concurrency limit
+        max_concurrent = getattr(client, 'max_concurrent', 5)
         num_batches = math.ceil(num_samples / max_concurrent)
         
         self.logger.info(f"Batching: {num_batches} batches, max_concurrent={max_concurrent}")
@@ -169,12 +166,21 @@ class ProblemGenerator:
         total_generated = 0
         total_duplicates = 0
         
+        from rich.progress import (
+            BarColumn,
+            Progress,
+            SpinnerColumn,
+            TextColumn,
+            TimeRemainingColumn,
+        )
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             BarColumn(),
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TimeRemainingColumn(),
+            metrics_column("problem"),
         ) as progress:
             task_id = progress.add_task(
                 f"[cyan]Generating {mode} problems...",
@@ -192,7 +198,7 @@ class ProblemGenerator:
                 # Prepare batch prompts
                 batch_prompts = [base_prompt] * batch_size
                 
-                self.logger.info(f"[Batch {batch_idx+1}/{num_batches}] Requesting {batch_size} samples...")
+                self.progress_log.info("[Batch %s/%s] Requesting %s samples...", batch_idx + 1, num_batches, batch_size)
                 
                 # Call API with batch
                 try:
@@ -202,10 +208,11 @@ class ProblemGenerator:
                         temperature=temperature,
                         top_p=top_p,
                         n=1,
-                        stop=stop
+                        stop=stop,
+                        priority=parse_priority((self.config.get('namegen') or {}).get('priority'), Priority.PROBLEM)
                     )
                     
-                    self.logger.info(f"[Batch {batch_idx+1}/{num_batches}] Received {len(batch_results)} responses")
+                    self.progress_log.info("[Batch %s/%s] Received %s responses", batch_idx + 1, num_batches, len(batch_results))
                     
                     # Process results
                     for result_list in batch_results:
@@ -216,11 +223,13 @@ class ProblemGenerator:
                                 continue
                             
                             # Compute hash
-                            uid = self._compute_hash(raw_text)
+                            with TRACER.span("hash"):
+                                uid = compute_hash(raw_text)
                             
                             # Check duplicates
                             if uid in existing_hashes or uid in pending_hashes:
                                 total_duplicates += 1
+                                self.metrics.duplicates.inc()
                                 continue
                             
                             # Add to pending
@@ -238,7 +247,7 @@ class ProblemGenerator:
                     # Incremental write
                     if len(pending_write) >= batch_write_size:
                         write_count = len(pending_write)
-                        self.logger.info(f"Writing {write_count} samples to disk...")
+                        self.progress_log.info("Writing %s samples to disk...", write_count)
                         
                         await self._write_jsonl(output_file, pending_write)
                         await self._write_hashes(hash_file, pending_hashes)
@@ -249,7 +258,7 @@ class ProblemGenerator:
                         pending_write = []
                         pending_hashes = []
                         
-                        self.logger.info(f"✅ Wrote {write_count} samples (total unique: {len(all_results)})")
+                        self.progress_log.info("✅ Wrote %s samples (total unique: %s)", write_count, len(all_results))
                 
                 except Exception as e:
                     self.logger.error(f"Error in batch {batch_idx+1}: {e}", exc_info=True)
@@ -270,6 +279,9 @@ class ProblemGenerator:
         self.logger.info(f"  Duplicates skipped: {total_duplicates}")
         self.logger.info(f"  Output: {output_file}")
         self.logger.info(f"  Hash table: {hash_file}")
+        if hasattr(client, "queue_stats"):
+            for line in format_queue_stats(client.queue_stats()):
+                self.logger.info(f"  {line}")
         
         return all_results
 
@@ -1,32 +1,516 @@
 """
 Rating Analysis and Visualization Module
 
-Analyzes quality ratings from FIM and L2R generation modes and produces:
+Analyzes quality ratings from any number of sources (FIM vs L2R, or
+successive self-training iterations) and produces:
 - Radar charts comparing average scores across 5 dimensions
 - Distribution histograms for each dimension
+- Score drift across sources, dimension correlations and joint histograms
+
+Scores are loaded column-wise: only the five score fields are pulled out of
+each ratings.jsonl (streamed in newline-aligned byte blocks) into an N x 5
+int8 matrix, cached next to the source as ``<name>.scores.npz``. Missing or
+out-of-range scores are stored as 0.
+
+Comparative analysis works on sufficient statistics instead: the joint
+count of every 5-dimension score combination (6^5 buckets, 0 = missing),
+from which distributions, pairwise histograms and correlations follow.
+They are cached as ``<name>.stats.npz`` together with the byte offset they
+cover, so a ratings file that has grown since is only scanned from there.
+Charts are rendered in parallel worker processes.
 """
 
+import hashlib
 import json
 import logging
+import multiprocessing as mp
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib import font_manager
 
+# Score dimensions, in column order of the score matrix
+DIMENSIONS = ('problem_design', 'function_definition', 'correctness', 'efficiency', 'readability')
+DIMENSION_TITLES = (
+    'Problem Design Quality',
+    'Function Definition & Naming',
+    'Algorithmic Correctness',
+    'Algorithmic Efficiency',
+    'Code Readability & Structure',
+)
+# Short axis labels for the radar chart
+DIMENSION_LABELS = ('Problem\nDesign', 'Function\nDefinition', 'Correctness', 'Efficiency', 'Readability')
+MIN_SCORE = 1
+MAX_SCORE = 5
+
+SCORE_CACHE_VERSION = 1
+STATS_CACHE_VERSION = 1
+_READ_CHUNK_BYTES = 16 * 1024 * 1024
+# Leading bytes hashed to detect a ratings file rewritten since it was cached
+_FINGERPRINT_BYTES = 64 * 1024
+
+# Joint histogram buckets: one axis per dimension, score 0 (missing) .. MAX_SCORE
+_JOINT_SHAPE = (MAX_SCORE + 1,) * len(DIMENSIONS)
+
+_COLORS = ('#2E86AB', '#A23B72', '#F18F01', '#6A994E', '#C73E1D', '#8E7DBE', '#3B1F2B', '#577590')
+
+# Key of the ratings object; quotes inside JSON strings are always escaped,
+# so this cannot match text embedded in code or problem fields
+_RATINGS_KEY = b'"ratings":'
+# Continuous scores added by logprob rating
+_EXPECTED_KEY = b'"expected_ratings":'
+# Byte layout of the object as RatingGenerator writes it with single-digit
+# scores; rows matching it are decoded as a fixed-width numpy view
+_RATINGS_TEMPLATE = b' ' + json.dumps({dim: 0 for dim in DIMENSIONS}).encode()
+_TEMPLATE_BYTES = np.frombuffer(_RATINGS_TEMPLATE, dtype=np.uint8)
+_DIGIT_POS = np.flatnonzero(_TEMPLATE_BYTES == ord('0'))
+_FIXED_POS = np.flatnonzero(_TEMPLATE_BYTES != ord('0'))
+# Same layout with arbitrary whitespace and integer/null scores
+_RATINGS_FIXED_RE = re.compile(
+    rb'\s*\{\s*'
+    + rb',\s*'.join(rb'"' + dim.encode() + rb'":\s*(\d{1,8}|null)' for dim in DIMENSIONS)
+    + rb'\s*\}'
+)
+
+
+def _iter_blocks(path: Path, start: int = 0, chunk_bytes: int = _READ_CHUNK_BYTES) -> Iterator[bytes]:
+    """Yield newline-aligned blocks of a file from byte offset ``start``.
+
+    A trailing partial line (no final newline) is yielded last, on its own.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        pending = b''
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            block = pending + block
+            cut = block.rfind(b'\n')
+            if cut < 0:
+                pending = block
+                continue
+            pending = block[cut + 1:]
+            yield block[:cut + 1]
+        if pending:
+            yield pending
+
+
+def _fingerprint(path: Path, length: int) -> str:
+    """Hash of the first ``length`` bytes of a file (capped at _FINGERPRINT_BYTES)."""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(min(length, _FINGERPRINT_BYTES))).hexdigest()
+
+
+def _valid_scores(values: np.ndarray) -> np.ndarray:
+    """Map an integer array to int8 scores, with 0 for out-of-range values."""
+    in_range = (values >= MIN_SCORE) & (values <= MAX_SCORE)
+    return np.where(in_range, values, 0).astype(np.int8)
+
+
+def _parse_ratings_object(piece: bytes) -> List[int]:
+    """Parse the ratings object at the start of ``piece`` (text after the key)."""
+    end = piece.find(b'}')
+    obj = piece[:end + 1] if end >= 0 else b''
+    match = _RATINGS_FIXED_RE.fullmatch(obj)
+    if match:
+        return [0 if value == b'null' else int(value) for value in match.groups()]
+
+    try:
+        scores = json.loads(obj)
+    except json.JSONDecodeError:
+        return [0] * len(DIMENSIONS)
+    values = []
+    for dim in DIMENSIONS:
+        value = scores.get(dim) if isinstance(scores, dict) else None
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool) and value == int(value)
+        values.append(int(value) if valid else 0)
+    return values
+
+
+def _scan_scores(block: bytes) -> np.ndarray:
+    """Extract the N x 5 score matrix of all records in a block of JSONL."""
+    pieces = block.split(_RATINGS_KEY)[1:]
+    if not pieces:
+        return np.zeros((0, len(DIMENSIONS)), dtype=np.int8)
+
+    width = len(_RATINGS_TEMPLATE)
+    heads = b''.join([piece[:width].ljust(width) for piece in pieces])
+    view = np.frombuffer(heads, dtype=np.uint8).reshape(len(pieces), width)
+    scores = view[:, _DIGIT_POS].astype(np.int64) - ord('0')
+    matches = (
+        (view[:, _FIXED_POS] == _TEMPLATE_BYTES[_FIXED_POS]).all(axis=1)
+        & ((scores >= 0) & (scores <= 9)).all(axis=1)
+    )
+    for row in np.flatnonzero(~matches):
+        scores[row] = _parse_ratings_object(pieces[row])
+    return _valid_scores(scores)
+
+
+def _scan_expected_scores(block: bytes) -> np.ndarray:
+    """Extract the N x 5 float32 expected score matrix (NaN = missing) of a block of JSONL."""
+    pieces = block.split(_EXPECTED_KEY)[1:]
+    matrix = np.full((len(pieces), len(DIMENSIONS)), np.nan, dtype=np.float32)
+    for row, piece in enumerate(pieces):
+        end = piece.find(b'}')
+        try:
+            scores = json.loads(piece[:end + 1]) if end >= 0 else None
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(scores, dict):
+            continue
+        for col, dim in enumerate(DIMENSIONS):
+            value = scores.get(dim)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and MIN_SCORE <= value <= MAX_SCORE:
+                matrix[row, col] = value
+    return matrix
+
+
+def score_counts(scores: np.ndarray) -> np.ndarray:
+    """Count scores per dimension.
+
+    Args:
+        scores: N x 5 score matrix
+
+    Returns:
+        5 x (MAX_SCORE + 1) int64 array; column 0 counts missing scores
+    """
+    return np.stack([
+        np.bincount(scores[:, col], minlength=MAX_SCORE + 1)[:MAX_SCORE + 1]
+        for col in range(len(DIMENSIONS))
+    ]).astype(np.int64)
+
+
+def stats_from_counts(counts: np.ndarray) -> Dict[str, float]:
+    """Compute mean, median, std and count of one dimension from its score counts.
+
+    Args:
+        counts: Length MAX_SCORE + 1 array of counts per score (index 0 = missing)
+
+    Returns:
+        Dictionary with mean, median, std and count
+    """
+    values = np.arange(MIN_SCORE, MAX_SCORE + 1)
+    hist = np.asarray(counts[MIN_SCORE:MAX_SCORE + 1], dtype=np.float64)
+    n = int(hist.sum())
+    if n == 0:
+        return {'mean': 0.0, 'median': 0.0, 'std': 0.0, 'count': 0}
+
+    mean = float((values * hist).sum() / n)
+    std = float(np.sqrt((hist * (values - mean) ** 2).sum() / n))
+    cumulative = np.cumsum(hist)
+    lower = values[np.searchsorted(cumulative, (n - 1) // 2, side='right')]
+    upper = values[np.searchsorted(cumulative, n // 2, side='right')]
+    return {'mean': mean, 'median': float(lower + upper) / 2, 'std': std, 'count': n}
+
+
+
+@dataclass
+class RatingStats:
+    """Sufficient statistics of one rating source.
+
+    ``joint`` counts records per combination of the five scores (0 = missing),
+    indexed ``joint[s_problem_design, ..., s_readability]``.
+    """
+
+    label: str
+    joint: np.ndarray = field(default_factory=lambda: np.zeros(_JOINT_SHAPE, dtype=np.int64))
+
+    @classmethod
+    def from_scores(cls, label: str, scores: np.ndarray) -> "RatingStats":
+        """Build statistics from an N x 5 score matrix."""
+        flat = np.ravel_multi_index(scores.T.astype(np.intp), _JOINT_SHAPE)
+        joint = np.bincount(flat, minlength=int(np.prod(_JOINT_SHAPE))).reshape(_JOINT_SHAPE)
+        return cls(label=label, joint=joint.astype(np.int64))
+
+    def update(self, scores: np.ndarray):
+        """Add the rows of a score matrix."""
+        self.joint += RatingStats.from_scores(self.label, scores).joint
+
+    @property
+    def records(self) -> int:
+        """Number of rating records."""
+        return int(self.joint.sum())
+
+    def counts(self) -> np.ndarray:
+        """Per-dimension score counts, 5 x (MAX_SCORE + 1) (column 0 = missing)."""
+        axes = range(len(DIMENSIONS))
+        return np.stack([self.joint.sum(axis=tuple(a for a in axes if a != col)) for col in axes])
+
+    def dimension_stats(self) -> Dict[str, Dict[str, float]]:
+        """Mean, median, std and count for each dimension."""
+        counts = self.counts()
+        return {dim: stats_from_counts(counts[col]) for col, dim in enumerate(DIMENSIONS)}
+
+    def pair_histogram(self, i: int, j: int) -> np.ndarray:
+        """Joint counts of two dimensions over records where both are scored.
+
+        Returns:
+            (MAX_SCORE x MAX_SCORE) array, rows = scores of dimension ``i``
+        """
+        others = tuple(a for a in range(len(DIMENSIONS)) if a not in (i, j))
+        hist = self.joint.sum(axis=others)[MIN_SCORE:, MIN_SCORE:]
+        return hist if i < j else hist.T
+
+    def correlations(self) -> np.ndarray:
+        """Pearson correlation between dimensions (pairwise complete records).
+
+        Returns:
+            5 x 5 array; NaN where a dimension has no variance or no records
+        """
+        values = np.arange(MIN_SCORE, MAX_SCORE + 1, dtype=np.float64)
+        corr = np.full((len(DIMENSIONS), len(DIMENSIONS)), np.nan)
+        counts = self.counts()
+        for i in range(len(DIMENSIONS)):
+            for j in range(i, len(DIMENSIONS)):
+                if i == j:
+                    hist = np.diag(counts[i, MIN_SCORE:].astype(np.float64))
+                else:
+                    hist = self.pair_histogram(i, j).astype(np.float64)
+                n = hist.sum()
+                if n == 0:
+                    continue
+                mean_x = (hist.sum(axis=1) * values).sum() / n
+                mean_y = (hist.sum(axis=0) * values).sum() / n
+                dx, dy = values - mean_x, values - mean_y
+                cov = (hist * np.outer(dx, dy)).sum() / n
+                var_x = (hist.sum(axis=1) * dx ** 2).sum() / n
+                var_y = (hist.sum(axis=0) * dy ** 2).sum() / n
+                if var_x > 0 and var_y > 0:
+                    corr[i, j] = corr[j, i] = cov / np.sqrt(var_x * var_y)
+        return corr
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serializable summary."""
+        corr = self.correlations()
+        return {
+            'records': self.records,
+            'dimensions': self.dimension_stats(),
+            'score_counts': {dim: row.tolist() for dim, row in zip(DIMENSIONS, self.counts())},
+            'correlations': {
+                dim: {other: (None if np.isnan(corr[i, j]) else float(corr[i, j])) for j, other in enumerate(DIMENSIONS)}
+                for i, dim in enumerate(DIMENSIONS)
+            },
+        }
+
+
+# ---------------------------------------------------------------------------
+# Chart rendering (module-level so they can run in worker processes)
+# ---------------------------------------------------------------------------
+
+def _color(idx: int) -> str:
+    return _COLORS[idx % len(_COLORS)]
+
+
+def render_radar_chart(labels: Sequence[str], means: np.ndarray, output_path: Path):
+    """Radar chart of per-dimension mean scores, one polygon per source.
+
+    Args:
+        labels: Source labels
+        means: len(labels) x 5 array of mean scores
+        output_path: Where to save the chart
+    """
+    num_vars = len(DIMENSIONS)
+
+    # Compute angle for each axis and close the polygons
+    angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
+    angles += angles[:1]
+
+    fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
+
+    for idx, (label, row) in enumerate(zip(labels, means)):
+        values = list(row) + [row[0]]
+        ax.plot(angles, values, 'o-', linewidth=2, label=label, color=_color(idx))
+        ax.fill(angles, values, alpha=0.25, color=_color(idx))
+
+    # Fix axis to go from 0 to 5
+    ax.set_ylim(0, MAX_SCORE)
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(DIMENSION_LABELS, size=11)
+    ax.set_yticks(range(1, MAX_SCORE + 1))
+    ax.set_yticklabels([str(v) for v in range(1, MAX_SCORE + 1)], size=9)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1), fontsize=12)
+
+    plt.title(f"Code Quality Comparison: {' vs '.join(labels)}\n(5-Dimension Radar Chart)",
+              size=16, weight='bold', pad=20)
+
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_distribution_histograms(labels: Sequence[str], counts: np.ndarray, output_path: Path):
+    """Per-dimension score distributions, one bar group per score.
+
+    Args:
+        labels: Source labels
+        counts: len(labels) x 5 x (MAX_SCORE + 1) score counts
+        output_path: Where to save the chart
+    """
+    fig, axes = plt.subplots(2, 3, figsize=(18, 10))
+    axes = axes.flatten()
+
+    values = np.arange(MIN_SCORE, MAX_SCORE + 1)
+    width = 0.8 / max(1, len(labels))
+
+    for col, title in enumerate(DIMENSION_TITLES):
+        ax = axes[col]
+        for idx, label in enumerate(labels):
+            hist = counts[idx, col, MIN_SCORE:]
+            offset = (idx - (len(labels) - 1) / 2) * width
+            ax.bar(values + offset, hist, width=width, alpha=0.75, label=label,
+                   color=_color(idx), edgecolor='black')
+
+            stats = stats_from_counts(counts[idx, col])
+            if stats['count']:
+                ax.axvline(stats['mean'], color=_color(idx), linestyle='--', linewidth=2,
+                           label=f"{label} Mean: {stats['mean']:.2f}")
+
+        ax.set_xlabel('Score', fontsize=11)
+        ax.set_ylabel('Frequency', fontsize=11)
+        ax.set_title(title, fontsize=12, weight='bold')
+        ax.set_xticks(values)
+        ax.legend(fontsize=9)
+        ax.grid(True, alpha=0.3)
+
+    # Hide the 6th subplot (we only have 5 dimensions)
+    axes[5].axis('off')
+
+    fig.suptitle(f"Score Distribution by Dimension: {' vs '.join(labels)}",
+                 fontsize=16, weight='bold', y=0.995)
+
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_drift_chart(labels: Sequence[str], means: np.ndarray, output_path: Path):
+    """Mean score per dimension across sources (e.g. self-training iterations).
+
+    Args:
+        labels: Source labels, in order
+        means: len(labels) x 5 array of mean scores
+        output_path: Where to save the chart
+    """
+    fig, ax = plt.subplots(figsize=(max(8, 1.5 * len(labels)), 6))
+    x = np.arange(len(labels))
+
+    for col, title in enumerate(DIMENSION_TITLES):
+        ax.plot(x, means[:, col], 'o-', linewidth=2, color=_color(col), label=title)
+    ax.plot(x, means.mean(axis=1), 's--', linewidth=2, color='black', label='Overall')
+
+    ax.set_xticks(x)
+    ax.set_xticklabels(labels, rotation=30 if len(labels) > 6 else 0)
+    ax.set_ylim(MIN_SCORE - 0.5, MAX_SCORE + 0.5)
+    ax.set_ylabel('Mean Score', fontsize=11)
+    ax.grid(True, alpha=0.3)
+    ax.legend(fontsize=9, loc='lower right')
+    ax.set_title('Mean Score Drift Across Sources', fontsize=16, weight='bold')
+
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=200, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_correlation_heatmaps(labels: Sequence[str], correlations: np.ndarray, output_path: Path):
+    """Dimension correlation matrix of each source.
+
+    Args:
+        labels: Source labels
+        correlations: len(labels) x 5 x 5 correlation matrices
+        output_path: Where to save the chart
+    """
+    fig, axes = plt.subplots(1, len(labels), figsize=(6 * len(labels), 5.5), squeeze=False)
+    short = [label.replace('\n', ' ') for label in DIMENSION_LABELS]
+
+    for idx, (label, corr) in enumerate(zip(labels, correlations)):
+        ax = axes[0, idx]
+        image = ax.imshow(np.nan_to_num(corr), vmin=-1, vmax=1, cmap='coolwarm')
+        for i in range(len(DIMENSIONS)):
+            for j in range(len(DIMENSIONS)):
+                text = '-' if np.isnan(corr[i, j]) else f'{corr[i, j]:.2f}'
+                ax.text(j, i, text, ha='center', va='center', fontsize=9)
+        ax.set_xticks(range(len(DIMENSIONS)))
+        ax.set_yticks(range(len(DIMENSIONS)))
+        ax.set_xticklabels(short, rotation=45, ha='right', fontsize=9)
+        # Rows share the dimension order, label them once
+        ax.set_yticklabels(short if idx == 0 else [], fontsize=9)
+        ax.set_title(label, fontsize=12, weight='bold')
+
+    fig.colorbar(image, ax=axes.ravel().tolist(), shrink=0.8)
+    fig.suptitle('Dimension Correlations', fontsize=16, weight='bold')
+    plt.savefig(output_path, dpi=200, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_joint_histograms(label: str, pair_histograms: np.ndarray, output_path: Path):
+    """Joint score histograms of every dimension pair of one source.
+
+    Args:
+        label: Source label
+        pair_histograms: 10 x MAX_SCORE x MAX_SCORE counts, pairs in
+            ``itertools.combinations(range(5), 2)`` order
+        output_path: Where to save the chart
+    """
+    pairs = [(i, j) for i in range(len(DIMENSIONS)) for j in range(i + 1, len(DIMENSIONS))]
+    fig, axes = plt.subplots(2, 5, figsize=(25, 10))
+    ticks = range(MAX_SCORE - MIN_SCORE + 1)
+    tick_labels = [str(v) for v in range(MIN_SCORE, MAX_SCORE + 1)]
+
+    for ax, (i, j), hist in zip(axes.flatten(), pairs, pair_histograms):
+        ax.imshow(hist, origin='lower', cmap='Blues')
+        for a in ticks:
+            for b in ticks:
+                ax.text(b, a, str(int(hist[a, b])), ha='center', va='center', fontsize=7)
+        ax.set_xticks(ticks)
+        ax.set_yticks(ticks)
+        ax.set_xticklabels(tick_labels)
+        ax.set_yticklabels(tick_labels)
+        ax.set_xlabel(DIMENSION_LABELS[j].replace('\n', ' '), fontsize=10)
+        ax.set_ylabel(DIMENSION_LABELS[i].replace('\n', ' '), fontsize=10)
+
+    fig.suptitle(f'Joint Score Histograms: {label}', fontsize=16, weight='bold')
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+
+
+def _render_jobs(jobs: List[Tuple[Callable, tuple]], workers: int):
+    """Run chart renderers, in a process pool when more than one worker is allowed."""
+    if workers <= 1 or len(jobs) <= 1:
+        for fn, args in jobs:
+            fn(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = [pool.submit(fn, *args) for fn, args in jobs]
+        for future in futures:
+            future.result()
+
 
 class RatingAnalyzer:
     """Analyzes and visualizes code quality ratings."""
 
-    def __init__(self, logger: Optional[logging.Logger] = None):
+    def __init__(self, logger: Optional[logging.Logger] = None, dimensions: Optional[Sequence[str]] = None):
         """
         Initialize the rating analyzer.
 
         Args:
             logger: Optional logger instance. If None, creates a default logger.
+            dimensions: Result keys of the rating config (``rating.dimensions``);
+                keys that differ from DIMENSIONS, which the charts cover, are
+                reported instead of silently charted as unscored
         """
         self.logger = logger or logging.getLogger(__name__)
+        if dimensions is not None:
+            self._check_dimensions(list(dimensions))
         
         # Try to set a font that supports Chinese characters (for better labels)
         try:
@@ -35,9 +519,30 @@ class RatingAnalyzer:
         except Exception:
             pass
 
+    def _check_dimensions(self, dimensions: List[str]):
+        """Warn about configured dimensions the analysis does not cover (and vice versa)."""
+        unknown = [dim for dim in dimensions if dim not in DIMENSIONS]
+        absent = [dim for dim in DIMENSIONS if dim not in dimensions]
+        if unknown:
+            self.logger.warning(f"Rating dimensions {unknown} are not analyzed (analyzed: {list(DIMENSIONS)})")
+        if absent:
+            self.logger.warning(f"Dimensions {absent} are not in the rating config and will show as unscored")
+
+    def _warn_unscored(self, source: Path, scored: Sequence[int], records: int):
+        """Warn about dimensions without a single score among ``records`` records."""
+        missing = [dim for dim, count in zip(DIMENSIONS, scored) if count == 0]
+        if records and missing:
+            self.logger.warning(
+                f"No {missing} scores in {records} records of {source} "
+                f"(rated with different rating.dimensions?)"
+            )
+
     def load_ratings(self, ratings_path: Path) -> List[Dict]:
         """
-        Load ratings from a JSONL file.
+        Load full rating records from a JSONL file.
+
+        Prefer load_scores() for analysis: this keeps code and raw rating
+        text of every record in memory.
 
         Args:
             ratings_path: Path to the ratings.jsonl file
@@ -65,229 +570,309 @@ class RatingAnalyzer:
         self.logger.info(f"Loaded {len(ratings)} ratings from {ratings_path}")
         return ratings
 
-    def extract_scores(self, ratings: List[Dict]) -> Dict[str, List[float]]:
+    @staticmethod
+    def score_cache_path(ratings_path: Path) -> Path:
+        """Path of the score matrix cache for a ratings file."""
+        return ratings_path.with_name(f"{ratings_path.stem}.scores.npz")
+
+    def _read_score_cache(self, cache_path: Path, stat: os.stat_result) -> Optional[np.ndarray]:
+        """Return the cached score matrix if it matches the source file."""
+        if not cache_path.exists():
+            return None
+        try:
+            with np.load(cache_path) as cache:
+                if (
+                    int(cache['version']) == SCORE_CACHE_VERSION
+                    and int(cache['source_size']) == stat.st_size
+                    and int(cache['source_mtime_ns']) == stat.st_mtime_ns
+                ):
+                    return cache['scores']
+        except (OSError, KeyError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable score cache {cache_path}: {e}")
+        return None
+
+    def load_scores(self, ratings_path: Path, use_cache: bool = True) -> np.ndarray:
+        """
+        Load the score columns of a ratings file into an N x 5 int8 matrix.
+
+        Only the "ratings" object of each record is scanned; code, problem
+        and raw rating text are never decoded. Columns follow DIMENSIONS,
+        missing or out-of-range scores are 0.
+
+        Args:
+            ratings_path: Path to the ratings.jsonl file
+            use_cache: Read/write the ``<name>.scores.npz`` cache next to the file
+
+        Returns:
+            N x 5 int8 score matrix (empty if the file does not exist)
+        """
+        if not ratings_path.exists():
+            self.logger.warning(f"Ratings file not found: {ratings_path}")
+            return np.zeros((0, len(DIMENSIONS)), dtype=np.int8)
+
+        stat = ratings_path.stat()
+        cache_path = self.score_cache_path(ratings_path)
+        if use_cache:
+            scores = self._read_score_cache(cache_path, stat)
+            if scores is not None:
+                self.logger.info(f"Loaded {len(scores)} ratings from cache {cache_path}")
+                return scores
+
+        blocks = [_scan_scores(block) for block in _iter_blocks(ratings_path)]
+        if blocks:
+            scores = np.concatenate(blocks)
+        else:
+            scores = np.zeros((0, len(DIMENSIONS)), dtype=np.int8)
+        self.logger.info(f"Loaded {len(scores)} ratings from {ratings_path}")
+        self._warn_unscored(ratings_path, (scores > 0).sum(axis=0), len(scores))
+
+        if use_cache:
+            self._save_npz(
+                cache_path,
+                scores=scores,
+                version=SCORE_CACHE_VERSION,
+                source_size=stat.st_size,
+                source_mtime_ns=stat.st_mtime_ns,
+            )
+        return scores
+
+    def load_expected_scores(self, ratings_path: Path) -> np.ndarray:
+        """
+        Load the continuous scores of logprob rating into an N x 5 float32 matrix.
+
+        Only records carrying an "expected_ratings" object (written with
+        ``rating.mode: logprobs``) contribute rows; missing scores are NaN.
+
+        Args:
+            ratings_path: Path to the ratings.jsonl file
+
+        Returns:
+            N x 5 float32 score matrix (empty if the file does not exist)
+        """
+        if not ratings_path.exists():
+            self.logger.warning(f"Ratings file not found: {ratings_path}")
+            return np.zeros((0, len(DIMENSIONS)), dtype=np.float32)
+
+        blocks = [_scan_expected_scores(block) for block in _iter_blocks(ratings_path)]
+        scores = np.concatenate(blocks) if blocks else np.zeros((0, len(DIMENSIONS)), dtype=np.float32)
+        self.logger.info(f"Loaded {len(scores)} expected ratings from {ratings_path}")
+        self._warn_unscored(ratings_path, (~np.isnan(scores)).sum(axis=0), len(scores))
+        return scores
+
+    def extract_scores(self, ratings: List[Dict]) -> np.ndarray:
         """
-        Extract scores for each dimension from ratings.
+        Build the score matrix from already-loaded rating dictionaries.
 
         Args:
             ratings: List of rating dictionaries
 
         Returns:
-            Dictionary mapping dimension names to lists of scores
+            N x 5 int8 score matrix (columns follow DIMENSIONS, 0 = missing)
         """
-        dimensions = {
-            'problem_design': [],
-            'function_definition': [],
-            'correctness': [],
-            'efficiency': [],
-            'readability': []
-        }
-        
-        for rating in ratings:
-            rating_scores = rating.get('ratings', {})
-            for dim in dimensions:
+        matrix = np.zeros((len(ratings), len(DIMENSIONS)), dtype=np.int64)
+        for row, rating in enumerate(ratings):
+            rating_scores = rating.get('ratings') or {}
+            for col, dim in enumerate(DIMENSIONS):
                 score = rating_scores.get(dim)
-                if score is not None and 1 <= score <= 5:
-                    dimensions[dim].append(float(score))
-        
-        return dimensions
+                if isinstance(score, (int, float)) and not isinstance(score, bool) and score == int(score):
+                    matrix[row, col] = int(score)
+        return _valid_scores(matrix)
 
-    def compute_statistics(self, scores: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    def compute_statistics(self, scores: np.ndarray) -> Dict[str, Dict[str, float]]:
         """
         Compute statistics for each dimension.
 
         Args:
-            scores: Dictionary mapping dimension names to score lists
+            scores: N x 5 score matrix; integer (0 = missing) or float
+                expected scores (NaN = missing)
 
         Returns:
-            Dictionary with mean, median, std for each dimension
+            Dictionary with mean, median, std and count for each dimension
         """
-        stats = {}
-        
-        for dim, values in scores.items():
-            if values:
+        if np.issubdtype(scores.dtype, np.floating):
+            stats = {}
+            for col, dim in enumerate(DIMENSIONS):
+                column = scores[:, col][~np.isnan(scores[:, col])].astype(np.float64)
+                if not len(column):
+                    stats[dim] = {'mean': 0.0, 'median': 0.0, 'std': 0.0, 'count': 0}
+                    continue
                 stats[dim] = {
-                    'mean': float(np.mean(values)),
-                    'median': float(np.median(values)),
-                    'std': float(np.std(values)),
-                    'count': len(values)
+                    'mean': float(column.mean()),
+                    'median': float(np.median(column)),
+                    'std': float(column.std()),
+                    'count': int(len(column)),
                 }
-            else:
-                stats[dim] = {
-                    'mean': 0.0,
-                    'median': 0.0,
-                    'std': 0.0,
-                    'count': 0
-                }
-        
+            return stats
+
+        counts = score_counts(scores)
+        return {dim: stats_from_counts(counts[col]) for col, dim in enumerate(DIMENSIONS)}
+
+
+    # ------------------------------------------------------------------
+    # Sufficient statistics (incremental)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def stats_cache_path(ratings_path: Path) -> Path:
+        """Path of the sufficient statistics cache for a ratings file."""
+        return ratings_path.with_name(f"{ratings_path.stem}.stats.npz")
+
+    def _read_stats_cache(self, cache_path: Path, ratings_path: Path, size: int) -> Optional[Tuple[np.ndarray, int]]:
+        """Return cached (joint counts, byte offset) if the file still starts with the covered bytes."""
+        if not cache_path.exists():
+            return None
+        try:
+            with np.load(cache_path) as cache:
+                offset = int(cache['offset'])
+                if (
+                    int(cache['version']) == STATS_CACHE_VERSION
+                    and offset <= size
+                    and str(cache['fingerprint']) == _fingerprint(ratings_path, offset)
+                ):
+                    return cache['joint'].astype(np.int64), offset
+        except (OSError, KeyError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable stats cache {cache_path}: {e}")
+        return None
+
+    def _save_npz(self, cache_path: Path, **arrays):
+        """Atomically write an npz cache file."""
+        tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            self.logger.warning(f"Failed to write cache {cache_path}: {e}")
+
+    def load_stats(self, ratings_path: Path, label: Optional[str] = None, use_cache: bool = True) -> RatingStats:
+        """
+        Load the sufficient statistics of a ratings file.
+
+        With the cache enabled only bytes appended since the last call are
+        scanned; a file rewritten in place (different leading bytes or
+        smaller than the cached offset) is scanned from the start.
+
+        Args:
+            ratings_path: Path to the ratings.jsonl file
+            label: Source label (default: the file's parent directory name)
+            use_cache: Read/write the ``<name>.stats.npz`` cache next to the file
+
+        Returns:
+            RatingStats of the file (empty if it does not exist)
+        """
+        stats = RatingStats(label=label or ratings_path.parent.name)
+        if not ratings_path.exists():
+            self.logger.warning(f"Ratings file not found: {ratings_path}")
+            return stats
+
+        cache_path = self.stats_cache_path(ratings_path)
+        offset = 0
+        cached = self._read_stats_cache(cache_path, ratings_path, ratings_path.stat().st_size) if use_cache else None
+        if cached is not None:
+            stats.joint, offset = cached
+        cached_records = stats.records
+
+        # Complete lines are folded into the cache; a partial last line (still
+        # being written) only counts towards this call's result
+        tail = None
+        for block in _iter_blocks(ratings_path, start=offset):
+            if not block.endswith(b'\n'):
+                tail = block
+                break
+            stats.update(_scan_scores(block))
+            offset += len(block)
+
+        if use_cache and (cached is None or stats.records != cached_records or cached[1] != offset):
+            self._save_npz(
+                cache_path,
+                joint=stats.joint,
+                offset=offset,
+                fingerprint=_fingerprint(ratings_path, offset),
+                version=STATS_CACHE_VERSION,
+            )
+        if tail is not None:
+            stats.update(_scan_scores(tail))
+
+        self.logger.info(
+            f"Loaded {stats.records} ratings for {stats.label} from {ratings_path} "
+            f"({stats.records - cached_records} newly scanned)"
+        )
+        self._warn_unscored(ratings_path, stats.counts()[:, MIN_SCORE:].sum(axis=1), stats.records)
         return stats
 
+    # ------------------------------------------------------------------
+    # Reports and charts
+    # ------------------------------------------------------------------
+
     def plot_radar_chart(
         self,
-        fim_scores: Dict[str, List[float]],
-        l2r_scores: Dict[str, List[float]],
+        fim_scores: np.ndarray,
+        l2r_scores: np.ndarray,
         output_path: Path
     ):
         """
         Create a radar chart comparing FIM and L2R average scores.
 
         Args:
-            fim_scores: FIM dimension scores
-            l2r_scores: L2R dimension scores
+            fim_scores: FIM score matrix
+            l2r_scores: L2R score matrix
             output_path: Where to save the chart
         """
-        # Dimension labels (short names for readability)
-        labels = [
-            'Problem\nDesign',
-            'Function\nDefinition',
-            'Correctness',
-            'Efficiency',
-            'Readability'
-        ]
-        
-        dimensions = ['problem_design', 'function_definition', 'correctness', 'efficiency', 'readability']
-        
-        # Compute average scores
-        fim_means = [np.mean(fim_scores[dim]) if fim_scores[dim] else 0 for dim in dimensions]
-        l2r_means = [np.mean(l2r_scores[dim]) if l2r_scores[dim] else 0 for dim in dimensions]
-        
-        # Number of variables
-        num_vars = len(labels)
-        
-        # Compute angle for each axis
-        angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-        
-        # Close the plot
-        fim_means += fim_means[:1]
-        l2r_means += l2r_means[:1]
-        angles += angles[:1]
-        
-        # Create figure
-        fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
-        
-        # Plot data
-        ax.plot(angles, fim_means, 'o-', linewidth=2, label='FIM', color='#2E86AB')
-        ax.fill(angles, fim_means, alpha=0.25, color='#2E86AB')
-        
-        ax.plot(angles, l2r_means, 'o-', linewidth=2, label='L2R', color='#A23B72')
-        ax.fill(angles, l2r_means, alpha=0.25, color='#A23B72')
-        
-        # Fix axis to go from 0 to 5
-        ax.set_ylim(0, 5)
-        
-        # Add labels
-        ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(labels, size=11)
-        
-        # Add gridlines
-        ax.set_yticks([1, 2, 3, 4, 5])
-        ax.set_yticklabels(['1', '2', '3', '4', '5'], size=9)
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        # Add legend
-        ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1), fontsize=12)
-        
-        # Add title
-        plt.title('Code Quality Comparison: FIM vs L2R\n(5-Dimension Radar Chart)', 
-                  size=16, weight='bold', pad=20)
-        
-        # Save
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
+        means = np.array([
+            [stats[dim]['mean'] for dim in DIMENSIONS]
+            for stats in (self.compute_statistics(fim_scores), self.compute_statistics(l2r_scores))
+        ])
+        render_radar_chart(['FIM', 'L2R'], means, output_path)
         self.logger.info(f"Saved radar chart to {output_path}")
 
     def plot_distribution_histograms(
         self,
-        fim_scores: Dict[str, List[float]],
-        l2r_scores: Dict[str, List[float]],
+        fim_scores: np.ndarray,
+        l2r_scores: np.ndarray,
         output_path: Path
     ):
         """
         Create distribution histograms for each dimension.
 
         Args:
-            fim_scores: FIM dimension scores
-            l2r_scores: L2R dimension scores
+            fim_scores: FIM score matrix
+            l2r_scores: L2R score matrix
             output_path: Where to save the chart
         """
-        dimensions = ['problem_design', 'function_definition', 'correctness', 'efficiency', 'readability']
-        dimension_titles = [
-            'Problem Design Quality',
-            'Function Definition & Naming',
-            'Algorithmic Correctness',
-            'Algorithmic Efficiency',
-            'Code Readability & Structure'
-        ]
-        
-        # Create subplots (2 rows x 3 columns, but we only use 5)
-        fig, axes = plt.subplots(2, 3, figsize=(18, 10))
-        axes = axes.flatten()
-        
-        # Bins for histogram (1, 2, 3, 4, 5)
-        bins = [0.5, 1.5, 2.5, 3.5, 4.5, 5.5]
-        
-        for idx, (dim, title) in enumerate(zip(dimensions, dimension_titles)):
-            ax = axes[idx]
-            
-            fim_data = fim_scores[dim]
-            l2r_data = l2r_scores[dim]
-            
-            # Plot histograms
-            ax.hist(fim_data, bins=bins, alpha=0.6, label='FIM', color='#2E86AB', edgecolor='black')
-            ax.hist(l2r_data, bins=bins, alpha=0.6, label='L2R', color='#A23B72', edgecolor='black')
-            
-            # Add mean lines
-            if fim_data:
-                fim_mean = np.mean(fim_data)
-                ax.axvline(fim_mean, color='#2E86AB', linestyle='--', linewidth=2, 
-                          label=f'FIM Mean: {fim_mean:.2f}')
-            
-            if l2r_data:
-                l2r_mean = np.mean(l2r_data)
-                ax.axvline(l2r_mean, color='#A23B72', linestyle='--', linewidth=2,
-                          label=f'L2R Mean: {l2r_mean:.2f}')
-            
-            # Styling
-            ax.set_xlabel('Score', fontsize=11)
-            ax.set_ylabel('Frequency', fontsize=11)
-            ax.set_title(title, fontsize=12, weight='bold')
-            ax.set_xticks([1, 2, 3, 4, 5])
-            ax.legend(fontsize=9)
-            ax.grid(True, alpha=0.3)
-        
-        # Hide the 6th subplot (we only have 5 dimensions)
-        axes[5].axis('off')
-        
-        # Overall title
-        fig.suptitle('Score Distribution by Dimension: FIM vs L2R', 
-                     fontsize=16, weight='bold', y=0.995)
-        
-        # Save
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
+        counts = np.stack([score_counts(fim_scores), score_counts(l2r_scores)])
+        render_distribution_histograms(['FIM', 'L2R'], counts, output_path)
         self.logger.info(f"Saved distribution histograms to {output_path}")
 
     def generate_statistics_report(
         self,
-        fim_scores: Dict[str, List[float]],
-        l2r_scores: Dict[str, List[float]],
+        fim_scores: np.ndarray,
+        l2r_scores: np.ndarray,
         output_path: Path
     ):
         """
         Generate a text report with detailed statistics.
 
         Args:
-            fim_scores: FIM dimension scores
-            l2r_scores: L2R dimension scores
+            fim_scores: FIM score matrix
+            l2r_scores: L2R score matrix
             output_path: Where to save the report
         """
-        fim_stats = self.compute_statistics(fim_scores)
-        l2r_stats = self.compute_statistics(l2r_scores)
-        
+        self.write_statistics_report(
+            [RatingStats.from_scores('FIM', fim_scores), RatingStats.from_scores('L2R', l2r_scores)],
+            output_path
+        )
+
+    def write_statistics_report(self, sources: List[RatingStats], output_path: Path):
+        """
+        Write a text report comparing sources; differences are relative to the first.
+
+        Args:
+            sources: Statistics of each source, baseline first
+            output_path: Where to save the report
+        """
+        baseline = sources[0].label
+        dim_stats = [source.dimension_stats() for source in sources]
+
         report_lines = [
             "=" * 80,
             "CODE QUALITY RATING STATISTICS REPORT",
@@ -295,125 +880,158 @@ class RatingAnalyzer:
             "",
             "## Overall Summary",
             "",
-            f"FIM Total Samples: {fim_stats['problem_design']['count']}",
-            f"L2R Total Samples: {l2r_stats['problem_design']['count']}",
+        ]
+        report_lines.extend(f"{source.label} Total Samples: {source.records}" for source in sources)
+        report_lines.extend([
             "",
             "=" * 80,
             "## Dimension-wise Statistics",
             "=" * 80,
             ""
-        ]
-        
-        dimensions = ['problem_design', 'function_definition', 'correctness', 'efficiency', 'readability']
-        dimension_names = [
-            'Problem Design Quality',
-            'Function Definition & Naming',
-            'Algorithmic Correctness',
-            'Algorithmic Efficiency',
-            'Code Readability & Structure'
-        ]
-        
-        for dim, name in zip(dimensions, dimension_names):
-            report_lines.extend([
-                f"### {name}",
-                "",
-                "FIM:",
-                f"  Mean:   {fim_stats[dim]['mean']:.3f}",
-                f"  Median: {fim_stats[dim]['median']:.3f}",
-                f"  Std:    {fim_stats[dim]['std']:.3f}",
-                f"  Count:  {fim_stats[dim]['count']}",
-                "",
-                "L2R:",
-                f"  Mean:   {l2r_stats[dim]['mean']:.3f}",
-                f"  Median: {l2r_stats[dim]['median']:.3f}",
-                f"  Std:    {l2r_stats[dim]['std']:.3f}",
-                f"  Count:  {l2r_stats[dim]['count']}",
-                "",
-                f"Difference (L2R - FIM): {l2r_stats[dim]['mean'] - fim_stats[dim]['mean']:+.3f}",
-                "",
-                "-" * 80,
-                ""
-            ])
-        
+        ])
+
+        for dim, name in zip(DIMENSIONS, DIMENSION_TITLES):
+            report_lines.extend([f"### {name}", ""])
+            for source, stats in zip(sources, dim_stats):
+                report_lines.extend([
+                    f"{source.label}:",
+                    f"  Mean:   {stats[dim]['mean']:.3f}",
+                    f"  Median: {stats[dim]['median']:.3f}",
+                    f"  Std:    {stats[dim]['std']:.3f}",
+                    f"  Count:  {stats[dim]['count']}",
+                    "",
+                ])
+            for source, stats in zip(sources[1:], dim_stats[1:]):
+                diff = stats[dim]['mean'] - dim_stats[0][dim]['mean']
+                report_lines.append(f"Difference ({source.label} - {baseline}): {diff:+.3f}")
+            report_lines.extend(["", "-" * 80, ""])
+
         # Overall averages
-        fim_overall = np.mean([fim_stats[dim]['mean'] for dim in dimensions])
-        l2r_overall = np.mean([l2r_stats[dim]['mean'] for dim in dimensions])
-        
+        overall = [np.mean([stats[dim]['mean'] for dim in DIMENSIONS]) for stats in dim_stats]
         report_lines.extend([
             "=" * 80,
             "## Overall Average Across All Dimensions",
             "=" * 80,
             "",
-            f"FIM Overall Average: {fim_overall:.3f}",
-            f"L2R Overall Average: {l2r_overall:.3f}",
-            f"Difference (L2R - FIM): {l2r_overall - fim_overall:+.3f}",
-            "",
-            "=" * 80
         ])
-        
+        report_lines.extend(f"{source.label} Overall Average: {avg:.3f}" for source, avg in zip(sources, overall))
+        report_lines.extend(
+            f"Difference ({source.label} - {baseline}): {avg - overall[0]:+.3f}"
+            for source, avg in zip(sources[1:], overall[1:])
+        )
+        report_lines.extend(["", "=" * 80])
+
         # Write to file
         output_path.parent.mkdir(parents=True, exist_ok=True)
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write('\n'.join(report_lines))
-        
+
         self.logger.info(f"Saved statistics report to {output_path}")
-        
+
         # Also log to console
         self.logger.info("\n" + "\n".join(report_lines))
 
+    def analyze_sources(
+        self,
+        sources: Dict[str, Path],
+        output_dir: Path,
+        use_cache: bool = True,
+        workers: Optional[int] = None
+    ) -> Dict[str, RatingStats]:
+        """
+        Compare any number of rating sources (e.g. self-training iterations).
+
+        Writes radar_chart.png, distribution_histograms.png, correlations.png,
+        score_drift.png (two or more sources), joint_<label>.png per source,
+        statistics_report.txt and statistics.json to ``output_dir``.
+
+        Args:
+            sources: Ordered mapping of source label to ratings.jsonl path;
+                the first source is the baseline for differences
+            output_dir: Directory to save outputs
+            use_cache: Use the incremental per-file statistics caches
+            workers: Chart rendering processes (default: CPU count)
+
+        Returns:
+            Mapping of source label to its statistics (empty if nothing was loaded)
+        """
+        self.logger.info("Loading rating statistics...")
+        stats_list = [self.load_stats(path, label, use_cache=use_cache) for label, path in sources.items()]
+
+        if not any(stats.records for stats in stats_list):
+            self.logger.error("No ratings loaded. Exiting.")
+            return {}
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        labels = [stats.label for stats in stats_list]
+        dim_stats = [stats.dimension_stats() for stats in stats_list]
+        means = np.array([[ds[dim]['mean'] for dim in DIMENSIONS] for ds in dim_stats])
+        counts = np.stack([stats.counts() for stats in stats_list])
+        correlations = np.stack([stats.correlations() for stats in stats_list])
+
+        outputs = {
+            'radar': output_dir / "radar_chart.png",
+            'distribution': output_dir / "distribution_histograms.png",
+            'correlations': output_dir / "correlations.png",
+        }
+        jobs: List[Tuple[Callable, tuple]] = [
+            (render_radar_chart, (labels, means, outputs['radar'])),
+            (render_distribution_histograms, (labels, counts, outputs['distribution'])),
+            (render_correlation_heatmaps, (labels, correlations, outputs['correlations'])),
+        ]
+        if len(stats_list) > 1:
+            outputs['drift'] = output_dir / "score_drift.png"
+            jobs.append((render_drift_chart, (labels, means, outputs['drift'])))
+
+        pairs = [(i, j) for i in range(len(DIMENSIONS)) for j in range(i + 1, len(DIMENSIONS))]
+        for stats in stats_list:
+            if not stats.records:
+                continue
+            path = output_dir / f"joint_{re.sub(r'[^A-Za-z0-9._-]+', '_', stats.label)}.png"
+            outputs[f'joint:{stats.label}'] = path
+            pair_histograms = np.stack([stats.pair_histogram(i, j) for i, j in pairs])
+            jobs.append((render_joint_histograms, (stats.label, pair_histograms, path)))
+
+        workers = workers if workers is not None else mp.cpu_count()
+        self.logger.info(f"Rendering {len(jobs)} charts with {min(max(1, workers), len(jobs))} worker(s)...")
+        _render_jobs(jobs, workers)
+
+        self.logger.info("Generating statistics report...")
+        outputs['report'] = output_dir / "statistics_report.txt"
+        self.write_statistics_report(stats_list, outputs['report'])
+
+        outputs['summary'] = output_dir / "statistics.json"
+        summary = {'baseline': labels[0], 'sources': {stats.label: stats.summary() for stats in stats_list}}
+        with open(outputs['summary'], 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+        self.logger.info("=" * 60)
+        self.logger.info("✅ Analysis complete!")
+        self.logger.info(f"   Outputs saved to: {output_dir}")
+        for path in outputs.values():
+            self.logger.info(f"   - {path.name}")
+        self.logger.info("=" * 60)
+
+        return {stats.label: stats for stats in stats_list}
+
     def analyze_and_visualize(
         self,
         fim_ratings_path: Path,
         l2r_ratings_path: Path,
-        output_dir: Path
+        output_dir: Path,
+        use_cache: bool = True
     ):
         """
-        Main entry point: load ratings, compute stats, and generate visualizations.
+        Main entry point for the FIM vs L2R comparison (see analyze_sources).
 
         Args:
             fim_ratings_path: Path to FIM ratings.jsonl
             l2r_ratings_path: Path to L2R ratings.jsonl
             output_dir: Directory to save outputs
+            use_cache: Use the per-file statistics caches
         """
         self.logger.info("=" * 60)
         self.logger.info("Rating Analysis and Visualization")
         self.logger.info("=" * 60)
-        
-        # Load ratings
-        self.logger.info("Loading ratings...")
-        fim_ratings = self.load_ratings(fim_ratings_path)
-        l2r_ratings = self.load_ratings(l2r_ratings_path)
-        
-        if not fim_ratings and not l2r_ratings:
-            self.logger.error("No ratings loaded. Exiting.")
-            return
-        
-        # Extract scores
-        self.logger.info("Extracting scores...")
-        fim_scores = self.extract_scores(fim_ratings)
-        l2r_scores = self.extract_scores(l2r_ratings)
-        
-        # Create output directory
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate visualizations
-        self.logger.info("Generating radar chart...")
-        radar_path = output_dir / "radar_chart.png"
-        self.plot_radar_chart(fim_scores, l2r_scores, radar_path)
-        
-        self.logger.info("Generating distribution histograms...")
-        dist_path = output_dir / "distribution_histograms.png"
-        self.plot_distribution_histograms(fim_scores, l2r_scores, dist_path)
-        
-        self.logger.info("Generating statistics report...")
-        stats_path = output_dir / "statistics_report.txt"
-        self.generate_statistics_report(fim_scores, l2r_scores, stats_path)
-        
-        self.logger.info("=" * 60)
-        self.logger.info("✅ Analysis complete!")
-        self.logger.info(f"   Outputs saved to: {output_dir}")
-        self.logger.info(f"   - {radar_path.name}")
-        self.logger.info(f"   - {dist_path.name}")
-        self.logger.info(f"   - {stats_path.name}")
-        self.logger.info("=" * 60)
 
+        self.analyze_sources({'FIM': fim_ratings_path, 'L2R': l2r_ratings_path}, output_dir, use_cache=use_cache)
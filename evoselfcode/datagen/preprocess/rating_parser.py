@@ -0,0 +1,262 @@
+"""
+Rating Output Parser
+
+Parses the plain-text rating format requested by the rating prompt:
+
+    Problem Design Score: 5
+    Function Definition Score: 4
+    Algorithm Correctness Score: 5
+    Algorithm Efficiency Score: 4
+    Code Readability Score: 5
+    Summary: ...
+
+All score lines and the summary marker are matched by one compiled
+alternation in a single left-to-right scan, stopping once every field has
+been seen. The first occurrence of each field wins. Matching is
+case-insensitive: the text is lowercased once and scanned with a
+case-sensitive pattern, which is several times faster than re.IGNORECASE.
+Compiled patterns are cached per dimension configuration.
+
+For logprob rating, score_distribution() turns the top-k logprobs at a
+score token into an expected score and a confidence. output_regex()
+describes the format for server-side guided decoding. split_candidates()
+splits the output of a packed prompt (several candidates rated in one
+completion) into per-candidate sections.
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Mapping, Match, Optional, Pattern, Tuple
+
+# Result key -> label printed before "Score:" in the model output
+DEFAULT_DIMENSIONS: Dict[str, str] = {
+    'problem_design': 'Problem Design',
+    'function_definition': 'Function Definition',
+    'correctness': 'Algorithm Correctness',
+    'efficiency': 'Algorithm Efficiency',
+    'readability': 'Code Readability',
+}
+
+_SUMMARY_GROUP = '_summary'
+# "Candidate <n>:" header line of a packed rating output (markdown decoration tolerated)
+_CANDIDATE_RE = re.compile(r'^[ \t#*]*candidate[ \t]+(\d+)[ \t]*:?[ \t*]*$', re.IGNORECASE | re.MULTILINE)
+# Summary text ends at a blank line, a "---" separator or the end of the output
+_SUMMARY_TERMINATORS = ('\n\n', '---')
+
+
+@lru_cache(maxsize=32)
+def _compile_patterns(labels: Tuple[str, ...]) -> Tuple[Pattern, Pattern]:
+    """Compile the alternation for the given labels (group ``d<i>`` = score of label i).
+
+    Returns:
+        (pattern for lowercased text, re.IGNORECASE pattern for any text)
+    """
+    alternatives = [
+        r'\s+'.join(re.escape(word.lower()) for word in label.split()) + rf'\s+score:\s*(?P<d{i}>\d+)'
+        for i, label in enumerate(labels)
+    ]
+    alternatives.append(rf'summary:\s*(?P<{_SUMMARY_GROUP}>)')
+    source = '|'.join(alternatives)
+    return re.compile(source), re.compile(source, re.IGNORECASE)
+
+
+class RatingParser:
+    """Single-pass parser for rating outputs."""
+
+    def __init__(self, dimensions: Optional[Mapping[str, str]] = None):
+        """
+        Args:
+            dimensions: Mapping of result key to output label (default: DEFAULT_DIMENSIONS)
+        """
+        self.dimensions: Dict[str, str] = dict(dimensions or DEFAULT_DIMENSIONS)
+        self._keys = list(self.dimensions)
+        self._lower_pattern, self._pattern = _compile_patterns(tuple(self.dimensions.values()))
+        self._group_keys = {f'd{i}': key for i, key in enumerate(self._keys)}
+        self._num_fields = len(self._keys) + 1
+
+    def _first_matches(self, raw_text: str) -> Iterator[Tuple[str, Match]]:
+        """Yield (group name, match) for the first occurrence of each field."""
+        # Lowercasing keeps offsets unless a character changes length (rare
+        # non-ASCII cases), then the slower case-insensitive pattern is used
+        lowered = raw_text.lower()
+        if len(lowered) == len(raw_text):
+            matches = self._lower_pattern.finditer(lowered)
+        else:
+            matches = self._pattern.finditer(raw_text)
+
+        seen = set()
+        for match in matches:
+            group = match.lastgroup
+            if group in seen:
+                continue
+            if group == _SUMMARY_GROUP and match.end() == len(raw_text) and not match.group(0)[-1].isspace():
+                # A bare "Summary:" ending the output carries no text
+                continue
+            seen.add(group)
+            yield group, match
+            if len(seen) == self._num_fields:
+                return
+
+    def parse(self, raw_text: str) -> Dict:
+        """Parse rating output into structured scores.
+
+        Args:
+            raw_text: Raw model output
+
+        Returns:
+            Dictionary with an int (or None) per dimension key and 'summary'
+            (str or None)
+        """
+        result: Dict = dict.fromkeys(self._keys)
+        result['summary'] = None
+        for group, match in self._first_matches(raw_text):
+            if group == _SUMMARY_GROUP:
+                result['summary'] = self._summary(raw_text, match.end())
+            else:
+                result[self._group_keys[group]] = int(match.group(group))
+        return result
+
+    def score_spans(self, raw_text: str) -> Dict[str, Tuple[int, int]]:
+        """Character span of each score value that parse() would read.
+
+        Args:
+            raw_text: Raw model output
+
+        Returns:
+            Mapping of dimension key to (start, end) of its score digits
+        """
+        return {
+            self._group_keys[group]: match.span(group)
+            for group, match in self._first_matches(raw_text)
+            if group != _SUMMARY_GROUP
+        }
+
+    def output_regex(
+        self,
+        min_score: int = 1,
+        max_score: int = 5,
+        prefilled: bool = False,
+        summary: bool = True,
+    ) -> str:
+        """Regular expression of a well-formed rating output (for guided decoding).
+
+        Args:
+            min_score: Lowest valid score
+            max_score: Highest valid score
+            prefilled: The prompt already ends with the first "<label> Score:"
+            summary: Require a one-line summary after the scores
+
+        Returns:
+            Regex the whole completion must match
+        """
+        if 0 <= min_score <= max_score <= 9:
+            score = f'[{min_score}-{max_score}]'
+        else:
+            score = r'\d+'
+        lines = [
+            re.escape(label).replace('\\ ', ' ') + ' Score: ' + score
+            for label in self.dimensions.values()
+        ]
+        if prefilled:
+            pattern = ' ' + score + ''.join(r'\n' + line for line in lines[1:])
+        else:
+            pattern = r'\s*(?:Output Evaluation:\s*)?' + r'\n'.join(lines)
+        if summary:
+            pattern += r'\nSummary: [^\n]+'
+        return pattern
+
+    @staticmethod
+    def _summary(raw_text: str, start: int) -> str:
+        """Summary text from ``start`` up to the first terminator."""
+        end = len(raw_text)
+        for terminator in _SUMMARY_TERMINATORS:
+            # The summary holds at least one character before a terminator
+            pos = raw_text.find(terminator, start + 1)
+            if 0 <= pos < end:
+                end = pos
+        return raw_text[start:end].strip()
+
+
+def split_candidates(raw_text: str) -> Dict[int, str]:
+    """Split a packed rating output into per-candidate sections.
+
+    Args:
+        raw_text: Output with "Candidate <n>:" header lines
+
+    Returns:
+        Mapping of candidate number to the text up to the next header (the
+        first section of a repeated number wins)
+    """
+    headers = list(_CANDIDATE_RE.finditer(raw_text))
+    sections: Dict[int, str] = {}
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(raw_text)
+        sections.setdefault(int(header.group(1)), raw_text[header.end():end].strip())
+    return sections
+
+
+def _field(obj: Any, name: str) -> Any:
+    """Attribute of an SDK logprobs object, or key of its dict form."""
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def score_distribution(
+    text: str,
+    logprobs: Any,
+    span: Tuple[int, int],
+    min_score: int = 1,
+    max_score: int = 5,
+) -> Optional[Dict[str, float]]:
+    """Score distribution at the token holding a score in a completion.
+
+    Args:
+        text: Completion text the logprobs belong to
+        logprobs: Completions API logprobs (``tokens``, ``token_logprobs``,
+            ``top_logprobs``), as SDK object or dict
+        span: (start, end) of the score digits in ``text``
+        min_score: Lowest valid score
+        max_score: Highest valid score
+
+    Returns:
+        Dictionary with ``expected`` (probability-weighted score),
+        ``score`` (most likely score) and ``confidence`` (its probability
+        among valid scores), or None if no valid score has probability mass
+    """
+    tokens: List[str] = _field(logprobs, 'tokens') or []
+    token_logprobs = _field(logprobs, 'token_logprobs') or []
+    top_logprobs = _field(logprobs, 'top_logprobs') or []
+
+    # Token positions follow from token lengths; the first token overlapping
+    # the span carries the score
+    pos = 0
+    index = None
+    for i, token in enumerate(tokens):
+        if pos + len(token) > span[0]:
+            index = i
+            break
+        pos += len(token)
+    if index is None:
+        return None
+
+    candidates: Dict[str, float] = dict(top_logprobs[index] or {}) if index < len(top_logprobs) else {}
+    if index < len(token_logprobs) and token_logprobs[index] is not None:
+        candidates.setdefault(tokens[index], token_logprobs[index])
+
+    probs: Dict[int, float] = {}
+    for token, logprob in candidates.items():
+        value = token.strip()
+        if value.isdigit() and min_score <= int(value) <= max_score and logprob is not None:
+            probs[int(value)] = probs.get(int(value), 0.0) + math.exp(logprob)
+
+    mass = sum(probs.values())
+    if mass <= 0:
+        return None
+    score = max(probs, key=probs.get)
+    return {
+        'expected': sum(value * p for value, p in probs.items()) / mass,
+        'score': score,
+        'confidence': probs[score] / mass,
+    }
@@ -5,47 +5,71 @@ This module generates quality ratings for function implementations using LLM eva
 """
 
 import asyncio
-import hashlib
 import json
+import logging
 import math
 import re
 from pathlib import Path
-from typing import Dict, List, Optional
-
-from rich.progress import (
-    Progress,
-    SpinnerColumn,
-    TextColumn,
-    BarColumn,
-    TimeRemainingColumn,
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...clients.guided import GuidedDecoding
+from ...clients.limiter import (
+    Priority,
+    format_queue_stats,
+    parse_priority,
+    queue_deadline,
+    requests_per_batch,
 )
+from ...utils.logger import RateLimitedLogger
+from ...utils.metrics import StageMetrics, metrics_column
+from ...utils.tracing import set_stage, traced
+from ..utils.validation_cache import ValidationCache
+from .rating_parser import RatingParser, score_distribution, split_candidates
+
+RATING_MODES = ("text", "logprobs")
+
+# Re-requests of an implementation whose rating has invalid scores
+SCORE_RETRIES = 1
+
+# Appended to a packed prompt after the candidates; the output is prefilled
+# with the first candidate header
+PACK_INSTRUCTION = (
+    "\n\nThe {count} candidates above are separate implementations. Evaluate each "
+    "candidate independently, in order. Start each evaluation with a \"Candidate <number>:\" "
+    "line, followed by the score lines and the summary in the plain text format above.\n\n"
+)
+PACK_HEADER = "Candidate {index}:"
 
 
 class RatingGenerator:
     """Generator for quality ratings of function implementations."""
 
-    def __init__(self, client_manager, config: Dict, logger):
+    def __init__(self, client_manager, config: Dict, logger, validation_cache: Optional[ValidationCache] = None):
         """Initialize rating generator.
 
         Args:
             client_manager: Manager for API clients
             config: Rating generation configuration
             logger: Logger instance
+            validation_cache: Parse results of earlier stages; code known not
+                to parse is not rated (None = rate everything)
         """
         self.client_manager = client_manager
         self.config = config
         self.logger = logger
-
-    def _compute_hash(self, text: str) -> str:
-        """Compute SHA256 hash of text.
-
-        Args:
-            text: Input text
-
-        Returns:
-            First 16 characters of hex digest
-        """
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+        self.validation_cache = validation_cache
+        self.metrics = StageMetrics("rating")
+        # Per-batch progress lines at most every 10s
+        self.progress_log = RateLimitedLogger(self.logger)
+        self.parser = RatingParser(config.get('dimensions'))
+
+        # Logprob mode: the prompt ends with the first score line's label, the
+        # model completes the score lines and top-k logprobs at each score
+        # digit give an expected score
+        logprob_cfg = config.get('logprobs', {}) or {}
+        first_label = next(iter(self.parser.dimensions.values()))
+        self.score_lead = f"{first_label} Score:"
+        self.score_prefill = logprob_cfg.get('prefill', "\n\nOutput Evaluation:\n") + self.score_lead
 
     def _load_existing_hashes(self, hash_file: Path) -> set:
         """Load existing hashes from file.
@@ -103,6 +127,36 @@ class RatingGenerator:
 
         return implementations
 
+    def _load_failed_executions(self, execution_file: Path, skip_statuses: List[str]) -> set:
+        """Load UIDs whose execution status is in skip_statuses.
+
+        Args:
+            execution_file: Path to executions.jsonl from the execution check stage
+            skip_statuses: Statuses that mark an implementation as broken
+
+        Returns:
+            Set of UIDs to skip
+        """
+        if not execution_file.exists():
+            self.logger.warning(f"Execution results not found, not filtering: {execution_file}")
+            return set()
+
+        skip = set(skip_statuses)
+        failed = set()
+        with open(execution_file, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError as e:
+                    # e.g. a line truncated by a crashed execution check
+                    self.logger.warning(f"Skipping malformed line {line_num} of {execution_file}: {e}")
+                    continue
+                if isinstance(data, dict) and data.get('status') in skip:
+                    failed.add(data.get('uid', ""))
+        return failed
+
     def _build_prompt(self, problem_text: str, code: str, template: str) -> str:
         """Build rating prompt from template.
 
@@ -116,10 +170,199 @@ class RatingGenerator:
         """
         return template.replace("{{problem_text}}", problem_text).replace("{{code}}", code)
 
+    def _plan_packs(self, implementations: List[Dict], size: int) -> List[List[Dict]]:
+        """Split implementations into packs, keeping siblings (same problem) together.
+
+        Args:
+            implementations: Implementations to rate
+            size: Maximum candidates per pack
+
+        Returns:
+            List of packs
+        """
+        siblings: Dict[str, List[Dict]] = {}
+        for impl in implementations:
+            siblings.setdefault(impl['problem_text'], []).append(impl)
+        ordered = [impl for group in siblings.values() for impl in group]
+        return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+
+    def _build_pack_prompt(self, pack: List[Dict], template: str, instruction: str) -> str:
+        """Build one prompt rating all candidates of a pack.
+
+        Siblings share one problem statement; a pack spanning several
+        problems gives each candidate its own.
+
+        Args:
+            pack: Implementations to rate
+            template: Prompt template with {{problem_text}} and {{code}} placeholders
+            instruction: Instruction appended after the candidates ({count} placeholder)
+
+        Returns:
+            Prompt ending with the first candidate header
+        """
+        shared = len({impl['problem_text'] for impl in pack}) == 1
+        blocks = []
+        for index, impl in enumerate(pack, 1):
+            problem = "" if shared else f"{impl['problem_text']}\n\n"
+            blocks.append(f"### Candidate {index}\n{problem}{impl['code']}")
+        prompt = self._build_prompt(pack[0]['problem_text'] if shared else "", "\n\n".join(blocks), template)
+        return prompt.rstrip() + instruction.format(count=len(pack)) + PACK_HEADER.format(index=1) + "\n"
+
+    def pack_constraint(self, count: int, min_score: int = 1, max_score: int = 5) -> GuidedDecoding:
+        """Guided decoding constraint for the output of a pack of ``count`` candidates.
+
+        Args:
+            count: Candidates in the pack
+            min_score: Minimum valid score
+            max_score: Maximum valid score
+
+        Returns:
+            Regex constraint for the completion (after the first header)
+        """
+        single = self.parser.output_regex(min_score, max_score)
+        return GuidedDecoding(regex=single + ''.join(
+            r'\n\n' + re.escape(PACK_HEADER.format(index=index)).replace('\\ ', ' ') + r'\n' + single
+            for index in range(2, count + 1)
+        ))
+
+    async def _rate_packs(
+        self,
+        client,
+        implementations: List[Dict],
+        prompt_template: str,
+        pack_cfg: Dict,
+        validate_scores: bool,
+        min_score: int,
+        max_score: int,
+        output_file: Path,
+        hash_file: Path,
+        batch_write_size: int
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """Rate implementations in packs of several candidates per request.
+
+        Candidates whose section is missing or invalid are returned for
+        single rating.
+
+        Args:
+            client: Completion client
+            implementations: Implementations to rate
+            prompt_template: Prompt template with {{problem_text}} and {{code}} placeholders
+            pack_cfg: ``rating.pack`` configuration
+            validate_scores: Whether to validate scores
+            min_score: Minimum valid score
+            max_score: Maximum valid score
+            output_file: Ratings output file
+            hash_file: Hash table file
+            batch_write_size: Write to disk every N ratings
+
+        Returns:
+            Tuple of (written rating records, implementations left for single rating)
+        """
+        packs = self._plan_packs(implementations, max(1, int(pack_cfg.get('size', 4))))
+        instruction = pack_cfg.get('instruction', PACK_INSTRUCTION)
+        tokens_per_candidate = int(pack_cfg.get('max_tokens_per_candidate', 192))
+        guided_cfg = self.config.get('guided_decoding') or {}
+        batch_size = requests_per_batch(getattr(client, 'max_concurrent', 5), self.config.get('queue_factor', 4))
+        num_batches = math.ceil(len(packs) / batch_size)
+        deadline_s = self.config.get('queue_deadline_s')
+
+        def request_kwargs(pack: List[Dict]) -> Dict[str, Any]:
+            kwargs = {
+                "max_tokens": tokens_per_candidate * len(pack),
+                "temperature": pack_cfg.get('temperature', self.config.get('temperature', 0.3)),
+                "top_p": pack_cfg.get('top_p', self.config.get('top_p', 0.9)),
+                "n": 1,
+                "stop": pack_cfg.get('stop', ["\n\n###", "Now evaluate"]),
+                "priority": parse_priority(self.config.get('priority'), Priority.RATING),
+            }
+            guided = GuidedDecoding.from_config(guided_cfg, default=self.pack_constraint(len(pack), min_score, max_score))
+            if guided is not None:
+                kwargs["guided"] = guided
+            return kwargs
+
+        self.logger.info(
+            f"Packed rating: {len(implementations)} implementations in {len(packs)} packs "
+            f"(up to {pack_cfg.get('size', 4)} candidates), {num_batches} batches"
+        )
+
+        written: List[Dict] = []
+        fallback: List[Dict] = []
+        pending_write: List[Dict] = []
+        pending_hashes: List[str] = []
+
+        from rich.progress import (
+            BarColumn,
+            Progress,
+            SpinnerColumn,
+            TextColumn,
+            TimeRemainingColumn,
+        )
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+            TimeRemainingColumn(),
+            metrics_column("rating"),
+        ) as progress:
+            task_id = progress.add_task("[cyan]Rating packed candidates...", total=len(implementations))
+
+            for batch_idx in range(num_batches):
+                batch_packs = packs[batch_idx * batch_size:(batch_idx + 1) * batch_size]
+                self.progress_log.info("[Pack batch %s/%s] Processing %s packs...", batch_idx + 1, num_batches, len(batch_packs))
+
+                batch_results = await asyncio.gather(*(
+                    client.complete_async(
+                        self._build_pack_prompt(pack, prompt_template, instruction),
+                        **request_kwargs(pack),
+                        deadline=queue_deadline(deadline_s)
+                    )
+                    for pack in batch_packs
+                ), return_exceptions=True)
+
+                for pack, results in zip(batch_packs, batch_results):
+                    if isinstance(results, BaseException):
+                        self.logger.error(f"Pack request failed, falling back to single rating: {results!r}")
+                        fallback.extend(pack)
+                        progress.update(task_id, advance=len(pack))
+                        continue
+                    text = results[0].get("text", "") if results else ""
+                    sections = split_candidates(PACK_HEADER.format(index=1) + "\n" + text)
+                    for index, impl_data in enumerate(pack, 1):
+                        section = sections.get(index, "")
+                        parsed = self._parse_rating(section)
+                        if not section or (validate_scores and not self._validate_scores(parsed, min_score, max_score)):
+                            self.logger.debug("[%s] No valid rating in pack, rating singly", impl_data["function_name"])
+                            fallback.append(impl_data)
+                            continue
+                        pending_write.append(self._make_record(impl_data, parsed, section))
+                        pending_hashes.append(impl_data['uid'])
+                    progress.update(task_id, advance=len(pack))
+
+                if len(pending_write) >= batch_write_size:
+                    await self._write_jsonl(output_file, pending_write)
+                    await self._write_hashes(hash_file, pending_hashes)
+                    written.extend(pending_write)
+                    pending_write = []
+                    pending_hashes = []
+                    self.progress_log.info("✅ Progress: %s packed ratings generated", len(written))
+
+        if pending_write:
+            await self._write_jsonl(output_file, pending_write)
+            await self._write_hashes(hash_file, pending_hashes)
+            written.extend(pending_write)
+
+        self.logger.info(
+            f"Packed rating: {len(written)} rated in {len(packs)} requests, "
+            f"{len(fallback)} left for single rating"
+        )
+        return written, fallback
+
     def _parse_rating(self, raw_text: str) -> Dict:
         """Parse rating output into structured scores.
 
-        Expected format:
+        Expected format (labels configurable via ``rating.dimensions``):
         Problem Design Score: 5
         Function Definition Score: 4
         Algorithm Correctness Score: 5
@@ -133,36 +376,108 @@ class RatingGenerator:
         Returns:
             Dictionary with parsed scores and summary
         """
-        patterns = {
-            'problem_design': r'Problem\s+Design\s+Score:\s*(\d+)',
-            'function_definition': r'Function\s+Definition\s+Score:\s*(\d+)',
-            'correctness': r'Algorithm\s+Correctness\s+Score:\s*(\d+)',
-            'efficiency': r'Algorithm\s+Efficiency\s+Score:\s*(\d+)',
-            'readability': r'Code\s+Readability\s+Score:\s*(\d+)',
-            'summary': r'Summary:\s*(.+?)(?:\n\n|---|\Z)'
-        }
+        return self.parser.parse(raw_text)
 
-        result = {}
-        for key, pattern in patterns.items():
-            match = re.search(pattern, raw_text, re.IGNORECASE | re.DOTALL)
-            if match:
-                if key == 'summary':
-                    result[key] = match.group(1).strip()
-                else:
-                    try:
-                        result[key] = int(match.group(1))
-                    except ValueError:
-                        result[key] = None
-            else:
-                result[key] = None
+    def output_constraint(
+        self,
+        mode: str = "text",
+        min_score: int = 1,
+        max_score: int = 5,
+        summary: bool = True
+    ) -> GuidedDecoding:
+        """Guided decoding constraint matching the expected rating output.
+
+        Args:
+            mode: Rating mode ("logprobs" completes the prefilled score lines)
+            min_score: Minimum valid score
+            max_score: Maximum valid score
+            summary: Whether the output ends with a summary line
+
+        Returns:
+            Regex constraint for the completion
+        """
+        return GuidedDecoding(
+            regex=self.parser.output_regex(min_score, max_score, prefilled=mode == "logprobs", summary=summary)
+        )
 
-        return result
+    @traced("parse")
+    def _parse_result(
+        self,
+        result: Dict[str, Any],
+        use_logprobs: bool,
+        min_score: int = 1,
+        max_score: int = 5
+    ) -> Tuple[Dict, str]:
+        """Parse one completion result.
+
+        In logprob mode the completion continues the prefilled first score
+        line; each integer score is replaced by the most likely score at its
+        token and ``expected_ratings`` / ``rating_confidence`` are added.
 
+        Args:
+            result: Completion result ({"text": ..., "logprobs": ...})
+            use_logprobs: Whether the request used the logprob rating mode
+            min_score: Minimum valid score
+            max_score: Maximum valid score
+
+        Returns:
+            Tuple of (parsed rating, rating text to store)
+        """
+        text = result.get("text", "")
+        if not use_logprobs:
+            text = text.strip()
+            return self._parse_rating(text), text
+
+        full_text = self.score_lead + text
+        parsed = self._parse_rating(full_text)
+        expected: Dict[str, Optional[float]] = dict.fromkeys(self.parser.dimensions)
+        confidence: Dict[str, Optional[float]] = dict.fromkeys(self.parser.dimensions)
+        logprobs = result.get("logprobs")
+        if logprobs is not None:
+            offset = len(self.score_lead)
+            for dim, (start, end) in self.parser.score_spans(full_text).items():
+                dist = score_distribution(text, logprobs, (start - offset, end - offset), min_score, max_score)
+                if dist is not None:
+                    parsed[dim] = dist['score']
+                    expected[dim] = dist['expected']
+                    confidence[dim] = dist['confidence']
+        parsed['expected_ratings'] = expected
+        parsed['rating_confidence'] = confidence
+        return parsed, full_text.strip()
+
+    def _make_record(self, impl_data: Dict, parsed: Dict, rating_text: str) -> Dict:
+        """Build the output record of a rated implementation.
+
+        Args:
+            impl_data: Implementation dictionary
+            parsed: Parsed rating
+            rating_text: Raw rating text
+
+        Returns:
+            Rating record
+        """
+        record = {
+            "uid": impl_data['uid'],
+            "source": impl_data['source'],
+            "problem_text": impl_data['problem_text'],
+            "code": impl_data['code'],
+            "function_name": impl_data['function_name'],
+            "ratings": {dim: parsed[dim] for dim in self.parser.dimensions},
+            "summary": parsed['summary'],
+            "raw_rating_text": rating_text
+        }
+        if 'expected_ratings' in parsed:
+            record["expected_ratings"] = parsed['expected_ratings']
+            record["rating_confidence"] = parsed['rating_confidence']
+        return record
+
+    @traced("validate")
     def _validate_scores(
         self,
         scores: Dict,
         min_score: int = 1,
-        max_score: int = 5
+        max_score: int = 5,
+        require_summary: bool = True
     ) -> bool:
         """Validate that all scores are in valid range.
 
@@ -170,13 +485,12 @@ class RatingGenerator:
             scores: Dictionary of scores
             min_score: Minimum valid score
             max_score: Maximum valid score
+            require_summary: Whether a non-empty summary is required
 
         Returns:
             True if all scores are valid, False otherwise
         """
-        required_keys = ['problem_design', 'function_definition', 'correctness', 'efficiency', 'readability']
-
-        for key in required_keys:
+        for key in self.parser.dimensions:
             score = scores.get(key)
             if score is None or not isinstance(score, int):
                 return False
@@ -184,11 +498,12 @@ class RatingGenerator:
                 return False
 
         # Check summary exists
-        if not scores.get('summary'):
+        if require_summary and not scores.get('summary'):
             return False
 
         return True
 
+    @traced("write_jsonl", always=True)
     async def _write_jsonl(self, file_path: Path, data: List[Dict]):
         """Write JSONL data asynchronously.
 
@@ -201,7 +516,8 @@ class RatingGenerator:
                 for item in data:
                     f.write(json.dumps(item, ensure_ascii=False) + '\n')
 
-        await asyncio.to_thread(_write)
+        with self.metrics.writing(len(data)):
+            await asyncio.to_thread(_write)
 
     async def _write_hashes(self, file_path: Path, hashes: List[str]):
         """Write hash table asynchronously.
@@ -235,7 +551,10 @@ class RatingGenerator:
         source_key: str = "source",
         validate_scores: bool = True,
         min_score: int = 1,
-        max_score: int = 5
+        max_score: int = 5,
+        execution_file: Optional[Path] = None,
+        skip_execution_statuses: Optional[List[str]] = None,
+        mode: str = "text"
     ) -> List[Dict]:
         """Generate quality ratings for implementations.
 
@@ -257,10 +576,19 @@ class RatingGenerator:
             validate_scores: Whether to validate scores
             min_score: Minimum valid score
             max_score: Maximum valid score
+            execution_file: Optional executions.jsonl; implementations whose
+                status is in skip_execution_statuses are not rated
+            skip_execution_statuses: Execution statuses to skip
+            mode: "text" (parse free-text scores and summary) or "logprobs"
+                (prefilled score lines, expected scores from top-k logprobs;
+                settings under ``logprobs`` in the rating config)
 
         Returns:
             List of rating dictionaries
         """
+        set_stage(self.metrics.stage)
+        # Previews are only built when DEBUG is enabled
+        debug = self.logger.isEnabledFor(logging.DEBUG)
         self.logger.info(f"=== Rating Generator ===")
         self.logger.info(f"Input: {input_file}")
         self.logger.info(f"Output: {output_dir}")
@@ -289,6 +617,27 @@ class RatingGenerator:
         implementations = [impl for impl in implementations if impl['uid'] not in existing_hashes]
         self.logger.info(f"Filtered to {len(implementations)} unrated implementations")
 
+        # Skip implementations that already failed execution
+        if execution_file is not None:
+            failed_uids = self._load_failed_executions(
+                execution_file,
+                skip_execution_statuses or ["failed", "error", "timeout", "crashed"]
+            )
+            before = len(implementations)
+            implementations = [impl for impl in implementations if impl['uid'] not in failed_uids]
+            self.logger.info(f"Skipped {before - len(implementations)} implementations that failed execution")
+
+        # Skip code an earlier stage found unparseable (implementation uids are content hashes)
+        if self.validation_cache is not None:
+            entries = await asyncio.to_thread(self.validation_cache.entries)
+            before = len(implementations)
+            implementations = [
+                impl for impl in implementations
+                if impl['uid'] not in entries or entries[impl['uid']].parse_ok
+            ]
+            if before > len(implementations):
+                self.logger.info(f"Skipped {before - len(implementations)} implementations that do not parse")
+
         if num_samples is not None:
             implementations = implementations[:num_samples]
 
@@ -300,20 +649,125 @@ class RatingGenerator:
         client = self.client_manager.completion_client
         self.logger.info(f"Client: {client.base_url}, Model: {client.model}")
 
-        # Calculate batching
-        max_concurrent = getattr(client.semaphore, '_value', 5)
-        num_batches = math.ceil(len(implementations) / max_concurrent)
+        # Request settings
+        if mode not in RATING_MODES:
+            raise ValueError(f"Unknown rating mode: {mode} (expected one of {RATING_MODES})")
+        use_logprobs = mode == "logprobs"
+        require_summary = True
+        prompt_suffix = ""
+        if use_logprobs:
+            logprob_cfg = self.config.get('logprobs', {}) or {}
+            require_summary = logprob_cfg.get('include_summary', False)
+            prompt_suffix = self.score_prefill
+            request_kwargs = {
+                "max_tokens": logprob_cfg.get('summary_max_tokens', 256) if require_summary else logprob_cfg.get('max_tokens', 48),
+                "temperature": logprob_cfg.get('temperature', 0.0),
+                "top_p": 1.0,
+                "n": 1,
+                "stop": stop if require_summary else ["Summary:"],
+                "logprobs": logprob_cfg.get('top_k', 20),
+                "priority": parse_priority(self.config.get('priority'), Priority.RATING),
+            }
+        else:
+            request_kwargs = {
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "top_p": top_p,
+                "n": 1,
+                "stop": stop,
+                "priority": parse_priority(self.config.get('priority'), Priority.RATING),
+            }
+
+        # Server-side guided decoding keeps outputs parseable (fewer retries)
+        guided = GuidedDecoding.from_config(
+            self.config.get('guided_decoding'),
+            default=self.output_constraint(mode, min_score, max_score, summary=require_summary)
+        )
+        if guided is not None:
+            request_kwargs["guided"] = guided
+            self.logger.info(f"Guided decoding: {guided.to_extra_body()}")
 
-        self.logger.info(f"Batching: {num_batches} batches, max_concurrent={max_concurrent}")
-        self.logger.info(f"Parameters: temp={temperature}, top_p={top_p}, max_tokens={max_tokens}")
+        # Packed rating first: several candidates (siblings first) per
+        # request; whatever a pack fails to rate goes through single rating
+        all_results = []
+        pack_cfg = self.config.get('pack', {}) or {}
+        if pack_cfg.get('enabled', False) and len(implementations) > 1:
+            if use_logprobs:
+                self.logger.warning("Packed rating is not supported in logprobs mode, rating singly")
+            else:
+                packed, implementations = await self._rate_packs(
+                    client, implementations, prompt_template, pack_cfg, validate_scores,
+                    min_score, max_score, output_file, hash_file, batch_write_size
+                )
+                all_results.extend(packed)
+
+        # Calculate batching: more requests than slots, so the limiter has a queue to order
+        max_concurrent = getattr(client, 'max_concurrent', 5)
+        batch_size = requests_per_batch(max_concurrent, self.config.get('queue_factor', 4))
+        num_batches = math.ceil(len(implementations) / batch_size)
+        deadline_s = self.config.get('queue_deadline_s')
+
+        self.logger.info(f"Batching: {num_batches} batches of {batch_size} requests, max_concurrent={max_concurrent}")
+        self.logger.info(
+            f"Parameters: mode={mode}, temp={request_kwargs['temperature']}, top_p={request_kwargs['top_p']}, "
+            f"max_tokens={request_kwargs['max_tokens']}"
+        )
 
         # Generation loop
-        all_results = []
         pending_write = []
         pending_hashes = []
         total_processed = 0
         total_parse_failures = 0
         total_invalid_scores = 0
+        total_retries = 0
+        total_failed = 0
+        total_unrated = 0
+
+        async def rate_one(impl_data: Dict) -> Optional[Tuple[Dict, str]]:
+            """(parsed rating, rating text) of one implementation, or None.
+
+            Empty outputs and invalid scores are counted on every attempt and
+            re-requested at retry priority as soon as they arrive, while the
+            rest of the batch is still queued, so the retry is served first.
+            """
+            nonlocal total_parse_failures, total_invalid_scores, total_retries
+            function_name = impl_data['function_name']
+            prompt = self._build_prompt(impl_data['problem_text'], impl_data['code'], prompt_template) + prompt_suffix
+            kwargs = dict(request_kwargs)
+            for attempt in range(SCORE_RETRIES + 1):
+                retry = attempt > 0
+                results = await client.complete_async(prompt, **kwargs, deadline=queue_deadline(deadline_s))
+                for result in results:
+                    if debug:
+                        self.logger.debug("[%s] Rating output (attempt %s, first 200 chars): %s", function_name, attempt + 1, result.get("text", "")[:200])
+
+                    if not result.get("text", "").strip():
+                        self.logger.debug("[%s] Empty response", function_name)
+                        total_parse_failures += 1
+                        self.metrics.invalid.inc()
+                        continue
+
+                    parsed_rating, rating_text = self._parse_result(result, use_logprobs, min_score, max_score)
+                    if not validate_scores or self._validate_scores(parsed_rating, min_score, max_score, require_summary):
+                        if retry:
+                            self.logger.debug("✓ Retry succeeded for %s", function_name)
+                        return parsed_rating, rating_text
+
+                    self.logger.debug("[%s] Invalid scores: %s", function_name, parsed_rating)
+                    total_invalid_scores += 1
+                    self.metrics.invalid.inc()
+                if attempt < SCORE_RETRIES:
+                    total_retries += 1
+                    kwargs["priority"] = Priority.RETRY
+            return None
+
+        from rich.progress import (
+            BarColumn,
+            Progress,
+            SpinnerColumn,
+            TextColumn,
+            TimeRemainingColumn,
+        )
 
         with Progress(
             SpinnerColumn(),
@@ -321,6 +775,7 @@ class RatingGenerator:
             BarColumn(),
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TimeRemainingColumn(),
+            metrics_column("rating"),
         ) as progress:
             task_id = progress.add_task(
                 "[cyan]Generating quality ratings...",
@@ -329,151 +784,35 @@ class RatingGenerator:
 
             # Process in batches
             for batch_idx in range(num_batches):
-                batch_start = batch_idx * max_concurrent
-                batch_end = min(batch_start + max_concurrent, len(implementations))
+                batch_start = batch_idx * batch_size
+                batch_end = min(batch_start + batch_size, len(implementations))
                 batch_implementations = implementations[batch_start:batch_end]
 
-                # Build prompts for batch
-                batch_prompts = [
-                    self._build_prompt(
-                        impl['problem_text'],
-                        impl['code'],
-                        prompt_template
-                    )
-                    for impl in batch_implementations
-                ]
-
-                self.logger.info(f"[Batch {batch_idx+1}/{num_batches}] Processing {len(batch_prompts)} implementations...")
+                self.progress_log.info("[Batch %s/%s] Processing %s implementations...", batch_idx + 1, num_batches, len(batch_implementations))
 
                 try:
-                    # Call API with batch
-                    batch_results = await client.complete_batch_async(
-                        prompts=batch_prompts,
-                        max_tokens=max_tokens,
-                        temperature=temperature,
-                        top_p=top_p,
-                        n=1,
-                        stop=stop
+                    # One request (plus its retry) per implementation; a failed item does not fail the batch
+                    batch_results = await asyncio.gather(
+                        *(rate_one(impl) for impl in batch_implementations), return_exceptions=True
                     )
 
-                    # Collect tasks that need retry
-                    retry_tasks = []
-
-                    # Process results
-                    self.logger.debug(f"[Batch {batch_idx+1}/{num_batches}] Processing {len(batch_results)} results")
-                    for idx, result_list in enumerate(batch_results):
-                        impl_data = batch_implementations[idx]
-                        function_name = impl_data['function_name']
-
-                        for result in result_list:
-                            rating_text = result.get("text", "").strip()
-
-                            self.logger.debug(f"[{function_name}] Raw rating output (first 200 chars): {rating_text[:200]}")
-
-                            if not rating_text:
-                                self.logger.debug(f"[{function_name}] Empty response")
-                                continue
-
-                            # Parse rating
-                            parsed_rating = self._parse_rating(rating_text)
-
-                            # Validate scores
-                            if validate_scores and not self._validate_scores(parsed_rating, min_score, max_score):
-                                self.logger.debug(f"[{function_name}] Invalid scores, adding to retry queue")
-                                self.logger.debug(f"[{function_name}] Parsed: {parsed_rating}")
-                                retry_tasks.append({
-                                    'impl_data': impl_data,
-                                    'function_name': function_name,
-                                    'attempts': 0,
-                                    'max_attempts': 3
-                                })
-                                continue
-
-                            # Add to pending write
-                            pending_write.append({
-                                "uid": impl_data['uid'],
-                                "source": impl_data['source'],
-                                "problem_text": impl_data['problem_text'],
-                                "code": impl_data['code'],
-                                "function_name": function_name,
-                                "ratings": {
-                                    "problem_design": parsed_rating['problem_design'],
-                                    "function_definition": parsed_rating['function_definition'],
-                                    "correctness": parsed_rating['correctness'],
-                                    "efficiency": parsed_rating['efficiency'],
-                                    "readability": parsed_rating['readability']
-                                },
-                                "summary": parsed_rating['summary'],
-                                "raw_rating_text": rating_text
-                            })
-                            pending_hashes.append(impl_data['uid'])
-
-                    # Process retry queue asynchronously
-                    if retry_tasks:
-                        self.logger.debug(f"Processing {len(retry_tasks)} retry tasks...")
-                        retry_prompts = [
-                            self._build_prompt(task['impl_data']['problem_text'], task['impl_data']['code'], prompt_template)
-                            for task in retry_tasks
-                        ]
-
-                        try:
-                            retry_results = await client.complete_batch_async(
-                                prompts=retry_prompts,
-                                max_tokens=max_tokens,
-                                temperature=temperature,
-                                top_p=top_p,
-                                n=1,
-                                stop=stop
-                            )
-
-                            retry_success_count = 0
-                            for task_idx, result_list in enumerate(retry_results):
-                                task = retry_tasks[task_idx]
-                                task['attempts'] += 1
-
-                                for result in result_list:
-                                    retry_text = result.get("text", "").strip()
-                                    self.logger.debug(f"[{task['function_name']}] Retry {task['attempts']} output: {retry_text[:200]}")
-
-                                    if retry_text:
-                                        parsed_retry = self._parse_rating(retry_text)
-                                        if not validate_scores or self._validate_scores(parsed_retry, min_score, max_score):
-                                            # Success! Add this result
-                                            pending_write.append({
-                                                "uid": task['impl_data']['uid'],
-                                                "source": task['impl_data']['source'],
-                                                "problem_text": task['impl_data']['problem_text'],
-                                                "code": task['impl_data']['code'],
-                                                "function_name": task['function_name'],
-                                                "ratings": {
-                                                    "problem_design": parsed_retry['problem_design'],
-                                                    "function_definition": parsed_retry['function_definition'],
-                                                    "correctness": parsed_retry['correctness'],
-                                                    "efficiency": parsed_retry['efficiency'],
-                                                    "readability": parsed_retry['readability']
-                                                },
-                                                "summary": parsed_retry['summary'],
-                                                "raw_rating_text": retry_text
-                                            })
-                                            pending_hashes.append(task['impl_data']['uid'])
-                                            retry_success_count += 1
-                                            self.logger.debug(f"✓ Retry succeeded for {task['function_name']}")
-                                            break
-                                        else:
-                                            total_invalid_scores += 1
-                                    else:
-                                        total_parse_failures += 1
-
-                            self.logger.debug(f"Retry batch: {retry_success_count}/{len(retry_tasks)} succeeded")
-
-                        except Exception as e:
-                            self.logger.error(f"Retry batch failed: {e}")
-                            total_parse_failures += len(retry_tasks)
-
-                    total_processed += len(batch_prompts)
-                    progress.update(task_id, advance=len(batch_prompts))
-
-                    self.logger.debug(f"[Batch {batch_idx+1}/{num_batches}] Pending write: {len(pending_write)}, batch_write_size: {batch_write_size}")
+                    for impl_data, outcome in zip(batch_implementations, batch_results):
+                        if isinstance(outcome, BaseException):
+                            self.logger.warning(f"[{impl_data['function_name']}] Request failed: {outcome!r}")
+                            total_failed += 1
+                            total_parse_failures += 1
+                            continue
+                        if outcome is None:
+                            total_unrated += 1
+                            continue
+                        parsed_rating, rating_text = outcome
+                        pending_write.append(self._make_record(impl_data, parsed_rating, rating_text))
+                        pending_hashes.append(impl_data['uid'])
+
+                    total_processed += len(batch_implementations)
+                    progress.update(task_id, advance=len(batch_implementations))
+
+                    self.logger.debug("[Batch %s/%s] Pending write: %s, batch_write_size: %s", batch_idx + 1, num_batches, len(pending_write), batch_write_size)
 
                     # Incremental write
                     if len(pending_write) >= batch_write_size:
@@ -486,7 +825,7 @@ class RatingGenerator:
                         pending_write = []
                         pending_hashes = []
 
-                        self.logger.info(f"✅ Progress: {len(all_results)} ratings generated")
+                        self.progress_log.info("✅ Progress: %s ratings generated", len(all_results))
 
                 except Exception as e:
                     self.logger.error(f"Error in batch {batch_idx+1}: {e}", exc_info=True)
@@ -505,8 +844,13 @@ class RatingGenerator:
         self.logger.info(f"  Total ratings: {len(all_results)}")
         self.logger.info(f"  Parse failures: {total_parse_failures}")
         self.logger.info(f"  Invalid scores: {total_invalid_scores}")
+        self.logger.info(f"  Score retries: {total_retries}, failed requests: {total_failed}, "
+                         f"unrated after retries: {total_unrated}")
         self.logger.info(f"  Output: {output_file}")
         self.logger.info(f"  Hash table: {hash_file}")
+        if hasattr(client, "queue_stats"):
+            for line in format_queue_stats(client.queue_stats()):
+                self.logger.info(f"  {line}")
 
         return all_results
 
@@ -6,18 +6,27 @@ Produces well-structured function definitions with type hints and Google-style d
 """
 
 import asyncio
-import ast
-import hashlib
 import json
 import logging
 import math
 import re
 from pathlib import Path
-from typing import List, Dict, Optional
-
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
+from typing import Dict, List, Optional
 
+from ...clients.limiter import (
+    Priority,
+    format_queue_stats,
+    parse_priority,
+    queue_deadline,
+    requests_per_batch,
+)
 from ...core.client_manager import ClientManager
+from ...utils.logger import RateLimitedLogger
+from ...utils.metrics import StageMetrics, metrics_column
+from ...utils.tracing import TRACER, set_stage, traced
+from ..utils.hashing import compute_hash
+from ..utils.postprocess import PostProcessPool
+from ..utils.validation_cache import ValidationCache
 
 
 class SkeletonGenerator:
@@ -36,7 +45,9 @@ class SkeletonGenerator:
         self,
         client_manager: ClientManager,
         config: dict,
-        logger: Optional[logging.Logger] = None
+        logger: Optional[logging.Logger] = None,
+        postprocess_pool: Optional[PostProcessPool] = None,
+        validation_cache: Optional[ValidationCache] = None
     ):
         """Initialize the skeleton generator.
         
@@ -44,21 +55,19 @@ class SkeletonGenerator:
             client_manager: Manager for API clients
             config: Configuration dictionary
             logger: Logger instance
+            postprocess_pool: Worker pool for syntax validation
+                (default: a pool of its own, shut down after each run)
+            validation_cache: Parse results by content hash, shared with
+                the other stages (default: in memory for this generator)
         """
         self.client_manager = client_manager
         self.config = config
         self.logger = logger or logging.getLogger(__name__)
-    
-    def _compute_hash(self, text: str) -> str:
-        """Compute SHA256 hash as UID.
-        
-        Args:
-            text: Text to hash
-            
-        Returns:
-            16-character hash string
-        """
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+        self.postprocess_pool = postprocess_pool or PostProcessPool()
+        self.validation_cache = validation_cache or ValidationCache()
+        self.metrics = StageMetrics("skeleton")
+        # Per-batch progress lines at most every 10s
+        self.progress_log = RateLimitedLogger(self.logger)
     
     def _load_existing_hashes(self, hash_file: Path) -> set:
         """Load existing hashes from file.
@@ -99,21 +108,7 @@ class SkeletonGenerator:
         match = re.search(r'^def\s+([a-z_][a-z0-9_]*)\s*\(', skeleton_code, re.MULTILINE)
         return match.group(1) if match else None
     
-    def _validate_skeleton(self, skeleton_code: str) -> bool:
-        """Validate skeleton code using AST parsing.
-        
-        Args:
-            skeleton_code: Generated function skeleton
-            
-        Returns:
-            True if valid Python code, False otherwise
-        """
-        try:
-            ast.parse(skeleton_code)
-            return True
-        except SyntaxError:
-            return False
-    
+    @traced("write_jsonl", always=True)
     async def _write_jsonl(self, file_path: Path, data: List[Dict]):
         """Write JSONL data asynchronously.
         
@@ -126,7 +121,8 @@ class SkeletonGenerator:
                 for item in data:
                     f.write(json.dumps(item, ensure_ascii=False) + '\n')
         
-        await asyncio.to_thread(_write)
+        with self.metrics.writing(len(data)):
+            await asyncio.to_thread(_write)
     
     async def _write_hashes(self, file_path: Path, hashes: List[str]):
         """Write hashes asynchronously.
@@ -200,6 +196,7 @@ class SkeletonGenerator:
         Returns:
             List of generated skeleton dictionaries
         """
+        set_stage(self.metrics.stage)
         self.logger.info(f"=== Skeleton Generator ===")
         self.logger.info(f"Input: {input_file}")
         self.logger.info(f"Output: {output_dir}")
@@ -229,11 +226,13 @@ class SkeletonGenerator:
         client = self.client_manager.completion_client
         self.logger.info(f"Client: {client.base_url}, Model: {client.model}")
         
-        # Calculate batching
-        max_concurrent = getattr(client.semaphore, '_value', 5)
-        num_batches = math.ceil(len(problems) / max_concurrent)
+        # Calculate batching: more requests than slots, so the limiter has a queue to order
+        skeleton_cfg = self.config.get('skeleton') or {}
+        max_concurrent = getattr(client, 'max_concurrent', 5)
+        batch_size = requests_per_batch(max_concurrent, skeleton_cfg.get('queue_factor', 4))
+        num_batches = math.ceil(len(problems) / batch_size)
         
-        self.logger.info(f"Batching: {num_batches} batches, max_concurrent={max_concurrent}")
+        self.logger.info(f"Batching: {num_batches} batches of {batch_size} requests, max_concurrent={max_concurrent}")
         self.logger.info(f"Parameters: temp={temperature}, top_p={top_p}, max_tokens={max_tokens}")
         
         # Generation loop
@@ -243,13 +242,23 @@ class SkeletonGenerator:
         total_processed = 0
         total_duplicates = 0
         total_invalid = 0
+        cache_hits, cache_misses = self.validation_cache.hits, self.validation_cache.misses
         
+        from rich.progress import (
+            BarColumn,
+            Progress,
+            SpinnerColumn,
+            TextColumn,
+            TimeRemainingColumn,
+        )
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             BarColumn(),
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TimeRemainingColumn(),
+            metrics_column("skeleton"),
         ) as progress:
             task_id = progress.add_task(
                 "[cyan]Generating function skeletons...",
@@ -258,8 +267,8 @@ class SkeletonGenerator:
             
             # Process in batches
             for batch_idx in range(num_batches):
-                batch_start = batch_idx * max_concurrent
-                batch_end = min(batch_start + max_concurrent, len(problems))
+                batch_start = batch_idx * batch_size
+                batch_end = min(batch_start + batch_size, len(problems))
                 batch_problems = problems[batch_start:batch_end]
                 
                 # Build prompts for batch
@@ -268,59 +277,73 @@ class SkeletonGenerator:
                     for p in batch_problems
                 ]
                 
-                self.logger.info(f"[Batch {batch_idx+1}/{num_batches}] Processing {len(batch_prompts)} problems...")
+                self.progress_log.info("[Batch %s/%s] Processing %s problems...", batch_idx + 1, num_batches, len(batch_prompts))
                 
                 try:
-                    # Call API with batch
-                    batch_results = await client.complete_batch_async(
-                        prompts=batch_prompts,
-                        max_tokens=max_tokens,
-                        temperature=temperature,
-                        top_p=top_p,
-                        n=1,
-                        stop=stop
-                    )
+                    # Call API with batch (a failed request does not fail the batch)
+                    batch_results = await asyncio.gather(*(
+                        client.complete_async(
+                            prompt,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                            top_p=top_p,
+                            n=1,
+                            stop=stop,
+                            priority=parse_priority(skeleton_cfg.get('priority'), Priority.SKELETON),
+                            deadline=queue_deadline(skeleton_cfg.get('queue_deadline_s'))
+                        )
+                        for prompt in batch_prompts
+                    ), return_exceptions=True)
                     
-                    self.logger.info(f"[Batch {batch_idx+1}/{num_batches}] Received {len(batch_results)} responses")
+                    self.progress_log.info("[Batch %s/%s] Received %s responses", batch_idx + 1, num_batches, len(batch_results))
                     
-                    # Process results
+                    # Collect non-empty skeletons
+                    candidates = []
                     for idx, result_list in enumerate(batch_results):
-                        problem_data = batch_problems[idx]
-                        problem_text = problem_data.get(problem_key, "")
-                        
+                        if isinstance(result_list, BaseException):
+                            self.logger.warning(f"Request failed: {result_list!r}")
+                            continue
                         for result in result_list:
                             skeleton_code = result.get("text", "").strip()
-                            
-                            if not skeleton_code:
-                                continue
-                            
-                            # Compute hash
-                            uid = self._compute_hash(skeleton_code)
-                            
-                            # Check duplicates
-                            if uid in existing_hashes or uid in pending_hashes:
-                                total_duplicates += 1
-                                continue
-                            
-                            # Validate
-                            is_valid = self._validate_skeleton(skeleton_code)
-                            if not is_valid:
-                                total_invalid += 1
-                                self.logger.debug(f"Invalid skeleton (skipping): {uid}")
-                                continue  # Skip invalid skeletons
-                            
-                            # Extract function name
-                            function_name = self._extract_function_name(skeleton_code)
-                            
-                            # Add to pending
-                            pending_hashes.append(uid)
-                            pending_write.append({
-                                "uid": uid,
-                                "source": problem_data.get("source", "UNKNOWN"),
-                                "problem_text": problem_text,
-                                "skeleton_code": skeleton_code,
-                                "function_name": function_name
-                            })
+                            if skeleton_code:
+                                candidates.append((batch_problems[idx], skeleton_code))
+                    
+                    # Parse only new, unseen skeletons (cache, then post-processing pool)
+                    with TRACER.span("hash"):
+                        uids = [compute_hash(code) for _, code in candidates]
+                    with TRACER.span("validate"):
+                        entries = await self.validation_cache.validate({
+                            uid: code for uid, (_, code) in zip(uids, candidates)
+                            if uid not in existing_hashes and uid not in pending_hashes
+                        }, self.postprocess_pool)
+                    
+                    for (problem_data, skeleton_code), uid in zip(candidates, uids):
+                        # Check duplicates
+                        if uid in existing_hashes or uid in pending_hashes:
+                            total_duplicates += 1
+                            self.metrics.duplicates.inc()
+                            continue
+                        
+                        entry = entries[uid]
+                        if not entry.parse_ok:
+                            total_invalid += 1
+                            self.metrics.invalid.inc()
+                            self.logger.debug("Invalid skeleton (skipping): %s", uid)
+                            continue  # Skip invalid skeletons
+                        
+                        # Function name from the parse, if it found a function
+                        function_name = entry.location.name if entry.location else self._extract_function_name(skeleton_code)
+                        
+                        # Add to pending
+                        pending_hashes.append(uid)
+                        pending_write.append({
+                            "uid": uid,
+                            "problem_uid": problem_data.get("uid"),
+                            "source": problem_data.get("source", "UNKNOWN"),
+                            "problem_text": problem_data.get(problem_key, ""),
+                            "skeleton_code": skeleton_code,
+                            "function_name": function_name
+                        })
                     
                     total_processed += len(batch_prompts)
                     progress.update(task_id, advance=len(batch_prompts))
@@ -328,7 +351,7 @@ class SkeletonGenerator:
                     # Incremental write
                     if len(pending_write) >= batch_write_size:
                         write_count = len(pending_write)
-                        self.logger.info(f"Writing {write_count} skeletons to disk...")
+                        self.progress_log.info("Writing %s skeletons to disk...", write_count)
                         
                         await self._write_jsonl(output_file, pending_write)
                         await self._write_hashes(hash_file, pending_hashes)
@@ -339,7 +362,7 @@ class SkeletonGenerator:
                         pending_write = []
                         pending_hashes = []
                         
-                        self.logger.info(f"✅ Wrote {write_count} skeletons (total unique: {len(all_results)})")
+                        self.progress_log.info("✅ Wrote %s skeletons (total unique: %s)", write_count, len(all_results))
                 
                 except Exception as e:
                     self.logger.error(f"Error in batch {batch_idx+1}: {e}", exc_info=True)
@@ -354,13 +377,20 @@ class SkeletonGenerator:
             # Wait for writes to complete
             await asyncio.sleep(0.5)
         
+        self.postprocess_pool.close()
+        
         # Summary
         self.logger.info(f"✅ Skeleton generation complete!")
         self.logger.info(f"  Total unique skeletons: {len(all_results)}")
         self.logger.info(f"  Duplicates skipped: {total_duplicates}")
         self.logger.info(f"  Invalid skeletons: {total_invalid}")
+        self.logger.info(f"  Validation cache: {self.validation_cache.hits - cache_hits} hits, "
+                         f"{self.validation_cache.misses - cache_misses} parsed")
         self.logger.info(f"  Output: {output_file}")
         self.logger.info(f"  Hash table: {hash_file}")
+        if hasattr(client, "queue_stats"):
+            for line in format_queue_stats(client.queue_stats()):
+                self.logger.info(f"  {line}")
         
         return all_results
 
@@ -0,0 +1,308 @@
+"""
+AST-based static checks for generated code.
+
+A single parse produces a small report that the code filters consume:
+- Parse success
+- Top-level imported modules (checked against a forbidden list by the filter)
+- Recursive functions without any branching (unbounded recursion)
+- ``while True`` loops that can never exit
+- Names that are loaded but never bound
+
+``extract_function_parts`` splits a function into signature, docstring and
+body from a single parse (used by the ChatML converter); ``locate_function``
+returns just the line offsets, which the validation cache stores so the
+split can be redone without parsing.
+"""
+
+import ast
+import builtins
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Names that are always available at module level without being bound
+_IMPLICIT_NAMES = set(dir(builtins)) | {
+    "__name__", "__file__", "__doc__", "__builtins__", "__spec__",
+    "__loader__", "__package__", "__annotations__", "__class__",
+}
+
+# Nodes that make a recursive call conditional
+_BRANCH_NODES = (ast.If, ast.IfExp, ast.Match, ast.BoolOp, ast.For, ast.While, ast.Try)
+
+_SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+
+def _walk_local(node: ast.AST):
+    """Walk a function body without descending into nested scopes."""
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        yield child
+        if not isinstance(child, _SCOPE_NODES):
+            stack.extend(ast.iter_child_nodes(child))
+
+
+def _find_unbounded_recursion(tree: ast.AST) -> List[str]:
+    """Find functions that call themselves without any branching construct."""
+    unbounded = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+
+        recursive = False
+        branches = False
+        for child in _walk_local(node):
+            if (isinstance(child, ast.Call)
+                    and isinstance(child.func, ast.Name)
+                    and child.func.id == node.name):
+                recursive = True
+            elif isinstance(child, _BRANCH_NODES):
+                branches = True
+
+        if recursive and not branches:
+            unbounded.append(node.name)
+    return unbounded
+
+
+# Nodes that hand control back to the caller: a generator's ``while True``
+# loop that yields (or a coroutine's that awaits) is not infinite
+_SUSPEND_NODES = (ast.Yield, ast.YieldFrom, ast.Await)
+
+
+def _loop_can_exit(loop: ast.While) -> bool:
+    """Check whether a loop body contains a break, return, raise, yield or await."""
+    stack = list(loop.body)
+    while stack:
+        child = stack.pop()
+        if isinstance(child, (ast.Break, ast.Return, ast.Raise, *_SUSPEND_NODES)):
+            return True
+        if isinstance(child, _SCOPE_NODES):
+            continue
+        if isinstance(child, (ast.For, ast.AsyncFor, ast.While)):
+            # break inside a nested loop only exits the nested loop
+            stack.extend(n for n in ast.walk(child) if isinstance(n, (ast.Return, ast.Raise, *_SUSPEND_NODES)))
+            continue
+        stack.extend(ast.iter_child_nodes(child))
+    return False
+
+
+def _count_infinite_loops(tree: ast.AST) -> int:
+    """Count ``while True`` (or any constant-truthy test) loops without an exit."""
+    count = 0
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.While)
+                and isinstance(node.test, ast.Constant)
+                and bool(node.test.value)
+                and not _loop_can_exit(node)):
+            count += 1
+    return count
+
+
+def _collect_bound_names(tree: ast.AST) -> Set[str]:
+    """Collect every name bound anywhere in the module (flat, scope-insensitive)."""
+    bound: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, ast.alias):
+            bound.add((node.asname or node.name).split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            bound.add(node.rest)
+    return bound
+
+
+def _find_undefined_names(tree: ast.AST) -> List[str]:
+    """Find loaded names that are neither bound in the code nor builtins."""
+    bound = _collect_bound_names(tree) | _IMPLICIT_NAMES
+    undefined = {
+        node.id
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in bound
+    }
+    return sorted(undefined)
+
+
+def _collect_imports(tree: ast.AST) -> List[str]:
+    """Collect top-level module names of all imports."""
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.add(node.module.split(".")[0])
+    return sorted(modules)
+
+
+def analyze_code(code: str) -> Dict[str, Any]:
+    """Run all AST checks on a code string with a single parse.
+
+    Args:
+        code: Python source code
+
+    Returns:
+        Report dictionary with keys ``parse_ok``, ``imports``,
+        ``unbounded_recursion``, ``infinite_loops`` and ``undefined_names``
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return {
+            "parse_ok": False,
+            "imports": [],
+            "unbounded_recursion": [],
+            "infinite_loops": 0,
+            "undefined_names": [],
+        }
+
+    return {
+        "parse_ok": True,
+        "imports": _collect_imports(tree),
+        "unbounded_recursion": _find_unbounded_recursion(tree),
+        "infinite_loops": _count_infinite_loops(tree),
+        "undefined_names": _find_undefined_names(tree),
+    }
+
+
+class FunctionParts(NamedTuple):
+    """Pieces of the first function definition in a code string."""
+
+    name: str
+    signature: str
+    docstring_span: Optional[Tuple[int, int]]  # 1-based inclusive line range
+    body: Optional[str]
+
+
+def _dedent_lines(lines: List[str]) -> str:
+    """Strip the first line's indentation from every non-empty line."""
+    base_indent = len(lines[0]) - len(lines[0].lstrip())
+    return '\n'.join(
+        (line[base_indent:] if len(line) >= base_indent else line) if line.strip() else ''
+        for line in lines
+    ).rstrip()
+
+
+class FunctionLocation(NamedTuple):
+    """Line offsets of the first function definition in a code string.
+
+    Enough to rebuild FunctionParts without parsing again (see
+    ``function_parts``); stored by the validation cache.
+    """
+
+    name: str
+    def_line: int  # 1-based line of ``def``
+    header_end: int  # 1-based last line of the header (``...):``)
+    docstring_span: Optional[Tuple[int, int]]  # 1-based inclusive line range
+    body_start: int  # 0-based index of the first line after the docstring
+    body_end: int  # 0-based exclusive end of the body
+
+
+def locate_function(code: str) -> Tuple[bool, Optional[FunctionLocation]]:
+    """Parse ``code`` once and locate its first function.
+
+    Spans are derived from node offsets:
+    - header: ``def`` line through the line ending the header (``...):``)
+    - docstring: line span of a leading string-literal statement, if any
+    - body: statements after the docstring; for top-level functions trailing
+      indented lines (comments) up to the next top-level line are kept
+
+    Args:
+        code: Python source code
+
+    Returns:
+        (parse_ok, location); location is None if the code does not parse
+        or has no function
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError, MemoryError, RecursionError):
+        return False, None
+
+    node = next((n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)), None)
+    if node is None:
+        return True, None
+
+    lines = code.split('\n')
+    first_body_line = node.body[0].lineno
+
+    # Header ends on the first line ending with ':' at or after the last
+    # argument / return annotation (so ':' inside annotations is skipped)
+    header_end = node.lineno
+    for child in (*node.args.args, *node.args.posonlyargs, *node.args.kwonlyargs,
+                  node.args.vararg, node.args.kwarg, node.returns,
+                  *node.args.defaults, *node.args.kw_defaults):
+        if child is not None and child.end_lineno > header_end:
+            header_end = child.end_lineno
+    while header_end < first_body_line - 1 and not lines[header_end - 1].rstrip().endswith(':'):
+        header_end += 1
+
+    docstring_span = None
+    body_start = header_end  # 0-based index of the line after the header
+    first = node.body[0]
+    if (isinstance(first, ast.Expr)
+            and isinstance(first.value, ast.Constant)
+            and isinstance(first.value.value, str)):
+        docstring_span = (first.lineno, first.end_lineno)
+        body_start = first.end_lineno
+
+    body_end = node.end_lineno
+    if node.col_offset == 0:
+        while body_end < len(lines) and (not lines[body_end].strip() or lines[body_end][0].isspace()):
+            body_end += 1
+
+    return True, FunctionLocation(
+        name=node.name,
+        def_line=node.lineno,
+        header_end=header_end,
+        docstring_span=docstring_span,
+        body_start=body_start,
+        body_end=body_end,
+    )
+
+
+def function_parts(code: str, location: FunctionLocation) -> FunctionParts:
+    """Cut signature and body out of ``code`` at a known location (no parsing).
+
+    Args:
+        code: Python source code the location was computed from
+        location: Result of ``locate_function(code)``
+
+    Returns:
+        FunctionParts (body dedented, None if empty)
+    """
+    lines = code.split('\n')
+    signature = '\n'.join(lines[location.def_line - 1:location.header_end]).strip()
+
+    body_lines = lines[location.body_start:location.body_end]
+    while body_lines and not body_lines[0].strip():
+        body_lines.pop(0)
+
+    return FunctionParts(
+        name=location.name,
+        signature=signature,
+        docstring_span=location.docstring_span,
+        body=_dedent_lines(body_lines) if body_lines else None,
+    )
+
+
+def extract_function_parts(code: str) -> Optional[FunctionParts]:
+    """Split the first function in ``code`` into signature, docstring and body.
+
+    Parses once (``locate_function``) and cuts the parts at the located
+    offsets (``function_parts``).
+
+    Args:
+        code: Python source code
+
+    Returns:
+        FunctionParts, or None if the code does not parse or has no function
+    """
+    _, location = locate_function(code)
+    return function_parts(code, location) if location is not None else None
@@ -0,0 +1,21 @@
+"""
+Content hashing helpers.
+
+All pipeline stages identify samples by the same truncated SHA256 digest,
+so caches keyed by these hashes can be shared across stages.
+"""
+
+import hashlib
+
+
+def compute_hash(text: str, length: int = 16) -> str:
+    """Compute SHA256 hash of text.
+
+    Args:
+        text: Input text
+        length: Number of hex characters to keep
+
+    Returns:
+        First ``length`` characters of the hex digest
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:length]
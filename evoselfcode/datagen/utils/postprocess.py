@@ -0,0 +1,186 @@
+"""
+Post-processing of generated code off the event loop.
+
+Validating a generated function (``ast.parse``) takes milliseconds, which at
+hundreds of concurrent requests stalls the event loop that is supposed to
+keep the inference server busy. ``PostProcessPool`` runs the checks of a
+whole batch in worker processes, in chunks (one IPC round-trip per chunk),
+and returns the results in input order. Chunk functions are plain
+module-level functions (e.g. ``validation_cache.validate_codes``). An item
+that kills its worker (a C stack overflow in the parser) only costs itself:
+the broken chunks are re-run one item per task and the culprit gets the
+caller's ``on_crash`` result.
+"""
+
+import ast
+import asyncio
+import logging
+import multiprocessing as mp
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ...utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+def is_valid_python(code: str) -> bool:
+    """Whether ``code`` parses as Python."""
+    try:
+        ast.parse(code)
+        return True
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        # ValueError: null bytes; RecursionError/MemoryError: pathological nesting
+        return False
+
+
+def combine_skeleton_and_body(skeleton: str, body: str) -> str:
+    """Combine a function skeleton with a generated body.
+
+    Args:
+        skeleton: Function definition with docstring
+        body: Generated function body
+
+    Returns:
+        Complete function implementation
+    """
+    # Ensure at least 4 spaces indentation on non-empty lines
+    indented_body = [
+        line if not line.strip() or line.startswith('    ') else '    ' + line.lstrip()
+        for line in body.split('\n')
+    ]
+    return skeleton.rstrip() + '\n' + '\n'.join(indented_body)
+
+
+def _default_context():
+    methods = mp.get_all_start_methods()
+    return mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class PostProcessPool:
+    """
+    Worker processes for CPU-bound post-processing (validation, hashing).
+
+    ``map`` splits items into chunks, runs them in the pool and awaits the
+    results without blocking the event loop. Disabled, it runs inline.
+    """
+
+    def __init__(self, num_workers: int = 0, chunk_size: int = 32, enabled: bool = True):
+        """Initialize the pool (workers are started on first use).
+
+        Args:
+            num_workers: Number of worker processes (0 = cpu_count - 1)
+            chunk_size: Items per submitted task
+            enabled: Run in worker processes (False = inline on the caller's thread)
+        """
+        self.num_workers = num_workers if num_workers > 0 else max(1, mp.cpu_count() - 1)
+        self.chunk_size = max(1, chunk_size)
+        self.enabled = enabled
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]]) -> "PostProcessPool":
+        """Create pool from a ``postprocess`` configuration section"""
+        cfg = cfg or {}
+        return cls(
+            num_workers=int(cfg.get("workers", 0)),
+            chunk_size=int(cfg.get("chunk_size", 32)),
+            enabled=bool(cfg.get("enabled", True)),
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.num_workers, mp_context=_default_context())
+            return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is pool:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    @traced("postprocess")
+    async def map(self, fn: Callable[..., List[Any]], items: Sequence[Any], *args, on_crash: Any = None) -> List[Any]:
+        """Run a chunk function over ``items`` in the pool.
+
+        Args:
+            fn: Module-level function taking a list of items (plus ``args``)
+                and returning one result per item
+            items: Items to process
+            *args: Extra arguments passed to every call of ``fn``
+            on_crash: Result of an item that kills the worker processing it
+                (e.g. a C stack overflow in ``ast.parse``)
+
+        Returns:
+            Results in the order of ``items``
+        """
+        items = list(items)
+        if not items:
+            return []
+        if not self.enabled:
+            return fn(items, *args)
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        starts = range(0, len(items), self.chunk_size)
+        chunk_results = await asyncio.gather(*[
+            loop.run_in_executor(pool, fn, items[i:i + self.chunk_size], *args) for i in starts
+        ], return_exceptions=True)
+
+        results: List[Any] = [None] * len(items)
+        suspects: List[int] = []
+        for start, outcome in zip(starts, chunk_results):
+            if isinstance(outcome, BrokenProcessPool):
+                suspects.extend(range(start, min(start + self.chunk_size, len(items))))
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results[start:start + len(outcome)] = outcome
+        if suspects:
+            self._reset_pool(pool)
+            await self._isolate(fn, items, args, suspects, results, on_crash)
+        return results
+
+    async def _isolate(
+        self,
+        fn: Callable[..., List[Any]],
+        items: List[Any],
+        args: tuple,
+        suspects: List[int],
+        results: List[Any],
+        on_crash: Any,
+    ) -> None:
+        """Re-run the items of broken chunks one per task, so only the item
+        that kills its worker (twice, to rule out a concurrent caller's
+        crash) gets ``on_crash``; the rest get their real results."""
+        loop = asyncio.get_running_loop()
+        crashed = 0
+        for i in suspects:
+            for attempt in range(2):
+                pool = self._get_pool()
+                try:
+                    results[i] = (await loop.run_in_executor(pool, fn, [items[i]], *args))[0]
+                    break
+                except BrokenProcessPool:
+                    self._reset_pool(pool)
+                    if attempt == 1:
+                        results[i] = on_crash
+                        crashed += 1
+        logger.warning(f"[PostProcessPool] Worker process died; isolated {len(suspects)} items, {crashed} crashed")
+
+    def close(self):
+        """Shut down worker processes (they are restarted on next use)"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self) -> "PostProcessPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,82 @@
+"""
+Ruff lint helpers.
+
+Ruff is an optional (dev) dependency. All snippets of a batch are linted with
+a single ``ruff check`` invocation over a temporary directory, so the process
+start-up cost is paid once per batch instead of once per snippet.
+"""
+
+import json
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+DEFAULT_SELECT = ["E9", "F"]  # syntax errors + pyflakes
+
+
+def ruff_available() -> bool:
+    """Check whether the ruff executable is on PATH."""
+    return shutil.which("ruff") is not None
+
+
+def count_lint_errors_batch(
+    codes: Sequence[str],
+    select: Optional[Sequence[str]] = None,
+    timeout_s: float = 60.0,
+) -> List[Optional[int]]:
+    """Count ruff diagnostics for each code snippet.
+
+    Args:
+        codes: Python source snippets
+        select: Ruff rule selectors (default: syntax errors and pyflakes)
+        timeout_s: Timeout for the ruff invocation
+
+    Returns:
+        Number of diagnostics per snippet, or None for every snippet if ruff
+        is unavailable or fails
+    """
+    if not codes:
+        return []
+
+    ruff_bin = shutil.which("ruff")
+    if ruff_bin is None:
+        return [None] * len(codes)
+
+    select = list(select or DEFAULT_SELECT)
+
+    with tempfile.TemporaryDirectory(prefix="evoselfcode_ruff_") as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        for i, code in enumerate(codes):
+            (tmp_path / f"snippet_{i}.py").write_text(code, encoding="utf-8")
+
+        cmd = [
+            ruff_bin, "check",
+            "--no-cache",
+            "--isolated",
+            "--output-format", "json",
+            "--select", ",".join(select),
+            "--exit-zero",
+            str(tmp_path),
+        ]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout_s)
+            diagnostics = json.loads(proc.stdout or "[]")
+        except (subprocess.SubprocessError, json.JSONDecodeError, OSError):
+            return [None] * len(codes)
+
+    counts = [0] * len(codes)
+    for diag in diagnostics:
+        stem = Path(diag.get("filename", "")).stem
+        if stem.startswith("snippet_"):
+            try:
+                counts[int(stem[len("snippet_"):])] += 1
+            except (ValueError, IndexError):
+                continue
+    return counts
+
+
+def count_lint_errors(code: str, select: Optional[Sequence[str]] = None) -> Optional[int]:
+    """Count ruff diagnostics for a single code snippet."""
+    return count_lint_errors_batch([code], select)[0]
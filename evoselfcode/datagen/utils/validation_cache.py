@@ -0,0 +1,373 @@
+"""
+Validation cache shared by the pipeline stages.
+
+Every stage identifies code by the same content hash (``compute_hash``), so
+the result of parsing a code string once can be reused everywhere: by the
+skeleton and code generators (syntax check, function name), the rating
+generator (skip code known not to parse) and the ChatML converter (cut
+signature and body at the stored offsets instead of parsing again). The
+cache outlives runs and is shared between FIM and L2R.
+
+On disk it is an append-only text file, one short line per code string:
+
+    # evoselfcode validation cache v1 py3.11
+    <hash> 0                                      # does not parse
+    <hash> 1                                      # parses, no function
+    <hash> 1 <name> <def> <header_end> <doc_start> <doc_end> <body_start> <body_end>
+
+(offsets as in ``FunctionLocation``, doc_start = doc_end = 0 without a
+docstring). Sharded worker processes share the file: each batch is appended
+in one write under an exclusive ``flock`` (which also guards writing the
+header), and loading holds a shared lock, so no process reads a half-written
+line. Malformed lines are still skipped when loading. Whether code parses
+depends on the Python version, so a file written by a different version is
+started over: truncated in place under the exclusive lock, never unlinked
+while other processes may hold it open.
+
+Worker processes that only look entries up (the ChatML converter) do not
+load the file: ``ValidationIndex.build`` writes its keys and line offsets,
+sorted by key, to an .npy file that workers memory-map and binary-search,
+reading only the lines they need. The index pages are shared through the
+page cache, so worker memory does not grow with the cache file.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ...constants import PROJECT_ROOT
+from .ast_tools import FunctionLocation, locate_function
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not POSIX: single-process use only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+HEADER = f"# evoselfcode validation cache v1 py{sys.version_info[0]}.{sys.version_info[1]}"
+
+# Hex digits of a cache key (compute_hash default length): one uint64 in the index
+_KEY_CHARS = 16
+# Shortest valid line: "<key> 0"
+_MIN_LINE = _KEY_CHARS + 2
+# Cache file bytes scanned at a time when building an index
+_INDEX_BLOCK_BYTES = 64 * 1024 * 1024
+# Hex digit value of each byte (-1 = not a lowercase hex digit)
+_HEX_VALUES = np.full(256, -1, dtype=np.int16)
+_HEX_VALUES[np.frombuffer(b"0123456789abcdef", dtype=np.uint8)] = np.arange(16)
+
+
+@contextlib.contextmanager
+def _file_lock(f, exclusive: bool):
+    """Hold an advisory lock on an open file (shared or exclusive)."""
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ValidationEntry(NamedTuple):
+    """Outcome of parsing one code string."""
+
+    parse_ok: bool
+    location: Optional[FunctionLocation] = None
+
+
+def validate_codes(codes: List[str]) -> List[ValidationEntry]:
+    """Worker: parse each code string once."""
+    return [ValidationEntry(*locate_function(code)) for code in codes]
+
+
+def encode_entry(key: str, entry: ValidationEntry) -> str:
+    """Cache file line (without newline) of an entry."""
+    if not entry.parse_ok:
+        return f"{key} 0"
+    loc = entry.location
+    if loc is None:
+        return f"{key} 1"
+    doc_start, doc_end = loc.docstring_span or (0, 0)
+    return f"{key} 1 {loc.name} {loc.def_line} {loc.header_end} {doc_start} {doc_end} {loc.body_start} {loc.body_end}"
+
+
+def decode_entry(line: str) -> Optional[Tuple[str, ValidationEntry]]:
+    """(key, entry) of a cache file line, or None if it is malformed."""
+    fields = line.split()
+    try:
+        if len(fields) == 2 and fields[1] in ("0", "1"):
+            return fields[0], ValidationEntry(fields[1] == "1")
+        if len(fields) == 9 and fields[1] == "1":
+            def_line, header_end, doc_start, doc_end, body_start, body_end = map(int, fields[3:])
+            return fields[0], ValidationEntry(True, FunctionLocation(
+                name=fields[2],
+                def_line=def_line,
+                header_end=header_end,
+                docstring_span=(doc_start, doc_end) if doc_start else None,
+                body_start=body_start,
+                body_end=body_end,
+            ))
+    except ValueError:
+        pass
+    return None
+
+
+def _index_block(block: bytes, base: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Keys (uint64) and file offsets of the well-formed lines of a block of whole lines."""
+    data = np.frombuffer(block, dtype=np.uint8)
+    ends = np.flatnonzero(data == ord('\n'))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    starts = starts[ends - starts >= _MIN_LINE]
+    digits = _HEX_VALUES[data[starts[:, None] + np.arange(_KEY_CHARS)]]
+    valid = (digits >= 0).all(axis=1) & (data[starts + _KEY_CHARS] == ord(' '))
+    keys = np.zeros(int(valid.sum()), dtype=np.uint64)
+    for column in digits[valid].T:
+        keys = (keys << np.uint64(4)) | column.astype(np.uint64)
+    return keys, starts[valid].astype(np.uint64) + np.uint64(base)
+
+
+class ValidationIndex:
+    """
+    Read-only lookups in a cache file through a memory-mapped sorted key index.
+
+    Usage:
+        ValidationIndex.build(cache_path, index_path)   # once, in the parent
+        index = ValidationIndex(cache_path, index_path)  # in each worker
+        entry = index.get(compute_hash(code))
+    """
+
+    def __init__(self, cache_path: Path, index_path: Path):
+        """Open an index written by ``build``.
+
+        Args:
+            cache_path: Cache file the index was built from
+            index_path: Index file
+        """
+        self._keys, self._offsets = np.load(index_path, mmap_mode='r')
+        self._fd = os.open(cache_path, os.O_RDONLY)
+
+    @staticmethod
+    def build(cache_path: Path, index_path: Path) -> bool:
+        """Write the sorted (key, line offset) index of a cache file.
+
+        A file written by another Python version is started over instead.
+
+        Args:
+            cache_path: Cache file
+            index_path: Index file to write (.npy, replaced atomically)
+
+        Returns:
+            Whether an index was written (False: no file or no entries)
+        """
+        if not cache_path.exists():
+            return False
+        keys, offsets = [], []
+        with open(cache_path, 'rb') as f, _file_lock(f, exclusive=False):
+            header = f.readline().rstrip(b'\n').decode('utf-8', 'replace')
+            if header == HEADER:
+                base = f.tell()
+                pending = b''
+                while True:
+                    block = f.read(_INDEX_BLOCK_BYTES)
+                    if not block:
+                        break
+                    block = pending + block
+                    cut = block.rfind(b'\n') + 1
+                    pending = block[cut:]
+                    if cut:
+                        block_keys, block_offsets = _index_block(block[:cut], base)
+                        keys.append(block_keys)
+                        offsets.append(block_offsets)
+                    base += cut
+        if header != HEADER:
+            ValidationCache(cache_path)._start_over()
+            return False
+        if not keys or not sum(len(k) for k in keys):
+            return False
+        keys = np.concatenate(keys)
+        offsets = np.concatenate(offsets)
+        order = np.argsort(keys, kind='stable')
+        keys, offsets = keys[order], offsets[order]
+        # Equal keys describe the same code; keep the first line of each
+        first = np.concatenate(([True], keys[1:] != keys[:-1]))
+        tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.stack([keys[first], offsets[first]]))
+        os.replace(tmp_path, index_path)
+        logger.info(f"[ValidationIndex] Indexed {int(first.sum())} entries of {cache_path}")
+        return True
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, key: str) -> Optional[ValidationEntry]:
+        """Entry of a content hash (None if not in the indexed part of the file)."""
+        if len(key) != _KEY_CHARS:
+            return None
+        try:
+            value = np.uint64(int(key, 16))
+        except ValueError:
+            return None
+        i = int(np.searchsorted(self._keys, value))
+        if i == len(self._keys) or self._keys[i] != value:
+            return None
+        decoded = decode_entry(self._read_line(int(self._offsets[i])))
+        # A file started over since the index was built has other lines there
+        return decoded[1] if decoded is not None and decoded[0] == key else None
+
+    def _read_line(self, offset: int) -> str:
+        size = 256
+        while True:
+            data = os.pread(self._fd, size, offset)
+            end = data.find(b'\n')
+            if end >= 0 or len(data) < size:
+                return data[:end if end >= 0 else len(data)].decode('utf-8', 'replace')
+            size *= 2
+
+
+class ValidationCache:
+    """
+    Content hash -> ValidationEntry, in memory and (optionally) on disk.
+
+    Usage:
+        cache = ValidationCache.from_config(config.get_section("postprocess"))
+        entries = await cache.validate({uid: code, ...}, pool)
+    """
+
+    # Instances per file, so stages running in one process share the loaded entries
+    _shared: Dict[Path, "ValidationCache"] = {}
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize the cache (the file is read on first use).
+
+        Args:
+            path: Cache file (None = in memory only)
+        """
+        self.path = path
+        self._entries: Dict[str, ValidationEntry] = {}
+        self._loaded = path is None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]]) -> "ValidationCache":
+        """Shared cache of the ``validation_cache`` file in a ``postprocess`` section.
+
+        A relative path is resolved against the project root; null keeps the
+        cache in memory for this instance only.
+        """
+        path = (cfg or {}).get("validation_cache")
+        if not path:
+            return cls()
+        path = Path(path)
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        if path not in cls._shared:
+            cls._shared[path] = cls(path)
+        return cls._shared[path]
+
+    def load(self) -> "ValidationCache":
+        """Read the cache file once (later calls do nothing)."""
+        with self._lock:
+            if self._loaded:
+                return self
+            self._loaded = True
+            if not self.path.exists():
+                return self
+            with open(self.path, 'r', encoding='utf-8') as f, _file_lock(f, exclusive=False):
+                header = f.readline().rstrip('\n')
+                if header == HEADER:
+                    for line in f:
+                        decoded = decode_entry(line)
+                        if decoded is not None:
+                            self._entries[decoded[0]] = decoded[1]
+            if header != HEADER:
+                self._start_over()
+                return self
+            logger.info(f"[ValidationCache] Loaded {len(self._entries)} entries from {self.path}")
+        return self
+
+    def _start_over(self) -> None:
+        """Empty a file written by another version (unless another process just did)."""
+        with open(self.path, 'r+', encoding='utf-8') as f, _file_lock(f, exclusive=True):
+            header = f.readline().rstrip('\n')
+            if header and header != HEADER:
+                logger.info(f"[ValidationCache] {self.path} was written by another version, starting over")
+                f.seek(0)
+                f.truncate()
+
+    def get(self, key: str) -> Optional[ValidationEntry]:
+        """Cached entry of a content hash (None if the code was never parsed)."""
+        return self._entries.get(key)
+
+    def entries(self) -> Dict[str, ValidationEntry]:
+        """All entries (loaded from disk first)."""
+        return self.load()._entries
+
+    def add(self, items: Iterable[Tuple[str, ValidationEntry]]) -> List[str]:
+        """Store new entries in memory; returns their cache file lines."""
+        lines = []
+        for key, entry in items:
+            if key not in self._entries:
+                self._entries[key] = entry
+                lines.append(encode_entry(key, entry))
+        return lines
+
+    def append_lines(self, lines: List[str]) -> None:
+        """Persist cache file lines (one write, under the file's exclusive lock)."""
+        if self.path is None or not lines:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f, _file_lock(f, exclusive=True):
+            # Size checked under the lock: exactly one writer adds the header
+            if os.fstat(f.fileno()).st_size == 0:
+                lines = [HEADER, *lines]
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+
+    async def validate(self, codes: Dict[str, str], pool=None) -> Dict[str, ValidationEntry]:
+        """Entries of code strings, parsing only those not seen before.
+
+        Args:
+            codes: Content hash (``compute_hash(code)``) -> code
+            pool: PostProcessPool to parse in (None = parse inline)
+
+        Returns:
+            Content hash -> ValidationEntry for every key of ``codes``
+        """
+        if not self._loaded:
+            await asyncio.to_thread(self.load)
+        result = {}
+        misses = []
+        for key in codes:
+            entry = self._entries.get(key)
+            if entry is None:
+                misses.append(key)
+            else:
+                result[key] = entry
+        self.hits += len(result)
+        self.misses += len(misses)
+        if not misses:
+            return result
+
+        miss_codes = [codes[key] for key in misses]
+        entries = (
+            await pool.map(validate_codes, miss_codes, on_crash=ValidationEntry(False))
+            if pool is not None else validate_codes(miss_codes)
+        )
+        result.update(zip(misses, entries))
+        lines = self.add(zip(misses, entries))
+        if lines and self.path is not None:
+            await asyncio.to_thread(self.append_lines, lines)
+        return result
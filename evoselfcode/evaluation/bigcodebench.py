@@ -1,13 +1,51 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from pathlib import Path
+from typing import List
+
+from .engine import Benchmark, EvalTask, format_pass_at_k, read_task_file, run_benchmark
 
 logger = logging.getLogger(__name__)
 
+_RUNNER = '''
+
+import io as __bcb_io
+import unittest as __bcb_unittest
+__bcb_suite = __bcb_unittest.defaultTestLoader.loadTestsFromTestCase(TestCases)
+__bcb_result = __bcb_unittest.TextTestRunner(stream=__bcb_io.StringIO(), verbosity=0).run(__bcb_suite)
+__passed__ = __bcb_result.testsRun - len(__bcb_result.failures) - len(__bcb_result.errors)
+assert __bcb_result.wasSuccessful(), f"{__passed__}/{__bcb_result.testsRun} tests passed"
+'''
+
+
+def load_tasks(path: Path) -> List[EvalTask]:
+	"""Load BigCodeBench records (task_id, complete_prompt, test with a TestCases class)"""
+	return [
+		EvalTask(
+			task_id=rec["task_id"],
+			prompt=rec["complete_prompt"],
+			num_tests=max(1, rec["test"].count("def test")),
+			data={"test": rec["test"]},
+		)
+		for rec in read_task_file(path)
+	]
 
-def cmd_eval(ckpt: Path, config_path: Path | None) -> None:
-	logger.info("[BigCodeBench] evaluating checkpoint %s (stub)", ckpt)
-	logger.info("[BigCodeBench] pass@1=0.0 (stub)")
 
+def build_program(task: EvalTask, completion: str) -> str:
+	return task.prompt + completion + "\n\n" + task.data["test"] + _RUNNER
 
+
+BENCHMARK = Benchmark(
+	name="bigcodebench",
+	load_tasks=load_tasks,
+	build_program=build_program,
+	stop=["\nif __name__", "\ndef main(", "\nprint(", "\n```"],
+)
+
+
+def cmd_eval(ckpt: Path, config_path: Path | None) -> None:
+	logger.info("[BigCodeBench] evaluating checkpoint %s", ckpt)
+	report = asyncio.run(run_benchmark(BENCHMARK, ckpt, config_path))
+	logger.info("[BigCodeBench] %s", format_pass_at_k(report))
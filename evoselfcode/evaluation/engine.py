@@ -0,0 +1,457 @@
+"""
+Execution-based evaluation engine.
+
+Generates ``n`` samples per task through the completion client (all tasks in
+flight at once, bounded only by the client's concurrency limit), executes
+each sample against the task's tests in the sandbox pool as soon as its
+generations arrive, and reports unbiased pass@k.
+
+Generations and execution results are cached on disk keyed by
+(checkpoint, task, sample), so re-running an evaluation only generates and
+executes what is missing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn, TimeRemainingColumn
+
+from ..constants import CONFIGS_DIR, DEFAULT_EVAL_CONFIG, PROJECT_ROOT
+from ..core import ClientManager, ConfigManager
+from ..datagen.utils.hashing import compute_hash
+from ..sandbox import SandboxPool
+
+logger = logging.getLogger(__name__)
+
+# Bumped when sandbox or harness changes can alter execution results
+# (v2: one isolated process per sample, real stdin for LCB), so cached
+# results from older runs are not reused
+EXECUTIONS_FILE = "executions.v2.jsonl"
+
+
+@dataclass
+class EvalTask:
+	"""One benchmark problem"""
+
+	task_id: str
+	prompt: str
+	num_tests: int = 1
+	data: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Benchmark:
+	"""How to load, prompt and test one benchmark"""
+
+	name: str
+	load_tasks: Callable[[Path], List[EvalTask]]
+	build_program: Callable[[EvalTask, str], str]
+	stop: List[str] = field(default_factory=list)
+
+
+def read_task_file(path: Path) -> List[Dict[str, Any]]:
+	"""Read task records from a local .jsonl, .jsonl.gz or .json file"""
+	opener = gzip.open if path.suffix == ".gz" else open
+	with opener(path, "rt", encoding="utf-8") as f:
+		if path.name.endswith((".json", ".json.gz")):
+			data = json.load(f)
+			return list(data.values()) if isinstance(data, dict) else list(data)
+		return [json.loads(line) for line in f if line.strip()]
+
+
+def estimate_pass_at_k(num_samples: Sequence[int], num_correct: Sequence[int], k: int) -> np.ndarray:
+	"""Unbiased pass@k per task: 1 - C(n-c, k) / C(n, k).
+
+	Computed as 1 - prod_{i=n-c+1}^{n} (1 - k/i) for numerical stability.
+	Tasks with fewer than k samples get NaN.
+	"""
+	n = np.asarray(num_samples, dtype=np.int64)
+	c = np.asarray(num_correct, dtype=np.int64)
+	if n.size == 0:
+		return np.zeros(0)
+
+	j = np.arange(int(n.max()))
+	denom = (n - c + 1)[:, None] + j[None, :]
+	terms = np.where(j[None, :] < c[:, None], 1.0 - k / np.maximum(denom, 1), 1.0)
+	estimates = 1.0 - terms.prod(axis=1)
+	estimates = np.where(n - c < k, 1.0, estimates)
+	return np.where(n < k, np.nan, estimates)
+
+
+class _JsonlCache:
+	"""Append-only JSONL cache keyed by (task_id, sample_idx)"""
+
+	def __init__(self, path: Path):
+		self.path = path
+		self.records: Dict[Tuple[str, int], Dict[str, Any]] = {}
+		self._lock = asyncio.Lock()
+		if path.exists():
+			with open(path, "r", encoding="utf-8") as f:
+				for line in f:
+					if not line.strip():
+						continue
+					try:
+						rec = json.loads(line)
+					except json.JSONDecodeError:
+						continue
+					self.records[(rec["task_id"], int(rec["sample_idx"]))] = rec
+
+	def get(self, task_id: str, sample_idx: int) -> Optional[Dict[str, Any]]:
+		return self.records.get((task_id, sample_idx))
+
+	async def add(self, records: List[Dict[str, Any]]) -> None:
+		if not records:
+			return
+		for rec in records:
+			self.records[(rec["task_id"], rec["sample_idx"])] = rec
+		payload = "".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in records)
+
+		def _write():
+			with open(self.path, "a", encoding="utf-8") as f:
+				f.write(payload)
+
+		async with self._lock:
+			await asyncio.to_thread(_write)
+
+
+class EvaluationEngine:
+	"""
+	Generate -> execute -> pass@k pipeline for one checkpoint.
+	The client and sandbox can be shared across benchmarks.
+	"""
+
+	def __init__(
+		self,
+		client,
+		sandbox: SandboxPool,
+		checkpoint: str,
+		cache_dir: Path,
+		n_samples: int = 10,
+		ks: Sequence[int] = (1, 5, 10),
+		generation: Optional[Dict[str, Any]] = None,
+		timeout_per_test_s: float = 3.0,
+		max_timeout_s: float = 60.0,
+	):
+		self.client = client
+		self.sandbox = sandbox
+		self.checkpoint = checkpoint
+		self.cache_dir = cache_dir
+		self.n_samples = n_samples
+		self.ks = [k for k in ks if k <= n_samples]
+		self.generation = dict(generation or {})
+		self.max_n_per_request = int(self.generation.pop("max_n_per_request", n_samples))
+		self.timeout_per_test_s = timeout_per_test_s
+		self.max_timeout_s = max_timeout_s
+
+	@classmethod
+	def from_config(cls, config: ConfigManager, client, sandbox: SandboxPool, checkpoint: str) -> "EvaluationEngine":
+		"""Create engine from ``eval.*`` configuration"""
+		cache_dir = Path(config.get("eval.cache_dir", "results/eval"))
+		if not cache_dir.is_absolute():
+			cache_dir = PROJECT_ROOT / cache_dir
+		return cls(
+			client=client,
+			sandbox=sandbox,
+			checkpoint=checkpoint,
+			cache_dir=cache_dir,
+			n_samples=int(config.get("eval.n_samples", 10)),
+			ks=config.get("eval.k", [1, 5, 10]),
+			generation=config.get("eval.generation", {}),
+			timeout_per_test_s=float(config.get("eval.timeout_per_test_s", 3.0)),
+			max_timeout_s=float(config.get("eval.max_timeout_s", 60.0)),
+		)
+
+	def checkpoint_dir(self) -> Path:
+		"""Cache directory for the checkpoint under evaluation"""
+		return self.cache_dir / f"{Path(self.checkpoint).name or 'model'}-{compute_hash(self.checkpoint, 8)}"
+
+	def _run_dir(self, benchmark: Benchmark) -> Path:
+		"""Cache directory for (checkpoint, benchmark, generation settings)"""
+		params = json.dumps(
+			{"generation": self.generation, "stop": benchmark.stop}, sort_keys=True
+		)
+		return self.checkpoint_dir() / f"{benchmark.name}-{compute_hash(params, 8)}"
+
+	async def _generate(self, prompt: str, count: int, stop: List[str]) -> List[str]:
+		"""Request ``count`` samples, split into requests of at most max_n_per_request"""
+		sizes = [
+			min(self.max_n_per_request, count - i)
+			for i in range(0, count, max(1, self.max_n_per_request))
+		]
+		responses = await asyncio.gather(*[
+			self.client.complete_batch_async(
+				[prompt],
+				n=size,
+				stop=stop or None,
+				max_tokens=int(self.generation.get("max_tokens", 512)),
+				temperature=float(self.generation.get("temperature", 0.8)),
+				top_p=float(self.generation.get("top_p", 0.95)),
+			)
+			for size in sizes
+		])
+		return [choice["text"] for response in responses for choice in response[0]]
+
+	async def _evaluate_task(
+		self,
+		benchmark: Benchmark,
+		task: EvalTask,
+		generations: _JsonlCache,
+		executions: _JsonlCache,
+	) -> Dict[str, Any]:
+		samples = {}
+		for idx in range(self.n_samples):
+			rec = generations.get(task.task_id, idx)
+			if rec is not None:
+				samples[idx] = rec["completion"]
+
+		missing = [idx for idx in range(self.n_samples) if idx not in samples]
+		if missing:
+			try:
+				completions = await self._generate(task.prompt, len(missing), benchmark.stop)
+			except Exception as e:
+				logger.warning("[%s] generation failed for %s: %s", benchmark.name, task.task_id, e)
+				completions = []
+			new_records = [
+				{"task_id": task.task_id, "sample_idx": idx, "completion": text}
+				for idx, text in zip(missing, completions)
+			]
+			samples.update((rec["sample_idx"], rec["completion"]) for rec in new_records)
+			await generations.add(new_records)
+
+		to_run = [idx for idx in sorted(samples) if executions.get(task.task_id, idx) is None]
+		if to_run:
+			timeout_s = min(self.max_timeout_s, self.timeout_per_test_s * max(1, task.num_tests))
+			programs = [benchmark.build_program(task, samples[idx]) for idx in to_run]
+			results = await self.sandbox.run_async(programs, timeout_s)
+			await executions.add([
+				{
+					"task_id": task.task_id,
+					"sample_idx": idx,
+					"status": result.status,
+					"error": result.error,
+					"duration_s": round(result.duration_s, 4),
+				}
+				for idx, result in zip(to_run, results)
+			])
+
+		statuses = [executions.get(task.task_id, idx)["status"] for idx in sorted(samples)]
+		return {
+			"task_id": task.task_id,
+			"n": len(statuses),
+			"c": sum(1 for s in statuses if s == "passed"),
+			"statuses": statuses,
+		}
+
+	async def evaluate(self, benchmark: Benchmark, tasks: List[EvalTask]) -> Dict[str, Any]:
+		"""Evaluate all tasks of one benchmark and write report.json.
+
+		Args:
+			benchmark: Benchmark definition
+			tasks: Tasks to evaluate
+
+		Returns:
+			Report dictionary with pass@k and per-task counts
+		"""
+		reports = await self.evaluate_many([(benchmark, tasks)])
+		return reports[benchmark.name]
+
+	async def evaluate_many(self, jobs: List[Tuple[Benchmark, List[EvalTask]]]) -> Dict[str, Dict[str, Any]]:
+		"""Evaluate several benchmarks concurrently.
+
+		Tasks of all benchmarks are interleaved and share the client's request
+		budget and the sandbox workers, so generation for one task overlaps
+		with execution for others regardless of which benchmark they belong to.
+
+		Args:
+			jobs: (benchmark, tasks) pairs
+
+		Returns:
+			Mapping of benchmark name to its report
+		"""
+		runs = []
+		for benchmark, tasks in jobs:
+			run_dir = self._run_dir(benchmark)
+			run_dir.mkdir(parents=True, exist_ok=True)
+			generations = _JsonlCache(run_dir / "generations.jsonl")
+			executions = _JsonlCache(run_dir / EXECUTIONS_FILE)
+			logger.info(
+				"[%s] %d tasks, n=%d, cached generations=%d, cached executions=%d",
+				benchmark.name, len(tasks), self.n_samples, len(generations.records), len(executions.records),
+			)
+			runs.append((benchmark, tasks, run_dir, generations, executions))
+
+		with Progress(
+			SpinnerColumn(),
+			TextColumn("[progress.description]{task.description}"),
+			BarColumn(),
+			TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+			TimeRemainingColumn(),
+		) as progress:
+			progress_ids = {
+				benchmark.name: progress.add_task(f"[cyan]{benchmark.name}", total=len(tasks))
+				for benchmark, tasks, *_ in runs
+			}
+
+			async def _run(benchmark, task, generations, executions) -> Dict[str, Any]:
+				result = await self._evaluate_task(benchmark, task, generations, executions)
+				progress.update(progress_ids[benchmark.name], advance=1)
+				return result
+
+			# Round-robin order so no benchmark's executions pile up at the end
+			coros, owners = [], []
+			for i in range(max((len(tasks) for _, tasks, *_ in runs), default=0)):
+				for run_idx, (benchmark, tasks, _, generations, executions) in enumerate(runs):
+					if i < len(tasks):
+						coros.append(_run(benchmark, tasks[i], generations, executions))
+						owners.append(run_idx)
+			results = await asyncio.gather(*coros)
+
+		per_run: List[List[Dict[str, Any]]] = [[] for _ in runs]
+		for run_idx, result in zip(owners, results):
+			per_run[run_idx].append(result)
+
+		reports = {}
+		for (benchmark, _, run_dir, _, _), per_task in zip(runs, per_run):
+			report = self._report(benchmark, per_task)
+			with open(run_dir / "report.json", "w", encoding="utf-8") as f:
+				json.dump(report, f, indent=2)
+
+			logger.info("[%s] %s", benchmark.name, format_pass_at_k(report))
+			if report["incomplete_tasks"]:
+				logger.warning(
+					"[%s] %d tasks have fewer than %d samples; re-run to fill them in",
+					benchmark.name, report["incomplete_tasks"], self.n_samples,
+				)
+			logger.info("[%s] report: %s", benchmark.name, run_dir / "report.json")
+			reports[benchmark.name] = report
+		return reports
+
+	def _report(self, benchmark: Benchmark, per_task: List[Dict[str, Any]]) -> Dict[str, Any]:
+		n = np.array([t["n"] for t in per_task], dtype=np.int64)
+		c = np.array([t["c"] for t in per_task], dtype=np.int64)
+		pass_at_k = {}
+		for k in self.ks:
+			estimates = estimate_pass_at_k(n, c, k)
+			valid = estimates[~np.isnan(estimates)]
+			pass_at_k[k] = float(valid.mean()) if valid.size else None
+
+		status_counts: Dict[str, int] = {}
+		for t in per_task:
+			for status in t["statuses"]:
+				status_counts[status] = status_counts.get(status, 0) + 1
+
+		return {
+			"benchmark": benchmark.name,
+			"checkpoint": self.checkpoint,
+			"num_tasks": len(per_task),
+			"n_samples": self.n_samples,
+			"incomplete_tasks": int((n < self.n_samples).sum()),
+			"pass_at_k": pass_at_k,
+			"status_counts": status_counts,
+			"per_task": {t["task_id"]: {"n": t["n"], "c": t["c"]} for t in per_task},
+		}
+
+
+def load_eval_config(config_path: Optional[Path]) -> ConfigManager:
+	"""Load eval config (default configs/eval.yaml) merged over its model config"""
+	main_config = ConfigManager.from_file(config_path or DEFAULT_EVAL_CONFIG)
+	model_config_path = Path(main_config.get("model_config", "model.yaml"))
+	if not model_config_path.is_absolute():
+		model_config_path = CONFIGS_DIR / model_config_path
+	if model_config_path.exists():
+		return ConfigManager.from_file(model_config_path).merge(main_config)
+	return main_config
+
+
+def resolve_path(path: str) -> Path:
+	"""Resolve a config path relative to the project root"""
+	p = Path(path)
+	return p if p.is_absolute() else PROJECT_ROOT / p
+
+
+def create_client(config: ConfigManager, ckpt: Path):
+	"""Completion client serving the checkpoint under evaluation"""
+	config.set("models.default", config.get("eval.served_model_name") or str(ckpt))
+	return ClientManager(config).completion_client
+
+
+def load_benchmark_tasks(benchmark: Benchmark, config: ConfigManager) -> List[EvalTask]:
+	"""Load tasks for a benchmark from its configured local file"""
+	path = config.get(f"eval.benchmarks.{benchmark.name}.path")
+	if not path:
+		raise ValueError(f"eval.benchmarks.{benchmark.name}.path is not configured")
+	tasks = benchmark.load_tasks(resolve_path(path))
+	max_tasks = config.get("eval.max_tasks")
+	return tasks[:int(max_tasks)] if max_tasks else tasks
+
+
+def configure_benchmark(benchmark: Benchmark, config: ConfigManager) -> Benchmark:
+	"""Apply ``eval.benchmarks.<name>.stop`` overrides"""
+	stop = config.get(f"eval.benchmarks.{benchmark.name}.stop")
+	return replace(benchmark, stop=list(stop)) if stop is not None else benchmark
+
+
+async def run_benchmark(benchmark: Benchmark, ckpt: Path, config_path: Optional[Path]) -> Dict[str, Any]:
+	"""Evaluate one checkpoint on one benchmark"""
+	config = load_eval_config(config_path)
+	benchmark = configure_benchmark(benchmark, config)
+	tasks = load_benchmark_tasks(benchmark, config)
+	client = create_client(config, ckpt)
+	with SandboxPool.from_config(config.get_section("eval.sandbox")) as sandbox:
+		engine = EvaluationEngine.from_config(config, client, sandbox, str(ckpt))
+		return await engine.evaluate(benchmark, tasks)
+
+
+async def run_all(benchmarks: List[Benchmark], ckpt: Path, config_path: Optional[Path]) -> Dict[str, Any]:
+	"""Evaluate one checkpoint on several benchmarks with one shared client and sandbox.
+
+	Benchmarks whose task file is missing are skipped with a warning. A
+	combined report is written next to the per-benchmark reports.
+	"""
+	config = load_eval_config(config_path)
+	jobs = []
+	for benchmark in benchmarks:
+		benchmark = configure_benchmark(benchmark, config)
+		path = config.get(f"eval.benchmarks.{benchmark.name}.path")
+		if not path or not resolve_path(path).exists():
+			logger.warning("[%s] task file not found (%s), skipped", benchmark.name, path)
+			continue
+		jobs.append((benchmark, load_benchmark_tasks(benchmark, config)))
+
+	client = create_client(config, ckpt)
+	start = time.perf_counter()
+	with SandboxPool.from_config(config.get_section("eval.sandbox")) as sandbox:
+		engine = EvaluationEngine.from_config(config, client, sandbox, str(ckpt))
+		reports = await engine.evaluate_many(jobs)
+
+	combined = {
+		"checkpoint": str(ckpt),
+		"elapsed_s": round(time.perf_counter() - start, 2),
+		"benchmarks": {
+			name: {key: report[key] for key in ("num_tasks", "incomplete_tasks", "pass_at_k", "status_counts")}
+			for name, report in reports.items()
+		},
+	}
+	out_dir = engine.checkpoint_dir()
+	out_dir.mkdir(parents=True, exist_ok=True)
+	with open(out_dir / "report_all.json", "w", encoding="utf-8") as f:
+		json.dump(combined, f, indent=2)
+	logger.info("Combined report: %s (%.1fs)", out_dir / "report_all.json", combined["elapsed_s"])
+	return combined
+
+
+def format_pass_at_k(report: Dict[str, Any]) -> str:
+	"""Render ``pass@1=0.1234 pass@10=...`` for logs"""
+	return " ".join(
+		f"pass@{k}={v:.4f}" if v is not None else f"pass@{k}=n/a"
+		for k, v in report["pass_at_k"].items()
+	)
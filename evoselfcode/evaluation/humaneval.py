@@ -1,13 +1,45 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from pathlib import Path
+from typing import List
+
+from .engine import Benchmark, EvalTask, format_pass_at_k, read_task_file, run_benchmark
 
 logger = logging.getLogger(__name__)
 
 
-def cmd_eval(ckpt: Path, config_path: Path | None) -> None:
-	logger.info("[HumanEval] evaluating checkpoint %s (stub)", ckpt)
-	logger.info("[HumanEval] pass@1=0.0 (stub)")
+def load_tasks(path: Path) -> List[EvalTask]:
+	"""Load HumanEval records (task_id, prompt, entry_point, test)"""
+	return [
+		EvalTask(
+			task_id=rec["task_id"],
+			prompt=rec["prompt"],
+			num_tests=max(1, rec["test"].count("assert")),
+			data={"entry_point": rec["entry_point"], "test": rec["test"]},
+		)
+		for rec in read_task_file(path)
+	]
+
+
+def build_program(task: EvalTask, completion: str) -> str:
+	return (
+		task.prompt + completion + "\n\n"
+		+ task.data["test"] + "\n\n"
+		+ f"check({task.data['entry_point']})\n"
+	)
 
 
+BENCHMARK = Benchmark(
+	name="humaneval",
+	load_tasks=load_tasks,
+	build_program=build_program,
+	stop=["\nclass", "\ndef", "\n#", "\nif", "\nprint"],
+)
+
+
+def cmd_eval(ckpt: Path, config_path: Path | None) -> None:
+	logger.info("[HumanEval] evaluating checkpoint %s", ckpt)
+	report = asyncio.run(run_benchmark(BENCHMARK, ckpt, config_path))
+	logger.info("[HumanEval] %s", format_pass_at_k(report))
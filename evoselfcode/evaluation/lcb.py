@@ -1,13 +1,169 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import io
+import json
 import logging
+import pickle
+import re
+import zlib
 from pathlib import Path
+from typing import Any, Dict, List
+
+from .engine import Benchmark, EvalTask, format_pass_at_k, read_task_file, run_benchmark
 
 logger = logging.getLogger(__name__)
 
+_STDIN_FORMAT = (
+	"Read the inputs from stdin solve the problem and write the answer to stdout "
+	"(do not directly test on the sample inputs). Enclose your code within delimiters as follows."
+)
+_FUNCTIONAL_FORMAT = (
+	"You will use the following starter code to write the solution to the problem "
+	"and enclose your code within delimiters."
+)
+PROMPT_TEMPLATE = (
+	"### Question:\n{question}\n\n"
+	"### Format: {fmt}\n```python\n{starter}\n```\n\n"
+	"### Answer: (use the provided format with backticks)\n\n```python\n"
+)
 
-def cmd_eval(ckpt: Path, config_path: Path | None) -> None:
-	logger.info("[LCB] evaluating checkpoint %s (stub)", ckpt)
-	logger.info("[LCB] pass@1=0.0 (stub)")
+_IMPORTS = (
+	"import sys, math, heapq, bisect, itertools, functools, collections, string, re\n"
+	"from typing import *\n"
+	"from collections import *\n"
+	"from functools import *\n"
+	"from itertools import *\n"
+	"from heapq import *\n"
+	"from bisect import *\n"
+)
+
+_STDIN_HARNESS = '''
+
+import contextlib as __lcb_contextlib
+import io as __lcb_io
+import sys as __lcb_sys
+
+def __lcb_lines(text):
+    return [line.strip() for line in text.strip().splitlines()]
+
+__passed__ = 0
+__lcb_stdin = __lcb_sys.stdin
+for __lcb_inp, __lcb_out in {tests!r}:
+    __lcb_buf = __lcb_io.StringIO()
+    # A real text stream: solutions commonly read sys.stdin.buffer
+    __lcb_sys.stdin = __lcb_io.TextIOWrapper(__lcb_io.BytesIO(__lcb_inp.encode()), encoding="utf-8")
+    try:
+        with __lcb_contextlib.redirect_stdout(__lcb_buf):
+            exec(compile({code!r}, "<solution>", "exec"), {{"__name__": "__main__"}})
+    except SystemExit:
+        pass
+    finally:
+        __lcb_sys.stdin = __lcb_stdin
+    if __lcb_lines(__lcb_buf.getvalue()) != __lcb_lines(__lcb_out):
+        break
+    __passed__ += 1
+assert __passed__ == {num_tests}, f"{{__passed__}}/{num_tests} tests passed"
+'''
+
+_FUNCTIONAL_HARNESS = '''
+
+def __lcb_normalize(value):
+    if isinstance(value, (list, tuple)):
+        return [__lcb_normalize(v) for v in value]
+    return value
+
+__passed__ = 0
+for __lcb_args, __lcb_expected in {tests!r}:
+    if __lcb_normalize(getattr(Solution(), {method!r})(*__lcb_args)) != __lcb_normalize(__lcb_expected):
+        break
+    __passed__ += 1
+assert __passed__ == {num_tests}, f"{{__passed__}}/{num_tests} tests passed"
+'''
+
+_METHOD_RE = re.compile(r"^\s+def\s+(\w+)\s*\(\s*self", re.MULTILINE)
+
+
+class _NoGlobalsUnpickler(pickle.Unpickler):
+	"""Only plain data (the test payload is a pickled JSON string)"""
 
+	def find_class(self, module, name):
+		raise pickle.UnpicklingError(f"global {module}.{name} is not allowed")
 
+
+def _decode_tests(value: Any) -> List[Dict[str, Any]]:
+	"""Decode test cases stored as a list, a JSON string, or base64(zlib(pickle(json)))"""
+	if not value:
+		return []
+	if isinstance(value, list):
+		return value
+	try:
+		return json.loads(value)
+	except json.JSONDecodeError:
+		payload = _NoGlobalsUnpickler(io.BytesIO(zlib.decompress(base64.b64decode(value)))).load()
+		return json.loads(payload)
+
+
+def load_tasks(path: Path) -> List[EvalTask]:
+	"""Load LiveCodeBench code-generation records (public + private test cases)"""
+	tasks = []
+	for rec in read_task_file(path):
+		tests = _decode_tests(rec.get("public_test_cases")) + _decode_tests(rec.get("private_test_cases"))
+		if not tests:
+			logger.warning("[LCB] %s has no test cases, skipped", rec.get("question_id"))
+			continue
+
+		starter = rec.get("starter_code", "") or ""
+		functional = tests[0].get("testtype") == "functional"
+		data: Dict[str, Any] = {"functional": functional}
+		if functional:
+			metadata = rec.get("metadata") or {}
+			if isinstance(metadata, str):
+				metadata = json.loads(metadata or "{}")
+			method = metadata.get("func_name")
+			if not method:
+				match = _METHOD_RE.search(starter)
+				method = match.group(1) if match else "solve"
+			data["method"] = method
+			data["tests"] = [
+				([json.loads(arg) for arg in t["input"].split("\n") if arg.strip()], json.loads(t["output"]))
+				for t in tests
+			]
+		else:
+			data["tests"] = [(t["input"], t["output"]) for t in tests]
+
+		tasks.append(EvalTask(
+			task_id=str(rec.get("question_id") or rec.get("task_id")),
+			prompt=PROMPT_TEMPLATE.format(
+				question=rec.get("question_content", ""),
+				fmt=_FUNCTIONAL_FORMAT if starter else _STDIN_FORMAT,
+				starter=starter or "# YOUR CODE HERE",
+			),
+			num_tests=len(tests),
+			data=data,
+		))
+	return tasks
+
+
+def build_program(task: EvalTask, completion: str) -> str:
+	tests = task.data["tests"]
+	if task.data["functional"]:
+		return _IMPORTS + completion + _FUNCTIONAL_HARNESS.format(
+			tests=tests, method=task.data["method"], num_tests=len(tests)
+		)
+	return _STDIN_HARNESS.format(code=_IMPORTS + completion, tests=tests, num_tests=len(tests))
+
+
+BENCHMARK = Benchmark(
+	name="lcb",
+	load_tasks=load_tasks,
+	build_program=build_program,
+	stop=["\n```"],
+)
+
+
+def cmd_eval(ckpt: Path, config_path: Path | None) -> None:
+	logger.info("[LCB] evaluating checkpoint %s", ckpt)
+	report = asyncio.run(run_benchmark(BENCHMARK, ckpt, config_path))
+	logger.info("[LCB] %s", format_pass_at_k(report))
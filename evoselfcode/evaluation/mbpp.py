@@ -1,13 +1,47 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from pathlib import Path
+from typing import List
+
+from .engine import Benchmark, EvalTask, format_pass_at_k, read_task_file, run_benchmark
 
 logger = logging.getLogger(__name__)
 
+PROMPT_TEMPLATE = (
+	"You are an expert Python programmer, and here is your task: {text} "
+	"Your code should pass these tests:\n\n{tests}\n[BEGIN]\n"
+)
+
+
+def load_tasks(path: Path) -> List[EvalTask]:
+	"""Load MBPP records (task_id, text/prompt, test_list, test_setup_code)"""
+	tasks = []
+	for rec in read_task_file(path):
+		tests = list(rec["test_list"])
+		tasks.append(EvalTask(
+			task_id=str(rec["task_id"]),
+			prompt=PROMPT_TEMPLATE.format(text=rec.get("text") or rec.get("prompt", ""), tests="\n".join(tests)),
+			num_tests=len(tests),
+			data={"tests": tests, "setup": rec.get("test_setup_code", "")},
+		))
+	return tasks
 
-def cmd_eval(ckpt: Path, config_path: Path | None) -> None:
-	logger.info("[MBPP] evaluating checkpoint %s (stub)", ckpt)
-	logger.info("[MBPP] pass@1=0.0 (stub)")
 
+def build_program(task: EvalTask, completion: str) -> str:
+	return "\n".join([completion, task.data["setup"], *task.data["tests"]]) + "\n"
 
+
+BENCHMARK = Benchmark(
+	name="mbpp",
+	load_tasks=load_tasks,
+	build_program=build_program,
+	stop=["[DONE]", "\n```", "\nassert", "\nif __name__", "\nprint("],
+)
+
+
+def cmd_eval(ckpt: Path, config_path: Path | None) -> None:
+	logger.info("[MBPP] evaluating checkpoint %s", ckpt)
+	report = asyncio.run(run_benchmark(BENCHMARK, ckpt, config_path))
+	logger.info("[MBPP] %s", format_pass_at_k(report))
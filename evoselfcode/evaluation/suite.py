@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict
+
+from . import bigcodebench, humaneval, lcb, mbpp
+from .engine import format_pass_at_k, run_all
+
+logger = logging.getLogger(__name__)
+
+BENCHMARKS = [humaneval.BENCHMARK, mbpp.BENCHMARK, lcb.BENCHMARK, bigcodebench.BENCHMARK]
+
+
+def cmd_eval_all(ckpt: Path, config_path: Path | None) -> Dict[str, Any]:
+	"""Run every benchmark concurrently (shared client budget and sandbox pool)"""
+	logger.info("[All] evaluating checkpoint %s on %d benchmarks", ckpt, len(BENCHMARKS))
+	combined = asyncio.run(run_all(BENCHMARKS, ckpt, config_path))
+	for name, report in combined["benchmarks"].items():
+		logger.info("[All] %-13s %s", name, format_pass_at_k(report))
+	return combined
@@ -9,11 +9,32 @@ from ..constants import PROCESSED_DIR
 logger = logging.getLogger(__name__)
 
 
+def load_train_shards(run: RunConfig):
+	"""Open memory-mapped ChatML shards if ``paths.train_shards`` is configured.
+
+	Records and token arrays are sliced straight out of the mapped files, so
+	epochs after the first do no JSON parsing or tokenization.
+	"""
+	shard_dir = run.get("paths.train_shards")
+	if not shard_dir:
+		return None
+	from ..datagen.postprocess.shards import ShardedDataset
+	dataset = ShardedDataset(Path(shard_dir))
+	logger.info(
+		"[D2C] memory-mapped shards %s: %d records, %d shards, tokens=%s",
+		shard_dir, len(dataset), len(dataset.manifest["shards"]),
+		dataset.manifest["num_tokens"] if dataset.has_tokens else "none",
+	)
+	return dataset
+
+
 def cmd_train_d2c(config_path: Path | None) -> None:
 	run = RunConfig.from_file(config_path)
-	train_path = Path(run.get("paths.processed_dir", str(PROCESSED_DIR))) / "train_d2c.jsonl"
-	logger.info("[D2C] (stub) training on %s", train_path)
+	dataset = load_train_shards(run)
+	if dataset is not None:
+		logger.info("[D2C] (stub) training on %d sharded samples", len(dataset))
+	else:
+		train_path = Path(run.get("paths.processed_dir", str(PROCESSED_DIR))) / "train_d2c.jsonl"
+		logger.info("[D2C] (stub) training on %s", train_path)
 	# TODO: integrate HF Trainer/Accelerate here
 	logger.info("[D2C] training complete (stub)")
-
-
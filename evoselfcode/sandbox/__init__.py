@@ -0,0 +1,24 @@
+"""Sandboxed execution of generated code."""
+
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .examples import build_example_program, extract_examples
+    from .pool import ExecutionResult, SandboxPool
+
+__all__ = [
+    "ExecutionResult",
+    "SandboxPool",
+    "build_example_program",
+    "extract_examples",
+]
+
+# Submodules are imported on first attribute access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "ExecutionResult": ".pool",
+    "SandboxPool": ".pool",
+    "build_example_program": ".examples",
+    "extract_examples": ".examples",
+})
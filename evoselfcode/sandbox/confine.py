@@ -0,0 +1,283 @@
+"""
+OS-level confinement of a sandboxed program's process (Linux).
+
+Applied in the freshly forked child that runs exactly one program, in order:
+
+1. Resource limits (setrlimit): address space, CPU time, file size, no core dumps.
+2. Namespaces (unshare): a user namespace (no capabilities outside it, even
+   for a root caller), a network namespace without interfaces (no network)
+   and a mount namespace in which every mount is read-only and the working
+   directory is a fresh tmpfs.
+3. Without namespaces, a root caller switches to ``nobody`` instead.
+4. seccomp filter: process creation, sockets, signals to other processes,
+   ptrace and (un)mounting/namespace syscalls fail with EPERM. Without a
+   read-only mount namespace, opening files for writing and other file
+   modifications are refused as well.
+
+Each layer is applied best effort; ``confine`` reports the layers that could
+not be applied so the caller can say what the sandbox does *not* enforce.
+"""
+
+import contextlib
+import ctypes
+import errno
+import os
+import platform
+import struct
+from typing import List
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    resource = None
+
+LAYER_NAMESPACES = "namespaces"
+LAYER_SECCOMP = "seccomp"
+
+_CLONE_NEWNS = 0x00020000
+_CLONE_NEWUSER = 0x10000000
+_CLONE_NEWNET = 0x40000000
+_MS_NOSUID = 0x2
+_MS_NODEV = 0x4
+_MS_REC = 0x4000
+_MS_PRIVATE = 1 << 18
+_AT_FDCWD = -100
+_AT_RECURSIVE = 0x8000
+_MOUNT_ATTR_RDONLY = 0x1
+_SYS_MOUNT_SETATTR = 442  # same number on x86_64 and aarch64
+_NOBODY = 65534
+
+_PR_SET_NO_NEW_PRIVS = 38
+_PR_SET_SECCOMP = 22
+_SECCOMP_MODE_FILTER = 2
+_SECCOMP_RET_KILL_PROCESS = 0x80000000
+_SECCOMP_RET_ERRNO = 0x00050000
+_SECCOMP_RET_ALLOW = 0x7FFF0000
+
+_BPF_LD_W_ABS = 0x20
+_BPF_JEQ_K = 0x15
+_BPF_JGE_K = 0x35
+_BPF_JSET_K = 0x45
+_BPF_RET_K = 0x06
+
+_CLONE_THREAD = 0x00010000
+_O_WRITE_FLAGS = 0o1 | 0o2 | 0o100 | 0o1000 | 0o2000  # O_WRONLY|O_RDWR|O_CREAT|O_TRUNC|O_APPEND
+_X32_SYSCALL_BIT = 0x40000000
+
+# (audit arch, always denied, denied without a read-only filesystem,
+#  open-like syscalls -> index of their flags argument)
+_SYSCALLS = {
+    "x86_64": (
+        0xC000003E,
+        {
+            "socket": 41, "socketpair": 53, "fork": 57, "vfork": 58, "execve": 59, "kill": 62,
+            "ptrace": 101, "pivot_root": 155, "chroot": 161, "mount": 165, "umount2": 166,
+            "tkill": 200, "tgkill": 234, "unshare": 272, "setns": 308, "process_vm_writev": 311,
+            "execveat": 322, "open_tree": 428, "move_mount": 429, "fsopen": 430, "fsconfig": 431,
+            "fsmount": 432, "fspick": 433, "mount_setattr": 442,
+        },
+        {
+            "truncate": 76, "rename": 82, "mkdir": 83, "rmdir": 84, "creat": 85, "link": 86,
+            "unlink": 87, "symlink": 88, "chmod": 90, "chown": 92, "lchown": 94, "mkdirat": 258,
+            "fchownat": 260, "unlinkat": 263, "renameat": 264, "linkat": 265, "symlinkat": 266,
+            "fchmodat": 268, "renameat2": 316,
+        },
+        {"open": (2, 1), "openat": (257, 2)},
+    ),
+    "aarch64": (
+        0xC00000B7,
+        {
+            "umount2": 39, "mount": 40, "pivot_root": 41, "chroot": 51, "unshare": 97,
+            "ptrace": 117, "kill": 129, "tkill": 130, "tgkill": 131, "socket": 198,
+            "socketpair": 199, "execve": 221, "setns": 268, "process_vm_writev": 271,
+            "execveat": 281, "open_tree": 428, "move_mount": 429, "fsopen": 430, "fsconfig": 431,
+            "fsmount": 432, "fspick": 433, "mount_setattr": 442,
+        },
+        {
+            "mkdirat": 34, "unlinkat": 35, "symlinkat": 36, "linkat": 37, "renameat": 38,
+            "truncate": 45, "fchmodat": 53, "fchownat": 54, "renameat2": 276,
+        },
+        {"openat": (56, 2)},
+    ),
+}
+_CLONE = {"x86_64": 56, "aarch64": 220}
+_CLONE3 = 435
+_OPENAT2 = 437
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        # The running interpreter's own symbols include libc (find_library would spawn ldconfig)
+        _libc = ctypes.CDLL(None, use_errno=True)
+    return _libc
+
+
+def prepare() -> None:
+    """Load libc in a long-lived parent so forked children start confining at once."""
+    _get_libc()
+
+
+def _check(ret: int) -> None:
+    if ret != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+def set_limits(memory_mb: int, cpu_time_s: float, file_size_mb: int) -> None:
+    """Hard resource limits of the current process."""
+    if resource is None:
+        return
+    limits = [(resource.RLIMIT_CORE, 0)]
+    if memory_mb > 0:
+        limits.append((resource.RLIMIT_AS, memory_mb * 1024 * 1024))
+    if file_size_mb > 0:
+        limits.append((resource.RLIMIT_FSIZE, file_size_mb * 1024 * 1024))
+    for res, limit in limits:
+        with contextlib.suppress(ValueError, OSError):
+            resource.setrlimit(res, (limit, limit))
+    if cpu_time_s > 0:
+        # SIGXCPU at the soft limit (reported as a timeout), SIGKILL one second later
+        soft = max(1, int(-(-cpu_time_s // 1)))
+        with contextlib.suppress(ValueError, OSError):
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + 1))
+
+
+def _private_mounts(work_dir: str) -> None:
+    """Make every mount read-only and mount a fresh tmpfs on ``work_dir``."""
+    libc = _get_libc()
+    libc.mount.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_ulong, ctypes.c_char_p]
+    _check(libc.mount(None, b"/", None, _MS_REC | _MS_PRIVATE, None))
+    attr = ctypes.create_string_buffer(struct.pack("QQQQ", _MOUNT_ATTR_RDONLY, 0, 0, 0))
+    _check(libc.syscall(_SYS_MOUNT_SETATTR, _AT_FDCWD, b"/", _AT_RECURSIVE, attr, len(attr.raw)))
+    _check(libc.mount(b"tmpfs", work_dir.encode(), b"tmpfs", _MS_NOSUID | _MS_NODEV, b"size=64m,mode=1777"))
+
+
+def isolate_namespaces(work_dir: str) -> None:
+    """Enter private user, network and mount namespaces (raises OSError if unsupported).
+
+    The user namespace maps only the caller's own uid/gid, so even a root
+    caller keeps no capabilities outside it.
+    """
+    uid, gid = os.geteuid(), os.getegid()
+    try:
+        unshare = _get_libc().unshare
+    except AttributeError as e:
+        raise OSError(errno.ENOSYS, "unshare not available") from e
+    _check(unshare(_CLONE_NEWUSER | _CLONE_NEWNET | _CLONE_NEWNS))
+    for name, value in (("setgroups", "deny"), ("uid_map", f"{uid} {uid} 1"), ("gid_map", f"{gid} {gid} 1")):
+        with open(f"/proc/self/{name}", "w") as f:
+            f.write(value)
+    _private_mounts(work_dir)
+
+
+def drop_privileges() -> None:
+    """Switch a root process to ``nobody``."""
+    if os.geteuid() == 0:
+        os.setgroups([])
+        os.setgid(_NOBODY)
+        os.setuid(_NOBODY)
+
+
+def _bpf(code: int, jt: int, jf: int, k: int) -> bytes:
+    return struct.pack("HBBI", code, jt, jf, k)
+
+
+def _seccomp_program(machine: str, read_only_fs: bool) -> bytes:
+    arch, denied, write_denied, open_calls = _SYSCALLS[machine]
+    eperm = _SECCOMP_RET_ERRNO | errno.EPERM
+    enosys = _SECCOMP_RET_ERRNO | errno.ENOSYS
+
+    # seccomp_data: nr at offset 0, arch at 4, args[i] (low word) at 16 + 8 * i
+    prog = [
+        _bpf(_BPF_LD_W_ABS, 0, 0, 4),
+        _bpf(_BPF_JEQ_K, 1, 0, arch),
+        _bpf(_BPF_RET_K, 0, 0, _SECCOMP_RET_KILL_PROCESS),
+        _bpf(_BPF_LD_W_ABS, 0, 0, 0),
+    ]
+    if machine == "x86_64":
+        prog += [_bpf(_BPF_JGE_K, 0, 1, _X32_SYSCALL_BIT), _bpf(_BPF_RET_K, 0, 0, eperm)]
+
+    def deny(nr: int, ret: int = eperm):
+        prog.extend([_bpf(_BPF_JEQ_K, 0, 1, nr), _bpf(_BPF_RET_K, 0, 0, ret)])
+
+    def deny_if(nr: int, arg: int, mask: int, when_set: bool):
+        allow, refuse = _bpf(_BPF_RET_K, 0, 0, _SECCOMP_RET_ALLOW), _bpf(_BPF_RET_K, 0, 0, eperm)
+        prog.extend([
+            _bpf(_BPF_JEQ_K, 0, 4, nr),
+            _bpf(_BPF_LD_W_ABS, 0, 0, 16 + 8 * arg),
+            _bpf(_BPF_JSET_K, 0, 1, mask),
+            refuse if when_set else allow,
+            allow if when_set else refuse,
+        ])
+
+    for nr in denied.values():
+        deny(nr)
+    # Threads are fine, new processes are not; clone3 -> ENOSYS makes libc fall back to clone
+    deny_if(_CLONE[machine], 0, _CLONE_THREAD, when_set=False)
+    deny(_CLONE3, enosys)
+    if not read_only_fs:
+        for nr in write_denied.values():
+            deny(nr)
+        for nr, flags_arg in open_calls.values():
+            deny_if(nr, flags_arg, _O_WRITE_FLAGS, when_set=True)
+        deny(_OPENAT2, enosys)
+    prog.append(_bpf(_BPF_RET_K, 0, 0, _SECCOMP_RET_ALLOW))
+    return b"".join(prog)
+
+
+def install_seccomp(read_only_fs: bool) -> None:
+    """Install the syscall filter (raises OSError if unsupported)."""
+    machine = platform.machine().lower()
+    machine = {"amd64": "x86_64", "arm64": "aarch64"}.get(machine, machine)
+    if machine not in _SYSCALLS:
+        raise OSError(errno.ENOSYS, f"no seccomp filter for {machine}")
+    try:
+        prctl = _get_libc().prctl
+    except AttributeError as e:
+        raise OSError(errno.ENOSYS, "prctl not available") from e
+
+    program = _seccomp_program(machine, read_only_fs)
+    filters = ctypes.create_string_buffer(program, len(program))
+    fprog = struct.pack("HxxxxxxP", len(program) // 8, ctypes.addressof(filters))
+    fprog_buf = ctypes.create_string_buffer(fprog, len(fprog))
+    prctl.argtypes = [ctypes.c_int, ctypes.c_ulong, ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong]
+    _check(prctl(_PR_SET_NO_NEW_PRIVS, 1, None, 0, 0))
+    _check(prctl(_PR_SET_SECCOMP, _SECCOMP_MODE_FILTER, ctypes.addressof(fprog_buf), 0, 0))
+
+
+def confine(work_dir: str, memory_mb: int, cpu_time_s: float, file_size_mb: int = 16,
+            namespaces: bool = True) -> List[str]:
+    """Confine the current (single-program) process.
+
+    Args:
+        work_dir: Directory that becomes the program's private writable tmpfs
+        memory_mb: Address-space limit (0 = none)
+        cpu_time_s: CPU-time limit (0 = none)
+        file_size_mb: Largest file the program may write
+        namespaces: Use network/mount namespaces
+
+    Returns:
+        Names of the layers that could not be applied
+    """
+    missing = []
+    set_limits(memory_mb, cpu_time_s, file_size_mb)
+    read_only_fs = False
+    if namespaces:
+        try:
+            isolate_namespaces(work_dir)
+            read_only_fs = True
+        except OSError:
+            missing.append(LAYER_NAMESPACES)
+    else:
+        missing.append(LAYER_NAMESPACES)
+    if not read_only_fs:
+        with contextlib.suppress(OSError):
+            drop_privileges()
+    try:
+        install_seccomp(read_only_fs)
+    except OSError:
+        missing.append(LAYER_SECCOMP)
+    return missing
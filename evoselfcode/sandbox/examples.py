@@ -0,0 +1,170 @@
+"""
+Example extraction and test-harness construction.
+
+Generated problem descriptions embed examples in a few loose formats:
+
+    Example:
+    Input: grid = [[0,1,0],[0,0,0]], k = 1
+    Output: 5
+
+    Example: weights = [1, 3, 4], values = [1, 4, 5], capacity = 7 → Output: 9
+
+Only examples whose inputs and outputs are Python literals are extracted;
+anything else is skipped rather than guessed.
+"""
+
+import ast
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+Example = Tuple[List[Any], Dict[str, Any], Any]
+
+_INPUT_RE = re.compile(r'^\s*(?:[-*]\s*)?(?:Example\s*\d*\s*:\s*)?Input\s*:\s*(?P<inp>.+)$', re.IGNORECASE)
+_OUTPUT_RE = re.compile(r'^\s*(?:[-*]\s*)?Output\s*:\s*(?P<out>.+)$', re.IGNORECASE)
+_INLINE_RE = re.compile(
+    r'^\s*(?:[-*]\s*)?(?:Example\s*\d*\s*:\s*)?(?:Input\s*:\s*)?(?P<inp>.+?)\s*(?:→|->|=>)\s*'
+    r'(?:Output\s*:\s*)?(?P<out>.+)$',
+    re.IGNORECASE,
+)
+_LOOKAHEAD_LINES = 3
+
+
+def _parse_args(text: str) -> Optional[Tuple[List[Any], Dict[str, Any]]]:
+    """Parse ``a = 1, b = [2]`` or ``"abc"`` as call arguments of literals."""
+    text = text.strip().rstrip('.').strip()
+    if not text:
+        return None
+    try:
+        call = ast.parse(f"__f({text})", mode="eval").body
+        args = [ast.literal_eval(arg) for arg in call.args]
+        kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords if kw.arg}
+    except (SyntaxError, ValueError, TypeError, MemoryError, RecursionError):
+        return None
+    if len(kwargs) != len(call.keywords):
+        return None
+    return args, kwargs
+
+
+def _parse_output(text: str) -> Tuple[bool, Any]:
+    """Parse an expected output literal, tolerating trailing explanations."""
+    text = text.strip().rstrip('.').strip()
+    candidates = [text]
+    for sep in (" (", " because", " since", " # ", ", since", ". "):
+        if sep in text:
+            candidates.append(text.split(sep, 1)[0].strip())
+    for candidate in candidates:
+        try:
+            return True, ast.literal_eval(candidate)
+        except (SyntaxError, ValueError, TypeError, MemoryError, RecursionError):
+            continue
+    return False, None
+
+
+def extract_examples(problem_text: str, max_examples: int = 8) -> List[Example]:
+    """Extract (args, kwargs, expected) examples from a problem description.
+
+    Args:
+        problem_text: Problem description text
+        max_examples: Maximum number of examples to return
+
+    Returns:
+        List of (args, kwargs, expected_output) tuples
+    """
+    examples: List[Example] = []
+    lines = problem_text.split('\n')
+
+    for i, line in enumerate(lines):
+        if len(examples) >= max_examples:
+            break
+
+        inp_text = out_text = None
+        inline = _INLINE_RE.match(line)
+        if inline and ('Input' in line or line.lstrip().lower().startswith('example')):
+            inp_text, out_text = inline.group('inp'), inline.group('out')
+        else:
+            inp_match = _INPUT_RE.match(line)
+            if not inp_match:
+                continue
+            inp_text = inp_match.group('inp')
+            for next_line in lines[i + 1:i + 1 + _LOOKAHEAD_LINES]:
+                out_match = _OUTPUT_RE.match(next_line)
+                if out_match:
+                    out_text = out_match.group('out')
+                    break
+
+        if inp_text is None or out_text is None:
+            continue
+
+        parsed_args = _parse_args(inp_text)
+        ok, expected = _parse_output(out_text)
+        if parsed_args is None or not ok:
+            continue
+        args, kwargs = parsed_args
+        examples.append((args, kwargs, expected))
+
+    return examples
+
+
+# Generated code often annotates with List, Optional, ... without importing them
+# (as evaluation/lcb.py does for benchmark programs)
+_PRELUDE = "from typing import *\n"
+
+_HARNESS = '''
+
+def __sandbox_normalize(value):
+    if isinstance(value, (list, tuple)):
+        return [__sandbox_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {{k: __sandbox_normalize(v) for k, v in value.items()}}
+    return value
+
+
+def __sandbox_equal(actual, expected):
+    import math
+    if isinstance(expected, float) or isinstance(actual, float):
+        try:
+            return math.isclose(actual, expected, rel_tol=1e-6, abs_tol=1e-9)
+        except TypeError:
+            return False
+    return __sandbox_normalize(actual) == __sandbox_normalize(expected)
+
+
+def __sandbox_call(fn, args, kwargs):
+    import inspect
+    try:
+        params = inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        params = {{}}
+    if kwargs and all(name in params for name in kwargs):
+        return fn(*args, **kwargs)
+    return fn(*args, *kwargs.values())
+
+
+__sandbox_cases__ = {cases!r}
+__passed__ = 0
+for __args, __kwargs, __expected in __sandbox_cases__:
+    if __sandbox_equal(__sandbox_call({entry_point}, __args, __kwargs), __expected):
+        __passed__ += 1
+assert __passed__ == len(__sandbox_cases__), f"{{__passed__}}/{{len(__sandbox_cases__)}} examples passed"
+'''
+
+
+def build_example_program(code: str, entry_point: str, examples: List[Example]) -> str:
+    """Build a self-checking program running ``entry_point`` on the examples.
+
+    The program sets ``__passed__`` to the number of passing examples and
+    raises AssertionError unless all of them pass. The ``typing`` names are
+    imported first, unless the code has ``__future__`` imports (which must
+    come first; with them, annotations are not evaluated anyway).
+
+    Args:
+        code: Function implementation
+        entry_point: Name of the function under test
+        examples: Examples from extract_examples()
+
+    Returns:
+        Program source string
+    """
+    cases = [(list(args), dict(kwargs), expected) for args, kwargs, expected in examples]
+    prelude = "" if "from __future__" in code else _PRELUDE
+    return prelude + code + _HARNESS.format(cases=cases, entry_point=entry_point)
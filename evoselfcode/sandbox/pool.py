@@ -0,0 +1,495 @@
+"""
+Sandboxed execution pool.
+
+Long-lived worker processes, started from a fork server, receive chunks of
+programs. Every program runs in its own freshly forked child of the worker,
+so nothing a program does (monkeypatching builtins, replacing ``sys.stdin``,
+leaking threads) can affect any other program. Before the program starts,
+the child confines itself at the OS level (see ``confine``):
+- Address-space, CPU-time and file-size limits via setrlimit
+- User, network and mount namespaces: no network, every mount read-only,
+  a private tmpfs as working directory
+- A seccomp filter refusing process creation, sockets, signals to other
+  processes, ptrace and mount/namespace changes
+- stdin/stdout/stderr connected to /dev/null, no inherited file descriptors
+
+The worker enforces the wall-clock limit from outside by killing the child.
+Where namespaces or seccomp are unavailable (non-Linux, no user namespaces)
+the worker logs which layers are not enforced; without namespaces the
+filter also refuses writing files.
+
+A worker that dies hard breaks the pool; the affected chunks are re-run one
+program at a time so the culprit is identified and recorded as ``crashed``
+while the other programs still get real results. Callers also wait at most
+a hard deadline per chunk, so a hung worker cannot block them forever.
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import multiprocessing as mp
+import os
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .confine import confine, prepare
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    resource = None
+
+STATUS_PASSED = "passed"
+STATUS_FAILED = "failed"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_CRASHED = "crashed"
+
+# Slack per program on top of its wall-clock limit (fork, confinement, IPC)
+# before the caller gives up on a chunk
+_CHUNK_SLACK_S = 2.0
+_RESULT_FD = 3
+
+
+@dataclass
+class ExecutionResult:
+    """Outcome of one sandboxed program."""
+
+    status: str
+    passed: Optional[int] = None
+    error: Optional[str] = None
+    duration_s: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _Limits:
+    """Per-program limits, sent with every chunk."""
+
+    timeout_s: float
+    cpu_time_s: float
+    memory_mb: int
+    file_size_mb: int
+    namespaces: bool
+
+
+class _SandboxTimeout(BaseException):
+    """Raised inside the child when it exceeds its CPU-time budget.
+
+    Derives from BaseException so that ``except Exception`` in user code
+    cannot swallow it.
+    """
+
+
+def _raise_timeout(signum, frame):
+    raise _SandboxTimeout()
+
+
+_work_dir: Optional[str] = None
+_reported_missing = False
+
+
+def _init_worker() -> None:
+    """Worker initializer: scratch directory, no core dumps, libc loaded for the children."""
+    global _work_dir
+    if resource is not None:
+        with contextlib.suppress(ValueError, OSError):
+            resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    _work_dir = tempfile.mkdtemp(prefix="evoselfcode_sandbox_")
+    os.chdir(_work_dir)
+    prepare()
+
+
+def _exec_program(program: str) -> Dict[str, Any]:
+    """Run a program in the current (confined) process."""
+    namespace: Dict[str, Any] = {"__name__": "__sandbox__", "__builtins__": __builtins__}
+    sink = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            exec(compile(program, "<sandbox>", "exec"), namespace)
+        status, error = STATUS_PASSED, None
+    except _SandboxTimeout:
+        status, error = STATUS_TIMEOUT, None
+    except AssertionError as e:
+        status, error = STATUS_FAILED, str(e)[:200] or "AssertionError"
+    except MemoryError:
+        status, error = STATUS_ERROR, "MemoryError"
+    except BaseException as e:  # noqa: BLE001 - anything the program raises is a result
+        status, error = STATUS_ERROR, f"{type(e).__name__}: {e}"[:200]
+
+    passed = namespace.get("__passed__")
+    return {"status": status, "passed": passed if isinstance(passed, int) else None, "error": error}
+
+
+def _child_main(program: str, run_dir: str, result_fd: int, limits: _Limits) -> None:
+    """Forked child: confine, run the program, report on the result pipe, exit."""
+    code = 70
+    try:
+        os.setpgid(0, 0)
+        null = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(null, fd)
+        os.dup2(result_fd, _RESULT_FD)
+        os.closerange(_RESULT_FD + 1, os.sysconf("SC_OPEN_MAX") if hasattr(os, "sysconf") else 1024)
+
+        missing = confine(run_dir, limits.memory_mb, limits.cpu_time_s, limits.file_size_mb, limits.namespaces)
+        os.chdir(run_dir)
+        os.environ["TMPDIR"] = run_dir
+        tempfile.tempdir = run_dir
+        sys.dont_write_bytecode = True
+        if hasattr(signal, "SIGXCPU"):
+            signal.signal(signal.SIGXCPU, _raise_timeout)
+
+        report = _exec_program(program)
+        report["missing"] = missing
+        os.write(_RESULT_FD, json.dumps(report).encode())
+        code = 0
+    finally:
+        os._exit(code)
+
+
+def _decode_report(data: bytes) -> Optional[Dict[str, Any]]:
+    """The child's report, or None if it is not one (the pipe is writable by the program)."""
+    try:
+        report = json.loads(data)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(report, dict) or report.get("status") not in (
+        STATUS_PASSED, STATUS_FAILED, STATUS_ERROR, STATUS_TIMEOUT
+    ):
+        return None
+    return report
+
+
+def _run_one(program: str, limits: _Limits) -> ExecutionResult:
+    """Execute a single program in a fresh confined child of this worker."""
+    global _reported_missing
+    start = time.perf_counter()
+    run_dir = tempfile.mkdtemp(dir=_work_dir)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _child_main(program, run_dir, write_fd, limits)
+    os.close(write_fd)
+
+    data, timed_out = b"", False
+    deadline = start + limits.timeout_s
+    try:
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                timed_out = True
+                break
+            ready, _, _ = select.select([read_fd], [], [], remaining)
+            if ready:
+                chunk = os.read(read_fd, 65536)
+                if not chunk:
+                    break
+                data += chunk
+    finally:
+        os.close(read_fd)
+        if timed_out:
+            with contextlib.suppress(ProcessLookupError, PermissionError):
+                os.killpg(pid, signal.SIGKILL)
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGKILL)
+        _, wait_status = os.waitpid(pid, 0)
+        shutil.rmtree(run_dir, ignore_errors=True)
+    duration_s = time.perf_counter() - start
+
+    report = None if timed_out else _decode_report(data)
+    if report is not None:
+        if report.get("missing") and not _reported_missing:
+            _reported_missing = True
+            logger.warning(f"[SandboxPool] Not enforced in this environment: {', '.join(report['missing'])}")
+        passed = report.get("passed")
+        return ExecutionResult(
+            status=report["status"],
+            passed=passed if isinstance(passed, int) else None,
+            error=report.get("error"),
+            duration_s=duration_s,
+        )
+    if timed_out:
+        return ExecutionResult(status=STATUS_TIMEOUT, duration_s=duration_s)
+    if os.WIFSIGNALED(wait_status):
+        sig = os.WTERMSIG(wait_status)
+        if sig in (getattr(signal, "SIGXCPU", None), signal.SIGKILL):
+            # SIGXCPU / SIGKILL at the CPU-time hard limit (or the OOM killer)
+            return ExecutionResult(status=STATUS_TIMEOUT, error=signal.Signals(sig).name, duration_s=duration_s)
+        return ExecutionResult(
+            status=STATUS_CRASHED, error=f"killed by {signal.Signals(sig).name}", duration_s=duration_s
+        )
+    return ExecutionResult(
+        status=STATUS_CRASHED,
+        error=f"exited with code {os.WEXITSTATUS(wait_status)} without a result",
+        duration_s=duration_s,
+    )
+
+
+def _run_chunk(programs: List[str], limits: _Limits) -> List[ExecutionResult]:
+    """Worker entry point: execute a chunk of programs sequentially."""
+    return [_run_one(program, limits) for program in programs]
+
+
+def _default_context():
+    methods = mp.get_all_start_methods()
+    return mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class SandboxPool:
+    """
+    Pool of worker processes that run untrusted programs in confined children.
+
+    Programs are submitted in chunks (one IPC round-trip per chunk), so small
+    programs run at hundreds per second per core.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 0,
+        chunk_size: int = 32,
+        timeout_s: float = 2.0,
+        cpu_time_s: float = 4.0,
+        memory_mb: int = 1024,
+        file_size_mb: int = 16,
+        namespaces: bool = True,
+    ):
+        """Initialize the pool (workers are started lazily).
+
+        Args:
+            num_workers: Number of worker processes (0 = cpu_count - 1)
+            chunk_size: Programs per submitted task
+            timeout_s: Default wall-clock limit per program
+            cpu_time_s: CPU-time limit per program
+            memory_mb: Address-space limit per program
+            file_size_mb: Largest file a program may write
+            namespaces: Isolate programs in user/network/mount namespaces
+        """
+        self.num_workers = num_workers if num_workers > 0 else max(1, mp.cpu_count() - 1)
+        self.chunk_size = max(1, chunk_size)
+        self.timeout_s = timeout_s
+        self.cpu_time_s = cpu_time_s
+        self.memory_mb = memory_mb
+        self.file_size_mb = file_size_mb
+        self.namespaces = namespaces
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, sandbox_cfg: Dict[str, Any]) -> "SandboxPool":
+        """Create pool from a ``sandbox`` configuration section"""
+        return cls(
+            num_workers=int(sandbox_cfg.get("num_workers", 0)),
+            chunk_size=int(sandbox_cfg.get("chunk_size", 32)),
+            timeout_s=float(sandbox_cfg.get("timeout_s", 2.0)),
+            cpu_time_s=float(sandbox_cfg.get("cpu_time_s", 4.0)),
+            memory_mb=int(sandbox_cfg.get("memory_mb", 1024)),
+            file_size_mb=int(sandbox_cfg.get("file_size_mb", 16)),
+            namespaces=bool(sandbox_cfg.get("namespaces", True)),
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.num_workers,
+                    mp_context=_default_context(),
+                    initializer=_init_worker,
+                )
+            return self._pool
+
+    def _reset_pool(self, pool: Optional[ProcessPoolExecutor] = None, kill: bool = False):
+        """Drop a broken (or hung: ``kill``) pool, only if it is still the current one"""
+        with self._lock:
+            if self._pool is not None and (pool is None or self._pool is pool):
+                if kill:
+                    # shutdown() never stops a worker that does not return
+                    for process in list((self._pool._processes or {}).values()):
+                        with contextlib.suppress(Exception):
+                            process.kill()
+                self._pool.shutdown(wait=False, cancel_futures=kill)
+                self._pool = None
+
+    def _limits(self, timeout_s: float) -> _Limits:
+        return _Limits(
+            timeout_s=timeout_s,
+            cpu_time_s=self.cpu_time_s,
+            memory_mb=self.memory_mb,
+            file_size_mb=self.file_size_mb,
+            namespaces=self.namespaces,
+        )
+
+    def _submit(self, programs: List[str], timeout_s: float) -> Tuple[ProcessPoolExecutor, Future]:
+        """Submit one chunk, replacing the pool once if another caller broke it"""
+        pool = self._get_pool()
+        try:
+            return pool, pool.submit(_run_chunk, programs, self._limits(timeout_s))
+        except RuntimeError:  # BrokenProcessPool or already shut down
+            self._reset_pool(pool)
+            pool = self._get_pool()
+            return pool, pool.submit(_run_chunk, programs, self._limits(timeout_s))
+
+    @staticmethod
+    def _chunk_budget(n: int, timeout_s: float) -> float:
+        """Hard limit on waiting for a started chunk (it may queue behind one other chunk)"""
+        return 2 * n * (timeout_s + _CHUNK_SLACK_S)
+
+    @staticmethod
+    def _result(future: Future, budget: float) -> List[ExecutionResult]:
+        """Chunk result; raises TimeoutError if the chunk runs longer than ``budget``"""
+        while not future.running() and not future.done():  # queued behind other callers' chunks
+            with contextlib.suppress(FutureTimeoutError):
+                return future.result(timeout=1.0)
+        return future.result(timeout=budget)
+
+    @staticmethod
+    async def _result_async(future: Future, budget: float) -> List[ExecutionResult]:
+        wrapped = asyncio.wrap_future(future)
+        while not future.running() and not future.done():
+            await asyncio.wait({wrapped}, timeout=1.0)
+        return await asyncio.wait_for(wrapped, budget)
+
+    def _chunk_indices(self, n: int) -> List[List[int]]:
+        return [list(range(i, min(i + self.chunk_size, n))) for i in range(0, n, self.chunk_size)]
+
+    def _check_workers_healthy(self):
+        """Run a trivial program; if even that kills the worker, the sandbox itself is broken"""
+        pool, future = self._submit(["pass"], self.timeout_s)
+        try:
+            self._result(future, self._chunk_budget(1, self.timeout_s))
+        except (BrokenProcessPool, FutureTimeoutError) as e:
+            self._reset_pool(pool, kill=True)
+            raise RuntimeError("Sandbox workers fail to start or run any program") from e
+
+    def _isolate(
+        self,
+        programs: Sequence[str],
+        suspects: List[int],
+        timeout_s: float,
+        results: List[Optional[ExecutionResult]],
+    ) -> None:
+        """Re-run programs from broken or hung chunks one at a time.
+
+        A program is only marked crashed if it breaks the pool twice, so a
+        crash caused by a concurrent caller is not misattributed.
+        """
+        budget = self._chunk_budget(1, timeout_s)
+        for i in suspects:
+            for attempt in range(2):
+                pool, future = self._submit([programs[i]], timeout_s)
+                try:
+                    results[i] = self._result(future, budget)[0]
+                    break
+                except BrokenProcessPool:
+                    self._reset_pool(pool)
+                    if attempt == 1:
+                        results[i] = ExecutionResult(status=STATUS_CRASHED, error="worker process died")
+                        self._check_workers_healthy()
+                except FutureTimeoutError:
+                    self._reset_pool(pool, kill=True)
+                    if attempt == 1:
+                        results[i] = ExecutionResult(status=STATUS_TIMEOUT, error="worker unresponsive")
+                        self._check_workers_healthy()
+
+        failed = sum(1 for i in suspects if results[i].status in (STATUS_CRASHED, STATUS_TIMEOUT))
+        logger.warning(f"[SandboxPool] Pool broke; isolated {len(suspects)} programs, {failed} crashed or hung")
+
+    def run(self, programs: Sequence[str], timeout_s: Optional[float] = None) -> List[ExecutionResult]:
+        """Execute programs and return one result per program (in order).
+
+        Safe to call from several threads at once; all callers share the
+        same workers.
+
+        Args:
+            programs: Program source strings
+            timeout_s: Wall-clock limit per program (default: pool setting)
+
+        Returns:
+            List of ExecutionResult
+        """
+        timeout_s = timeout_s or self.timeout_s
+        results: List[Optional[ExecutionResult]] = [None] * len(programs)
+        submitted = [
+            (idxs, *self._submit([programs[i] for i in idxs], timeout_s))
+            for idxs in self._chunk_indices(len(programs))
+        ]
+
+        suspects: List[int] = []
+        for idxs, pool, future in submitted:
+            try:
+                for i, result in zip(idxs, self._result(future, self._chunk_budget(len(idxs), timeout_s))):
+                    results[i] = result
+            except BrokenProcessPool:
+                suspects.extend(idxs)
+                self._reset_pool(pool)
+            except FutureTimeoutError:
+                suspects.extend(idxs)
+                self._reset_pool(pool, kill=True)
+
+        if suspects:
+            self._isolate(programs, suspects, timeout_s, results)
+        return results
+
+    async def run_async(self, programs: Sequence[str], timeout_s: Optional[float] = None) -> List[ExecutionResult]:
+        """Async variant of run(): awaits chunk results without blocking the event loop.
+
+        Args:
+            programs: Program source strings
+            timeout_s: Wall-clock limit per program (default: pool setting)
+
+        Returns:
+            List of ExecutionResult
+        """
+        timeout_s = timeout_s or self.timeout_s
+        results: List[Optional[ExecutionResult]] = [None] * len(programs)
+        submitted = [
+            (idxs, *self._submit([programs[i] for i in idxs], timeout_s))
+            for idxs in self._chunk_indices(len(programs))
+        ]
+
+        suspects: List[int] = []
+        for idxs, pool, future in submitted:
+            try:
+                chunk_results = await self._result_async(future, self._chunk_budget(len(idxs), timeout_s))
+                for i, result in zip(idxs, chunk_results):
+                    results[i] = result
+            except BrokenProcessPool:
+                suspects.extend(idxs)
+                self._reset_pool(pool)
+            except (FutureTimeoutError, asyncio.TimeoutError):
+                suspects.extend(idxs)
+                self._reset_pool(pool, kill=True)
+
+        if suspects:
+            await asyncio.to_thread(self._isolate, programs, suspects, timeout_s, results)
+        return results
+
+    def close(self):
+        """Shut down worker processes"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
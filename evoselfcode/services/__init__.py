@@ -1,4 +1,15 @@
-from .datagen_service import DataGenService
+from typing import TYPE_CHECKING
 
-__all__ = ["DataGenService"]
+from ..utils.lazy import lazy_exports
 
+if TYPE_CHECKING:
+    from .datagen_service import DataGenService
+    from .shard_coordinator import ShardCoordinator
+
+__all__ = ["DataGenService", "ShardCoordinator"]
+
+# Submodules are imported on first attribute access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "DataGenService": ".datagen_service",
+    "ShardCoordinator": ".shard_coordinator",
+})
@@ -4,21 +4,89 @@ Data Generation Service (Orchestration Layer)
 High-level service that orchestrates the data generation pipeline:
 1. Problem Description Generation (ProblemGen)
 2. Function Skeleton Generation (SkeletonGen)
-3. Code Implementation Generation (CodeGen) - Future
+3. Code Implementation Generation (CodeGen)
+4. Execution Check (ExecCheck)
+5. Quality Rating (RatingGen)
 
 This layer provides a unified API and handles multi-stage workflows.
+Stages run one after another in a process can share a single client (and its
+connection pool and request limiter) via ``DataGenService.from_stage``.
 """
 
 from __future__ import annotations
 
+import json
 import logging
+import zlib
 from pathlib import Path
-from typing import Dict, List, Literal, Optional
+from typing import Dict, List, Literal, Optional, Set, Tuple
 
-from ..core import ConfigManager, ClientManager, PromptBuilder, FilterChain
 from ..constants import CONFIGS_DIR, PROJECT_ROOT
-from ..datagen.preprocess import ProblemGenerator, SkeletonGenerator, CodeGenerator, RatingGenerator
+from ..core import ClientManager, ConfigManager, FilterChain, PromptBuilder
+from ..datagen.preprocess import (
+    CodeGenerator,
+    ExecutionChecker,
+    ProblemGenerator,
+    RatingGenerator,
+    SkeletonGenerator,
+)
+from ..datagen.utils.postprocess import PostProcessPool
+from ..datagen.utils.validation_cache import ValidationCache
+from ..sandbox import SandboxPool
 from ..utils.logger import setup_task_logger
+from ..utils.metrics import start_exporters
+from ..utils.tracing import start_tracing
+
+# Stage name -> config file under configs/datagen ({source} is 'fim' or 'l2r')
+STAGE_CONFIGS = {
+    "problems": "{source}.yaml",
+    "skeletons": "skeleton.yaml",
+    "code": "codegen.yaml",
+    "exec": "execution.yaml",
+    "ratings": "rating.yaml",
+}
+# Stage name -> output file name written by its generator ({source} as above)
+STAGE_OUTPUTS = {
+    "problems": "{source}_results.jsonl",
+    "skeletons": "skeletons.jsonl",
+    "code": "implementations.jsonl",
+    "exec": "executions.jsonl",
+    "ratings": "ratings.jsonl",
+}
+# Stage name -> config section holding its batch_write_size
+_WRITE_SECTIONS = {"problems": "namegen", "skeletons": "skeleton", "code": "codegen", "ratings": "rating"}
+# Stage name -> output field with the uid of the input record it came from (resume).
+# Execution checks and ratings record the uids of their inputs in their hash table.
+_PARENT_KEYS = {"skeletons": "problem_uid", "code": "skeleton_uid"}
+
+
+def shard_index(uid: str, num_shards: int) -> int:
+    """Shard of a record by uid hash (stable across processes and runs)."""
+    return zlib.crc32(uid.encode("utf-8")) % num_shards
+
+
+def _read_field(file_path: Path, key: str) -> Set[str]:
+    """Values of ``key`` over the records of a JSONL file."""
+    values = set()
+    if not file_path.exists():
+        return values
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                value = json.loads(line).get(key)
+            except json.JSONDecodeError:
+                continue
+            if value:
+                values.add(value)
+    return values
+
+
+def _read_lines(file_path: Path) -> Set[str]:
+    """Non-empty lines of a hash table file."""
+    if not file_path.exists():
+        return set()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return set(line.strip() for line in f if line.strip())
 
 
 class DataGenService:
@@ -28,7 +96,9 @@ class DataGenService:
     Coordinates:
     - ProblemGenerator: Generates algorithm problem descriptions
     - SkeletonGenerator: Generates function skeletons from problems
-    - CodeGenerator: Generates full implementations (future)
+    - CodeGenerator: Generates full implementations
+    - ExecutionChecker: Runs implementations in the sandbox
+    - RatingGenerator: Rates implementation quality
     """
     
     def __init__(
@@ -50,6 +120,14 @@ class DataGenService:
         self.client_manager = client_manager
         self.prompt_builder = prompt_builder
         self.logger = logger or logging.getLogger(__name__)
+        # (index, count): only process records with shard_index(uid, count) == index
+        self.shard: Optional[Tuple[int, int]] = None
+        # Skip inputs that already have an output record
+        self.resume = False
+        # Validation and hashing of generated code, off the event loop
+        self.postprocess_pool = PostProcessPool.from_config(config.get_section("postprocess"))
+        # Parse results by content hash, shared by all stages and runs
+        self.validation_cache = ValidationCache.from_config(config.get_section("postprocess"))
         
         # Initialize generators
         self.problem_gen = ProblemGenerator(
@@ -62,7 +140,9 @@ class DataGenService:
         self.skeleton_gen = SkeletonGenerator(
             client_manager=client_manager,
             config=config.to_dict(),
-            logger=logger
+            logger=logger,
+            postprocess_pool=self.postprocess_pool,
+            validation_cache=self.validation_cache
         )
     
     @classmethod
@@ -71,6 +151,7 @@ class DataGenService:
         config_path: Path,
         task: Optional[str] = None,
         logger: Optional[logging.Logger] = None,
+        client_manager: Optional[ClientManager] = None,
     ) -> "DataGenService":
         """Create service from configuration file.
         
@@ -78,6 +159,7 @@ class DataGenService:
             config_path: Main configuration file path
             task: Task name for logging (e.g., 'fim', 'l2r')
             logger: Custom logger instance
+            client_manager: Existing client manager to share (default: new one)
             
         Returns:
             Configured DataGenService instance
@@ -96,11 +178,220 @@ class DataGenService:
         else:
             config = main_config
         
-        client_manager = ClientManager(config)
+        client_manager = client_manager or ClientManager(config)
         prompt_builder = PromptBuilder(config)
         
         return cls(config, client_manager, prompt_builder, logger)
     
+    @classmethod
+    def from_stage(
+        cls,
+        stage: str,
+        source: str,
+        config_path: Optional[Path] = None,
+        logger: Optional[logging.Logger] = None,
+        client_manager: Optional[ClientManager] = None,
+        concurrency: Optional[int] = None,
+        shard: Optional[Tuple[int, int]] = None,
+        resume: bool = False,
+        stream: bool = False,
+    ) -> "DataGenService":
+        """Create a service for one pipeline stage from its default config.
+        
+        Args:
+            stage: Stage name (key of STAGE_CONFIGS)
+            source: Source mode ('fim' or 'l2r')
+            config_path: Config file (default: configs/datagen/STAGE_CONFIGS[stage])
+            logger: Custom logger instance
+            client_manager: Client manager of a previous stage to reuse its
+                client and connection pool (its concurrency is kept)
+            concurrency: Override api.concurrency.max_concurrent_requests
+            shard: (index, count) to process one uid-hash shard of the input;
+                outputs go to a shard_<index>_of_<count> subdirectory
+            resume: Skip inputs that already have an output record (they count
+                towards ``num_samples`` of run_stage)
+            stream: Write every record as soon as it is accepted
+            
+        Returns:
+            Configured DataGenService instance
+        """
+        if stage not in STAGE_CONFIGS:
+            raise ValueError(f"Unknown stage '{stage}', expected one of {list(STAGE_CONFIGS)}")
+        if config_path is None:
+            config_path = CONFIGS_DIR / "datagen" / STAGE_CONFIGS[stage].format(source=source)
+        
+        service = cls.from_config_path(config_path, task=source, logger=logger, client_manager=client_manager)
+        if concurrency is not None and client_manager is None:
+            service.config.set("api.concurrency.max_concurrent_requests", concurrency)
+        if stream and stage in _WRITE_SECTIONS:
+            service.config.set(f"{_WRITE_SECTIONS[stage]}.batch_write_size", 1)
+        service.shard = shard
+        service.resume = resume
+        return service
+    
+    async def run_stage(self, stage: str, source: str, num_samples: Optional[int] = None) -> List[Dict]:
+        """Run one pipeline stage.
+        
+        Args:
+            stage: Stage name (key of STAGE_CONFIGS)
+            source: Source mode ('fim' or 'l2r')
+            num_samples: Number of samples to generate or process (None = config/all);
+                with sharding, the total over all shards
+            
+        Returns:
+            List of the stage's result dictionaries
+        """
+        if self.shard is not None and num_samples is not None and stage != "problems":
+            num_samples = self._shard_share(num_samples)
+        if stage == "problems":
+            return await self.generate_problems(mode=source.upper(), num_samples=num_samples)
+        if stage == "skeletons":
+            return await self.generate_skeletons(source_mode=source, num_samples=num_samples)
+        if stage == "code":
+            return await self.generate_code(source_mode=source, num_samples=num_samples)
+        if stage == "exec":
+            return await self.check_executions(source_mode=source, num_samples=num_samples)
+        if stage == "ratings":
+            return await self.generate_ratings(source_mode=source, num_samples=num_samples)
+        raise ValueError(f"Unknown stage '{stage}', expected one of {list(STAGE_CONFIGS)}")
+    
+    def stage_paths(self, stage: str, source: str) -> Tuple[Optional[Path], Path]:
+        """Configured input file (None for problems) and output directory of a stage.
+        
+        Args:
+            stage: Stage name (key of STAGE_CONFIGS)
+            source: Source mode ('fim' or 'l2r')
+            
+        Returns:
+            (input_file, output_dir), before sharding
+        """
+        io_cfg = self.config.get_section("io")
+        source_cfg = io_cfg.get("source", {})
+        dir_map = source_cfg.get("dir_map", {})
+        out_dir_map = io_cfg.get("out_dir_map", {})
+        
+        if stage == "problems":
+            out_dir = Path(self.config.get("io.out_names_dir", f"data/generated/problems_desc/{source}"))
+            if not out_dir.is_absolute():
+                out_dir = PROJECT_ROOT / out_dir
+            return None, out_dir
+        if stage == "skeletons":
+            input_dir = PROJECT_ROOT / dir_map.get(source, f"data/generated/problems_desc/{source}")
+            input_file = input_dir / source_cfg.get("file_name_map", {}).get(source, f"{source}_results.jsonl")
+            return input_file, PROJECT_ROOT / out_dir_map.get(source, f"data/generated/func_skeletons/{source}")
+        
+        # Stages reading a single input file name
+        default_input, default_output, default_file = {
+            "code": ("func_skeletons", "func_implementations", "skeletons.jsonl"),
+            "exec": ("func_implementations", "func_executions", "implementations.jsonl"),
+            "ratings": ("func_implementations", "func_ratings", "implementations.jsonl"),
+        }[stage]
+        input_dir = Path(dir_map.get(source, f"data/generated/{default_input}/{source}"))
+        input_file = input_dir / source_cfg.get("file_name", default_file)
+        return input_file, Path(out_dir_map.get(source, f"data/generated/{default_output}/{source}"))
+    
+    def stage_files(self, stage: str, source: str) -> Tuple[str, str]:
+        """Output file and hash table names of a stage.
+        
+        The execution check writes the names configured under ``io``
+        (``out_file_name``, ``hash_table_name``); the generators of the other
+        stages write fixed names.
+        """
+        out_file = STAGE_OUTPUTS[stage].format(source=source)
+        if stage != "exec":
+            return out_file, "hash_table.txt"
+        return (
+            self.config.get("io.out_file_name", out_file),
+            self.config.get("io.hash_table_name", "hash_table.txt"),
+        )
+    
+    def _shard_share(self, num_samples: int) -> int:
+        """This shard's part of ``num_samples``."""
+        index, count = self.shard
+        return num_samples // count + (1 if index < num_samples % count else 0)
+    
+    def _shard_path(self, path: Path) -> Path:
+        """``path`` inside this service's shard subdirectory."""
+        index, count = self.shard
+        return path.parent / f"shard_{index}_of_{count}" / path.name
+    
+    def _done_inputs(self, stage: str, source: str, output_dir: Path) -> Set[str]:
+        """UIDs of the input records a stage already has an output for."""
+        if stage in _PARENT_KEYS:
+            return _read_field(output_dir / STAGE_OUTPUTS[stage], _PARENT_KEYS[stage])
+        return _read_lines(output_dir / self.stage_files(stage, source)[1])
+    
+    def _stage_io(
+        self, stage: str, source: str, num_samples: Optional[int]
+    ) -> Tuple[Path, Path, Optional[int]]:
+        """Apply sharding and resume to a stage's input file, output directory and sample count.
+        
+        When either is active, the selected input records are written to a
+        hidden file in the output directory, which becomes the stage input.
+        With resume, inputs already done are left out and count towards
+        ``num_samples``, so a rerun processes up to ``num_samples`` in total.
+        
+        Returns:
+            (input_file, output_dir, num_samples still to process)
+        """
+        input_file, output_dir = self.stage_paths(stage, source)
+        if self.shard is None and not self.resume:
+            return input_file, output_dir, num_samples
+        
+        shard = self.shard
+        if shard is not None:
+            output_dir = output_dir / f"shard_{shard[0]}_of_{shard[1]}"
+            # Upstream stage ran with the same sharding: its output is this shard's input
+            if self._shard_path(input_file).exists():
+                input_file = self._shard_path(input_file)
+                shard = None
+        if not input_file.exists() or (shard is None and not self.resume):
+            return input_file, output_dir, num_samples
+        
+        done = self._done_inputs(stage, source, output_dir) if self.resume else set()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        selected_file = output_dir / f".{stage}_input.jsonl"
+        kept = skipped = 0
+        with open(input_file, 'r', encoding='utf-8') as src, open(selected_file, 'w', encoding='utf-8') as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                try:
+                    uid = json.loads(line).get("uid") or line
+                except json.JSONDecodeError:
+                    continue
+                if shard is not None and shard_index(uid, shard[1]) != shard[0]:
+                    continue
+                if uid in done:
+                    skipped += 1
+                    continue
+                dst.write(line if line.endswith("\n") else line + "\n")
+                kept += 1
+        
+        self.logger.info(f"Selected {kept} input records from {input_file}"
+                         + (f" (shard {shard[0]}/{shard[1]})" if shard else "")
+                         + (f", {skipped} already done" if self.resume else ""))
+        if self.resume and num_samples is not None:
+            num_samples = max(num_samples - skipped, 0)
+            self.logger.info(f"Resuming: {num_samples} more to process")
+        return selected_file, output_dir, num_samples
+    
+    def metrics_exporters(self, name: str):
+        """Run the metrics exporters of the ``metrics`` config section (context manager).
+
+        Args:
+            name: Run name used in the snapshot file name (e.g. 'codegen_fim')
+        """
+        return start_exporters(self.config.get_section("metrics"), name=name)
+    
+    def tracing(self, name: str):
+        """Trace the run if enabled in the ``tracing`` config section (context manager).
+
+        Args:
+            name: Run name used in the trace file name (e.g. 'codegen_fim')
+        """
+        return start_tracing(self.config.get_section("tracing"), name=name)
+    
     async def generate_problems(
         self,
         mode: Literal["FIM", "L2R"],
@@ -126,9 +417,17 @@ class DataGenService:
         batch_write_size = int(self.config.get("namegen.batch_write_size", 50))
         
         # Get output directory
-        out_dir = Path(self.config.get("io.out_names_dir", f"data/generated/problems_desc/{mode.lower()}"))
-        if not out_dir.is_absolute():
-            out_dir = PROJECT_ROOT / out_dir
+        _, out_dir = self.stage_paths("problems", mode.lower())
+        
+        if self.shard is not None:
+            num_samples = self._shard_share(num_samples)
+            out_dir = out_dir / f"shard_{self.shard[0]}_of_{self.shard[1]}"
+        if self.resume:
+            done = len(self.problem_gen._load_existing_hashes(out_dir / "hash_table.txt"))
+            self.logger.info(f"Resuming: {done} problems already generated")
+            num_samples = max(num_samples - done, 0)
+            if num_samples == 0:
+                return []
         
         self.logger.info(f"=== Orchestrating Problem Generation: {mode} ===")
         
@@ -171,15 +470,9 @@ class DataGenService:
         prompt_template = self.config.get("prompts.skeleton.template", "")
         
         # Get input/output paths
-        source_cfg = self.config.get("io.source", {})
-        dir_map = source_cfg.get("dir_map", {})
-        file_name_map = source_cfg.get("file_name_map", {})
-        
-        input_dir = PROJECT_ROOT / dir_map.get(source_mode, f"data/generated/problems_desc/{source_mode}")
-        input_file = input_dir / file_name_map.get(source_mode, f"{source_mode}_results.jsonl")
-        
-        out_dir_map = self.config.get("io.out_dir_map", {})
-        output_dir = PROJECT_ROOT / out_dir_map.get(source_mode, f"data/generated/func_skeletons/{source_mode}")
+        input_file, output_dir, num_samples = self._stage_io("skeletons", source_mode, num_samples)
+        if num_samples == 0:
+            return []
         
         self.logger.info(f"=== Orchestrating Skeleton Generation: {source_mode.upper()} ===")
         
@@ -216,17 +509,12 @@ class DataGenService:
         
         # Get config for code generation
         codegen_cfg = self.config.get_section("codegen")
-        io_cfg = self.config.get_section("io")
-        
-        # Get input file path
-        source_cfg = io_cfg.get("source", {})
-        dir_map = source_cfg.get("dir_map", {})
-        input_dir = Path(dir_map.get(source_mode, f"data/generated/func_skeletons/{source_mode}"))
-        input_file = input_dir / source_cfg.get("file_name", "skeletons.jsonl")
-        
-        # Get output directory
-        output_dir_map = io_cfg.get("out_dir_map", {})
-        output_dir = Path(output_dir_map.get(source_mode, f"data/generated/func_implementations/{source_mode}"))
+        source_cfg = self.config.get_section("io").get("source", {})
+
+        # Get input file and output directory
+        input_file, output_dir, num_samples = self._stage_io("code", source_mode, num_samples)
+        if num_samples == 0:
+            return []
         
         # Get prompt template
         prompts_cfg = self.config.get_section("prompts")
@@ -240,7 +528,10 @@ class DataGenService:
         code_generator = CodeGenerator(
             client_manager=self.client_manager,
             config=codegen_cfg,
-            logger=self.logger
+            logger=self.logger,
+            postprocess_pool=self.postprocess_pool,
+            validation_cache=self.validation_cache,
+            code_filter=FilterChain.for_code(self.config)
         )
         
         # Generate implementations
@@ -265,6 +556,49 @@ class DataGenService:
         self.logger.info(f"✅ Generated {len(results)} unique function implementations")
         return results
     
+    async def check_executions(
+        self,
+        source_mode: str,
+        num_samples: Optional[int] = None,
+    ) -> List[Dict]:
+        """Orchestrates sandboxed execution of implementations on problem examples.
+        
+        Args:
+            source_mode: Source mode ('fim' or 'l2r')
+            num_samples: Number of implementations to check (None = all)
+            
+        Returns:
+            List of execution result dictionaries
+        """
+        self.logger.info(f"=== Orchestrating Execution Check: {source_mode.upper()} ===")
+        
+        sandbox_cfg = self.config.get_section("sandbox")
+
+        # Get input file and output directory
+        input_file, output_dir, num_samples = self._stage_io("exec", source_mode, num_samples)
+        if num_samples == 0:
+            return []
+        out_file_name, hash_table_name = self.stage_files("exec", source_mode)
+        
+        with SandboxPool.from_config(sandbox_cfg) as sandbox:
+            checker = ExecutionChecker(
+                sandbox=sandbox,
+                config=sandbox_cfg,
+                logger=self.logger
+            )
+            results = await checker.check(
+                input_file=input_file,
+                output_dir=output_dir,
+                num_samples=num_samples,
+                batch_size=sandbox_cfg.get("batch_size", 4096),
+                max_examples=sandbox_cfg.get("max_examples", 8),
+                out_file_name=out_file_name,
+                hash_table_name=hash_table_name,
+            )
+        
+        self.logger.info(f"✅ Checked {len(results)} implementations")
+        return results
+    
     async def generate_ratings(
         self,
         source_mode: str,
@@ -286,12 +620,9 @@ class DataGenService:
         
         # Determine input and output paths
         source_cfg = io_cfg.get("source", {})
-        dir_map = source_cfg.get("dir_map", {})
-        input_dir = Path(dir_map.get(source_mode, f"data/generated/func_implementations/{source_mode}"))
-        input_file = input_dir / source_cfg.get("file_name", "implementations.jsonl")
-        
-        output_dir_map = io_cfg.get("out_dir_map", {})
-        output_dir = Path(output_dir_map.get(source_mode, f"data/generated/func_ratings/{source_mode}"))
+        input_file, output_dir, num_samples = self._stage_io("ratings", source_mode, num_samples)
+        if num_samples == 0:
+            return []
         
         # Get prompt template
         prompts_cfg = self.config.get_section("prompts")
@@ -301,11 +632,22 @@ class DataGenService:
         if not prompt_template:
             raise ValueError("Rating prompt template not found in config")
         
+        # Optional execution-based pre-filter
+        execution_file = None
+        exec_filter_cfg = rating_cfg.get("execution_filter", {})
+        if exec_filter_cfg.get("enabled", False):
+            exec_dir_map = exec_filter_cfg.get("dir_map", {})
+            exec_dir = Path(exec_dir_map.get(source_mode, f"data/generated/func_executions/{source_mode}"))
+            execution_file = exec_dir / exec_filter_cfg.get("file_name", "executions.jsonl")
+            if self.shard is not None and self._shard_path(execution_file).exists():
+                execution_file = self._shard_path(execution_file)
+        
         # Create rating generator
         rating_generator = RatingGenerator(
             client_manager=self.client_manager,
             config=rating_cfg,
-            logger=self.logger
+            logger=self.logger,
+            validation_cache=self.validation_cache
         )
         
         # Generate ratings
@@ -326,7 +668,12 @@ class DataGenService:
             source_key=source_cfg.get("source_key", "source"),
             validate_scores=rating_cfg.get("validate_scores", True),
             min_score=rating_cfg.get("min_score", 1),
-            max_score=rating_cfg.get("max_score", 5)
+            max_score=rating_cfg.get("max_score", 5),
+            mode=rating_cfg.get("mode", "text"),
+            execution_file=execution_file,
+            skip_execution_statuses=exec_filter_cfg.get(
+                "skip_statuses", ["failed", "error", "timeout", "crashed"]
+            )
         )
         
         self.logger.info(f"✅ Generated {len(results)} quality ratings")
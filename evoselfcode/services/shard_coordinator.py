@@ -0,0 +1,320 @@
+"""
+Sharded multi-process datagen runner.
+
+One event loop saturates a core (JSON encoding, hashing, AST validation,
+logging) long before the inference cluster does. The coordinator splits a
+run into N shards by uid hash (``shard_index``) and starts one worker
+process per shard:
+
+    evoselfcode datagen run --pipeline <stages> --shard K/N --resume
+
+Each worker has its own client and event loop. Workers run locally, or on
+other nodes through a launcher command (e.g. ``ssh {host} ...``) when the
+data directory is on a shared filesystem. A worker that exits with an error
+is restarted and resumes where it stopped: with --resume, inputs a shard has
+already processed count towards its share of --num-samples. When every worker has finished,
+the shard outputs and hash tables are merged into the stage's normal output
+directory.
+
+Usage:
+    coordinator = ShardCoordinator(["code", "ratings"], "fim", num_shards=8)
+    coordinator.run()
+    coordinator.merge()
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..constants import PROJECT_ROOT
+from .datagen_service import DataGenService
+
+
+@dataclass
+class ShardWorker:
+    """State of one shard's worker process."""
+    index: int
+    host: Optional[str] = None
+    base_url: Optional[str] = None
+    process: Optional[subprocess.Popen] = None
+    restarts: int = 0
+    status: str = "pending"  # pending | running | done | failed
+
+
+class _LineCounter:
+    """Counts lines of growing files, reading only what was appended since the last call."""
+
+    def __init__(self):
+        self._state: Dict[Path, List[int]] = {}  # path -> [offset, lines]
+
+    def count(self, path: Path) -> int:
+        offset, lines = self._state.setdefault(path, [0, 0])
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return lines
+        # Only complete lines are counted; a partial last line is read again next time
+        end = data.rfind(b"\n") + 1
+        self._state[path] = [offset + end, lines + data.count(b"\n", 0, end)]
+        return self._state[path][1]
+
+
+class ShardCoordinator:
+    """Runs datagen stages as N sharded worker processes and merges their outputs."""
+
+    def __init__(
+        self,
+        stages: List[str],
+        source: str,
+        num_shards: int,
+        num_samples: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        stream: bool = False,
+        hosts: Optional[List[str]] = None,
+        launcher: Optional[str] = None,
+        base_urls: Optional[List[str]] = None,
+        max_restarts: int = 3,
+        poll_interval_s: float = 10.0,
+        log_dir: Optional[Path] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """Initialize the coordinator.
+
+        Args:
+            stages: Stages each worker runs in order (keys of STAGE_CONFIGS)
+            source: Source mode ('fim' or 'l2r')
+            num_shards: Number of shards (= worker processes)
+            num_samples: Samples per stage in total over all shards (None = config/all)
+            concurrency: Max concurrent requests per worker
+            stream: Workers write every record as soon as it is accepted
+            hosts: Hosts assigned to workers round-robin (requires ``launcher``)
+            launcher: Shell command template starting a worker on ``{host}``,
+                e.g. "ssh {host} 'cd /shared/evoselfcode && {command}'";
+                also gets ``{shard}``
+            base_urls: Inference endpoints assigned to workers round-robin
+                (EVOCODE_BASE_URL of the worker)
+            max_restarts: Restarts per worker before the shard is given up
+            poll_interval_s: Seconds between status checks and progress reports
+            log_dir: Directory for worker stdout/stderr
+            logger: Logger instance
+        """
+        if num_shards < 1:
+            raise ValueError(f"num_shards must be >= 1, got {num_shards}")
+        if hosts and not launcher:
+            raise ValueError("hosts require a launcher command template")
+        self.stages = stages
+        self.source = source
+        self.num_shards = num_shards
+        self.num_samples = num_samples
+        self.concurrency = concurrency
+        self.stream = stream
+        self.hosts = hosts or []
+        self.launcher = launcher
+        self.base_urls = base_urls or []
+        self.max_restarts = max_restarts
+        self.poll_interval_s = poll_interval_s
+        self.log_dir = log_dir or PROJECT_ROOT / "logs" / "datagen" / f"sharded_{source}"
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Output directory and file names per stage (configs only; no client is created).
+        # Workers run in PROJECT_ROOT, so relative paths are resolved there.
+        self.output_dirs = {}
+        self.output_files = {}
+        for stage in stages:
+            service = DataGenService.from_stage(stage, source, logger=self.logger)
+            out_dir = service.stage_paths(stage, source)[1]
+            self.output_dirs[stage] = out_dir if out_dir.is_absolute() else PROJECT_ROOT / out_dir
+            self.output_files[stage] = service.stage_files(stage, source)
+        self.workers = [
+            ShardWorker(
+                index=i,
+                host=self.hosts[i % len(self.hosts)] if self.hosts else None,
+                base_url=self.base_urls[i % len(self.base_urls)] if self.base_urls else None,
+            )
+            for i in range(num_shards)
+        ]
+
+    def shard_dir(self, stage: str, index: int) -> Path:
+        """Output directory of one shard of a stage."""
+        return self.output_dirs[stage] / f"shard_{index}_of_{self.num_shards}"
+
+    def worker_command(self, index: int, python: str = sys.executable) -> List[str]:
+        """Command line of the worker for shard ``index``."""
+        command = [
+            python, "-m", "evoselfcode.cli", "datagen", "run",
+            "--pipeline", ",".join(self.stages),
+            "--source", self.source,
+            "--shard", f"{index}/{self.num_shards}",
+            "--resume",
+        ]
+        if self.num_samples is not None:
+            command += ["--num-samples", str(self.num_samples)]
+        if self.concurrency is not None:
+            command += ["--concurrency", str(self.concurrency)]
+        if self.stream:
+            command.append("--stream")
+        return command
+
+    def _start(self, worker: ShardWorker):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        log_file = open(self.log_dir / f"worker_{worker.index}.log", 'ab')
+        if self.launcher:
+            # Remote interpreter: whatever `python` is on the node's PATH
+            command = shlex.join(self.worker_command(worker.index, python="python"))
+            if worker.base_url:
+                command = f"EVOCODE_BASE_URL={shlex.quote(worker.base_url)} {command}"
+            shell_command = self.launcher.format(
+                host=worker.host or "localhost", command=command, shard=worker.index,
+            )
+            worker.process = subprocess.Popen(
+                shell_command, shell=True, stdout=log_file, stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL, cwd=PROJECT_ROOT,
+            )
+        else:
+            env = dict(os.environ)
+            if worker.base_url:
+                env["EVOCODE_BASE_URL"] = worker.base_url
+            worker.process = subprocess.Popen(
+                self.worker_command(worker.index), stdout=log_file, stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL, cwd=PROJECT_ROOT, env=env,
+            )
+        # The child holds its own descriptor
+        log_file.close()
+        worker.status = "running"
+        self.logger.info(f"Started shard {worker.index}/{self.num_shards}"
+                         + (f" on {worker.host}" if worker.host else "")
+                         + (f" (restart {worker.restarts})" if worker.restarts else "")
+                         + f", pid {worker.process.pid}")
+
+    def _poll(self, worker: ShardWorker):
+        returncode = worker.process.poll()
+        if returncode is None:
+            return
+        if returncode == 0:
+            worker.status = "done"
+            self.logger.info(f"Shard {worker.index} finished")
+        elif worker.restarts < self.max_restarts:
+            worker.restarts += 1
+            self.logger.warning(f"Shard {worker.index} exited with {returncode}, restarting "
+                                f"({worker.restarts}/{self.max_restarts}); see {self.log_dir}/worker_{worker.index}.log")
+            self._start(worker)
+        else:
+            worker.status = "failed"
+            self.logger.error(f"Shard {worker.index} exited with {returncode} after {worker.restarts} restarts")
+
+    def progress(self, counter: _LineCounter) -> Dict[str, int]:
+        """Records written so far per stage, over all shards."""
+        return {
+            stage: sum(
+                counter.count(self.shard_dir(stage, i) / self.output_files[stage][0])
+                for i in range(self.num_shards)
+            )
+            for stage in self.stages
+        }
+
+    def run(self) -> Dict[str, int]:
+        """Run all workers to completion, restarting failed ones.
+
+        Returns:
+            Records written per stage over all shards
+
+        Raises:
+            RuntimeError: If a shard still fails after ``max_restarts`` restarts
+        """
+        counter = _LineCounter()
+        start = time.monotonic()
+        self.logger.info(f"Sharded run: {' -> '.join(self.stages)} ({self.source}), {self.num_shards} workers, "
+                         f"logs in {self.log_dir}")
+        for worker in self.workers:
+            self._start(worker)
+
+        try:
+            while True:
+                for worker in self.workers:
+                    if worker.status == "running":
+                        self._poll(worker)
+                counts = self.progress(counter)
+                statuses = [w.status for w in self.workers]
+                elapsed = time.monotonic() - start
+                self.logger.info(
+                    " ".join(f"{stage}={n}" for stage, n in counts.items())
+                    + f" | {sum(counts.values()) / max(elapsed, 1e-9):.1f} records/s"
+                    + f" | running {statuses.count('running')}, done {statuses.count('done')}, "
+                      f"failed {statuses.count('failed')}, restarts {sum(w.restarts for w in self.workers)}"
+                )
+                if "running" not in statuses:
+                    break
+                time.sleep(self.poll_interval_s)
+        except BaseException:
+            for worker in self.workers:
+                if worker.status == "running":
+                    worker.process.terminate()
+            raise
+
+        failed = [w.index for w in self.workers if w.status == "failed"]
+        if failed:
+            raise RuntimeError(f"Shards {failed} failed after {self.max_restarts} restarts; "
+                               f"rerun to resume them")
+        return counts
+
+    def merge(self, remove_shards: bool = False) -> Dict[str, int]:
+        """Merge shard outputs and hash tables into each stage's output directory.
+
+        Records whose uid is already in the stage's hash table are skipped,
+        so merging again (e.g. after a rerun) only adds new records.
+
+        Args:
+            remove_shards: Delete the shard directories after merging
+
+        Returns:
+            Records added per stage
+        """
+        added = {}
+        for stage in self.stages:
+            out_dir = self.output_dirs[stage]
+            file_name, hash_table_name = self.output_files[stage]
+            hash_file = out_dir / hash_table_name
+            out_dir.mkdir(parents=True, exist_ok=True)
+
+            seen = set()
+            if hash_file.exists():
+                with open(hash_file, 'r', encoding='utf-8') as f:
+                    seen = set(line.strip() for line in f if line.strip())
+
+            added[stage] = 0
+            with open(out_dir / file_name, 'a', encoding='utf-8') as out, \
+                    open(hash_file, 'a', encoding='utf-8') as hashes:
+                for i in range(self.num_shards):
+                    shard_file = self.shard_dir(stage, i) / file_name
+                    if not shard_file.exists():
+                        continue
+                    with open(shard_file, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            try:
+                                uid = json.loads(line).get("uid")
+                            except json.JSONDecodeError:
+                                continue
+                            if not uid or uid in seen:
+                                continue
+                            seen.add(uid)
+                            out.write(line if line.endswith("\n") else line + "\n")
+                            hashes.write(uid + "\n")
+                            added[stage] += 1
+
+            self.logger.info(f"Merged {stage}: {added[stage]} new records into {out_dir / file_name}")
+            if remove_shards:
+                for i in range(self.num_shards):
+                    shutil.rmtree(self.shard_dir(stage, i), ignore_errors=True)
+        return added
@@ -0,0 +1,39 @@
+"""Local stand-ins for external services (tests and benchmarks)."""
+
+from typing import TYPE_CHECKING
+
+from ..utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .canned import CannedResponder, detect_stage
+    from .mock_server import (
+        MockBehavior,
+        MockOpenAIServer,
+        MockServerProcess,
+        guided_text,
+        sample_json_schema,
+        sample_regex,
+    )
+
+__all__ = [
+    "CannedResponder",
+    "MockBehavior",
+    "MockOpenAIServer",
+    "MockServerProcess",
+    "detect_stage",
+    "guided_text",
+    "sample_json_schema",
+    "sample_regex",
+]
+
+# Submodules are imported on first attribute access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "CannedResponder": ".canned",
+    "detect_stage": ".canned",
+    "MockBehavior": ".mock_server",
+    "MockOpenAIServer": ".mock_server",
+    "MockServerProcess": ".mock_server",
+    "guided_text": ".mock_server",
+    "sample_json_schema": ".mock_server",
+    "sample_regex": ".mock_server",
+})
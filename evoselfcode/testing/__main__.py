@@ -0,0 +1,5 @@
+"""Run the mock OpenAI server: python -m evoselfcode.testing [options]"""
+
+from .mock_server import main
+
+main()
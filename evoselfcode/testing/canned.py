@@ -0,0 +1,152 @@
+"""
+Canned completions in the output format of each datagen stage.
+
+The stage is recognised from the prompt the generators send:
+
+- ``rating``:        prompt contains "Output Evaluation:" (rating prompt);
+                     a prompt ending with "<label> Score:" gets the rest of
+                     the score lines (logprob mode), a packed prompt ("The N
+                     candidates above ...") gets one block per candidate
+- ``codegen``:       prompt ends with "Output (function body only):"
+- ``skeleton``:      prompt ends with "Output:"
+- ``problem``:       anything else (FIM and L2R problem prompts)
+
+Outputs are unique per call (numbered function names and titles), so hash
+deduplication keeps every sample, and valid for the stage's checks (AST
+parsing, rating parser), so throughput measurements are not skewed by
+retries. Fixed texts per stage can be supplied instead.
+"""
+
+from __future__ import annotations
+
+import itertools
+import random
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from ..datagen.preprocess.rating_parser import DEFAULT_DIMENSIONS
+
+STAGES = ("problem", "skeleton", "codegen", "rating")
+
+_PACK_COUNT_RE = re.compile(r"The (\d+) candidates above")
+
+_TOPICS = (
+    ("Subarray Sum Count", "Count the contiguous subarrays of nums whose sum equals target.", "prefix sums"),
+    ("Longest Unique Substring", "Return the length of the longest substring of s without repeated characters.", "sliding window"),
+    ("Grid Path Count", "Count the monotone paths from the top-left to the bottom-right cell of a grid avoiding blocked cells.", "dynamic programming"),
+    ("Interval Merge", "Merge all overlapping intervals and return the merged list sorted by start.", "sorting"),
+    ("Kth Smallest Pair Distance", "Return the k-th smallest absolute difference among all pairs of nums.", "binary search on the answer"),
+)
+
+
+def detect_stage(prompt: str) -> str:
+    """Datagen stage a prompt belongs to (one of STAGES)."""
+    if "Output Evaluation:" in prompt:
+        return "rating"
+    tail = prompt.rstrip()
+    if tail.endswith("Output (function body only):"):
+        return "codegen"
+    if tail.endswith("Output:"):
+        return "skeleton"
+    return "problem"
+
+
+class CannedResponder:
+    """Responder of the mock server producing stage-formatted outputs."""
+
+    def __init__(
+        self,
+        outputs: Optional[Mapping[str, Sequence[str]]] = None,
+        seed: int = 0,
+        min_score: int = 3,
+        max_score: int = 5,
+    ):
+        """
+        Args:
+            outputs: Fixed texts per stage, served round-robin instead of the
+                built-in outputs of that stage
+            seed: Seed of the sampled scores and topics
+            min_score: Lowest rating score produced
+            max_score: Highest rating score produced
+        """
+        self.outputs: Dict[str, List[str]] = {stage: list(texts) for stage, texts in (outputs or {}).items() if texts}
+        unknown = set(self.outputs) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown stages in canned outputs: {sorted(unknown)}")
+        self.rng = random.Random(seed)
+        self.min_score = min_score
+        self.max_score = max_score
+        self._counter = itertools.count()
+        self._cursors = {stage: itertools.cycle(texts) for stage, texts in self.outputs.items()}
+
+    def __call__(self, prompt: str, body: Dict[str, Any]) -> str:
+        stage = detect_stage(prompt)
+        if stage in self._cursors:
+            return next(self._cursors[stage])
+        index = next(self._counter)
+        if stage == "rating":
+            return self.rating(prompt)
+        if stage == "codegen":
+            return self.body(index)
+        if stage == "skeleton":
+            return self.skeleton(index)
+        return self.problem(index)
+
+    def problem(self, index: int) -> str:
+        title, description, hint = self.rng.choice(_TOPICS)
+        return (
+            f"Title: {title} {index}\n"
+            f"Description: {description} Variant {index} limits the input to {10 ** (index % 5 + 2)} elements.\n"
+            f"Example:\n"
+            f"Input: nums = [1, 1, 1], target = 2\n"
+            f"Output: 2\n"
+            f"Hint: {hint}.\n"
+        )
+
+    def skeleton(self, index: int) -> str:
+        return (
+            f"def solve_{index}(nums: List[int], target: int) -> int:\n"
+            f'    """\n'
+            f"    Count the subarrays of nums summing to target.\n"
+            f"\n"
+            f"    Args:\n"
+            f"        nums: Input numbers\n"
+            f"        target: Target sum\n"
+            f"\n"
+            f"    Returns:\n"
+            f"        Number of subarrays\n"
+            f'    """\n'
+        )
+
+    def body(self, index: int) -> str:
+        return (
+            f"    counts = {{0: 1}}\n"
+            f"    total = result = 0\n"
+            f"    for x in nums:\n"
+            f"        total += x\n"
+            f"        result += counts.get(total - target, 0)\n"
+            f"        counts[total] = counts.get(total, 0) + {index % 3 + 1}\n"
+            f"    return result\n"
+        )
+
+    def _scores(self) -> List[str]:
+        return [
+            f"{label} Score: {self.rng.randint(self.min_score, self.max_score)}"
+            for label in DEFAULT_DIMENSIONS.values()
+        ]
+
+    def rating(self, prompt: str) -> str:
+        tail = prompt.rstrip()
+        summary = "Summary: Correct prefix-sum solution with clear naming."
+        pack = _PACK_COUNT_RE.search(prompt)
+        if pack and tail.endswith(":") and "Candidate" in tail.rsplit("\n", 1)[-1]:
+            blocks = []
+            for index in range(1, int(pack.group(1)) + 1):
+                header = "" if index == 1 else f"Candidate {index}:\n"
+                blocks.append(header + "\n".join(self._scores()) + "\n" + summary)
+            return "\n\n".join(blocks)
+        lines = self._scores()
+        if tail.endswith("Score:"):
+            # Prefilled up to the first score (logprob mode)
+            return " " + lines[0].rsplit(" ", 1)[-1] + "\n" + "\n".join(lines[1:]) + "\n" + summary
+        return "\n".join(lines) + "\n" + summary
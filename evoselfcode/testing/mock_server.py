@@ -0,0 +1,773 @@
+"""
+Local OpenAI-compatible mock server.
+
+Serves ``/v1/completions`` and ``/v1/chat/completions`` (plus
+``/v1/models``) on an asyncio HTTP/1.1 server, so AsyncOpenAICompletionClient
+and the generators can be exercised and load-tested without a GPU endpoint.
+Supported request fields: ``n``, ``max_tokens`` (finish_reason "length"),
+``stop``, ``stream`` (server-sent events, with ``stream_options.include_usage``),
+``echo``, ``logprobs`` (completions: top-k count; chat: ``logprobs`` +
+``top_logprobs``), FIM ``suffix`` and the chat FIM ``prefix``/``suffix``
+body fields. Tokens are approximated by a regex split (words, single digits,
+punctuation, whitespace runs).
+
+Completion text comes from a responder callable (default: CannedResponder,
+which answers in the output format of the datagen stage the prompt belongs
+to) unless the request carries vLLM guided decoding fields (``guided_json``,
+``guided_regex``, ``guided_choice``), in which case a text satisfying the
+constraint is sampled instead, as a guided server would return.
+
+MockBehavior models the serving side: time to first token drawn from a
+latency distribution (fixed, uniform, exponential, lognormal), a decode rate
+in tokens/sec, and injected errors (HTTP status or dropped connections) at a
+given rate.
+
+Usage:
+    with MockOpenAIServer(behavior=MockBehavior(latency_s=0.2, tokens_per_s=50)) as server:
+        client = AsyncOpenAICompletionClient(base_url=server.base_url, model="mock")
+
+    python -m evoselfcode.testing --port 8000 --latency lognormal --latency-s 0.3 --tokens-per-s 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import re
+import socket
+import string
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+try:
+    import re._constants as sre_constants
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+# Responder: (prompt, request body) -> completion text
+Responder = Callable[[str, Dict[str, Any]], str]
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# Request bodies kept in MockOpenAIServer.requests
+_RECORD_LIMIT = 1000
+# Approximate tokenizer: words, single digits (as in Qwen/Llama tokenizers),
+# punctuation, whitespace runs; a leading space is part of the token
+_TOKEN_RE = re.compile(r" ?[A-Za-z_]+| ?\d| ?[^\sA-Za-z_\d]|\s+")
+# Alternatives listed in top_logprobs of non-digit tokens
+_ALT_TOKENS = (" the", " a", "\n", " of", "_", " =", " (", ".", ",", " in")
+_HEADER_LIMIT = 64 * 1024
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests",
+            500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable"}
+
+# Characters sampled for wildcards and negated character classes
+_ALPHABET = string.ascii_letters + string.digits + " _.,:;()[]=+-*/"
+_CATEGORY_CHARS = {
+    sre_constants.CATEGORY_DIGIT: string.digits,
+    sre_constants.CATEGORY_NOT_DIGIT: string.ascii_letters + " _",
+    sre_constants.CATEGORY_SPACE: " ",
+    sre_constants.CATEGORY_NOT_SPACE: string.ascii_letters + string.digits,
+    sre_constants.CATEGORY_WORD: string.ascii_letters + string.digits + "_",
+    sre_constants.CATEGORY_NOT_WORD: " .,:;()",
+}
+
+
+def _class_chars(items) -> str:
+    """Characters matched by a parsed character class (IN)."""
+    negate = False
+    chars: List[str] = []
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            chars.append(chr(av))
+        elif op is sre_constants.RANGE:
+            low, high = av
+            chars.extend(chr(c) for c in range(low, min(high, low + 255) + 1))
+        elif op is sre_constants.CATEGORY:
+            chars.extend(_CATEGORY_CHARS.get(av, ""))
+    if negate:
+        excluded = set(chars)
+        return "".join(c for c in _ALPHABET if c not in excluded)
+    return "".join(chars)
+
+
+def _sample_parsed(parsed, rng: random.Random, groups: Dict[int, str], max_repeat: int) -> str:
+    out: List[str] = []
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            out.append(chr(av))
+        elif op is sre_constants.NOT_LITERAL:
+            out.append(rng.choice([c for c in _ALPHABET if ord(c) != av]))
+        elif op is sre_constants.ANY:
+            out.append(rng.choice(_ALPHABET))
+        elif op is sre_constants.IN:
+            chars = _class_chars(av)
+            if chars:
+                out.append(rng.choice(chars))
+        elif op is sre_constants.CATEGORY:
+            out.append(rng.choice(_CATEGORY_CHARS.get(av, "x")))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+                    getattr(sre_constants, "POSSESSIVE_REPEAT", None)):
+            low, high, sub = av
+            high = low + max_repeat if high is sre_constants.MAXREPEAT else high
+            count = rng.randint(low, max(low, min(high, low + max_repeat)))
+            out.extend(_sample_parsed(sub, rng, groups, max_repeat) for _ in range(count))
+        elif op is sre_constants.SUBPATTERN:
+            group, _, _, sub = av
+            text = _sample_parsed(sub, rng, groups, max_repeat)
+            if group is not None:
+                groups[group] = text
+            out.append(text)
+        elif op is sre_constants.BRANCH:
+            out.append(_sample_parsed(rng.choice(av[1]), rng, groups, max_repeat))
+        elif op is sre_constants.GROUPREF:
+            out.append(groups.get(av, ""))
+        elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            out.append(_sample_parsed(av, rng, groups, max_repeat))
+        # AT (anchors) and lookaround assertions produce no text
+    return "".join(out)
+
+
+def sample_regex(pattern: str, rng: Optional[random.Random] = None, max_repeat: int = 8) -> str:
+    """Sample a string fully matching ``pattern``.
+
+    Args:
+        pattern: Regular expression (Python syntax)
+        rng: Random generator
+        max_repeat: Extra repetitions sampled beyond a quantifier's minimum
+
+    Returns:
+        Matching string
+
+    Raises:
+        ValueError: If no matching string was found (e.g. lookarounds)
+    """
+    rng = rng or random.Random()
+    compiled = re.compile(pattern)
+    parsed = sre_parse.parse(pattern)
+    for _ in range(20):
+        text = _sample_parsed(parsed, rng, {}, max_repeat)
+        if compiled.fullmatch(text):
+            return text
+    raise ValueError(f"Could not sample a match for regex: {pattern!r}")
+
+
+def sample_json_schema(schema: Dict[str, Any], rng: Optional[random.Random] = None) -> Any:
+    """Sample a JSON value valid under a (subset of) JSON schema.
+
+    Supports const, enum, anyOf/oneOf, object, array, string (with
+    pattern), integer, number, boolean and null.
+    """
+    rng = rng or random.Random()
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            return sample_json_schema(rng.choice(schema[key]), rng)
+
+    kind = schema.get("type", "object" if "properties" in schema else "string")
+    if isinstance(kind, list):
+        kind = rng.choice(kind)
+    if kind == "object":
+        return {name: sample_json_schema(sub, rng) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        low = schema.get("minItems", 1)
+        high = schema.get("maxItems", low + 2)
+        return [sample_json_schema(schema.get("items", {}), rng) for _ in range(rng.randint(low, high))]
+    if kind == "integer":
+        return rng.randint(schema.get("minimum", 0), schema.get("maximum", 100))
+    if kind == "number":
+        return rng.uniform(schema.get("minimum", 0.0), schema.get("maximum", 1.0))
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "null":
+        return None
+    if "pattern" in schema:
+        return sample_regex(schema["pattern"], rng)
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(schema.get("minLength", 8)))
+
+
+def guided_text(
+    body: Dict[str, Any],
+    rng: Optional[random.Random] = None,
+    candidate: Optional[str] = None,
+) -> Optional[str]:
+    """Text satisfying the guided decoding fields of a request body.
+
+    Args:
+        body: Request body
+        rng: Random generator
+        candidate: Preferred text, returned as is if it satisfies the
+            choice or regex constraint
+
+    Returns:
+        Constrained text, or None if the request is unconstrained
+    """
+    rng = rng or random.Random()
+    if body.get("guided_choice"):
+        if candidate in body["guided_choice"]:
+            return candidate
+        return rng.choice(body["guided_choice"])
+    if body.get("guided_regex"):
+        if candidate is not None and re.fullmatch(body["guided_regex"], candidate):
+            return candidate
+        return sample_regex(body["guided_regex"], rng)
+    if body.get("guided_json") is not None:
+        schema = body["guided_json"]
+        if isinstance(schema, str):
+            schema = json.loads(schema)
+        return json.dumps(sample_json_schema(schema, rng))
+    return None
+
+
+def tokenize(text: str) -> List[str]:
+    """Approximate tokens of ``text`` (they concatenate back to ``text``)."""
+    return _TOKEN_RE.findall(text)
+
+
+@dataclass
+class MockBehavior:
+    """Serving characteristics simulated by the mock server."""
+
+    latency: str = "fixed"          # Time-to-first-token distribution (LATENCY_DISTRIBUTIONS)
+    latency_s: float = 0.0          # Fixed value, mean (uniform, exponential) or median (lognormal)
+    jitter: float = 0.5             # Relative half-width (uniform) or sigma (lognormal)
+    tokens_per_s: float = 0.0       # Decode rate per request (0 = instant)
+    error_rate: float = 0.0         # Fraction of requests failing
+    error_status: int = 500         # HTTP status of injected errors (0 = drop the connection)
+
+    def __post_init__(self):
+        if self.latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.latency} (expected one of {LATENCY_DISTRIBUTIONS})")
+        if not 0.0 <= self.error_rate <= 1.0:
+            raise ValueError("error_rate must be in [0, 1]")
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Time to first token of one request in seconds."""
+        if self.latency_s <= 0:
+            return 0.0
+        if self.latency == "uniform":
+            return rng.uniform(self.latency_s * max(0.0, 1 - self.jitter), self.latency_s * (1 + self.jitter))
+        if self.latency == "exponential":
+            return rng.expovariate(1.0 / self.latency_s)
+        if self.latency == "lognormal":
+            return rng.lognormvariate(math.log(self.latency_s), self.jitter)
+        return self.latency_s
+
+    def decode_time(self, num_tokens: int) -> float:
+        """Time to decode ``num_tokens`` tokens in seconds."""
+        return num_tokens / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+
+
+def _cut(text: str, stop: Any, max_tokens: Optional[int]) -> Tuple[List[str], str]:
+    """Tokens of ``text`` after applying stop sequences and max_tokens, and the finish reason."""
+    finish_reason = "stop"
+    if stop:
+        positions = [text.find(s) for s in ([stop] if isinstance(stop, str) else stop) if s]
+        positions = [pos for pos in positions if pos >= 0]
+        if positions:
+            text = text[:min(positions)]
+    tokens = tokenize(text)
+    if max_tokens is not None and len(tokens) > max_tokens:
+        tokens = tokens[:max_tokens]
+        finish_reason = "length"
+    return tokens, finish_reason
+
+
+def _token_logprob(token: str, top_k: int, rng: random.Random) -> Tuple[float, Dict[str, float]]:
+    """Sampled logprob of a token and its top-k alternatives (digits compete with other digits)."""
+    p = rng.uniform(0.5, 0.99)
+    top = {token: math.log(p)}
+    digit = token.strip()
+    if len(digit) == 1 and digit.isdigit():
+        lead = token[:len(token) - 1]
+        alternatives = [lead + d for d in "0123456789" if d != digit]
+        rng.shuffle(alternatives)
+    else:
+        alternatives = [t for t in _ALT_TOKENS if t != token]
+    rest = 1.0 - p
+    for alternative in alternatives[:max(0, top_k - 1)]:
+        share = rest * rng.uniform(0.3, 0.7)
+        rest -= share
+        top[alternative] = math.log(share)
+    return top[token], top
+
+
+class MockOpenAIServer:
+    """OpenAI-compatible completion server (asyncio; in-process thread or foreground)."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        responder: Optional[Responder] = None,
+        seed: int = 0,
+        behavior: Optional[MockBehavior] = None,
+        record_limit: int = _RECORD_LIMIT,
+    ):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 = any free port)
+            responder: Completion text for a (prompt, request body); default
+                CannedResponder (stage-formatted outputs)
+            seed: Seed of the sampler for guided outputs, latencies, errors
+                and logprobs
+            behavior: Latency, decode rate and error injection (default: none)
+            record_limit: Most recent request bodies kept in ``requests``
+        """
+        if responder is None:
+            from .canned import CannedResponder
+            responder = CannedResponder(seed=seed)
+        self.responder = responder
+        self.behavior = behavior or MockBehavior()
+        self.rng = random.Random(seed)
+        self.requests: Deque[Dict[str, Any]] = deque(maxlen=record_limit)
+        self.request_count = 0
+        self.error_count = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+        # Bound up front so base_url is known before serving starts
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(1024)
+        self._sock.setblocking(False)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._sock.getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    def stats(self) -> Dict[str, int]:
+        """Requests served, errors injected and completion tokens produced."""
+        return {
+            "requests": self.request_count,
+            "errors": self.error_count,
+            "completion_tokens": self.completion_tokens,
+        }
+
+    def complete_text(self, prompt: str, body: Dict[str, Any]) -> str:
+        """Completion text for one choice of a request."""
+        text = self.responder(prompt, body)
+        with self._lock:
+            guided = guided_text(body, self.rng, candidate=text)
+        return guided if guided is not None else text
+
+    def _logprobs(self, tokens: List[str], top_k: int, offset: int, skip_first: bool) -> Dict[str, Any]:
+        """Completions API logprobs of ``tokens`` starting at character ``offset``."""
+        token_logprobs: List[Optional[float]] = []
+        top_logprobs: List[Optional[Dict[str, float]]] = []
+        text_offset = []
+        for i, token in enumerate(tokens):
+            text_offset.append(offset)
+            offset += len(token)
+            if i == 0 and skip_first:
+                # The first prompt token has no logprob
+                token_logprobs.append(None)
+                top_logprobs.append(None)
+                continue
+            logprob, top = _token_logprob(token, top_k, self.rng)
+            token_logprobs.append(logprob)
+            top_logprobs.append(top)
+        return {
+            "tokens": tokens,
+            "token_logprobs": token_logprobs,
+            "top_logprobs": top_logprobs,
+            "text_offset": text_offset,
+        }
+
+    def _chat_logprobs(self, tokens: List[str], top_k: int) -> Dict[str, Any]:
+        content = []
+        for token in tokens:
+            logprob, top = _token_logprob(token, top_k, self.rng)
+            content.append({
+                "token": token,
+                "logprob": logprob,
+                "top_logprobs": [{"token": t, "logprob": lp} for t, lp in top.items()][:top_k],
+            })
+        return {"content": content}
+
+    def _prepare(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Sample the choices of a request (tokens, finish reasons, logprobs settings)."""
+        chat = path.endswith("/chat/completions")
+        if chat:
+            prompt = "\n".join(str(m.get("content") or "") for m in body.get("messages", []))
+            if not prompt and body.get("prefix") is not None:
+                # Chat FIM: prefix/suffix passed as extra body fields
+                prompt = str(body["prefix"])
+        else:
+            prompt = body.get("prompt", "")
+            if isinstance(prompt, list):
+                prompt = prompt[0] if prompt else ""
+        max_tokens = body.get("max_tokens")
+        choices = []
+        for _ in range(int(body.get("n") or 1)):
+            text = self.complete_text(prompt, body) if max_tokens != 0 else ""
+            tokens, finish_reason = _cut(text, body.get("stop"), max_tokens)
+            choices.append((tokens, finish_reason))
+
+        if chat:
+            top_k = int(body.get("top_logprobs") or 1) if body.get("logprobs") else None
+        else:
+            top_k = body.get("logprobs")
+            top_k = int(top_k) if top_k is not None and top_k is not False else None
+        return {
+            "chat": chat,
+            "prompt": prompt,
+            "choices": choices,
+            "top_k": top_k,
+            "echo": bool(body.get("echo")) and not chat,
+            "prompt_tokens": len(tokenize(prompt)),
+            "completion_tokens": sum(len(tokens) for tokens, _ in choices),
+        }
+
+    def _respond(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Non-streaming response body of a completion request."""
+        return self._response(body, self._prepare(path, body))
+
+    def _response(self, body: Dict[str, Any], plan: Dict[str, Any]) -> Dict[str, Any]:
+        chat, prompt, top_k = plan["chat"], plan["prompt"], plan["top_k"]
+        choices = []
+        for i, (tokens, finish_reason) in enumerate(plan["choices"]):
+            text = "".join(tokens)
+            if chat:
+                choice = {"index": i, "message": {"role": "assistant", "content": text}, "finish_reason": finish_reason}
+                choice["logprobs"] = self._chat_logprobs(tokens, top_k) if top_k is not None else None
+            else:
+                logprobs = None
+                if plan["echo"]:
+                    prompt_tokens = tokenize(prompt)
+                    if top_k is not None:
+                        logprobs = self._logprobs(prompt_tokens + tokens, top_k, 0, skip_first=True)
+                    text = prompt + text
+                elif top_k is not None:
+                    logprobs = self._logprobs(tokens, top_k, 0, skip_first=False)
+                choice = {"index": i, "text": text, "logprobs": logprobs, "finish_reason": finish_reason}
+            choices.append(choice)
+        return {
+            "id": f"cmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion" if chat else "text_completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": choices,
+            "usage": self._usage(plan),
+        }
+
+    @staticmethod
+    def _usage(plan: Dict[str, Any]) -> Dict[str, int]:
+        return {
+            "prompt_tokens": plan["prompt_tokens"],
+            "completion_tokens": plan["completion_tokens"],
+            "total_tokens": plan["prompt_tokens"] + plan["completion_tokens"],
+        }
+
+    # --- HTTP -------------------------------------------------------------
+
+    @staticmethod
+    def _head(status: int, headers: Dict[str, str]) -> bytes:
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any]):
+        data = json.dumps(payload).encode("utf-8")
+        writer.write(self._head(status, {"Content-Type": "application/json", "Content-Length": str(len(data))}) + data)
+        await writer.drain()
+
+    async def _send_error(self, writer: asyncio.StreamWriter, status: int, message: str):
+        await self._send_json(writer, status, {"error": {"message": message, "type": "mock_error", "code": status}})
+
+    async def _stream(self, writer: asyncio.StreamWriter, body: Dict[str, Any], plan: Dict[str, Any], start: float):
+        """Send a completion as server-sent events, paced by the decode rate."""
+        writer.write(self._head(200, {"Content-Type": "text/event-stream", "Cache-Control": "no-cache",
+                                      "Transfer-Encoding": "chunked"}))
+        chat, top_k = plan["chat"], plan["top_k"]
+        base = {
+            "id": f"cmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion.chunk" if chat else "text_completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+        }
+
+        def event(payload: Dict[str, Any]) -> bytes:
+            data = f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+            return f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n"
+
+        def chunk(index: int, piece: str, finish_reason: Optional[str], offset: int) -> bytes:
+            if chat:
+                choice = {"index": index, "delta": {"content": piece} if piece else {}, "finish_reason": finish_reason}
+                if piece and top_k is not None:
+                    choice["logprobs"] = self._chat_logprobs([piece], top_k)
+            else:
+                choice = {"index": index, "text": piece, "finish_reason": finish_reason, "logprobs": None}
+                if piece and top_k is not None:
+                    choice["logprobs"] = self._logprobs([piece], top_k, offset, skip_first=False)
+            return event({**base, "choices": [choice]})
+
+        choices = plan["choices"]
+        offsets = [0] * len(choices)
+        if plan["echo"]:
+            for i in range(len(choices)):
+                writer.write(chunk(i, plan["prompt"], None, 0))
+                offsets[i] = len(plan["prompt"])
+        if chat:
+            for i in range(len(choices)):
+                writer.write(event({**base, "choices": [
+                    {"index": i, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}))
+
+        rate = self.behavior.tokens_per_s
+        for step in range(max((len(tokens) for tokens, _ in choices), default=0)):
+            for i, (tokens, _) in enumerate(choices):
+                if step < len(tokens):
+                    writer.write(chunk(i, tokens[step], None, offsets[i]))
+                    offsets[i] += len(tokens[step])
+            if rate > 0:
+                # Keep to the decode schedule; sleeps under a few ms are batched
+                ahead = start + (step + 1) / rate - time.monotonic()
+                if ahead > 0.005:
+                    await writer.drain()
+                    await asyncio.sleep(ahead)
+        for i, (_, finish_reason) in enumerate(choices):
+            writer.write(chunk(i, "", finish_reason, offsets[i]))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            writer.write(event({**base, "choices": [], "usage": self._usage(plan)}))
+        data = b"data: [DONE]\n\n"
+        writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n0\r\n\r\n")
+        await writer.drain()
+
+    async def _handle_completion(self, writer: asyncio.StreamWriter, path: str, raw: bytes) -> bool:
+        """Serve one completion request; returns False if the connection must close."""
+        try:
+            body = json.loads(raw or b"{}")
+        except json.JSONDecodeError as e:
+            await self._send_error(writer, 400, f"Invalid JSON: {e}")
+            return True
+        with self._lock:
+            self.requests.append(body)
+            self.request_count += 1
+            fail = self.behavior.error_rate > 0 and self.rng.random() < self.behavior.error_rate
+            latency = self.behavior.sample_latency(self.rng)
+
+        if fail:
+            self.error_count += 1
+            await asyncio.sleep(latency)
+            if self.behavior.error_status == 0:
+                return False
+            await self._send_error(writer, self.behavior.error_status, "Injected error")
+            return True
+
+        try:
+            plan = self._prepare(path, body)
+        except ValueError as e:
+            await self._send_error(writer, 400, str(e))
+            return True
+        self.completion_tokens += plan["completion_tokens"]
+
+        await asyncio.sleep(latency)
+        if body.get("stream"):
+            await self._stream(writer, body, plan, time.monotonic())
+        else:
+            longest = max((len(tokens) for tokens, _ in plan["choices"]), default=0)
+            await asyncio.sleep(self.behavior.decode_time(longest))
+            await self._send_json(writer, 200, self._response(body, plan))
+        return True
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of one keep-alive connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target = request_line.decode("latin-1").split(" ", 2)[:2]
+                headers: Dict[str, str] = {}
+                size = 0
+                while True:
+                    line = await reader.readline()
+                    size += len(line)
+                    if line in (b"\r\n", b"\n", b"") or size > _HEADER_LIMIT:
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get("content-length") or 0))
+                path = target.split("?", 1)[0].rstrip("/")
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if method == "GET" and path.endswith("/models"):
+                    await self._send_json(writer, 200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+                elif method == "POST" and path.endswith(("/completions", "/chat/completions")):
+                    keep_alive = await self._handle_completion(writer, path, raw) and keep_alive
+                else:
+                    await self._send_error(writer, 404, f"Unknown path {target}")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.debug(f"mock server: connection closed ({e})")
+        except asyncio.CancelledError:
+            # Server shutting down with the connection idle
+            pass
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        """Serve on the current event loop until stop() is called."""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_server(self._handle, sock=self._sock, limit=_HEADER_LIMIT * 16)
+        async with server:
+            await self._stopped.wait()
+
+    def start(self) -> "MockOpenAIServer":
+        """Serve from an event loop in a daemon thread."""
+        ready = threading.Event()
+
+        async def _run():
+            task = asyncio.ensure_future(self.serve_forever())
+            await asyncio.sleep(0)
+            ready.set()
+            await task
+
+        self._thread = threading.Thread(target=asyncio.run, args=(_run(),), daemon=True)
+        self._thread.start()
+        ready.wait()
+        logger.info(f"Mock OpenAI server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sock.close()
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class MockServerProcess:
+    """Mock server in a child process, so its work does not share the caller's GIL.
+
+    Usage:
+        with MockServerProcess(["--tokens-per-s", "50"]) as server:
+            client = AsyncOpenAICompletionClient(base_url=server.base_url, model="mock")
+    """
+
+    def __init__(self, args: Optional[List[str]] = None, startup_timeout_s: float = 30.0):
+        """
+        Args:
+            args: Command-line options of the mock server (see main())
+            startup_timeout_s: Time allowed until the server reports its address
+        """
+        self.args = list(args or [])
+        self.startup_timeout_s = startup_timeout_s
+        self.base_url: Optional[str] = None
+        self._process: Optional[subprocess.Popen] = None
+
+    def start(self) -> "MockServerProcess":
+        root = str(Path(__file__).resolve().parents[2])
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "evoselfcode.testing", "--port", "0", *self.args],
+            stdout=subprocess.PIPE, env=env, text=True,
+        )
+        deadline = time.monotonic() + self.startup_timeout_s
+        # The server prints "Serving on <base_url> ..." once bound
+        while time.monotonic() < deadline:
+            line = self._process.stdout.readline()
+            if not line:
+                break
+            if line.startswith("Serving on "):
+                self.base_url = line.split()[2]
+                return self
+        self.stop()
+        raise RuntimeError("Mock server process did not start")
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process.stdout.close()
+            self._process = None
+
+    def __enter__(self) -> "MockServerProcess":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def load_canned_outputs(path: Path) -> Dict[str, List[str]]:
+    """Fixed outputs per stage from a JSON or YAML file ({stage: [text, ...]})."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix in (".yaml", ".yml"):
+            import yaml
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    return {stage: [texts] if isinstance(texts, str) else list(texts) for stage, texts in (data or {}).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind (0 = any free port)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for outputs, latencies and errors")
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="fixed", help="Time-to-first-token distribution")
+    parser.add_argument("--latency-s", type=float, default=0.0, help="Latency value, mean or median in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Relative spread (uniform) or sigma (lognormal)")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="Decode rate per request (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of injected errors (0 = drop connection)")
+    parser.add_argument("--canned", type=Path, default=None, help="JSON/YAML file of fixed outputs per stage")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    behavior = MockBehavior(**{
+        f.name: getattr(args, f.name) for f in fields(MockBehavior)
+    })
+    from .canned import CannedResponder
+    responder = CannedResponder(load_canned_outputs(args.canned) if args.canned else None, seed=args.seed)
+    server = MockOpenAIServer(args.host, args.port, responder=responder, seed=args.seed, behavior=behavior)
+    print(f"Serving on {server.base_url} ({asdict(behavior)}; Ctrl+C to stop)", flush=True)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._sock.close()
+
+
+if __name__ == "__main__":
+    main()
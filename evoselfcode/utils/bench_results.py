@@ -0,0 +1,203 @@
+"""
+Benchmark result files and run-to-run comparison.
+
+A result file holds the metrics of one benchmark run as a flat mapping of
+dotted metric names (e.g. ``generators.rating.samples_per_s``) to a value,
+its unit and whether higher values are better, together with the git commit,
+host and arguments of the run. diff_results() compares two files metric by
+metric and flags changes beyond a relative threshold in the worse direction
+as regressions.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SCHEMA_VERSION = 1
+
+
+def metric(value: float, unit: str, higher_is_better: bool = True) -> Dict[str, Any]:
+    """One metric entry of a result file."""
+    return {"value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+
+
+def _git_info(root: Path) -> Dict[str, Any]:
+    def _git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=root, capture_output=True, text=True, timeout=30, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": commit, "dirty": bool(status) if status is not None else None}
+
+
+def environment_info(root: Path) -> Dict[str, Any]:
+    """Git commit and host description of a run."""
+    return {
+        "git": _git_info(root),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+    }
+
+
+def save_results(
+    path: Path,
+    suite: str,
+    metrics: Dict[str, Dict[str, Any]],
+    args: Optional[Dict[str, Any]] = None,
+    root: Optional[Path] = None,
+) -> Path:
+    """Write the metrics of a run to a result file.
+
+    Args:
+        path: Output file, or a directory to create ``<timestamp>-<commit>.json`` in
+        suite: Name of the benchmark suite
+        metrics: Metric name -> metric() entry
+        args: Arguments of the run
+        root: Repository root for the git commit (default: current directory)
+
+    Returns:
+        Path of the written file
+    """
+    env = environment_info(root or Path.cwd())
+    created = datetime.now()
+    if path.is_dir() or not path.suffix:
+        path.mkdir(parents=True, exist_ok=True)
+        path = path / f"{created:%Y%m%d-%H%M%S}-{env['git']['commit'] or 'nogit'}.json"
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "schema": SCHEMA_VERSION,
+        "suite": suite,
+        "created": created.isoformat(timespec="seconds"),
+        **env,
+        "args": args or {},
+        "metrics": dict(sorted(metrics.items())),
+    }
+    path.write_text(json.dumps(payload, indent=2, default=str) + "\n", encoding="utf-8")
+    return path
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    """Read a result file.
+
+    Raises:
+        ValueError: If the file is not a benchmark result file
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or "metrics" not in data:
+        raise ValueError(f"Not a benchmark result file: {path}")
+    if data.get("schema", SCHEMA_VERSION) > SCHEMA_VERSION:
+        raise ValueError(f"Result file schema {data['schema']} is newer than supported ({SCHEMA_VERSION}): {path}")
+    return data
+
+
+@dataclass
+class MetricDiff:
+    """Comparison of one metric between a baseline and a new run."""
+
+    name: str
+    unit: str
+    base: Optional[float]
+    new: Optional[float]
+    change: Optional[float]     # Relative change new/base - 1 (None if not comparable)
+    status: str                 # "improved", "regressed", "unchanged", "added", "removed"
+
+
+def diff_results(base: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.05) -> List[MetricDiff]:
+    """Compare the metrics of two runs.
+
+    Args:
+        base: Baseline result file contents
+        new: New result file contents
+        threshold: Relative change below which a metric counts as unchanged
+
+    Returns:
+        One MetricDiff per metric of either run, sorted by name
+    """
+    diffs = []
+    base_metrics, new_metrics = base["metrics"], new["metrics"]
+    for name in sorted(set(base_metrics) | set(new_metrics)):
+        old, cur = base_metrics.get(name), new_metrics.get(name)
+        entry = cur or old
+        unit = entry.get("unit", "")
+        if old is None or cur is None:
+            diffs.append(MetricDiff(name, unit, old and old["value"], cur and cur["value"], None,
+                                    "added" if old is None else "removed"))
+            continue
+        delta = cur["value"] - old["value"]
+        change = delta / abs(old["value"]) if old["value"] else None
+        if delta == 0 or (change is not None and abs(change) < threshold):
+            status = "unchanged"
+        elif (delta > 0) == entry.get("higher_is_better", True):
+            status = "improved"
+        else:
+            status = "regressed"
+        diffs.append(MetricDiff(name, unit, old["value"], cur["value"], change, status))
+    return diffs
+
+
+def print_diff(base: Dict[str, Any], new: Dict[str, Any], diffs: List[MetricDiff], console=None) -> None:
+    """Print a comparison table of diff_results()."""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = console or Console()
+    styles = {"improved": "green", "regressed": "bold red", "added": "cyan", "removed": "yellow"}
+
+    def _describe(run: Dict[str, Any]) -> str:
+        git = run.get("git") or {}
+        commit = (git.get("commit") or "?") + ("+dirty" if git.get("dirty") else "")
+        return f"{commit} ({run.get('created', '?')})"
+
+    table = Table(title=f"{_describe(base)} -> {_describe(new)}")
+    table.add_column("Metric")
+    table.add_column("Base", justify="right")
+    table.add_column("New", justify="right")
+    table.add_column("Unit")
+    table.add_column("Change", justify="right")
+    for d in diffs:
+        change = d.status if d.change is None else f"{d.change:+.1%}"
+        style = styles.get(d.status)
+        table.add_row(
+            d.name,
+            "-" if d.base is None else f"{d.base:,.4g}",
+            "-" if d.new is None else f"{d.new:,.4g}",
+            d.unit,
+            f"[{style}]{change}[/{style}]" if style else change,
+        )
+    console.print(table)
+
+    regressed = [d for d in diffs if d.status == "regressed"]
+    if base.get("host") != new.get("host"):
+        console.print("[yellow]Runs come from different hosts; absolute numbers may not be comparable[/yellow]")
+    console.print(
+        f"{sum(d.status == 'improved' for d in diffs)} improved, {len(regressed)} regressed, "
+        f"{sum(d.status == 'unchanged' for d in diffs)} unchanged"
+    )
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
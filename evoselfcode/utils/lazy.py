@@ -0,0 +1,44 @@
+"""
+Lazy package exports.
+
+Package ``__init__`` modules re-export their public classes without
+importing the submodules that define them: the submodule is imported on
+first attribute access (PEP 562). Importing e.g. ``DataGenService`` then
+no longer pulls in matplotlib through ``RatingAnalyzer``.
+
+Usage (in a package ``__init__``):
+    __getattr__, __dir__ = lazy_exports(__name__, {
+        "ProblemGenerator": ".problemgen",
+        "RatingAnalyzer": ".rating_analyzer",
+    })
+"""
+
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Module ``__getattr__`` and ``__dir__`` importing ``exports`` on first use.
+
+    Args:
+        package: ``__name__`` of the package
+        exports: Attribute name -> (relative) module defining it
+
+    Returns:
+        ``(__getattr__, __dir__)`` to assign in the package namespace
+    """
+
+    def __getattr__(name: str) -> Any:
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module, package), name)
+        # Cache so later lookups skip __getattr__
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
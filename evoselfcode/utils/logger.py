@@ -1,24 +1,47 @@
 """
 Unified logging system with structured output to files and console.
+
+Loggers created by LoggerManager hand records to a queue; a background
+listener thread does the formatting, Rich rendering and file I/O, so a log
+call on the event loop thread costs little more than a queue put.
 """
 
+import atexit
+import copy
 import logging
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
 
-from rich.console import Console
-from rich.logging import RichHandler
+    Only the message arguments are merged (they may be mutated after the
+    call returns); exception info is kept for Rich tracebacks.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 
 class LoggerManager:
     """
     Centralized logger management.
-    Creates loggers with file and console handlers.
+    Creates loggers with file and console handlers, served by a
+    background listener thread per logger.
     """
     
     _loggers = {}
+    _listeners: Dict[str, QueueListener] = {}
     _base_log_dir = Path("logs")
     
     @classmethod
@@ -64,7 +87,12 @@ class LoggerManager:
         # Remove existing handlers
         logger.handlers.clear()
         
-        # Console handler with Rich
+        handlers = []
+        
+        # Console handler with Rich (imported here to keep module import cheap)
+        from rich.console import Console
+        from rich.logging import RichHandler
+        
         console = Console(stderr=True)
         console_handler = RichHandler(
             console=console,
@@ -76,7 +104,7 @@ class LoggerManager:
         console_handler.setLevel(level)
         console_formatter = logging.Formatter("%(message)s")
         console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
         
         # File handler
         if module:
@@ -95,8 +123,19 @@ class LoggerManager:
                 datefmt="%Y-%m-%d %H:%M:%S"
             )
             file_handler.setFormatter(file_formatter)
-            logger.addHandler(file_handler)
-            
+            handlers.append(file_handler)
+        
+        # Records go through a queue to a listener thread running the handlers
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        logger.addHandler(_DeferredQueueHandler(log_queue))
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        if not cls._listeners:
+            # Flush queued records at exit even if close_all() is not called
+            atexit.register(cls.close_all)
+        cls._listeners[cache_key] = listener
+        
+        if module:
             logger.info(f"Logging to: {log_file}")
         
         cls._loggers[cache_key] = logger
@@ -104,7 +143,12 @@ class LoggerManager:
     
     @classmethod
     def close_all(cls):
-        """Close all loggers and handlers"""
+        """Flush pending records, then close all loggers and handlers"""
+        for listener in cls._listeners.values():
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        cls._listeners.clear()
         for logger in cls._loggers.values():
             for handler in logger.handlers[:]:
                 handler.close()
@@ -112,6 +156,49 @@ class LoggerManager:
         cls._loggers.clear()
 
 
+class RateLimitedLogger:
+    """
+    Emits each message at most once per interval.
+    
+    For per-batch progress lines in generation loops: a message (identified
+    by its %-style format string) logged again within ``interval_s`` is
+    dropped and counted; the next emitted line reports how many were
+    suppressed. Use %-style arguments so dropped lines are never formatted.
+    
+    Example:
+        progress_log = RateLimitedLogger(logger, interval_s=10)
+        progress_log.info("[Batch %d/%d] Received %d responses", i, n, len(results))
+    """
+    
+    def __init__(self, logger: logging.Logger, interval_s: float = 10.0):
+        self.logger = logger
+        self.interval_s = interval_s
+        self._last: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+    
+    def log(self, level: int, msg: str, *args, force: bool = False):
+        """Log ``msg % args`` unless it was emitted within the interval (or ``force``)."""
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._last.get(msg, (float("-inf"), 0))
+            if not force and now - last < self.interval_s:
+                self._last[msg] = (last, suppressed + 1)
+                return
+            self._last[msg] = (now, 0)
+        if suppressed:
+            self.logger.log(level, msg + " (%d similar suppressed)", *args, suppressed)
+        else:
+            self.logger.log(level, msg, *args)
+    
+    def info(self, msg: str, *args, force: bool = False):
+        self.log(logging.INFO, msg, *args, force=force)
+    
+    def debug(self, msg: str, *args, force: bool = False):
+        self.log(logging.DEBUG, msg, *args, force=force)
+
+
 def setup_task_logger(
     module: str,
     task: str,
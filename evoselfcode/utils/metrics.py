@@ -0,0 +1,546 @@
+"""
+Lightweight metrics for the datagen pipeline.
+
+A MetricsRegistry holds counters, gauges and histograms, optionally split
+by label values. Updates are plain attribute arithmetic on pre-bound
+children (no locks, no allocation), so they are cheap enough for per-request
+and per-sample hot paths; readers in other threads may see a snapshot that
+is a few updates behind, which is fine for monitoring.
+
+Histograms use HDR-style log-linear buckets: values are recorded as
+integers in a unit (microseconds for seconds-valued histograms), exactly up
+to 2 * SUB_BUCKETS and with a relative error below 1 / SUB_BUCKETS above.
+Recording is O(1); quantiles are computed when exporting.
+
+Exporters:
+- PrometheusExporter:   text exposition format on http://<host>:<port>/metrics
+- JsonSnapshotExporter: periodic snapshots appended as JSON lines to logs/
+- metrics_column():     rich progress column with in-flight requests, queue
+                        depth, p95 latency, retry and duplicate rates
+
+Usage:
+    from evoselfcode.utils.metrics import REGISTRY
+    requests = REGISTRY.counter("llm_requests_total", "Completion requests", ("status",))
+    requests.labels("ok").inc()
+
+    with start_exporters(config.get_section("metrics"), name="codegen_fim"):
+        ...
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sub-buckets per power of two (relative error < 1 / SUB_BUCKETS)
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Quantiles reported by snapshots and the Prometheus summary
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    __slots__ = ("value",)
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def snapshot(self) -> float:
+        return self.value
+
+
+class Gauge:
+    """Value that goes up and down, or is read from a callback."""
+
+    __slots__ = ("value", "_fn")
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0.0
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set_function(self, fn: Optional[Callable[[], float]]):
+        """Read the value from ``fn`` at export time (e.g. a queue length)."""
+        self._fn = fn
+
+    @contextlib.contextmanager
+    def track_inprogress(self) -> Iterator[None]:
+        """Increment for the duration of the block."""
+        self.value += 1
+        try:
+            yield
+        finally:
+            self.value -= 1
+
+    def snapshot(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return float("nan")
+        return self.value
+
+
+class Histogram:
+    """Distribution with HDR-style log-linear buckets."""
+
+    __slots__ = ("scale", "count", "sum", "min", "max", "_counts", "_limit")
+    kind = "histogram"
+
+    def __init__(self, scale: float = 1e6, max_value: float = 1e6):
+        """
+        Args:
+            scale: Recorded units per value unit (1e6: seconds recorded in microseconds)
+            max_value: Largest value kept exactly in range; larger values are clamped
+        """
+        self.scale = scale
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._limit = max(2 * SUB_BUCKETS, int(max_value * scale))
+        self._counts = [0] * (_bucket_index(self._limit) + 1)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        units = int(value * self.scale)
+        if units < 0:
+            units = 0
+        elif units > self._limit:
+            units = self._limit
+        self._counts[_bucket_index(units)] += 1
+
+    @contextlib.contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile ``q`` (bucket midpoint), 0.0 if empty."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        counts = list(self._counts)
+        for index, n in enumerate(counts):
+            seen += n
+            if n and seen >= rank:
+                low, high = _bucket_bounds(index)
+                value = (low + high) / 2 / self.scale
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        data = {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+        }
+        for q in QUANTILES:
+            data[f"p{q * 100:g}"] = self.quantile(q)
+        return data
+
+
+def _bucket_index(units: int) -> int:
+    if units < 2 * SUB_BUCKETS:
+        return units
+    shift = units.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift << SUB_BUCKET_BITS) + (units >> shift)
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    """[low, high) range of recorded units of a bucket."""
+    if index < 2 * SUB_BUCKETS:
+        return index, index + 1
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = index - (shift << SUB_BUCKET_BITS)
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class MetricFamily:
+    """A named metric with one child per combination of label values."""
+
+    def __init__(self, kind: str, name: str, help: str, labelnames: Tuple[str, ...], factory: Callable[[], Any]):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any, **kwargs: Any):
+        """Child for the given label values (positional or by name); bind it once outside hot loops."""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def children(self) -> List[Tuple[Dict[str, str], Any]]:
+        return [(dict(zip(self.labelnames, key)), child) for key, child in list(self._children.items())]
+
+
+class MetricsRegistry:
+    """Collection of metric families (get-or-create by name)."""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, kind: str, name: str, help: str, labelnames, factory):
+        family = self._families.get(name)
+        if family is None:
+            with self._lock:
+                family = self._families.get(name)
+                if family is None:
+                    family = MetricFamily(kind, name, help, tuple(labelnames), factory)
+                    self._families[name] = family
+        if family.kind != kind or family.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} already registered as {family.kind}{family.labelnames}")
+        # Unlabelled metrics are used directly
+        return family if family.labelnames else family.labels()
+
+    def counter(self, name: str, help: str = "", labelnames=()):
+        """Counter (or its family if ``labelnames`` is given)."""
+        return self._family("counter", name, help, labelnames, Counter)
+
+    def gauge(self, name: str, help: str = "", labelnames=()):
+        """Gauge (or its family if ``labelnames`` is given)."""
+        return self._family("gauge", name, help, labelnames, Gauge)
+
+    def histogram(self, name: str, help: str = "", labelnames=(), scale: float = 1e6, max_value: float = 1e6):
+        """Histogram (or its family); defaults suit durations in seconds."""
+        return self._family("histogram", name, help, labelnames, lambda: Histogram(scale, max_value))
+
+    def families(self) -> List[MetricFamily]:
+        return list(self._families.values())
+
+    def get(self, name: str, **labels: Any):
+        """Existing child of a metric, or None."""
+        family = self._families.get(name)
+        if family is None:
+            return None
+        key = tuple(str(labels[n]) for n in family.labelnames if n in labels)
+        return family._children.get(key) if len(key) == len(family.labelnames) else None
+
+    def total(self, name: str, **labels: Any) -> float:
+        """Sum of a counter or gauge over the children matching ``labels``."""
+        family = self._families.get(name)
+        if family is None:
+            return 0.0
+        return sum(
+            child.snapshot()
+            for child_labels, child in family.children()
+            if all(child_labels.get(k) == str(v) for k, v in labels.items())
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as a JSON-serialisable dictionary."""
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "metrics": {
+                family.name: {
+                    "type": family.kind,
+                    "help": family.help,
+                    "series": [{"labels": labels, "value": child.snapshot()} for labels, child in family.children()],
+                }
+                for family in self.families()
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (histograms as summaries)."""
+        lines: List[str] = []
+        for family in self.families():
+            kind = "summary" if family.kind == "histogram" else family.kind
+            if family.help:
+                lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {kind}")
+            for labels, child in family.children():
+                if family.kind == "histogram":
+                    for q in QUANTILES:
+                        lines.append(f"{family.name}{_labels({**labels, 'quantile': f'{q:g}'})} {child.quantile(q):.6g}")
+                    lines.append(f"{family.name}_sum{_labels(labels)} {child.sum:.6g}")
+                    lines.append(f"{family.name}_count{_labels(labels)} {child.count}")
+                else:
+                    lines.append(f"{family.name}{_labels(labels)} {child.snapshot():.6g}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Drop all metrics (benchmarks and repeated runs in one process)."""
+        with self._lock:
+            self._families.clear()
+
+
+def _labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+# Process-wide registry used by the client, generators and exporters
+REGISTRY = MetricsRegistry()
+
+
+class ClientMetrics:
+    """Metrics of completion requests, bound once per client."""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self.in_flight = registry.gauge("llm_requests_in_flight", "Requests holding a concurrency slot")
+        self.queue_depth = registry.gauge("llm_queue_depth", "Requests waiting for a concurrency slot")
+        self.queue_wait = registry.histogram("llm_queue_wait_seconds", "Time waiting for a concurrency slot")
+        latency = registry.histogram("llm_request_seconds", "Request latency incl. retries", ("kind",))
+        self.latency = {kind: latency.labels(kind) for kind in ("completion", "fim")}
+        requests = registry.counter("llm_requests_total", "Completed requests by outcome", ("status",))
+        self.ok = requests.labels("ok")
+        self.failed = requests.labels("error")
+        self.retries = registry.counter("llm_retries_total", "Retried request attempts")
+        self.choices = registry.counter("llm_choices_total", "Completion choices received")
+
+
+class StageMetrics:
+    """Sample outcomes and write metrics of one datagen stage, bound once per generator."""
+
+    def __init__(self, stage: str, registry: MetricsRegistry = REGISTRY):
+        self.stage = stage
+        samples = registry.counter("datagen_samples_total", "Generated samples by outcome", ("stage", "outcome"))
+        self.written = samples.labels(stage, "written")
+        self.duplicates = samples.labels(stage, "duplicate")
+        self.invalid = samples.labels(stage, "invalid")
+        self.filtered = samples.labels(stage, "filtered")
+        self.failed = samples.labels(stage, "failed")
+        self.write_seconds = registry.histogram(
+            "datagen_write_seconds", "Duration of one incremental write", ("stage",)).labels(stage)
+        self.write_lag = registry.histogram(
+            "datagen_write_lag_seconds", "Time since the previous write when a buffer is flushed "
+            "(upper bound on how long a record waits in memory)", ("stage",)).labels(stage)
+        self._last_write: Optional[float] = None
+
+    @contextlib.contextmanager
+    def writing(self, num_records: int) -> Iterator[None]:
+        """Time a write of ``num_records`` records to disk."""
+        start = time.perf_counter()
+        if self._last_write is not None:
+            self.write_lag.observe(start - self._last_write)
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.write_seconds.observe(end - start)
+            self.written.inc(num_records)
+            self._last_write = end
+
+
+# --- Exporters -------------------------------------------------------------
+
+
+class PrometheusExporter:
+    """Serve the registry in the Prometheus text format from a daemon thread."""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = "127.0.0.1", port: int = 9464):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.registry = registry
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0].rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                data = registry_ref.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> "PrometheusExporter":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-prometheus", daemon=True)
+        self._thread.start()
+        logger.info(f"Prometheus metrics on {self.url}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class JsonSnapshotExporter:
+    """Append a registry snapshot as one JSON line every ``interval_s`` seconds (and at stop)."""
+
+    def __init__(self, path: Path, registry: MetricsRegistry = REGISTRY, interval_s: float = 30.0):
+        self.path = Path(path)
+        self.registry = registry
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write_snapshot(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.registry.snapshot(), default=str) + "\n")
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logger.warning(f"Failed to write metrics snapshot: {e}")
+
+    def start(self) -> "JsonSnapshotExporter":
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshots", daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics snapshots every {self.interval_s:g}s to {self.path}")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write_snapshot()
+
+
+@contextlib.contextmanager
+def start_exporters(
+    cfg: Optional[Mapping[str, Any]],
+    name: str = "datagen",
+    registry: MetricsRegistry = REGISTRY,
+    log_dir: Optional[Path] = None,
+) -> Iterator[List[Any]]:
+    """Run the exporters enabled in a ``metrics`` config section for the duration of the block.
+
+    Args:
+        cfg: {"prometheus": {"enabled", "host", "port"},
+              "snapshots": {"enabled", "dir", "interval_s"}}
+        name: Run name used in the snapshot file name
+        registry: Registry to export
+        log_dir: Base directory of relative snapshot dirs (default: project logs/)
+
+    Yields:
+        Started exporters
+    """
+    cfg = cfg or {}
+    exporters: List[Any] = []
+    try:
+        prom_cfg = cfg.get("prometheus") or {}
+        if prom_cfg.get("enabled", False):
+            try:
+                exporters.append(PrometheusExporter(
+                    registry, prom_cfg.get("host", "127.0.0.1"), int(prom_cfg.get("port", 9464))).start())
+            except OSError as e:
+                logger.warning(f"Prometheus exporter not started: {e}")
+        snap_cfg = cfg.get("snapshots") or {}
+        if snap_cfg.get("enabled", False):
+            directory = Path(snap_cfg.get("dir", "metrics"))
+            if not directory.is_absolute():
+                if log_dir is None:
+                    from ..constants import LOGS_DIR
+                    log_dir = LOGS_DIR
+                directory = log_dir / directory
+            path = directory / f"{name}_{datetime.now():%Y%m%d_%H%M%S}.jsonl"
+            exporters.append(JsonSnapshotExporter(path, registry, float(snap_cfg.get("interval_s", 30))).start())
+        yield exporters
+    finally:
+        for exporter in reversed(exporters):
+            exporter.stop()
+
+
+def progress_summary(registry: MetricsRegistry = REGISTRY, stage: Optional[str] = None) -> str:
+    """One-line view of the key metrics (for progress bars and logs).
+
+    In-flight and queued requests, p95 request latency, retried attempts per
+    request and the duplicate share of the samples (of ``stage`` if given).
+    """
+    parts = [
+        f"run {registry.total('llm_requests_in_flight'):.0f}",
+        f"wait {registry.total('llm_queue_depth'):.0f}",
+    ]
+    latency = registry.get("llm_request_seconds", kind="completion")
+    if latency is not None and latency.count:
+        parts.append(f"p95 {latency.quantile(0.95):.2f}s")
+    requests = registry.total("llm_requests_total")
+    if requests:
+        parts.append(f"retry {registry.total('llm_retries_total') / requests:.1%}")
+    labels = {"stage": stage} if stage else {}
+    written = registry.total("datagen_samples_total", outcome="written", **labels)
+    duplicates = registry.total("datagen_samples_total", outcome="duplicate", **labels)
+    if written + duplicates:
+        parts.append(f"dup {duplicates / (written + duplicates):.1%}")
+    return " ".join(parts)
+
+
+def metrics_column(stage: Optional[str] = None, registry: MetricsRegistry = REGISTRY):
+    """Rich progress column rendering progress_summary()."""
+    from rich.progress import ProgressColumn
+    from rich.text import Text
+
+    class MetricsColumn(ProgressColumn):
+        # Rendered at most twice a second
+        max_refresh = 0.5
+
+        def render(self, task) -> Text:
+            return Text(progress_summary(registry, stage), style="dim")
+
+    return MetricsColumn()
@@ -0,0 +1,384 @@
+"""
+Optional request tracing for the datagen pipeline.
+
+When enabled, spans (name, start, duration, arguments) are recorded for the
+traced steps of a sample: waiting for a concurrency slot, each request
+attempt and retry backoff, validation, hashing and JSONL writes. Events are
+written in the Chrome trace format (JSON array of "X" events, closed when
+tracing stops) and can be
+opened in chrome://tracing or https://ui.perfetto.dev; each sampled request
+gets its own row (tid), with its queue wait and attempts nested in it.
+
+Sampling happens at the root span: a root is kept with probability
+``sample_rate`` and its nested spans follow that decision (the state is kept
+in a ContextVar, so it follows asyncio tasks). Disabled tracing costs one
+attribute check per traced call.
+
+Usage:
+    with start_tracing(config.get_section("tracing"), name="codegen_fim"):
+        ...
+
+    @traced("write_jsonl", always=True)
+    async def _write_jsonl(self, file_path, data): ...
+
+    with TRACER.span("dedup", uid=uid): ...
+
+Summarize a trace with summarize_trace() or scripts/datagen/summarize_trace.py.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Trace of the current task: None (no root span yet), False (root not sampled)
+# or the trace id of a sampled root
+_trace: contextvars.ContextVar = contextvars.ContextVar("evoselfcode_trace", default=None)
+# Datagen stage recorded as the event category (see set_stage)
+_stage: contextvars.ContextVar = contextvars.ContextVar("evoselfcode_trace_stage", default="")
+
+
+class _NullSpan:
+    """Span that records nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _UnsampledRoot:
+    """Root span that was not sampled: suppresses its nested spans."""
+
+    __slots__ = ("_token",)
+
+    def __enter__(self):
+        self._token = _trace.set(False)
+        return self
+
+    def __exit__(self, *exc):
+        _trace.reset(self._token)
+        return False
+
+
+class _Span:
+    __slots__ = ("_tracer", "name", "args", "_tid", "_root", "_token", "_start")
+
+    def __init__(self, tracer: "Tracer", name: str, tid: int, root: bool, args: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.args = args
+        self._tid = tid
+        self._root = root
+        self._token = None
+
+    def __enter__(self):
+        if self._root:
+            self._token = _trace.set(self._tid)
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if self._token is not None:
+            _trace.reset(self._token)
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self._tracer._record(self.name, self._tid, self._start, end, self.args)
+        return False
+
+
+class Tracer:
+    """Collects spans and appends them to a Chrome trace file."""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.path: Optional[Path] = None
+        self.max_events = 0
+        self.dropped = 0
+        self._events: List[str] = []
+        self._written = 0
+        self._flush_every = 2000
+        self._origin = 0
+        self._pid = os.getpid()
+        self._ids = itertools.count(1)
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def start(self, path: Path, sample_rate: float = 0.05, max_events: int = 1_000_000, seed: Optional[int] = None):
+        """Start recording to ``path``.
+
+        Args:
+            path: Trace file (JSON array format)
+            sample_rate: Probability of keeping a root span and its children
+            max_events: Events after which further spans are dropped
+            seed: Seed of the sampling decisions
+        """
+        if self.enabled:
+            self.stop()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.max_events = max_events
+        self.dropped = 0
+        self._written = 0
+        self._events = []
+        self._random = random.Random(seed)
+        self._origin = time.perf_counter_ns()
+        header = [
+            {"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0, "args": {"name": "evoselfcode datagen"}},
+            {"name": "trace_config", "ph": "M", "pid": self._pid, "tid": 0, "args": {
+                "sample_rate": sample_rate, "started": datetime.now().isoformat(timespec="seconds")}},
+        ]
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("[\n" + "".join(json.dumps(e) + ",\n" for e in header))
+        self.enabled = True
+        logger.info(f"Tracing {sample_rate:.1%} of requests to {self.path}")
+
+    def stop(self):
+        """Stop recording, flush the remaining events and close the JSON array.
+
+        A trace stopped cleanly is plain JSON; load_trace() also reads one
+        cut short by a crash (trailing comma, no closing bracket).
+        """
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.flush()
+        with self._lock, open(self.path, "r+b") as f:
+            # Every event line ends with ",\n"; replace the last one's comma
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            f.seek(max(0, end - 2))
+            if f.read() == b",\n":
+                f.seek(end - 2)
+                f.truncate()
+            f.write(b"\n]\n")
+        if self.dropped:
+            logger.warning(f"Trace event limit reached, {self.dropped} spans dropped")
+        logger.info(f"Trace written to {self.path} ({self._written} events)")
+
+    def span(self, name: str, always: bool = False, **args: Any):
+        """Context manager recording a span.
+
+        Nested in a sampled span it is recorded on the same row; otherwise it
+        becomes a root, kept with probability ``sample_rate`` (always if
+        ``always``, e.g. for rare but expensive steps such as batch writes).
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        trace = _trace.get()
+        if trace is False:
+            return _NULL_SPAN
+        if trace is None:
+            if not always and self._random.random() >= self.sample_rate:
+                return _UnsampledRoot()
+            # Weight of the trace for estimates over all requests
+            args["weight"] = 1.0 if always else 1.0 / self.sample_rate
+            return _Span(self, name, next(self._ids), True, args)
+        return _Span(self, name, trace, False, args)
+
+    def _record(self, name: str, tid: int, start: int, end: int, args: Dict[str, Any]):
+        if not self.enabled:
+            # A span still open when tracing stopped: the array is closed
+            return
+        if self._written + len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        event = {
+            "name": name,
+            "cat": _stage.get(),
+            "ph": "X",
+            "ts": (start - self._origin) / 1000,
+            "dur": (end - start) / 1000,
+            "pid": self._pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        self._events.append(json.dumps(event, default=str))
+        if len(self._events) >= self._flush_every:
+            self.flush()
+
+    def flush(self):
+        """Append buffered events to the trace file."""
+        with self._lock:
+            events, self._events = self._events, []
+            if not events or self.path is None:
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(e + ",\n" for e in events))
+            self._written += len(events)
+
+
+# Process-wide tracer (disabled until started)
+TRACER = Tracer()
+
+
+def set_stage(stage: str):
+    """Record spans of the current task (and tasks it creates) under ``stage``."""
+    _stage.set(stage)
+
+
+def traced(name: str, always: bool = False):
+    """Decorator recording each call of a function or coroutine function as a span."""
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not TRACER.enabled:
+                    return await fn(*args, **kwargs)
+                with TRACER.span(name, always):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with TRACER.span(name, always):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+@contextlib.contextmanager
+def start_tracing(
+    cfg: Optional[Mapping[str, Any]],
+    name: str = "datagen",
+    tracer: Tracer = TRACER,
+    log_dir: Optional[Path] = None,
+) -> Iterator[Optional[Path]]:
+    """Trace the block if enabled in a ``tracing`` config section.
+
+    Args:
+        cfg: {"enabled", "sample_rate", "dir", "max_events"}
+        name: Run name used in the trace file name
+        tracer: Tracer to start
+        log_dir: Base directory of a relative ``dir`` (default: project logs/)
+
+    Yields:
+        Trace file path, or None if tracing is disabled
+    """
+    cfg = cfg or {}
+    if not cfg.get("enabled", False):
+        yield None
+        return
+    directory = Path(cfg.get("dir", "traces"))
+    if not directory.is_absolute():
+        if log_dir is None:
+            from ..constants import LOGS_DIR
+            log_dir = LOGS_DIR
+        directory = log_dir / directory
+    path = directory / f"{name}_{datetime.now():%Y%m%d_%H%M%S}.trace.json"
+    tracer.start(path, float(cfg.get("sample_rate", 0.05)), int(cfg.get("max_events", 1_000_000)))
+    try:
+        yield path
+    finally:
+        tracer.stop()
+
+
+def load_trace(path: Path) -> List[Dict[str, Any]]:
+    """Events of a trace file (also one cut short by a crash)."""
+    text = Path(path).read_text(encoding="utf-8").rstrip().rstrip(",")
+    if not text.endswith("]"):
+        text += "]"
+    data = json.loads(text)
+    return data["traceEvents"] if isinstance(data, dict) else data
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize_trace(events: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Where the wall-clock time of each stage went.
+
+    Counts and totals are estimates over all requests: each trace is weighted
+    by the inverse of its sampling probability.
+
+    Args:
+        events: Events of load_trace()
+
+    Returns:
+        Per stage: ``wall_s`` (first span start to last span end), ``spans``
+        (per span name: sampled and estimated count, estimated total seconds,
+        mean/p50/p95/max milliseconds, and ``busy`` = estimated total / wall,
+        i.e. the average number of samples in that step), and
+        ``request_breakdown`` (share of request time spent in queue wait,
+        attempts, backoff and the remaining client overhead)
+    """
+    spans = [e for e in events if e.get("ph") == "X"]
+    weights = {e["tid"]: e["args"]["weight"] for e in spans if "weight" in e.get("args", {})}
+    # Sampled requests per (stage, tid): duration and time in nested spans
+    requests: Dict[tuple, Dict[str, float]] = {}
+    for e in spans:
+        if e["name"] == "request" and "weight" in e.get("args", {}):
+            requests[(e.get("cat", ""), e["tid"])] = {"request": e["dur"]}
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    for e in spans:
+        stage = e.get("cat") or "-"
+        info = stages.setdefault(stage, {"start": e["ts"], "end": e["ts"] + e["dur"], "durations": {}, "totals": {}})
+        info["start"] = min(info["start"], e["ts"])
+        info["end"] = max(info["end"], e["ts"] + e["dur"])
+        weight = weights.get(e["tid"], 1.0)
+        info["durations"].setdefault(e["name"], []).append((e["dur"], weight))
+        request = requests.get((e.get("cat", ""), e["tid"]))
+        if request is not None and e["name"] != "request":
+            request[e["name"]] = request.get(e["name"], 0.0) + e["dur"]
+
+    summary: Dict[str, Dict[str, Any]] = {}
+    for stage, info in sorted(stages.items()):
+        wall_us = max(info["end"] - info["start"], 1e-9)
+        span_stats = {}
+        for name, items in sorted(info["durations"].items()):
+            durations = sorted(d for d, _ in items)
+            total_us = sum(d * w for d, w in items)
+            span_stats[name] = {
+                "sampled": len(items),
+                "estimated": sum(w for _, w in items),
+                "total_s": total_us / 1e6,
+                "mean_ms": sum(durations) / len(durations) / 1e3,
+                "p50_ms": _percentile(durations, 0.5) / 1e3,
+                "p95_ms": _percentile(durations, 0.95) / 1e3,
+                "max_ms": durations[-1] / 1e3,
+                "busy": total_us / wall_us,
+            }
+        breakdown: Dict[str, float] = {}
+        stage_requests = [r for (cat, _), r in requests.items() if (cat or "-") == stage]
+        request_us = sum(r["request"] for r in stage_requests)
+        if request_us:
+            for r in stage_requests:
+                for name, dur in r.items():
+                    if name != "request":
+                        breakdown[name] = breakdown.get(name, 0.0) + dur
+            breakdown = {name: dur / request_us for name, dur in sorted(breakdown.items())}
+            breakdown["other"] = max(0.0, 1.0 - sum(breakdown.values()))
+        summary[stage] = {"wall_s": wall_us / 1e6, "spans": span_stats, "request_breakdown": breakdown}
+    return summary
@@ -2,12 +2,15 @@
 """
 Rating Analysis Script
 
-Analyzes and visualizes code quality ratings from FIM and L2R generation modes.
-Generates radar charts, distribution histograms, and statistical reports.
+Analyzes and visualizes code quality ratings from FIM and L2R generation modes,
+or from any number of labelled sources (e.g. self-training iterations).
+Generates radar charts, distribution histograms, drift/correlation charts,
+and statistical reports.
 
 Usage:
     python scripts/datagen/analyze_ratings.py
     python scripts/datagen/analyze_ratings.py --fim-path <path> --l2r-path <path>
+    python scripts/datagen/analyze_ratings.py --source iter0=<path> --source iter1=<path>
     python scripts/datagen/analyze_ratings.py --output-dir <path>
 """
 
@@ -21,6 +24,7 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from evoselfcode.core import ConfigManager
 from evoselfcode.datagen.preprocess.rating_analyzer import RatingAnalyzer
 from evoselfcode.utils.logger import LoggerManager
 
@@ -40,6 +44,11 @@ Examples:
     --fim-path data/generated/func_ratings/fim/ratings.jsonl \\
     --l2r-path data/generated/func_ratings/l2r/ratings.jsonl
 
+  # Compare self-training iterations (first source is the baseline)
+  python scripts/datagen/analyze_ratings.py \\
+    --source iter0=data/iter0/func_ratings/fim/ratings.jsonl \\
+    --source iter1=data/iter1/func_ratings/fim/ratings.jsonl
+
   # Custom output directory
   python scripts/datagen/analyze_ratings.py \\
     --output-dir results/rating_analysis
@@ -60,6 +69,14 @@ Examples:
         help='Path to L2R ratings.jsonl (default: data/generated/func_ratings/l2r/ratings.jsonl)'
     )
     
+    parser.add_argument(
+        '--source',
+        action='append',
+        default=[],
+        metavar='LABEL=PATH',
+        help='Labelled ratings file to compare (repeatable, in order; overrides --fim-path/--l2r-path)'
+    )
+    
     parser.add_argument(
         '--output-dir',
         type=str,
@@ -67,6 +84,26 @@ Examples:
         help='Output directory for charts and reports (default: data/analysis/rating_comparison)'
     )
     
+    parser.add_argument(
+        '--rating-config',
+        type=str,
+        default='configs/datagen/rating.yaml',
+        help='Rating config whose rating.dimensions are checked against the analysis (default: configs/datagen/rating.yaml)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Re-scan the ratings files instead of using the <name>.stats.npz caches'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Processes used to render charts (default: CPU count)'
+    )
+    
     parser.add_argument(
         '--log-level',
         type=str,
@@ -83,8 +120,19 @@ def main():
     args = parse_args()
     
     # Setup paths
-    fim_path = PROJECT_ROOT / args.fim_path
-    l2r_path = PROJECT_ROOT / args.l2r_path
+    if args.source:
+        sources = {}
+        for spec in args.source:
+            label, sep, path = spec.partition('=')
+            if not sep or not label or not path:
+                print(f"Invalid --source '{spec}', expected LABEL=PATH", file=sys.stderr)
+                return 1
+            sources[label] = PROJECT_ROOT / path
+    else:
+        sources = {
+            'FIM': PROJECT_ROOT / args.fim_path,
+            'L2R': PROJECT_ROOT / args.l2r_path,
+        }
     output_dir = PROJECT_ROOT / args.output_dir
     
     # Setup logger
@@ -99,35 +147,43 @@ def main():
     logger.info("=" * 60)
     logger.info("Rating Analysis Configuration")
     logger.info("=" * 60)
-    logger.info(f"FIM ratings path: {fim_path}")
-    logger.info(f"L2R ratings path: {l2r_path}")
+    for label, path in sources.items():
+        logger.info(f"{label} ratings path: {path}")
     logger.info(f"Output directory: {output_dir}")
+    logger.info(f"Stats cache: {'disabled' if args.no_cache else 'enabled'}")
     logger.info(f"Log level: {args.log_level}")
     logger.info("=" * 60)
     
     # Check if input files exist
-    if not fim_path.exists():
-        logger.warning(f"FIM ratings file not found: {fim_path}")
-    
-    if not l2r_path.exists():
-        logger.warning(f"L2R ratings file not found: {l2r_path}")
+    for label, path in sources.items():
+        if not path.exists():
+            logger.warning(f"{label} ratings file not found: {path}")
     
-    if not fim_path.exists() and not l2r_path.exists():
+    if not any(path.exists() for path in sources.values()):
         logger.error("No rating files found. Please generate ratings first.")
         logger.error("  Run: python scripts/datagen/generate_ratings.py --source fim")
         logger.error("  Run: python scripts/datagen/generate_ratings.py --source l2r")
         return 1
     
-    # Create analyzer
-    analyzer = RatingAnalyzer(logger=logger)
+    # Create analyzer (checks the scored dimensions of the rating config)
+    rating_config = PROJECT_ROOT / args.rating_config
+    dimensions = None
+    if rating_config.exists():
+        dimensions = list(ConfigManager.from_file(rating_config).get('rating.dimensions') or {}) or None
+    else:
+        logger.warning(f"Rating config not found: {rating_config}")
+    analyzer = RatingAnalyzer(logger=logger, dimensions=dimensions)
     
     try:
         # Run analysis
-        analyzer.analyze_and_visualize(
-            fim_ratings_path=fim_path,
-            l2r_ratings_path=l2r_path,
-            output_dir=output_dir
+        results = analyzer.analyze_sources(
+            sources=sources,
+            output_dir=output_dir,
+            use_cache=not args.no_cache,
+            workers=args.workers
         )
+        if not results:
+            return 1
         
         logger.info("\n✅ Analysis completed successfully!")
         logger.info(f"\nView results at: {output_dir}")
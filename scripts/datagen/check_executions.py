@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Script to execute function implementations against their problem examples.
+
+Runs every implementation in a sandboxed worker pool and records
+passed / failed / error / timeout. Enable `rating.execution_filter` in
+configs/datagen/rating.yaml to skip rating implementations that failed.
+
+Usage:
+    python scripts/datagen/check_executions.py --source fim
+    python scripts/datagen/check_executions.py --source l2r
+    python scripts/datagen/check_executions.py --source fim --num-samples 1000
+"""
+
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from evoselfcode.services.datagen_service import DataGenService
+from evoselfcode.utils.logger import LoggerManager
+
+
+async def main(source: str = "fim", num_samples: int = None):
+    """Main function to run the execution check.
+
+    Args:
+        source (str): Source mode, either 'fim' or 'l2r'.
+        num_samples (int, optional): Number of samples to process. None means all.
+    """
+    # Determine config path
+    config_path = PROJECT_ROOT / "configs" / "datagen" / "execution.yaml"
+    
+    if not config_path.exists():
+        print(f"Config file not found: {config_path}")
+        sys.exit(1)
+    
+    # Load config to get log level
+    from evoselfcode.core import ConfigManager
+    temp_config = ConfigManager.from_file(str(config_path))
+    log_level_str = temp_config.get("logging.level", "INFO")
+    log_level = getattr(logging, log_level_str, logging.INFO)
+    
+    # Setup logger with configured level
+    logger = LoggerManager.get_logger(
+        name="check_executions",
+        module="datagen",
+        task=f"execution_{source}",
+        level=log_level
+    )
+    
+    logger.info(f"Starting execution check for source: {source.upper()}")
+    if num_samples:
+        logger.info(f"Limited to {num_samples} samples")
+    
+    service = DataGenService.from_config_path(str(config_path), logger=logger)
+    
+    try:
+        with service.metrics_exporters(f"execcheck_{source}"), service.tracing(f"execcheck_{source}"):
+            results = await service.check_executions(
+                source_mode=source,
+                num_samples=num_samples
+            )
+        
+        passed = sum(1 for r in results if r["status"] == "passed")
+        logger.info(f"✅ Checked {len(results)} implementations, {passed} passed all examples")
+    
+    except Exception as e:
+        logger.exception(f"Error during execution check: {e}")
+        sys.exit(1)
+    finally:
+        LoggerManager.close_all()
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Execute function implementations against problem examples")
+    parser.add_argument(
+        "--source",
+        type=str,
+        choices=["fim", "l2r"],
+        required=True,
+        help="Source mode: 'fim' or 'l2r'"
+    )
+    parser.add_argument(
+        "--num-samples",
+        type=int,
+        default=None,
+        help="Number of samples to process (default: all)"
+    )
+    
+    args = parser.parse_args()
+    
+    asyncio.run(main(source=args.source, num_samples=args.num_samples))
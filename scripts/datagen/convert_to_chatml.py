@@ -14,6 +14,7 @@ Usage:
     python scripts/datagen/convert_to_chatml.py --mode fim
     python scripts/datagen/convert_to_chatml.py --mode l2r
     python scripts/datagen/convert_to_chatml.py --input data/custom/ratings.jsonl --output data/custom/chatml.jsonl
+    python scripts/datagen/convert_to_chatml.py --mode fim --rebuild   # ignore the incremental cache
 """
 
 import sys
@@ -24,8 +25,8 @@ from typing import Optional
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from evoselfcode.datagen.postprocess.converter import ChatMLConverter
 from evoselfcode.core import ConfigManager
+from evoselfcode.datagen.postprocess.converter import ChatMLConverter
 from evoselfcode.utils.logger import LoggerManager
 
 
@@ -33,7 +34,8 @@ def main(
     mode: Optional[str] = None,
     input_path: Optional[Path] = None,
     output_path: Optional[Path] = None,
-    config_path: Optional[Path] = None
+    config_path: Optional[Path] = None,
+    rebuild: bool = False
 ):
     """Main conversion function.
     
@@ -42,6 +44,7 @@ def main(
         input_path: Custom input path (overrides config)
         output_path: Custom output path (overrides config)
         config_path: Custom config path (default: configs/datagen/convert.yaml)
+        rebuild: Ignore the incremental cache and reconvert everything
     """
     # Load config first
     if not config_path:
@@ -101,7 +104,7 @@ def main(
     converter = ChatMLConverter.from_config_path(config_path, logger=logger)
     
     # Convert file
-    stats = converter.convert_file(input_path, output_path)
+    stats = converter.convert_file(input_path, output_path, rebuild=rebuild)
     
     logger.info(f"✅ Conversion complete!")
     logger.info(f"Output saved to: {output_path}")
@@ -149,6 +152,11 @@ if __name__ == "__main__":
         type=Path,
         help="Custom config file path (default: configs/datagen/convert.yaml)"
     )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Ignore the incremental cache and reconvert the whole input"
+    )
     
     args = parser.parse_args()
     
@@ -156,6 +164,7 @@ if __name__ == "__main__":
         mode=args.mode,
         input_path=args.input,
         output_path=args.output,
-        config_path=args.config
+        config_path=args.config,
+        rebuild=args.rebuild
     )
 
@@ -59,10 +59,11 @@ async def main(source: str = "fim", num_samples: int = None):
     
     try:
         # Generate implementations
-        results = await service.generate_code(
-            source_mode=source,
-            num_samples=num_samples
-        )
+        with service.metrics_exporters(f"codegen_{source}"), service.tracing(f"codegen_{source}"):
+            results = await service.generate_code(
+                source_mode=source,
+                num_samples=num_samples
+            )
         
         logger.info(f"✅ Generated {len(results)} unique function implementations")
         
@@ -51,10 +51,11 @@ async def main(mode: str = "fim", num_samples: int = None):
     service = DataGenService.from_config_path(config_path, task=mode, logger=logger)
     
     # Generate problems
-    results = await service.generate_problems(
-        mode=mode.upper(),
-        num_samples=num_samples
-    )
+    with service.metrics_exporters(f"problems_{mode}"), service.tracing(f"problems_{mode}"):
+        results = await service.generate_problems(
+            mode=mode.upper(),
+            num_samples=num_samples
+        )
     
     logger.info(f"✅ Generated {len(results)} unique algorithm problems")
     
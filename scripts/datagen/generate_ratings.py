@@ -60,10 +60,11 @@ async def main(source: str = "fim", num_samples: int = None):
     
     try:
         # Generate ratings
-        results = await service.generate_ratings(
-            source_mode=source,
-            num_samples=num_samples
-        )
+        with service.metrics_exporters(f"rating_{source}"), service.tracing(f"rating_{source}"):
+            results = await service.generate_ratings(
+                source_mode=source,
+                num_samples=num_samples
+            )
         
         # Display sample results
         logger.info("=== Sample Ratings ===")
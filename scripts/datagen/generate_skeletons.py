@@ -49,10 +49,11 @@ async def main(source: str = "fim", num_samples: int = None):
     service = DataGenService.from_config_path(config_path, task=source, logger=logger)
     
     # Generate skeletons
-    results = await service.generate_skeletons(
-        source_mode=source,
-        num_samples=num_samples
-    )
+    with service.metrics_exporters(f"skeleton_{source}"), service.tracing(f"skeleton_{source}"):
+        results = await service.generate_skeletons(
+            source_mode=source,
+            num_samples=num_samples
+        )
     
     logger.info(f"✅ Generated {len(results)} unique function skeletons")
     
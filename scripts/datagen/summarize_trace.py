@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Trace Summary Script
+
+Summarizes a request trace of a datagen run (enable ``tracing`` in
+configs/model.yaml) per stage: how many samples went through each traced
+step, how long it took (mean/p50/p95/max), its estimated share of the
+stage's wall-clock time, and how request time splits into queue wait,
+attempts (network, server queueing and decode), retry backoff and client
+overhead. For the full per-request timeline open the trace file in
+https://ui.perfetto.dev or chrome://tracing.
+
+Usage:
+    python scripts/datagen/summarize_trace.py logs/traces/codegen_fim_20250101_120000.trace.json
+    python scripts/datagen/summarize_trace.py <trace> --json summary.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Ensure project root is in path
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from rich.console import Console
+from rich.table import Table
+
+from evoselfcode.utils.tracing import load_trace, summarize_trace
+
+
+def print_summary(summary, console: Console):
+    """Print one table per stage."""
+    for stage, info in summary.items():
+        table = Table(title=f"Stage: {stage} (wall {info['wall_s']:.1f}s)")
+        table.add_column("Span")
+        table.add_column("Sampled", justify="right")
+        table.add_column("Est. count", justify="right")
+        table.add_column("Est. total (s)", justify="right")
+        table.add_column("Mean (ms)", justify="right")
+        table.add_column("p50 (ms)", justify="right")
+        table.add_column("p95 (ms)", justify="right")
+        table.add_column("Max (ms)", justify="right")
+        table.add_column("Busy", justify="right")
+        for name, s in info["spans"].items():
+            table.add_row(
+                name,
+                f"{s['sampled']:,}",
+                f"{s['estimated']:,.0f}",
+                f"{s['total_s']:,.2f}",
+                f"{s['mean_ms']:,.2f}",
+                f"{s['p50_ms']:,.2f}",
+                f"{s['p95_ms']:,.2f}",
+                f"{s['max_ms']:,.2f}",
+                f"{s['busy']:.2f}",
+            )
+        console.print(table)
+        if info["request_breakdown"]:
+            parts = ", ".join(f"{name} {share:.1%}" for name, share in info["request_breakdown"].items())
+            console.print(f"Request time: {parts}")
+        console.print()
+    console.print(
+        "[dim]Busy = estimated total / stage wall time (average number of samples in that step; "
+        "for synchronous steps such as validate/parse/hash, the share of the event loop they block)[/dim]"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a datagen request trace per stage")
+    parser.add_argument("trace", type=Path, help="Trace file (*.trace.json)")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the summary to this JSON file")
+    args = parser.parse_args()
+
+    events = load_trace(args.trace)
+    config = next((e.get("args", {}) for e in events if e.get("name") == "trace_config"), {})
+    console = Console()
+    console.print(f"Trace: {args.trace} (sample rate {config.get('sample_rate', 1.0):.1%}, "
+                  f"{sum(e.get('ph') == 'X' for e in events):,} spans)")
+
+    summary = summarize_trace(events)
+    print_summary(summary, console)
+
+    if args.json:
+        args.json.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        console.print(f"Summary written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
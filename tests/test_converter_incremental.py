@@ -0,0 +1,67 @@
+"""ChatMLConverter incremental runs: appended input, regenerated input."""
+
+import json
+import logging
+
+import pytest
+
+from evoselfcode.core import ConfigManager
+from evoselfcode.datagen.postprocess.converter import ChatMLConverter
+
+
+def _record(uid: str, name: str) -> dict:
+    return {
+        "uid": uid,
+        "problem_text": f"Implement {name}.\nHint: none",
+        "code": f"def {name}(x):\n    \"\"\"Doc.\"\"\"\n    return x + 1\n",
+        "ratings": {"correctness": 5},
+    }
+
+
+def _write(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def _uids(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["uid"] for line in f]
+
+
+@pytest.fixture
+def converter():
+    return ChatMLConverter(ConfigManager({
+        "filter": {"min_ratings": {"correctness": 4}},
+        "processing": {"num_workers": 1, "chunk_bytes": 256, "validation_cache": None},
+        "incremental": {"enabled": True},
+    }), logger=logging.getLogger(__name__))
+
+
+def test_appended_records_are_converted_once(converter, tmp_path):
+    input_path, output_path = tmp_path / "ratings.jsonl", tmp_path / "out" / "train.jsonl"
+    records = [_record(f"a{i}", f"f{i}") for i in range(5)]
+    _write(input_path, records)
+    assert converter.convert_file(input_path, output_path)["total"] == 5
+
+    records += [_record(f"b{i}", f"g{i}") for i in range(3)]
+    _write(input_path, records)
+    stats = converter.convert_file(input_path, output_path)
+    assert stats["total"] == 3
+    assert _uids(output_path) == [r["uid"] for r in records]
+
+
+def test_regenerated_input_of_the_same_size_is_rebuilt(converter, tmp_path):
+    input_path, output_path = tmp_path / "ratings.jsonl", tmp_path / "out" / "train.jsonl"
+    _write(input_path, [_record(f"a{i}", f"f{i}") for i in range(5)])
+    converter.convert_file(input_path, output_path)
+
+    # Re-rated from scratch: same size, different uids and code
+    size = input_path.stat().st_size
+    replacement = [_record(f"c{i}", f"h{i}") for i in range(5)]
+    _write(input_path, replacement)
+    assert input_path.stat().st_size == size
+
+    stats = converter.convert_file(input_path, output_path)
+    assert stats["total"] == 5
+    assert _uids(output_path) == [r["uid"] for r in replacement]
@@ -0,0 +1,234 @@
+"""PriorityLimiter: serving order, deadlines, cancellation and process-wide gauges."""
+
+import asyncio
+import gc
+import time
+import weakref
+
+import pytest
+
+from evoselfcode.clients.async_openai import AsyncOpenAICompletionClient
+from evoselfcode.clients.limiter import (
+    DeadlineExceeded,
+    Priority,
+    PriorityLimiter,
+    parse_priority,
+    queue_deadline,
+    requests_per_batch,
+)
+from evoselfcode.utils.metrics import REGISTRY
+
+
+async def _settle():
+    """Let every ready task run until it blocks."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_grants_immediately_below_capacity():
+    async def scenario():
+        limiter = PriorityLimiter(2)
+        await limiter.acquire()
+        await limiter.acquire()
+        assert (limiter.active, limiter.waiting) == (2, 0)
+        limiter.release()
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_waiters_served_by_priority_then_deadline_then_arrival():
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        await limiter.acquire()
+        served = []
+
+        async def request(name, priority, deadline=None):
+            async with limiter.slot(priority, deadline):
+                served.append(name)
+
+        far = time.monotonic() + 60
+        near = time.monotonic() + 30
+        tasks = []
+        for name, priority, deadline in [
+            ("problem", Priority.PROBLEM, None),
+            ("codegen-late", Priority.CODEGEN, None),
+            ("codegen-far", Priority.CODEGEN, far),
+            ("retry", Priority.RETRY, None),
+            ("codegen-near", Priority.CODEGEN, near),
+            ("rating", Priority.RATING, None),
+        ]:
+            tasks.append(asyncio.create_task(request(name, priority, deadline)))
+            await _settle()
+        assert limiter.waiting == 6
+
+        limiter.release()
+        await asyncio.gather(*tasks)
+        assert served == ["retry", "rating", "codegen-near", "codegen-far", "codegen-late", "problem"]
+        assert (limiter.active, limiter.waiting) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_newcomer_does_not_overtake_queued_waiters():
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire(Priority.DEFAULT))
+        await _settle()
+
+        limiter.release()
+        # The freed slot went to the waiter, not to whoever asks next
+        newcomer = asyncio.create_task(limiter.acquire(Priority.RETRY))
+        await _settle()
+        assert waiter.done() and not newcomer.done()
+
+        limiter.release()
+        await newcomer
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_deadline_expires_while_queued():
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        await limiter.acquire()
+
+        with pytest.raises(DeadlineExceeded):
+            await limiter.acquire(Priority.CODEGEN, deadline=time.monotonic() + 0.05)
+        assert limiter.waiting == 0
+        assert limiter.stats()["CODEGEN"]["expired"] == 1
+
+        # The expired request holds no slot: the holder's release frees it
+        limiter.release()
+        assert limiter.active == 0
+        await asyncio.wait_for(limiter.acquire(), 1.0)
+
+    asyncio.run(scenario())
+
+
+def test_deadline_is_a_timeout_error():
+    assert issubclass(DeadlineExceeded, asyncio.TimeoutError)
+
+
+def test_cancelled_waiter_is_skipped():
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        await limiter.acquire()
+        cancelled = asyncio.create_task(limiter.acquire(Priority.RETRY))
+        waiter = asyncio.create_task(limiter.acquire(Priority.PROBLEM))
+        await _settle()
+
+        cancelled.cancel()
+        await _settle()
+        assert limiter.waiting == 1
+
+        limiter.release()
+        await asyncio.wait_for(waiter, 1.0)
+        assert limiter.active == 1
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_slot_handed_to_a_cancelled_waiter_is_passed_on():
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire(Priority.RETRY))
+        second = asyncio.create_task(limiter.acquire(Priority.PROBLEM))
+        await _settle()
+
+        # Granted, then cancelled before it could resume
+        limiter.release()
+        first.cancel()
+        await _settle()
+        assert first.cancelled()
+
+        await asyncio.wait_for(second, 1.0)
+        assert (limiter.active, limiter.waiting) == (1, 0)
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_wait_statistics_per_class():
+    async def scenario():
+        limiter = PriorityLimiter(1)
+        await limiter.acquire(Priority.RATING)
+        waiter = asyncio.create_task(limiter.acquire(Priority.RETRY))
+        await asyncio.sleep(0.02)
+        limiter.release()
+        await waiter
+        limiter.release()
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert list(stats) == ["RETRY", "RATING"]
+    assert stats["RATING"]["queued"] == 0
+    assert stats["RETRY"]["queued"] == 1
+    assert stats["RETRY"]["wait_max_s"] >= 0.01
+
+
+def test_rejects_zero_capacity():
+    with pytest.raises(ValueError):
+        PriorityLimiter(0)
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, Priority.CODEGEN),
+    ("retry", Priority.RETRY),
+    ("Rating", Priority.RATING),
+    (7, 7),
+    ("-1", -1),
+])
+def test_parse_priority(value, expected):
+    assert parse_priority(value, Priority.CODEGEN) == expected
+
+
+def test_parse_priority_rejects_unknown_class():
+    with pytest.raises(ValueError):
+        parse_priority("urgent")
+
+
+def test_batches_exceed_the_limiter_capacity():
+    assert requests_per_batch(8, 4) == 32
+    assert requests_per_batch(8, None) == 8
+    assert requests_per_batch(8, 0.5) == 8
+
+
+def test_queue_deadline():
+    assert queue_deadline(None) is None
+    assert queue_deadline(0) is None
+    assert queue_deadline(10) == pytest.approx(time.monotonic() + 10, abs=1.0)
+
+
+def test_process_gauges_sum_over_live_clients():
+    async def scenario():
+        first = AsyncOpenAICompletionClient("http://127.0.0.1:1", max_concurrent=2)
+        second = AsyncOpenAICompletionClient("http://127.0.0.1:1", max_concurrent=1)
+        await first.limiter.acquire()
+        await second.limiter.acquire()
+        waiter = asyncio.create_task(second.limiter.acquire())
+        await _settle()
+        assert REGISTRY.total("llm_requests_in_flight") == 2
+        assert REGISTRY.total("llm_queue_depth") == 1
+
+        # A client that is gone no longer counts (and is not kept alive by the gauges)
+        ref = weakref.ref(first)
+        del first
+        gc.collect()
+        assert ref() is None
+        assert REGISTRY.total("llm_requests_in_flight") == 1
+
+        second.limiter.release()
+        await waiter
+        second.limiter.release()
+        assert REGISTRY.total("llm_requests_in_flight") == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,45 @@
+"""Unbiased pass@k estimator of the evaluation engine."""
+
+import math
+
+import numpy as np
+import pytest
+
+from evoselfcode.evaluation.engine import estimate_pass_at_k
+
+
+def exact_pass_at_k(n: int, c: int, k: int) -> float:
+    """1 - C(n-c, k) / C(n, k), the definition the estimator approximates."""
+    return 1.0 - math.comb(n - c, k) / math.comb(n, k)
+
+
+@pytest.mark.parametrize("k", [1, 2, 5, 10])
+def test_matches_binomial_definition(k):
+    cases = [(n, c) for n in range(k, 25) for c in range(n + 1)]
+    num_samples, num_correct = zip(*cases)
+
+    estimates = estimate_pass_at_k(num_samples, num_correct, k)
+
+    expected = [exact_pass_at_k(n, c, k) for n, c in cases]
+    np.testing.assert_allclose(estimates, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_large_sample_counts_stay_finite():
+    # math.comb is exact here; the product form must not overflow or lose precision
+    estimates = estimate_pass_at_k([200, 200, 1000], [1, 37, 999], 100)
+    expected = [exact_pass_at_k(200, 1, 100), exact_pass_at_k(200, 37, 100), 1.0]
+    np.testing.assert_allclose(estimates, expected, rtol=1e-9)
+
+
+def test_pass_at_1_is_the_fraction_correct():
+    np.testing.assert_allclose(estimate_pass_at_k([10, 4, 7], [3, 0, 7], 1), [0.3, 0.0, 1.0])
+
+
+def test_tasks_with_fewer_than_k_samples_are_nan():
+    estimates = estimate_pass_at_k([3, 10], [3, 2], 5)
+    assert np.isnan(estimates[0])
+    assert estimates[1] == pytest.approx(exact_pass_at_k(10, 2, 5))
+
+
+def test_no_tasks():
+    assert estimate_pass_at_k([], [], 1).shape == (0,)
@@ -0,0 +1,130 @@
+"""Rating output parsing: scores, packed candidates and logprob distributions."""
+
+import math
+import re
+
+import pytest
+
+from evoselfcode.datagen.preprocess.rating_parser import (
+    RatingParser,
+    score_distribution,
+    split_candidates,
+)
+
+RATING = """Output Evaluation:
+Problem Design Score: 4
+Function Definition Score: 5
+Algorithm Correctness Score: 3
+Algorithm Efficiency Score: 2
+Code Readability Score: 5
+Summary: Correct but quadratic.
+
+---
+Problem Design Score: 1
+"""
+
+
+def test_parse_all_fields():
+    assert RatingParser().parse(RATING) == {
+        'problem_design': 4,
+        'function_definition': 5,
+        'correctness': 3,
+        'efficiency': 2,
+        'readability': 5,
+        'summary': 'Correct but quadratic.',
+    }
+
+
+def test_parse_is_case_insensitive_and_first_occurrence_wins():
+    text = "problem design score: 2\nPROBLEM DESIGN SCORE: 5\nCode readability Score:4"
+    parsed = RatingParser().parse(text)
+    assert parsed['problem_design'] == 2
+    assert parsed['readability'] == 4
+
+
+def test_parse_missing_fields_are_none():
+    parsed = RatingParser().parse("Algorithm Correctness Score: 5\nSummary:")
+    assert parsed['correctness'] == 5
+    assert parsed['efficiency'] is None
+    # A bare "Summary:" at the end of the output carries no text
+    assert parsed['summary'] is None
+
+
+def test_summary_stops_at_separator():
+    parsed = RatingParser().parse("Summary: fine --- Problem Design Score: 3")
+    assert parsed['summary'] == 'fine'
+    assert parsed['problem_design'] == 3
+
+
+def test_custom_dimensions():
+    parser = RatingParser({'style': 'Style', 'speed': 'Speed'})
+    assert parser.parse("Speed Score: 3\nStyle Score: 4\nSummary: ok") == {'style': 4, 'speed': 3, 'summary': 'ok'}
+
+
+def test_score_spans_point_at_the_digits():
+    spans = RatingParser().score_spans(RATING)
+    assert RATING[slice(*spans['efficiency'])] == '2'
+    assert len(spans) == 5
+
+
+def test_output_regex_accepts_well_formed_output():
+    parser = RatingParser()
+    pattern = re.compile(parser.output_regex(1, 5))
+    assert pattern.fullmatch(RATING.split('\n\n---')[0])
+    assert not pattern.fullmatch(RATING.replace('Score: 2', 'Score: 7').split('\n\n---')[0])
+
+
+def test_split_candidates():
+    text = (
+        "Candidate 1:\nProblem Design Score: 4\n"
+        "**Candidate 2:**\nProblem Design Score: 2\n"
+        "### Candidate 3\nProblem Design Score: 5\n"
+        "Candidate 2:\nProblem Design Score: 1\n"
+    )
+    sections = split_candidates(text)
+    assert sorted(sections) == [1, 2, 3]
+    assert sections[1] == "Problem Design Score: 4"
+    # The first section of a repeated number wins
+    assert sections[2] == "Problem Design Score: 2"
+    assert sections[3] == "Problem Design Score: 5"
+
+
+def test_split_candidates_without_headers():
+    assert split_candidates("Problem Design Score: 4") == {}
+
+
+def _logprobs(tokens, top):
+    """Completions API logprobs (dict form) with ``top`` at the score token."""
+    return {
+        'tokens': tokens,
+        'token_logprobs': [0.0] * len(tokens),
+        'top_logprobs': [top if token.strip().isdigit() else {} for token in tokens],
+    }
+
+
+def test_score_distribution():
+    tokens = ["Problem Design Score:", " 4", "\n"]
+    text = "".join(tokens)
+    span = RatingParser().score_spans(text)['problem_design']
+    top = {" 4": math.log(0.6), " 5": math.log(0.3), " x": math.log(0.1)}
+
+    result = score_distribution(text, _logprobs(tokens, top), span)
+
+    assert result['score'] == 4
+    assert result['expected'] == pytest.approx((4 * 0.6 + 5 * 0.3) / 0.9)
+    assert result['confidence'] == pytest.approx(0.6 / 0.9)
+
+
+def test_score_distribution_ignores_out_of_range_scores():
+    tokens = ["Score:", " 3"]
+    top = {" 3": math.log(0.5), " 9": math.log(0.5)}
+    result = score_distribution("".join(tokens), _logprobs(tokens, top), (7, 8), min_score=1, max_score=5)
+    assert result['score'] == 3
+    assert result['confidence'] == pytest.approx(1.0)
+
+
+def test_score_distribution_without_valid_mass():
+    tokens = ["Score:", " x"]
+    assert score_distribution("".join(tokens), _logprobs(tokens, {" x": 0.0}), (7, 8)) is None
+    # Span beyond the tokens
+    assert score_distribution("Score: 4", _logprobs(["Score:"], {}), (7, 8)) is None
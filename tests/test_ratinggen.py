@@ -0,0 +1,62 @@
+"""RatingGenerator: empty outputs and invalid scores are counted and retried."""
+
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+
+from evoselfcode.clients.limiter import Priority
+from evoselfcode.datagen.preprocess.ratinggen import RatingGenerator
+
+VALID = (
+    "Problem Design Score: 5\nFunction Definition Score: 4\nAlgorithm Correctness Score: 5\n"
+    "Algorithm Efficiency Score: 4\nCode Readability Score: 5\nSummary: Fine."
+)
+INVALID = VALID.replace("Correctness Score: 5", "Correctness Score: 9")
+
+
+class ScriptedClient:
+    """Answers each prompt (= function name) with the next output of its script."""
+
+    base_url = "http://test"
+    model = "test"
+    max_concurrent = 2
+
+    def __init__(self, scripts):
+        self.scripts = {name: list(outputs) for name, outputs in scripts.items()}
+        self.priorities = []
+
+    async def complete_async(self, prompt, priority=Priority.DEFAULT, **kwargs):
+        self.priorities.append(priority)
+        return [{"text": self.scripts[prompt].pop(0)}]
+
+
+def _rate(tmp_path, scripts):
+    input_file = tmp_path / "implementations.jsonl"
+    with open(input_file, "w", encoding="utf-8") as f:
+        for name in scripts:
+            f.write(json.dumps({"uid": name, "function_name": name, "code": name, "problem_text": ""}) + "\n")
+    client = ScriptedClient(scripts)
+    generator = RatingGenerator(
+        SimpleNamespace(completion_client=client), config={}, logger=logging.getLogger(__name__)
+    )
+    invalid_before = generator.metrics.invalid.value
+    results = asyncio.run(generator.generate(
+        input_file=input_file, output_dir=tmp_path / "ratings", prompt_template="{{code}}"
+    ))
+    return results, client, generator.metrics.invalid.value - invalid_before
+
+
+def test_empty_and_invalid_first_attempts_are_retried_and_counted(tmp_path):
+    results, client, invalid = _rate(tmp_path, {
+        "ok": [VALID],
+        "empty_then_ok": ["  ", VALID],
+        "invalid_then_ok": [INVALID, VALID],
+        "always_empty": ["", ""],
+        "always_invalid": [INVALID, INVALID],
+    })
+    assert sorted(r["uid"] for r in results) == ["empty_then_ok", "invalid_then_ok", "ok"]
+    # Every bad output counts, including those of first attempts that a retry fixed
+    assert invalid == 6
+    assert sorted(client.priorities).count(Priority.RETRY) == 4
+    assert all(not outputs for outputs in client.scripts.values())
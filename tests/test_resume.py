@@ -0,0 +1,109 @@
+"""DataGenService --resume: num_samples is a total over runs; restarted shards finish only their share."""
+
+import asyncio
+import json
+import logging
+
+import pytest
+
+from evoselfcode.core import ConfigManager
+from evoselfcode.services import datagen_service
+from evoselfcode.services.datagen_service import DataGenService, shard_index
+
+
+class _CrashAfter(RuntimeError):
+    pass
+
+
+class FakeCodeGenerator:
+    """Writes one implementation per skeleton; optionally dies after ``crash_after`` records."""
+
+    crash_after = None
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def generate(self, input_file, output_dir, num_samples=None, **kwargs):
+        with open(input_file, encoding="utf-8") as f:
+            skeletons = [json.loads(line) for line in f if line.strip()]
+        if num_samples is not None:
+            skeletons = skeletons[:num_samples]
+        output_dir.mkdir(parents=True, exist_ok=True)
+        results = []
+        with open(output_dir / "implementations.jsonl", "a", encoding="utf-8") as out:
+            for skeleton in skeletons:
+                if self.crash_after is not None and len(results) == self.crash_after:
+                    raise _CrashAfter()
+                record = {"uid": "impl-" + skeleton["uid"], "skeleton_uid": skeleton["uid"]}
+                out.write(json.dumps(record) + "\n")
+                results.append(record)
+        return results
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    monkeypatch.setattr(datagen_service, "CodeGenerator", FakeCodeGenerator)
+    monkeypatch.setattr(FakeCodeGenerator, "crash_after", None)
+    skeleton_dir, impl_dir = tmp_path / "skeletons", tmp_path / "implementations"
+    skeleton_dir.mkdir()
+    with open(skeleton_dir / "skeletons.jsonl", "w", encoding="utf-8") as f:
+        for i in range(40):
+            f.write(json.dumps({"uid": f"s{i:02d}"}) + "\n")
+    return skeleton_dir, impl_dir
+
+
+def _service(data, shard=None, resume=True):
+    skeleton_dir, impl_dir = data
+    service = DataGenService(ConfigManager({
+        "io": {"source": {"dir_map": {"fim": str(skeleton_dir)}}, "out_dir_map": {"fim": str(impl_dir)}},
+        "codegen": {},
+        "prompts": {"codegen": {"template": "{skeleton}"}},
+        "postprocess": {"validation_cache": None},
+    }), None, None, logging.getLogger(__name__))
+    service.shard = shard
+    service.resume = resume
+    return service
+
+
+def _written(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["skeleton_uid"] for line in f]
+
+
+def test_resume_treats_num_samples_as_a_total(data):
+    out_file = data[1] / "implementations.jsonl"
+    asyncio.run(_service(data).run_stage("code", "fim", num_samples=10))
+    assert len(_written(out_file)) == 10
+    assert asyncio.run(_service(data).run_stage("code", "fim", num_samples=10)) == []
+    assert len(_written(out_file)) == 10
+
+    asyncio.run(_service(data).run_stage("code", "fim", num_samples=15))
+    written = _written(out_file)
+    assert len(written) == 15
+    assert len(set(written)) == 15
+
+
+def test_without_resume_num_samples_is_per_run(data):
+    asyncio.run(_service(data, resume=False).run_stage("code", "fim", num_samples=10))
+    asyncio.run(_service(data, resume=False).run_stage("code", "fim", num_samples=10))
+    assert len(_written(data[1] / "implementations.jsonl")) == 20
+
+
+def test_restarted_shard_only_finishes_its_share(data, monkeypatch):
+    shard = (1, 2)
+    out_file = data[1] / "shard_1_of_2" / "implementations.jsonl"
+    share = _service(data, shard=shard)._shard_share(16)
+
+    # The worker dies part-way; the coordinator reruns the same command
+    monkeypatch.setattr(FakeCodeGenerator, "crash_after", 3)
+    with pytest.raises(_CrashAfter):
+        asyncio.run(_service(data, shard=shard).run_stage("code", "fim", num_samples=16))
+    assert len(_written(out_file)) == 3
+
+    monkeypatch.setattr(FakeCodeGenerator, "crash_after", None)
+    asyncio.run(_service(data, shard=shard).run_stage("code", "fim", num_samples=16))
+    asyncio.run(_service(data, shard=shard).run_stage("code", "fim", num_samples=16))
+    written = _written(out_file)
+    assert len(written) == share
+    assert len(set(written)) == share
+    assert all(shard_index(uid, 2) == 1 for uid in written)
@@ -0,0 +1,112 @@
+"""SandboxPool: results, limits and isolation of untrusted programs."""
+
+import asyncio
+import sys
+
+import pytest
+
+from evoselfcode.sandbox import SandboxPool, build_example_program, extract_examples
+from evoselfcode.sandbox.pool import (
+    STATUS_CRASHED,
+    STATUS_ERROR,
+    STATUS_FAILED,
+    STATUS_PASSED,
+    STATUS_TIMEOUT,
+)
+
+linux_only = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="OS-level confinement is Linux-only")
+
+
+@pytest.fixture(scope="module")
+def pool():
+    # One worker: consecutive programs of a chunk share it, so state leaking
+    # from one program into the next would be visible
+    with SandboxPool(num_workers=1, chunk_size=8, timeout_s=1.0, cpu_time_s=2.0, memory_mb=512) as sandbox:
+        yield sandbox
+
+
+def test_outcomes(pool):
+    results = pool.run([
+        "__passed__ = 3",
+        "assert 1 == 2, 'nope'",
+        "raise ValueError('bad input')",
+    ])
+    assert [r.status for r in results] == [STATUS_PASSED, STATUS_FAILED, STATUS_ERROR]
+    assert results[0].passed == 3
+    assert results[1].error == "nope"
+    assert "ValueError" in results[2].error
+
+
+def test_timeouts(pool):
+    results = pool.run([
+        "while True: pass",
+        "import time; time.sleep(60)",
+        "import signal; signal.signal(signal.SIGALRM, signal.SIG_IGN)\nwhile True: pass",
+        "__passed__ = 1",
+    ])
+    assert [r.status for r in results] == [STATUS_TIMEOUT] * 3 + [STATUS_PASSED]
+
+
+def test_crashes_do_not_affect_other_programs(pool):
+    results = pool.run([
+        "import ctypes; ctypes.string_at(0)",
+        "import os; os._exit(0)",
+        "__passed__ = 1",
+    ])
+    assert [r.status for r in results] == [STATUS_CRASHED, STATUS_CRASHED, STATUS_PASSED]
+    assert "SIGSEGV" in results[0].error
+
+
+def test_memory_limit(pool):
+    result = pool.run(["x = bytearray(8 * 1024 ** 3)"])[0]
+    assert result.status == STATUS_ERROR
+    assert "MemoryError" in result.error
+
+
+def test_programs_do_not_share_interpreter_state(pool):
+    results = pool.run([
+        "import builtins; builtins.len = lambda obj: 42",
+        "import sys; sys.stdin = None; sys.modules['json'] = None",
+        "assert len([1]) == 1",
+        "import sys, json; assert sys.stdin is not None",
+    ])
+    assert [r.status for r in results] == [STATUS_PASSED] * 4
+
+
+@linux_only
+def test_cannot_write_outside_its_directory(pool, tmp_path):
+    target = tmp_path / "escape"
+    results = pool.run([
+        f"open({str(target)!r}, 'w').write('x')",
+        "open('local.txt', 'w').write('x'); assert open('local.txt').read() == 'x'",
+    ])
+    assert results[0].status == STATUS_ERROR
+    assert results[1].status == STATUS_PASSED
+    assert not target.exists()
+
+
+@linux_only
+def test_cannot_open_sockets_or_spawn_processes(pool, tmp_path):
+    marker = tmp_path / "spawned"
+    results = pool.run([
+        "import _socket; _socket.socket()",
+        f"import posix; assert posix.system('touch {marker}') == 0",
+        "import os; os.fork()",
+    ])
+    assert all(r.status in (STATUS_ERROR, STATUS_FAILED) for r in results)
+    assert not marker.exists()
+
+
+def test_example_programs_import_typing_names(pool):
+    examples = extract_examples("Example:\nInput: nums = [3, 1, 2]\nOutput: [1, 2, 3]")
+    annotated = "def sort_nums(nums: List[int]) -> Optional[List[int]]:\n    return sorted(nums)\n"
+    future = "from __future__ import annotations\n\n" + annotated
+    wrong = "def sort_nums(nums: List[int]) -> List[int]:\n    return nums\n"
+    results = pool.run([build_example_program(code, "sort_nums", examples) for code in (annotated, future, wrong)])
+    assert [r.status for r in results] == [STATUS_PASSED, STATUS_PASSED, STATUS_FAILED]
+    assert results[0].passed == 1
+
+
+def test_run_async(pool):
+    results = asyncio.run(pool.run_async([f"__passed__ = {i}" for i in range(20)]))
+    assert [r.passed for r in results] == list(range(20))
@@ -0,0 +1,78 @@
+"""ValidationIndex: sorted, memory-mapped lookups in the validation cache file."""
+
+import json
+import logging
+
+from evoselfcode.core import ConfigManager
+from evoselfcode.datagen.postprocess.converter import ChatMLConverter
+from evoselfcode.datagen.utils.ast_tools import locate_function
+from evoselfcode.datagen.utils.hashing import compute_hash
+from evoselfcode.datagen.utils.validation_cache import (
+    HEADER,
+    ValidationCache,
+    ValidationEntry,
+    ValidationIndex,
+    encode_entry,
+)
+
+CODES = [f"def f{i}(x):\n    \"\"\"Doc.\"\"\"\n    return x + {i}\n" for i in range(300)] + ["def broken(:", "x = 1"]
+
+
+def _items(codes):
+    return [(compute_hash(code), ValidationEntry(*locate_function(code))) for code in codes]
+
+
+def test_index_finds_every_entry(tmp_path):
+    cache_path, index_path = tmp_path / "cache.txt", tmp_path / "index.npy"
+    cache = ValidationCache(cache_path)
+    items = _items(CODES)
+    cache.append_lines(cache.add(items[:100]))
+    # Malformed and duplicate lines between batches are skipped
+    with open(cache_path, "a", encoding="utf-8") as f:
+        f.write("not a cache line\nzzzzzzzzzzzzzzzz 1\n" + encode_entry(*items[0]) + "\n")
+    cache.append_lines(cache.add(items[100:]))
+
+    assert ValidationIndex.build(cache_path, index_path)
+    index = ValidationIndex(cache_path, index_path)
+    assert len(index) == len(items)
+    for key, entry in items:
+        assert index.get(key) == entry
+    assert index.get(compute_hash("def unseen(): pass")) is None
+    assert index.get("not-a-key") is None
+
+
+def test_no_index_without_entries(tmp_path):
+    cache_path, index_path = tmp_path / "cache.txt", tmp_path / "index.npy"
+    assert not ValidationIndex.build(cache_path, index_path)
+    cache_path.write_text(HEADER + "\n", encoding="utf-8")
+    assert not ValidationIndex.build(cache_path, index_path)
+    assert not index_path.exists()
+
+
+def test_file_of_another_version_is_started_over(tmp_path):
+    cache_path, index_path = tmp_path / "cache.txt", tmp_path / "index.npy"
+    key, entry = _items(CODES[:1])[0]
+    cache_path.write_text("# evoselfcode validation cache v1 py2.7\n" + encode_entry(key, entry) + "\n", encoding="utf-8")
+    assert not ValidationIndex.build(cache_path, index_path)
+    assert cache_path.read_text(encoding="utf-8") == ""
+
+
+def test_converter_workers_reuse_and_extend_the_cache(tmp_path):
+    input_path, cache_path = tmp_path / "ratings.jsonl", tmp_path / "cache.txt"
+    with open(input_path, "w", encoding="utf-8") as f:
+        for i, code in enumerate(CODES):
+            f.write(json.dumps({"uid": f"u{i}", "problem_text": "Task", "code": code, "ratings": {}}) + "\n")
+    converter = ChatMLConverter(ConfigManager({
+        "processing": {"num_workers": 2, "chunk_bytes": 4096, "validation_cache": str(cache_path)},
+        "incremental": {"enabled": False},
+    }), logger=logging.getLogger(__name__))
+
+    first = converter.convert_file(input_path, tmp_path / "first.jsonl")
+    lines = cache_path.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == HEADER and len(lines) == len(CODES) + 1
+
+    second = converter.convert_file(input_path, tmp_path / "second.jsonl")
+    assert cache_path.read_text(encoding="utf-8").splitlines() == lines
+    assert first == second and first["converted"] == len(CODES) - 2
+    assert (tmp_path / "first.jsonl").read_bytes() == (tmp_path / "second.jsonl").read_bytes()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cache.txt", "first.jsonl", "ratings.jsonl", "second.jsonl"]